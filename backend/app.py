@@ -4,99 +4,201 @@ Provides endpoints for grocery promotion scraping, recipe generation, and shoppi
 """
 
 import os
+import copy
+import asyncio
 import json
+import hashlib
 import glob
-from datetime import datetime
-from flask import Flask, request, jsonify
+import threading
+from datetime import datetime, timedelta
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
-from openai import OpenAI
-from tinydb import TinyDB, Query
 
-# Import our scraping and analysis modules
-from scripts.discover_flyers import discover_latest_flyers, save_flyer_urls
-from scripts.extract_flyer_urls import extract_all_flyers, save_image_urls
-from scripts.download_all_flyers import download_all_flyers
-from scripts.analyze_all_stores_partial import analyze_all_stores_partial
+# OpenAI, APScheduler and TinyDB are imported where first used, so importing
+# the app stays fast. The scraping stack only runs in the worker (worker.py).
+from scripts.response_parsing import parse_json_response, normalize_recipes
+from scripts.request_metrics import init_request_metrics, timed_operation
+from scripts.instrumentation import record_usage
+from scripts.metrics import render_prometheus
+from scripts.process_lock import acquire_process_lock, release_process_lock
+from scripts.job_runs import JobRuns
+from scripts.async_jobs import AsyncJobRunner
+from scripts.single_flight import SingleFlight
+from scripts.unit_prices import add_unit_prices
+from scripts.discounts import add_discount_savings
+from scripts.store_optimizer import ShoppingListOptimizerError, add_other
+from scripts.quantities import aggregate_amounts, purchase
+from scripts.promotion_store import database_file_id, stored_promotions, write_snapshot
+from scripts.promotion_index import PromotionIndex, PromotionQueryError, parse_query, project, encode_cursor, PROMOTION_FIELDS
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+init_request_metrics(app)
 
 # Configuration
 PROMOTIONS_DIR = "data/promotion_results"
 FLYER_IMAGES_DIR = "data/flyer_images"
 DB_PATH = "data/promotions.json"
-NUM_PAGES_PER_STORE = 2
-EXCLUDE_STORES = ['super-c-direct']  # Old test folder
-
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-# Initialize TinyDB
-db = TinyDB(DB_PATH)
-promotions_table = db.table('promotions')
-scrapes_table = db.table('scrapes')
+SCHEDULER_LOCK_FILE = "data/scheduler.lock"  # Held by the one process running the scheduler
+JOB_RUNS_DB = "data/jobs.sqlite3"  # Job queue shared with the pipeline worker (see scripts/job_runs.py)
+SCRAPE_JOB = "weekly_scrape"
+SCRAPE_WEEKDAY = 0  # Monday
+SCRAPE_HOUR = 1
+SCHEDULER_MISFIRE_GRACE = 6 * 60 * 60  # Run a late weekly scrape up to 6 hours after 1 AM
+
+RECIPE_MODEL = "gpt-3.5-turbo"
+RECIPE_MAX_TOKENS = 4000
+RECIPE_TEMPERATURE = 0.8
+RECIPE_JOB_CONCURRENCY = 200  # Async recipe generations in flight per process
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+MAX_BATCH_LISTS = 1000  # Recipe sets per /api/shopping-lists/batch call
+
+# OpenAI clients and the TinyDB tables are created on first use (see get_openai_client,
+# get_async_openai_client and get_tables). The async client lives on the job event loop.
+openai_client = None
+async_openai_client = None
+db = None
+db_file_id = None  # Identity of the file db was opened on; a published snapshot changes it
+promotions_table = None
+scrapes_table = None
+_init_lock = threading.Lock()
 
 # In-memory storage for generated recipes
 recipes_cache = {}
 recipe_counter = 0
+recipes_lock = threading.Lock()
+
+# Promotion each recipe ingredient is linked to, per recipe ID (see recipe_promotion_links)
+promotion_links = {}
+
+# Recipe generations running on a background event loop (POST /api/recipes/generate with "async": true)
+recipe_jobs = AsyncJobRunner('recipes', max_concurrency=RECIPE_JOB_CONCURRENCY)
+
+# Identical recipe requests made at the same time share one OpenAI call
+recipe_flights = SingleFlight('recipe_generation')
+
+# Lock file held while this process runs the background scheduler
+scheduler_lock = None
+
+# Persisted scrape runs, shared by every process (created on first use, see get_job_runs)
+job_runs = None
+
+
+class ScrapeSkipped(RuntimeError):
+    """Raised when a scrape is not queued because another run is pending or its slot already ran."""
+
+
+# Indexes over the latest promotions, rebuilt when the database changes (see get_promotion_index)
+promotion_index = None
+promotion_index_signature = None
+promotion_index_lock = threading.Lock()
+
+
+def get_openai_client():
+    """Return the OpenAI client, creating it on first use."""
+    global openai_client
+
+    if openai_client is None:
+        with _init_lock:
+            if openai_client is None:
+                from openai import OpenAI
+                openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    return openai_client
 
 
-def run_weekly_scrape_and_analysis():
+def get_tables():
     """
-    Background task that runs weekly to scrape flyers and analyze promotions.
+    Return the (promotions, scrapes) TinyDB tables, opening the database on first use.
+
+    The database is reopened when a published snapshot has replaced the file
+    (see scripts/promotion_store.py). Tables already set on the module (e.g. by
+    tests) are kept.
     """
-    print("\n" + "="*60)
-    print(f"[{datetime.now()}] Running weekly scrape and analysis...")
-    print("="*60)
+    global db, db_file_id, promotions_table, scrapes_table
+
+    if db is not None and database_file_id(DB_PATH) != db_file_id:
+        with _init_lock:
+            if db is not None and database_file_id(DB_PATH) != db_file_id:
+                # The old handle is not closed: threads still reading it see the previous snapshot whole
+                db = promotions_table = scrapes_table = None
+
+    if promotions_table is None or scrapes_table is None:
+        with _init_lock:
+            if promotions_table is None or scrapes_table is None:
+                from tinydb import TinyDB
+                os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+                db = TinyDB(DB_PATH)
+                db_file_id = database_file_id(DB_PATH)
+                promotions_table = db.table('promotions')
+                scrapes_table = db.table('scrapes')
+    return promotions_table, scrapes_table
+
+
+def get_job_runs():
+    """Return the JobRuns store, creating the database on first use."""
+    global job_runs
+
+    if job_runs is None:
+        with _init_lock:
+            if job_runs is None:
+                job_runs = JobRuns(JOB_RUNS_DB)
+    return job_runs
+
+
+def weekly_slot(now=None):
+    """Return the latest weekly scrape time (Monday 1 AM) at or before now."""
+    now = now or datetime.now()
+    slot = now.replace(hour=SCRAPE_HOUR, minute=0, second=0, microsecond=0)
+    slot -= timedelta(days=(now.weekday() - SCRAPE_WEEKDAY) % 7)
+    if slot > now:
+        slot -= timedelta(days=7)
+    return slot
+
+
+def enqueue_scrape(trigger='manual', scheduled_for=None):
+    """
+    Queue a scrape and analysis run for the pipeline worker (worker.py).
 
-    try:
-        # Step 1: Discover latest flyers
-        print("\n[1/4] Discovering latest flyers...")
-        flyers = discover_latest_flyers()
-        flyers_file = save_flyer_urls(flyers)
-        print(f"✓ Found {len(flyers)} flyers")
-
-        # Step 2: Extract image URLs
-        print("\n[2/4] Extracting image URLs...")
-        image_data = extract_all_flyers(flyers_file)
-        urls_file = save_image_urls(image_data)
-        total_images = sum(len(data['image_urls']) for data in image_data.values())
-        print(f"✓ Extracted {total_images} image URLs")
-
-        # Step 3: Download images
-        print("\n[3/4] Downloading flyer images...")
-        stats = download_all_flyers(urls_file, FLYER_IMAGES_DIR)
-        print(f"✓ Downloaded {stats['images_succeeded']}/{stats['total_images']} images")
-
-        # Step 4: Analyze with OpenAI (first 2 pages per store)
-        print("\n[4/4] Analyzing flyers with OpenAI...")
-        results = analyze_all_stores_partial(
-            num_pages=NUM_PAGES_PER_STORE,
-            exclude_stores=EXCLUDE_STORES,
-            flyer_images_dir=FLYER_IMAGES_DIR,
-            output_dir=PROMOTIONS_DIR
-        )
-        total_promotions = sum(r['promotion_count'] for r in results.values())
-        print(f"✓ Extracted {total_promotions} promotions from {len(results)} stores")
+    The API process never runs the pipeline itself: Chromium, flyer images and
+    Vision calls stay in the worker, which publishes the promotions to the
+    database that get_promotion_index() reads.
 
-        # Step 5: Save to database
-        print("\n[5/5] Saving promotions to database...")
-        promotions = load_all_promotions_from_files()
-        save_promotions_to_db(promotions)
-        print(f"✓ Saved {len(promotions)} promotions to database")
+    Args:
+        trigger: What queued it ('cron', 'catch_up' or 'manual')
+        scheduled_for: Weekly slot of a scheduled run (ISO timestamp); a slot runs successfully once
 
-        print("\n" + "="*60)
-        print(f"[{datetime.now()}] Weekly task completed successfully!")
-        print("="*60 + "\n")
+    Returns:
+        The queued run (dict)
 
-    except Exception as e:
-        print(f"\n✗ Error during weekly task: {e}")
-        print("="*60 + "\n")
+    Raises:
+        ScrapeSkipped: If a scrape is already queued or running, or the slot already ran
+    """
+    runs = get_job_runs()
+    run_id = runs.enqueue(SCRAPE_JOB, trigger, scheduled_for)
+    if run_id is None:
+        active = runs.active(SCRAPE_JOB)
+        if active and active['status'] == 'running':
+            started = datetime.fromtimestamp(active['started_at']).isoformat(timespec='seconds')
+            raise ScrapeSkipped(f"A scrape is already running (run {active['id']}, started {started})")
+        if active:
+            raise ScrapeSkipped(f"A scrape is already queued (run {active['id']})")
+        raise ScrapeSkipped(f"The scrape scheduled for {scheduled_for} already ran")
+
+    print(f"[{datetime.now()}] Queued scrape and analysis (run {run_id}, {trigger})")
+    return runs.get(run_id)
+
+
+def scheduled_weekly_scrape(trigger='cron'):
+    """Queue the scrape for the current weekly slot from the scheduler, skipping it if it can't be queued."""
+    try:
+        enqueue_scrape(trigger, weekly_slot().isoformat())
+    except ScrapeSkipped as e:
+        print(f"⚠ Weekly scrape skipped: {e}")
 
 
 def load_all_promotions_from_files():
@@ -118,35 +220,43 @@ def load_all_promotions_from_files():
     return promotions
 
 
+@timed_operation('storage_write')
 def save_promotions_to_db(promotions):
     """
     Save promotions to TinyDB with a timestamp.
     Each scrape is stored as a separate record with all promotions.
+
+    The worker publishes while the API processes read the same file, so the
+    database is never rewritten in place: the new promotions and the scrape
+    history go into a snapshot file that replaces it in one rename (see
+    scripts/promotion_store.py).
     """
     scrape_id = datetime.now().isoformat()
+    _, scrapes_table = get_tables()
 
-    # Clear old promotions
-    promotions_table.truncate()
-
-    # Insert new promotions with scrape_id
-    for promo in promotions:
-        promo_with_id = promo.copy()
-        promo_with_id['scrape_id'] = scrape_id
-        promotions_table.insert(promo_with_id)
+    rows = stored_promotions(promotions, scrape_id)
 
-    # Record the scrape metadata
-    scrapes_table.insert({
+    # Previous scrape records, plus this scrape's metadata
+    scrapes = [dict(scrape) for scrape in scrapes_table.all()]
+    scrapes.append({
         'scrape_id': scrape_id,
         'timestamp': scrape_id,
         'promotion_count': len(promotions)
     })
 
+    write_snapshot(DB_PATH, rows, scrapes)
+    reset_promotion_index()
 
+
+@timed_operation('storage_read')
 def load_all_promotions():
     """
     Load the latest promotions from TinyDB.
     Returns promotions from the most recent scrape only.
     """
+    from tinydb import Query
+    promotions_table, scrapes_table = get_tables()
+
     # Get the latest scrape
     all_scrapes = scrapes_table.all()
 
@@ -169,10 +279,8 @@ def load_all_promotions():
     ]
 
 
-def generate_recipes_with_openai(promotions, num_recipes=5, preferences=None):
-    """Generate recipes using OpenAI based on current promotions."""
-    global recipe_counter
-
+def build_recipe_messages(promotions, num_recipes=5, preferences=None):
+    """Build the chat messages asking OpenAI for recipes based on current promotions."""
     if preferences is None:
         preferences = {}
 
@@ -238,39 +346,137 @@ def generate_recipes_with_openai(promotions, num_recipes=5, preferences=None):
 - Do NOT include any non-food items in recipes
 """
 
-    try:
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a creative meal planning assistant that creates diverse, delicious recipes based on grocery promotions to help users save money while eating well."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=4000,
-            temperature=0.8
-        )
+    return [
+        {"role": "system", "content": "You are a creative meal planning assistant that creates diverse, delicious recipes based on grocery promotions to help users save money while eating well."},
+        {"role": "user", "content": prompt}
+    ]
+
 
-        content = response.choices[0].message.content.strip()
+def recipe_request_key(promotions, num_recipes=5, preferences=None):
+    """
+    Return a key identifying a recipe request, for coalescing identical ones.
+
+    Preferences are normalized (case, whitespace, empty values and key order
+    do not matter) and the promotions are reduced to a digest of their items.
+    """
+    normalized = {}
+    for name, value in (preferences or {}).items():
+        if isinstance(value, str):
+            value = value.strip().lower()
+        if value not in ('', None):
+            normalized[name] = value
 
-        # Extract JSON from markdown code blocks if present
-        if content.startswith("```json"):
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif content.startswith("```"):
-            content = content.split("```")[1].split("```")[0].strip()
+    items = hashlib.sha1("\n".join(p['item'] for p in promotions).encode('utf-8')).hexdigest()
+    return json.dumps([int(num_recipes), normalized, items], sort_keys=True)
 
-        try:
-            recipes = json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
-            print(f"Content received: {content[:500]}...")
-            raise
 
-        # Add IDs to recipes and cache them
+def parse_recipe_response(response):
+    """
+    Parse the complete recipes in an OpenAI response.
+
+    Raises:
+        ValueError: If the response holds no complete recipe
+    """
+    record_usage(RECIPE_MODEL, getattr(response, 'usage', None))
+
+    # Parse JSON, keeping the complete recipes if the response was truncated
+    data, truncated = parse_json_response(response.choices[0].message.content)
+    recipes = normalize_recipes(data)
+
+    if truncated:
+        print(f"⚠ Recipe response was truncated, kept {len(recipes)} complete recipes")
+
+    if not recipes:
+        raise ValueError("No complete recipes in OpenAI response")
+
+    return recipes
+
+
+def cache_recipes(recipes, link=True):
+    """
+    Cache copies of recipes under new IDs (callers sharing a response each get their own).
+
+    Args:
+        recipes: Parsed recipes
+        link: Link the copies to the current promotions now (async callers
+            pass False and link them off the event loop)
+    """
+    global recipe_counter
+
+    recipes = copy.deepcopy(recipes)
+    with recipes_lock:
         for recipe in recipes:
             recipe_counter += 1
             recipe_id = f"recipe_{recipe_counter}"
             recipe['id'] = recipe_id
             recipes_cache[recipe_id] = recipe
 
+    # Resolve ingredients to promotions once, now, rather than on every shopping list
+    if link:
+        link_recipes(recipes)
+    return recipes
+
+
+def generate_recipes_with_openai(promotions, num_recipes=5, preferences=None):
+    """
+    Generate recipes using OpenAI based on current promotions.
+
+    Concurrent identical requests share one OpenAI call (see recipe_request_key);
+    each caller still gets its own recipe IDs.
+    """
+    def request_recipes():
+        response = get_openai_client().chat.completions.create(
+            model=RECIPE_MODEL,
+            messages=build_recipe_messages(promotions, num_recipes, preferences),
+            max_tokens=RECIPE_MAX_TOKENS,
+            temperature=RECIPE_TEMPERATURE
+        )
+        return parse_recipe_response(response)
+
+    try:
+        key = recipe_request_key(promotions, num_recipes, preferences)
+        with timed_operation('llm_call'):
+            recipes = recipe_flights.do(key, request_recipes)
+        return cache_recipes(recipes)
+
+    except Exception as e:
+        print(f"Error generating recipes: {e}")
+        raise
+
+
+def get_async_openai_client():
+    """Return the AsyncOpenAI client, creating it on first use (on the job event loop)."""
+    global async_openai_client
+
+    if async_openai_client is None:
+        from openai import AsyncOpenAI
+        async_openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    return async_openai_client
+
+
+async def generate_recipes_async(promotions, num_recipes=5, preferences=None):
+    """
+    Generate recipes like generate_recipes_with_openai(), awaiting the OpenAI call.
+
+    Runs on the recipe_jobs event loop, so waiting on OpenAI holds no worker thread.
+    Shares in-flight calls with identical sync and async requests.
+    """
+    async def request_recipes():
+        response = await get_async_openai_client().chat.completions.create(
+            model=RECIPE_MODEL,
+            messages=build_recipe_messages(promotions, num_recipes, preferences),
+            max_tokens=RECIPE_MAX_TOKENS,
+            temperature=RECIPE_TEMPERATURE
+        )
+        return parse_recipe_response(response)
+
+    try:
+        key = recipe_request_key(promotions, num_recipes, preferences)
+        with timed_operation('llm_call'):
+            recipes = await recipe_flights.do_async(key, request_recipes)
+        recipes = cache_recipes(recipes, link=False)
+        # Linking may build the promotion index (disk reads, indexing): keep it off the shared event loop
+        await asyncio.to_thread(link_recipes, recipes)
         return recipes
 
     except Exception as e:
@@ -278,6 +484,92 @@ def generate_recipes_with_openai(promotions, num_recipes=5, preferences=None):
         raise
 
 
+def link_recipe_ingredients(recipe, index):
+    """
+    Link each ingredient of a recipe to the first promotion it matches.
+
+    Uses the optimizer's candidate lookups (see StoreOptimizer.candidates for
+    the matching rule).
+
+    Returns:
+        List with, per ingredient, the position of its promotion in
+        index.promotions, or None (not on sale, or no match)
+    """
+    positions = []
+    for ingredient in recipe['ingredients']:
+        position = None
+        if ingredient.get('on_sale', False):
+            candidates = index.store_optimizer.candidates(ingredient['item'].lower())
+            position = candidates[0] if candidates else None
+        positions.append(position)
+    return positions
+
+
+def recipe_promotion_links(recipe, index):
+    """
+    Return a recipe's ingredient -> promotion links for the current promotions.
+
+    Links are stored per recipe ID with the version and scrape_id of the
+    promotions they point into. When a new scrape lands they are recomputed on
+    first use; until then they are reused as they are.
+    """
+    recipe_id = recipe.get('id')
+    link = promotion_links.get(recipe_id)
+    if link is None or link['version'] != index.version:
+        link = {
+            'version': index.version,
+            'scrape_id': index.scrape_timestamp,
+            'positions': link_recipe_ingredients(recipe, index)
+        }
+        if recipe_id is not None:
+            promotion_links[recipe_id] = link
+    return link['positions']
+
+
+def link_recipes(recipes):
+    """Link newly cached recipes to the current promotions (failures only defer linking)."""
+    try:
+        index = get_promotion_index()
+        for recipe in recipes:
+            recipe_promotion_links(recipe, index)
+    except Exception as e:
+        print(f"⚠ Could not link recipes to promotions, linking on first use: {e}")
+
+
+@timed_operation('matching')
+def aggregate_linked_ingredients(recipes, index):
+    """
+    Group recipe ingredients by their linked promotions.
+
+    Uses the stored links instead of matching ingredient names again.
+
+    Returns:
+        Tuple of (promotion_usage, other_ingredients) keyed by lowercase item name
+    """
+    promotion_usage = {}
+    other_ingredients = {}
+
+    for recipe in recipes:
+        positions = recipe_promotion_links(recipe, index)
+        for ingredient, position in zip(recipe['ingredients'], positions):
+            if position is None:
+                add_other(other_ingredients, ingredient['item'], ingredient['amount'])
+                continue
+
+            promo = index.promotions[position]
+            promo_key = promo['item'].lower()
+            if promo_key not in promotion_usage:
+                promotion_usage[promo_key] = {
+                    'promo': promo,
+                    'recipe_names': [],
+                    'suggested_amounts': []
+                }
+            promotion_usage[promo_key]['recipe_names'].append(recipe['name'])
+            promotion_usage[promo_key]['suggested_amounts'].append(ingredient['amount'])
+
+    return promotion_usage, other_ingredients
+
+
 # ============================================================================
 # API ENDPOINTS
 # ============================================================================
@@ -291,49 +583,188 @@ def health_check():
     })
 
 
-@app.route('/api/promotions', methods=['GET'])
-def get_promotions():
-    """Get all current promotions (from latest scrape only)."""
-    try:
-        promotions = load_all_promotions()
+def promotions_signature():
+    """Return what identifies the stored promotions: size and mtime of the database and results folder."""
+    signature = []
+    for path in (DB_PATH, PROMOTIONS_DIR):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def get_promotion_index():
+    """
+    Return the PromotionIndex of the latest scrape, rebuilding it if the promotions changed.
+
+    The database file is checked on every call, so a scrape saved by another
+    process (the scheduler or a worker) is picked up on the next request.
+    """
+    global promotion_index, promotion_index_signature
+
+    signature = promotions_signature()
+    index = promotion_index
+    if index is not None and promotion_index_signature == signature:
+        return index
+
+    with promotion_index_lock:
+        if promotion_index is not None and promotion_index_signature == signature:
+            return promotion_index
+
+        # Promotions saved before unit prices and savings were stored get them here
+        promotions = add_discount_savings(add_unit_prices(load_all_promotions()))
 
         # Get the latest scrape timestamp
-        all_scrapes = scrapes_table.all()
+        with timed_operation('storage_read'):
+            all_scrapes = get_tables()[1].all()
         scrape_timestamp = None
         if all_scrapes:
             latest_scrape = max(all_scrapes, key=lambda x: x['timestamp'])
             scrape_timestamp = latest_scrape['timestamp']
 
-        return jsonify({
-            "promotions": promotions,
+        with timed_operation('promotion_index_build'):
+            promotion_index = PromotionIndex(promotions, scrape_timestamp)
+        promotion_index_signature = signature
+        return promotion_index
+
+
+def reset_promotion_index():
+    """Drop the cached PromotionIndex, and the recipe links into it, so the next request rebuilds them."""
+    global promotion_index, promotion_index_signature
+
+    with promotion_index_lock:
+        promotion_index = None
+        promotion_index_signature = None
+        promotion_links.clear()
+
+
+@app.route('/api/promotions', methods=['GET'])
+def get_promotions():
+    """
+    Get current promotions (from latest scrape only).
+
+    Query parameters (all optional): store (comma-separated), min_price, max_price,
+    q (item words or word prefixes), sort (position, item, price, store; prefix
+    with - to reverse), limit and cursor for pagination, fields (comma-separated).
+    """
+    try:
+        index = get_promotion_index()
+        try:
+            query, fields = parse_query(request.args, index)
+        except PromotionQueryError as e:
+            return jsonify({"error": str(e)}), 400
+
+        with timed_operation('promotion_query'):
+            promotions, after = index.query(**query)
+
+        response = {
+            "promotions": project(promotions, fields),
             "count": len(promotions),
-            "scrape_timestamp": scrape_timestamp,
+            "scrape_timestamp": index.scrape_timestamp,
             "last_updated": datetime.now().isoformat()
+        }
+        if query['limit'] is not None:
+            response["next_cursor"] = (
+                encode_cursor(index.version, query['sort'], query['descending'], after)
+                if after is not None else None
+            )
+        return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/promotions/search', methods=['GET'])
+def search_promotions():
+    """
+    Ranked search over current promotions by item name, store and unit.
+
+    Query parameters: q (required), limit (default 20, max 100), fields (comma-separated).
+    Query words match whole words, word prefixes or words with a typo or two.
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+
+    try:
+        limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {SEARCH_MAX_LIMIT}"}), 400
+
+    fields = None
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in PROMOTION_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    try:
+        index = get_promotion_index()
+        with timed_operation('promotion_search'):
+            matches = index.search_index.search(query, limit)
+
+        promotions = project([index.promotions[position] for position, _ in matches], fields)
+        results = [dict(promo, score=score) for promo, (_, score) in zip(promotions, matches)]
+
+        return jsonify({
+            "query": query,
+            "results": results,
+            "count": len(results),
+            "scrape_timestamp": index.scrape_timestamp
         })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Request latency, operation timing and token metrics of this API process in Prometheus text format.
+
+    Pipeline metrics are recorded by the worker process (worker.py), which writes
+    them to data/promotion_results/_metrics.prom after each run.
+    """
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+def format_run(run):
+    """Return a job run with its timestamps as ISO strings."""
+    run = dict(run)
+    for field in ('queued_at', 'started_at', 'heartbeat_at', 'finished_at'):
+        if run[field] is not None:
+            run[field] = datetime.fromtimestamp(run[field]).isoformat()
+    return run
+
+
 @app.route('/api/scrape', methods=['POST'])
 def trigger_scrape():
     """
     Manually trigger the scraping and analysis pipeline.
-    This runs the same process as the weekly background task.
+
+    The run is queued for the pipeline worker, the same as the weekly background
+    task. Poll /api/scrape/runs/<run_id> for its status; GET /api/promotions
+    returns the new promotions once it succeeded.
     """
     try:
-        # Run scraping and analysis in foreground
-        run_weekly_scrape_and_analysis()
+        run = enqueue_scrape('manual')
 
-        # Load and return the promotions
-        promotions = load_all_promotions()
+        return jsonify({
+            "status": "queued",
+            "message": "Scraping and analysis queued",
+            "run": format_run(run),
+            "status_url": f"/api/scrape/runs/{run['id']}"
+        }), 202
 
+    except ScrapeSkipped as e:
         return jsonify({
-            "status": "success",
-            "message": "Scraping and analysis completed",
-            "promotions": promotions,
-            "count": len(promotions)
-        })
+            "status": "error",
+            "message": str(e)
+        }), 409
 
     except Exception as e:
         return jsonify({
@@ -342,6 +773,22 @@ def trigger_scrape():
         }), 500
 
 
+@app.route('/api/scrape/runs', methods=['GET'])
+def get_scrape_runs():
+    """List the latest scrape runs (scheduled and manual), queued to or run by any worker."""
+    runs = [format_run(run) for run in get_job_runs().recent(SCRAPE_JOB, limit=20)]
+    return jsonify({"runs": runs, "count": len(runs)})
+
+
+@app.route('/api/scrape/runs/<int:run_id>', methods=['GET'])
+def get_scrape_run(run_id):
+    """Status of one scrape run."""
+    run = get_job_runs().get(run_id)
+    if run is None or run['job'] != SCRAPE_JOB:
+        return jsonify({"error": f"Scrape run not found: {run_id}"}), 404
+    return jsonify(format_run(run))
+
+
 @app.route('/api/recipes/generate', methods=['POST'])
 def generate_recipes():
     """
@@ -353,8 +800,12 @@ def generate_recipes():
       "preferences": {
         "dietary": "vegetarian",  // optional
         "servings": 4             // optional
-      }
+      },
+      "async": true               // optional: return 202 with a job to poll
     }
+
+    With "async": true the OpenAI call runs on a background event loop instead
+    of holding this worker thread; poll GET /api/recipes/jobs/<job_id>.
     """
     try:
         data = request.get_json()
@@ -371,6 +822,14 @@ def generate_recipes():
                 "error": "No promotions available. Run /api/scrape first."
             }), 400
 
+        if data.get('async'):
+            job_id = recipe_jobs.submit(generate_recipes_async, promotions, num_recipes, preferences)
+            return jsonify({
+                "job_id": job_id,
+                "status": "pending",
+                "status_url": f"/api/recipes/jobs/{job_id}"
+            }), 202
+
         # Generate recipes using OpenAI
         recipes = generate_recipes_with_openai(promotions, num_recipes, preferences)
 
@@ -385,6 +844,133 @@ def generate_recipes():
         }), 500
 
 
+@app.route('/api/recipes/jobs/<job_id>', methods=['GET'])
+def get_recipe_job(job_id):
+    """
+    Get the status of an async recipe generation.
+
+    Returns the recipes once the job is done, or the error if it failed.
+    """
+    job = recipe_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown or expired job: {job_id}"}), 404
+
+    body = {"job_id": job_id, "status": job['status']}
+    if job['status'] == 'done':
+        body['recipes'] = job['result']
+        body['count'] = len(job['result'])
+    elif job['status'] == 'error':
+        body['error'] = job['error']
+
+    return jsonify(body)
+
+
+def build_shopping_list(selected_recipes, index, optimize=False, max_stores=None):
+    """
+    Build a promotion-centric shopping list for a set of recipes.
+
+    Args:
+        selected_recipes: Recipes to shop for
+        index: Current PromotionIndex
+        optimize: Pick the cheapest promotion per ingredient across stores
+        max_stores: With optimize, visit at most this many stores (None for no limit)
+
+    Returns:
+        Dict with shopping_list, total_cost, estimated_savings (and stores with optimize)
+
+    Raises:
+        ShoppingListOptimizerError: If max_stores is invalid
+    """
+    # Match recipe ingredients to promotions
+    stores = None
+    if optimize:
+        # Cheapest matching promotion per ingredient within at most max_stores stores
+        with timed_operation('matching'):
+            promotion_usage, other_ingredients, stores = index.store_optimizer.optimize(
+                selected_recipes, max_stores
+            )
+    else:
+        # Promotions were linked to the ingredients when the recipes were generated
+        promotion_usage, other_ingredients = aggregate_linked_ingredients(selected_recipes, index)
+
+    # Build the shopping list with promotional items
+    shopping_list = []
+    total_cost = 0.0
+    estimated_savings = 0.0
+    item_counter = 1
+
+    # Add promotional items
+    for promo_key, usage_data in promotion_usage.items():
+        promo = usage_data['promo']
+        recipe_count = len(usage_data['recipe_names'])
+
+        # Add up what the recipes need and buy enough packages (see scripts/quantities.py)
+        totals, amount = aggregate_amounts(usage_data['suggested_amounts'])
+        bought = purchase(promo, totals)
+
+        # Savings were parsed from the discount text at ingest (see scripts/discounts.py)
+        price_per_unit = promo['price']
+        original_price = promo.get('original_price')
+        estimated_savings += (promo.get('savings_amount') or 0.0) * bought['packages']
+
+        list_item = {
+            'id': f'promo_{item_counter}',
+            'item': promo['item'],
+            'is_promotion': True,
+            'price': bought['cost'],  # Line total: packages x price_per_unit
+            'price_per_unit': price_per_unit,
+            'original_price': original_price,
+            'unit': promo.get('unit', 'each'),
+            'store': promo.get('store', 'Unknown'),
+            'discount': promo.get('discount', ''),
+            'quantity': promo.get('quantity'),
+            'base_unit': promo.get('base_unit'),
+            'unit_price': promo.get('unit_price'),
+            'savings_amount': promo.get('savings_amount'),
+            'savings_pct': promo.get('savings_pct'),
+            'on_sale': True,
+            'recipes_using': recipe_count,
+            'recipe_names': usage_data['recipe_names'],
+            'amount': amount,  # Total needed by the recipes
+            'needed_quantity': bought['needed_quantity'],
+            'needed_unit': bought['needed_unit'],
+            'packages': bought['packages']
+        }
+        if 'alternatives' in usage_data:
+            # Cheapest matching promotion in each other store, for comparison
+            list_item['alternatives'] = usage_data['alternatives']
+        shopping_list.append(list_item)
+
+        total_cost += bought['cost']
+        item_counter += 1
+
+    # Add other (non-promotional) ingredients
+    for item_lower, item_data in other_ingredients.items():
+        amounts = item_data['amounts']
+        _, combined_amount = aggregate_amounts(amounts)
+
+        shopping_list.append({
+            'id': f'item_{item_counter}',
+            'item': item_data['item'],
+            'is_promotion': False,
+            'amount': combined_amount,
+            'on_sale': False,
+            'price': None,  # No price for non-promotional items
+            'recipes_using': len(amounts)
+        })
+
+        item_counter += 1
+
+    result = {
+        "shopping_list": shopping_list,
+        "total_cost": round(total_cost, 2),
+        "estimated_savings": round(estimated_savings, 2)
+    }
+    if stores is not None:
+        result["stores"] = stores
+    return result
+
+
 @app.route('/api/shopping-list', methods=['POST'])
 def create_shopping_list():
     """
@@ -392,7 +978,9 @@ def create_shopping_list():
 
     Request body:
     {
-      "recipe_ids": ["recipe_1", "recipe_3"]
+      "recipe_ids": ["recipe_1", "recipe_3"],
+      "optimize": false,  // optional: cheapest promotion per ingredient across stores
+      "max_stores": 2     // optional with optimize: visit at most this many stores
     }
 
     Returns a list of actual promotional items to buy, not aggregated ingredients.
@@ -405,6 +993,16 @@ def create_shopping_list():
             return jsonify({
                 "error": "No recipe IDs provided"
             }), 400
+        if not isinstance(recipe_ids, list) or not all(isinstance(recipe_id, str) for recipe_id in recipe_ids):
+            return jsonify({
+                "error": "recipe_ids must be a list of recipe ID strings"
+            }), 400
+
+        optimize = data.get('optimize', False)
+        if not isinstance(optimize, bool):
+            return jsonify({
+                "error": "optimize must be true or false"
+            }), 400
 
         # Get recipes from cache
         selected_recipes = []
@@ -416,151 +1014,17 @@ def create_shopping_list():
                     "error": f"Recipe {recipe_id} not found. Generate recipes first."
                 }), 404
 
-        # Load promotions
-        promotions = load_all_promotions()
+        # Current promotions, with unit prices and savings computed at ingest
+        index = get_promotion_index()
 
-        # Build a map to track which promotions are used and by how many recipes
-        promotion_usage = {}  # promotion_item_lower -> {promo, recipe_names, suggested_amounts}
-
-        # Track non-promotional ingredients separately
-        other_ingredients = {}  # item_lower -> {amounts, on_sale}
-
-        # Process each recipe
-        for recipe in selected_recipes:
-            recipe_name = recipe['name']
-
-            for ingredient in recipe['ingredients']:
-                item_name = ingredient['item']
-                item_lower = item_name.lower()
-                amount = ingredient['amount']
-                on_sale = ingredient.get('on_sale', False)
-
-                # Try to match to a promotion if marked as on_sale
-                if on_sale:
-                    matching_promo = None
-
-                    # Find matching promotion with fuzzy matching
-                    for promo in promotions:
-                        promo_item_lower = promo['item'].lower()
-
-                        # Check if ingredient name contains promo name or vice versa
-                        # or if key words match (e.g., "chicken" in both)
-                        if (promo_item_lower in item_lower or
-                            item_lower in promo_item_lower or
-                            any(word in promo_item_lower for word in item_lower.split() if len(word) > 4)):
-                            matching_promo = promo
-                            break
-
-                    if matching_promo:
-                        promo_key = matching_promo['item'].lower()
-
-                        if promo_key not in promotion_usage:
-                            promotion_usage[promo_key] = {
-                                'promo': matching_promo,
-                                'recipe_names': [],
-                                'suggested_amounts': []
-                            }
-
-                        promotion_usage[promo_key]['recipe_names'].append(recipe_name)
-                        promotion_usage[promo_key]['suggested_amounts'].append(amount)
-                    else:
-                        # Marked as on_sale but no matching promotion found - treat as other ingredient
-                        if item_lower not in other_ingredients:
-                            other_ingredients[item_lower] = {
-                                'item': item_name,
-                                'amounts': [],
-                                'on_sale': False
-                            }
-                        other_ingredients[item_lower]['amounts'].append(amount)
-                else:
-                    # Not on sale - add to other ingredients
-                    if item_lower not in other_ingredients:
-                        other_ingredients[item_lower] = {
-                            'item': item_name,
-                            'amounts': [],
-                            'on_sale': False
-                        }
-                    other_ingredients[item_lower]['amounts'].append(amount)
-
-        # Build the shopping list with promotional items
-        shopping_list = []
-        total_cost = 0.0
-        estimated_savings = 0.0
-        item_counter = 1
-
-        # Add promotional items
-        for promo_key, usage_data in promotion_usage.items():
-            promo = usage_data['promo']
-            recipe_count = len(usage_data['recipe_names'])
-            suggested_amounts = usage_data['suggested_amounts']
-
-            # Calculate unit price
-            price_per_unit = promo['price']
-            original_price = None
-
-            # Try to extract discount amount to calculate original price
-            if promo.get('discount'):
-                discount_text = promo['discount']
-                # Parse discount like "Save $8"
-                if 'Save $' in discount_text or 'Save$' in discount_text:
-                    try:
-                        saved_amount = float(discount_text.replace('Save', '').replace('$', '').strip())
-                        original_price = price_per_unit + saved_amount
-                        estimated_savings += saved_amount
-                    except:
-                        # Estimate 30% savings if we can't parse
-                        original_price = price_per_unit / 0.7
-                        estimated_savings += price_per_unit * 0.3
-                else:
-                    # Estimate 30% savings
-                    original_price = price_per_unit / 0.7
-                    estimated_savings += price_per_unit * 0.3
-            else:
-                # Estimate 30% savings if no discount info
-                original_price = price_per_unit / 0.7
-                estimated_savings += price_per_unit * 0.3
-
-            shopping_list.append({
-                'id': f'promo_{item_counter}',
-                'item': promo['item'],
-                'is_promotion': True,
-                'price': price_per_unit,
-                'price_per_unit': price_per_unit,
-                'original_price': original_price,
-                'unit': promo.get('unit', 'each'),
-                'store': promo.get('store', 'Unknown'),
-                'discount': promo.get('discount', ''),
-                'on_sale': True,
-                'recipes_using': recipe_count,
-                'recipe_names': usage_data['recipe_names'],
-                'amount': ', '.join(suggested_amounts)  # Show suggested amounts from recipes
-            })
-
-            total_cost += price_per_unit
-            item_counter += 1
-
-        # Add other (non-promotional) ingredients
-        for item_lower, item_data in other_ingredients.items():
-            amounts = item_data['amounts']
-            combined_amount = ', '.join(amounts)
-
-            shopping_list.append({
-                'id': f'item_{item_counter}',
-                'item': item_data['item'],
-                'is_promotion': False,
-                'amount': combined_amount,
-                'on_sale': False,
-                'price': None,  # No price for non-promotional items
-                'recipes_using': len(amounts)
-            })
-
-            item_counter += 1
+        try:
+            result = build_shopping_list(
+                selected_recipes, index, optimize, data.get('max_stores')
+            )
+        except ShoppingListOptimizerError as e:
+            return jsonify({"error": str(e)}), 400
 
-        return jsonify({
-            "shopping_list": shopping_list,
-            "total_cost": round(total_cost, 2),
-            "estimated_savings": round(estimated_savings, 2)
-        })
+        return jsonify(result)
 
     except Exception as e:
         return jsonify({
@@ -568,28 +1032,163 @@ def create_shopping_list():
         }), 500
 
 
+@app.route('/api/shopping-lists/batch', methods=['POST'])
+def create_shopping_lists_batch():
+    """
+    Create shopping lists for many recipe sets (e.g. one per household) in one call.
+
+    Request body:
+    {
+      "lists": [
+        {"id": "household_1", "recipe_ids": ["recipe_1", "recipe_3"]},
+        {"id": "household_2", "recipe_ids": ["recipe_2"], "optimize": true, "max_stores": 1}
+      ],
+      "optimize": false,  // optional default for every list
+      "max_stores": null  // optional default for every list
+    }
+
+    Streams one JSON line per list, in request order (application/x-ndjson): the
+    create_shopping_list() response plus "id", or "id", "error" and "status"
+    for a list that failed. Promotions are loaded once for the whole batch and
+    each distinct recipe is linked to them at most once.
+    """
+    data = request.get_json(silent=True) or {}
+    lists = data.get('lists')
+
+    if not isinstance(lists, list) or not lists:
+        return jsonify({"error": "No lists provided"}), 400
+    if len(lists) > MAX_BATCH_LISTS:
+        return jsonify({"error": f"At most {MAX_BATCH_LISTS} lists per batch"}), 400
+    if not all(isinstance(entry, dict) for entry in lists):
+        return jsonify({"error": "Each list must be an object with recipe_ids"}), 400
+
+    default_optimize = data.get('optimize', False)
+    if not isinstance(default_optimize, bool):
+        return jsonify({"error": "optimize must be true or false"}), 400
+    default_max_stores = data.get('max_stores')
+
+    try:
+        # One promotion snapshot for the whole batch
+        index = get_promotion_index()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        for position, entry in enumerate(lists):
+            list_id = entry.get('id', position)
+            recipe_ids = entry.get('recipe_ids')
+            optimize = entry.get('optimize', default_optimize)
+
+            if not isinstance(recipe_ids, list) or not recipe_ids:
+                line = {"id": list_id, "error": "No recipe IDs provided", "status": 400}
+            elif not all(isinstance(recipe_id, str) for recipe_id in recipe_ids):
+                line = {"id": list_id, "error": "recipe_ids must be a list of recipe ID strings", "status": 400}
+            elif not isinstance(optimize, bool):
+                line = {"id": list_id, "error": "optimize must be true or false", "status": 400}
+            else:
+                missing = [recipe_id for recipe_id in recipe_ids if recipe_id not in recipes_cache]
+                if missing:
+                    line = {
+                        "id": list_id,
+                        "error": f"Recipe {missing[0]} not found. Generate recipes first.",
+                        "status": 404
+                    }
+                else:
+                    try:
+                        line = dict(id=list_id, **build_shopping_list(
+                            [recipes_cache[recipe_id] for recipe_id in recipe_ids],
+                            index,
+                            optimize,
+                            entry.get('max_stores', default_max_stores)
+                        ))
+                    except ShoppingListOptimizerError as e:
+                        line = {"id": list_id, "error": str(e), "status": 400}
+                    except Exception as e:
+                        line = {"id": list_id, "error": str(e), "status": 500}
+
+            yield json.dumps(line) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 # ============================================================================
 # SCHEDULER SETUP
 # ============================================================================
 
-def initialize_scheduler():
-    """Initialize and start the background scheduler for weekly tasks."""
-    scheduler = BackgroundScheduler()
+def initialize_scheduler(lock_path=SCHEDULER_LOCK_FILE):
+    """
+    Initialize and start the background scheduler for weekly tasks.
+
+    Only one process on the host runs the scheduler. Under gunicorn every worker
+    calls this on boot; the first one to take the lock at lock_path runs the
+    weekly job, and a replacement worker takes over if that worker exits.
+
+    The weekly job only queues the scrape for the pipeline worker (worker.py).
+    It never fires twice at once (max_instances=1), missed runs collapse into
+    one (coalesce) and a run up to SCHEDULER_MISFIRE_GRACE late still happens.
+    If this week's scrape was missed while no scheduler was running, it is
+    queued now. The queue holds one scrape at a time, so it can't overlap a
+    manual /api/scrape from another process.
+
+    Returns:
+        The started scheduler, or None if another process already runs it
+    """
+    global scheduler_lock
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    lock = acquire_process_lock(lock_path)
+    if lock is None:
+        print(f"Background scheduler runs in another process (lock: {lock_path})")
+        return None
+
+    scheduler_lock = lock
+    scheduler = BackgroundScheduler(job_defaults={
+        'max_instances': 1,
+        'coalesce': True,
+        'misfire_grace_time': SCHEDULER_MISFIRE_GRACE
+    })
 
     # Schedule weekly task (every Monday at 1 AM)
     scheduler.add_job(
-        func=run_weekly_scrape_and_analysis,
+        func=scheduled_weekly_scrape,
         trigger="cron",
-        day_of_week="mon",
-        hour=1,
+        day_of_week=SCRAPE_WEEKDAY,
+        hour=SCRAPE_HOUR,
         minute=0,
-        id="weekly_scrape",
+        id=SCRAPE_JOB,
         name="Weekly flyer scrape and analysis",
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=SCHEDULER_MISFIRE_GRACE,
         replace_existing=True
     )
 
+    # Catch up on this week's scrape if it was missed within the grace period
+    slot = weekly_slot()
+    missed = (datetime.now() - slot).total_seconds() <= SCHEDULER_MISFIRE_GRACE
+    if missed and not get_job_runs().succeeded(SCRAPE_JOB, slot.isoformat()):
+        print(f"⚠ Scrape scheduled for {slot} did not run, queueing it now")
+        scheduler.add_job(
+            func=scheduled_weekly_scrape,
+            args=['catch_up'],
+            id=f"{SCRAPE_JOB}_catch_up",
+            name="Missed weekly flyer scrape",
+            replace_existing=True
+        )
+
     scheduler.start()
-    print("✓ Background scheduler started (weekly task: Mondays at 1 AM)")
+    print(f"✓ Background scheduler started in process {os.getpid()} (weekly task: Mondays at 1 AM)")
+    return scheduler
+
+
+def shutdown_scheduler(scheduler):
+    """Stop the scheduler without waiting for a running job and release its lock."""
+    global scheduler_lock
+
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=False)
+    release_process_lock(scheduler_lock)
+    scheduler_lock = None
 
 
 # ============================================================================
@@ -609,12 +1208,25 @@ if __name__ == '__main__':
     initialize_scheduler()
 
     print(f"\nAPI Endpoints:")
-    print(f"  GET  /api/health              - Health check")
-    print(f"  GET  /api/promotions          - Get current promotions")
-    print(f"  POST /api/scrape              - Trigger scraping & analysis")
-    print(f"  POST /api/recipes/generate    - Generate recipes")
-    print(f"  POST /api/shopping-list       - Create shopping list")
-    print("\n" + "="*60 + "\n")
-
-    # Run Flask app
-    app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
+    print(f"  GET  /api/health               - Health check")
+    print(f"  GET  /api/promotions           - Get current promotions")
+    print(f"  GET  /api/promotions/search    - Search promotions")
+    print(f"  GET  /api/metrics              - Prometheus metrics")
+    print(f"  POST /api/scrape               - Queue scraping & analysis")
+    print(f"  GET  /api/scrape/runs          - Scrape run history")
+    print(f"  GET  /api/scrape/runs/<id>     - Scrape run status")
+    print(f"  POST /api/recipes/generate     - Generate recipes")
+    print(f"  GET  /api/recipes/jobs/<id>    - Async recipe generation status")
+    print(f"  POST /api/shopping-list        - Create shopping list")
+    print(f"  POST /api/shopping-lists/batch - Create shopping lists in batch")
+    print("\nDevelopment server. In production run: gunicorn -c gunicorn.conf.py")
+    print("="*60 + "\n")
+
+    # Run Flask's development server (set FLASK_DEBUG=1 for the debugger)
+    app.run(
+        debug=os.getenv('FLASK_DEBUG') == '1',
+        host='0.0.0.0',
+        port=int(os.getenv('PORT', '5000')),
+        threaded=True,
+        use_reloader=False
+    )
@@ -0,0 +1,256 @@
+"""
+Benchmark the API hot paths on synthetic promotion sets.
+
+Measures, for 200 / 2k / 20k / 200k promotions:
+- save_promotions_to_db: weekly write of a full scrape into TinyDB
+- load_all_promotions:   read of the latest scrape from TinyDB
+- get_promotions:        GET /api/promotions (every promotion, JSON serialization)
+- promotions_page:       GET /api/promotions filtered by store, price and text, one 50-item page
+- search_promotions:     ranked search index lookups (exact, prefix, typo and multi-word queries)
+- match_ingredients:     recipe ingredient → promotion matching
+- shopping_list:         POST /api/shopping-list (load + matching + pricing)
+- optimize_stores:       cross-store optimizer, cold candidate cache, at most 2 stores
+- shopping_list_batch:   POST /api/shopping-lists/batch with 100 lists of 3 recipes
+
+Each case runs against a temporary TinyDB, never data/promotions.json. Sizes
+whose projected time exceeds --budget are skipped (the projection assumes
+linear scaling, so it never skips too eagerly).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --sizes 200 2000 --save-baseline
+    python -m benchmarks.bench_api --compare          # exit 1 on >25% regressions
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+from unittest.mock import patch
+from scripts.promotion_store import write_snapshot
+import app as app_module
+from benchmarks.harness import (
+    case_key, compare_to_baseline, load_baseline, measure,
+    print_results, projected_seconds, save_baseline
+)
+from benchmarks.synthetic_data import make_promotions, make_recipes
+
+BASELINE_NAME = 'bench_api'
+DEFAULT_SIZES = [200, 2000, 20000, 200000]
+
+
+class TempDatabase:
+    """A throwaway TinyDB file swapped in for the app's database."""
+
+    def __init__(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'promotions.json')
+        self.patches = [
+            patch.object(app_module, 'DB_PATH', self.path),
+            patch.object(app_module, 'db', None),
+            patch.object(app_module, 'promotions_table', None),
+            patch.object(app_module, 'scrapes_table', None)
+        ]
+
+    def seed(self, promotions, scrape_id='2025-01-06T01:00:00'):
+        """Store promotions as one scrape, without the enrichment save_promotions_to_db does."""
+        write_snapshot(self.path, [dict(p, scrape_id=scrape_id) for p in promotions],
+                       [{'scrape_id': scrape_id, 'timestamp': scrape_id, 'promotion_count': len(promotions)}])
+
+    def __enter__(self):
+        for p in self.patches:
+            p.start()
+        app_module.reset_promotion_index()
+        return self
+
+    def __exit__(self, *exc_info):
+        if app_module.db is not None:
+            app_module.db.close()
+        for p in reversed(self.patches):
+            p.stop()
+        app_module.reset_promotion_index()
+        self.directory.cleanup()
+
+
+def bench_save(promotions, recipes, repeat):
+    with TempDatabase():
+        return measure(lambda: app_module.save_promotions_to_db(promotions), repeat=repeat)
+
+
+def bench_load(promotions, recipes, repeat):
+    with TempDatabase() as db:
+        db.seed(promotions)
+        return measure(app_module.load_all_promotions, repeat=repeat)
+
+
+def bench_get_promotions(promotions, recipes, repeat):
+    client = app_module.app.test_client()
+
+    def request():
+        response = client.get('/api/promotions')
+        assert response.status_code == 200, response.status_code
+
+    with TempDatabase() as db:
+        db.seed(promotions)
+        return measure(request, repeat=repeat)
+
+
+def bench_promotions_page(promotions, recipes, repeat):
+    client = app_module.app.test_client()
+    url = '/api/promotions?store=metro,maxi&max_price=10&q=chick&sort=price&limit=50&fields=item,price,store'
+
+    def request():
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+
+    with TempDatabase() as db:
+        db.seed(promotions)
+        request()  # Build the index once, as the first request after a scrape does
+        return measure(request, repeat=repeat)
+
+
+SEARCH_QUERIES = ['chicken', 'chick', 'chiken', 'mozarella', 'organic chicken metro', 'great value milk']
+
+
+def bench_search(promotions, recipes, repeat):
+    """Time one uncached pass over SEARCH_QUERIES (the per-index query cache is cleared each time)."""
+    search_index = app_module.PromotionIndex(promotions).search_index
+
+    def search_all():
+        search_index._cache.clear()
+        for query in SEARCH_QUERIES:
+            search_index.search(query, 20)
+
+    return measure(search_all, repeat=repeat)
+
+
+def bench_match(promotions, recipes, repeat):
+    """Time linking recipes to promotions from scratch and grouping them by promotion."""
+    index = app_module.PromotionIndex(promotions)
+
+    def match():
+        app_module.promotion_links.clear()
+        app_module.aggregate_linked_ingredients(recipes, index)
+
+    return measure(match, repeat=repeat)
+
+
+def bench_shopping_list(promotions, recipes, repeat):
+    client = app_module.app.test_client()
+    recipe_ids = [recipe['id'] for recipe in recipes]
+
+    def request():
+        response = client.post('/api/shopping-list', json={'recipe_ids': recipe_ids})
+        assert response.status_code == 200, response.status_code
+
+    with TempDatabase() as db, patch.dict(app_module.recipes_cache, {r['id']: r for r in recipes}):
+        db.seed(promotions)
+        return measure(request, repeat=repeat)
+
+
+def bench_shopping_list_batch(promotions, recipes, repeat):
+    client = app_module.app.test_client()
+    recipe_ids = [recipe['id'] for recipe in recipes]
+    lists = [{'recipe_ids': [recipe_ids[(i + k) % len(recipe_ids)] for k in range(3)]} for i in range(100)]
+
+    def request():
+        response = client.post('/api/shopping-lists/batch', json={'lists': lists})
+        assert response.status_code == 200, response.status_code
+        assert len(response.data.splitlines()) == len(lists)
+
+    with TempDatabase() as db, patch.dict(app_module.recipes_cache, {r['id']: r for r in recipes}):
+        db.seed(promotions)
+        return measure(request, repeat=repeat)
+
+
+def bench_optimize(promotions, recipes, repeat):
+    """Time the optimizer with its per-ingredient candidate cache cleared each run."""
+    optimizer = app_module.PromotionIndex(promotions).store_optimizer
+
+    def optimize():
+        optimizer.candidate_cache.clear()
+        optimizer.optimize(recipes, max_stores=2)
+
+    return measure(optimize, repeat=repeat)
+
+
+BENCHMARKS = {
+    'save_promotions_to_db': bench_save,
+    'load_all_promotions': bench_load,
+    'get_promotions': bench_get_promotions,
+    'promotions_page': bench_promotions_page,
+    'search_promotions': bench_search,
+    'match_ingredients': bench_match,
+    'shopping_list': bench_shopping_list,
+    'optimize_stores': bench_optimize,
+    'shopping_list_batch': bench_shopping_list_batch
+}
+
+
+def run(sizes, names, repeat, budget, num_recipes):
+    results = {}
+    recipes = make_recipes(num_recipes)
+
+    for name in names:
+        previous = None
+        for size in sizes:
+            key = case_key(name, size)
+            if previous is not None:
+                projection = projected_seconds(previous[0], previous[1], size) * repeat
+                if projection > budget:
+                    results[key] = {'median': None, 'skipped': f"projected ≥ {projection:.0f}s > budget {budget:.0f}s"}
+                    continue
+
+            promotions = make_promotions(size)
+            result = BENCHMARKS[name](promotions, recipes, repeat)
+            results[key] = result
+            previous = (size, result['median'])
+            print(f"  ✓ {key}: {result['median'] * 1000:.1f} ms")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API hot paths on synthetic promotions")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Promotion counts (default: 200 2000 20000 200000)')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS), help='Benchmarks to run')
+    parser.add_argument('--recipes', type=int, default=5, help='Recipes on the shopping list (default: 5)')
+    parser.add_argument('--repeat', type=int, default=5, help='Minimum runs per case (default: 5)')
+    parser.add_argument('--budget', type=float, default=60, help='Skip cases projected to take longer, in seconds (default: 60)')
+    parser.add_argument('--save-baseline', action='store_true', help='Save these results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='Exit with status 1 if a case regressed against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown for --compare (default: 0.25)')
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"API benchmark: sizes {', '.join(map(str, args.sizes))}, {args.recipes} recipes")
+    print("="*60)
+
+    results = run(args.sizes, args.only, args.repeat, args.budget, args.recipes)
+    baseline = load_baseline(BASELINE_NAME)
+
+    print("\nResults (median per call):")
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        path = save_baseline(BASELINE_NAME, results)
+        print(f"\n✓ Baseline saved to {path}")
+
+    if args.compare:
+        if not baseline:
+            print("\n⚠ No baseline to compare against (run with --save-baseline first)")
+            return 0
+
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for key, before, after in regressions:
+                print(f"  - {key}: {before * 1000:.1f} ms → {after * 1000:.1f} ms")
+            return 1
+        print(f"\n✓ No regressions beyond {args.tolerance:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
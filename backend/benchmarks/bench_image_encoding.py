@@ -0,0 +1,139 @@
+"""
+Benchmark memory use of flyer image base64 encoding.
+
+Each encoder runs in a fresh subprocess so the peak RSS it reports is not
+polluted by earlier runs. Use the per-call overhead to size analysis concurrency.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_image_encoding
+    python -m benchmarks.bench_image_encoding --size-mb 8 --concurrency 4
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from scripts.image_encoding import encode_image_data_url
+
+
+def naive_data_url(image_path):
+    """Original path: read, b64encode, decode and format into a data URL."""
+    with open(image_path, "rb") as image_file:
+        base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+    return f"data:image/jpeg;base64,{base64_image}"
+
+
+ENCODERS = {
+    'naive': naive_data_url,
+    'mmap': encode_image_data_url
+}
+
+
+def max_rss_bytes():
+    """Return this process's peak RSS in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure(encoder_name, image_path, concurrency):
+    """Run one encoder `concurrency` times in parallel and report memory use."""
+    encoder = ENCODERS[encoder_name]
+    file_size = os.path.getsize(image_path)
+
+    # Warm up imports and the page cache outside the measured window
+    encoder(image_path)
+    rss_before = max_rss_bytes()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    # Keep every data URL alive until all threads finish, like in-flight requests do
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(encoder(image_path)))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'encoder': encoder_name,
+        'file_bytes': file_size,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 4),
+        'heap_peak_bytes': heap_peak,
+        'heap_peak_per_call': round(heap_peak / concurrency / file_size, 2),
+        'rss_growth_bytes': max_rss_bytes() - rss_before
+    }
+
+
+def run_isolated(encoder_name, image_path, concurrency):
+    """Measure an encoder in a fresh interpreter."""
+    output = subprocess.check_output([
+        sys.executable, '-m', 'benchmarks.bench_image_encoding',
+        '--child', encoder_name,
+        '--image', image_path,
+        '--concurrency', str(concurrency)
+    ])
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flyer image base64 encoding memory use")
+    parser.add_argument('--size-mb', type=float, default=6, help='Synthetic image size in MB (default: 6)')
+    parser.add_argument('--image', type=str, default=None, help='Use an existing image instead of a synthetic one')
+    parser.add_argument('--concurrency', type=int, default=1, help='Parallel encodes per run (default: 1)')
+    parser.add_argument('--budget-mb', type=float, default=512, help='Memory budget used for the concurrency estimate')
+    parser.add_argument('--child', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.image, args.concurrency)))
+        return
+
+    image_path = args.image
+    temp_file = None
+    if image_path is None:
+        temp_file = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False)
+        temp_file.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+        temp_file.close()
+        image_path = temp_file.name
+
+    try:
+        print("="*60)
+        print(f"Image encoding benchmark ({os.path.getsize(image_path) / (1024 * 1024):.1f} MB, "
+              f"concurrency {args.concurrency})")
+        print("="*60)
+
+        for encoder_name in ENCODERS:
+            result = run_isolated(encoder_name, image_path, args.concurrency)
+            per_call_mb = result['heap_peak_bytes'] / args.concurrency / (1024 * 1024)
+            safe_concurrency = int(args.budget_mb // per_call_mb) if per_call_mb else 0
+
+            print(f"\n{encoder_name}:")
+            print(f"  Time:              {result['seconds'] * 1000:.1f} ms")
+            print(f"  Heap peak:         {result['heap_peak_bytes'] / (1024 * 1024):.1f} MB "
+                  f"({result['heap_peak_per_call']}x image size per call)")
+            print(f"  Peak RSS growth:   {result['rss_growth_bytes'] / (1024 * 1024):.1f} MB")
+            print(f"  Calls in {args.budget_mb:.0f} MB:    {safe_concurrency}")
+
+        print("\n" + "="*60)
+    finally:
+        if temp_file is not None:
+            os.remove(image_path)
+
+
+if __name__ == "__main__":
+    main()
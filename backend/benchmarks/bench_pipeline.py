@@ -0,0 +1,175 @@
+"""
+Benchmark the flyer pipeline end-to-end against local stand-ins.
+
+Runs process_all_flyers() against tests/fake_flyer_site.py (flyer pages and
+images with simulated latency and bandwidth) and tests/fake_openai.py (canned
+promotions after a simulated model delay), once per executor, and reports
+throughput so serial and concurrent modes can be compared reproducibly.
+
+Discovery and extraction need a Playwright browser. When none is installed,
+the extract output is seeded from the fake site and only download and analyze
+are run.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --stores 6 --pages 8 --openai-delay 2
+    python -m benchmarks.bench_pipeline --latency 0.2 --bandwidth 1 --modes serial threaded
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+from urllib.parse import urlparse
+from PIL import Image
+from scripts.flyer_processor import process_all_flyers
+from scripts.pipeline import EXECUTORS
+from scripts.pipeline.runner import IMAGE_URLS_FILE
+from tests.fake_flyer_site import FakeFlyerSite
+from tests.fake_openai import FakeOpenAIServer
+
+STORE_NAMES = ['metro', 'super c', 'maxi', 'iga', 'provigo', 'loblaws', 'walmart', 'costco']
+
+CANNED_PROMOTIONS = {'promotions': [
+    {'item': 'Chicken breast', 'price': 4.99, 'unit': 'lb', 'discount': 'Save 40%'},
+    {'item': 'Strawberries 454 g', 'price': 2.97, 'unit': 'each', 'discount': ''},
+    {'item': 'Cheddar cheese 400 g', 'price': 5.49, 'unit': 'each', 'discount': '2 for $10'}
+]}
+
+
+def make_flyer_image(width=1200, height=1600, seed=0):
+    """Return JPEG bytes of a flyer-sized noise image (compresses like a busy flyer page)."""
+    rng = random.Random(seed)
+    small = Image.frombytes('L', (width // 4, height // 4), rng.randbytes(width * height // 16))
+    buffer = io.BytesIO()
+    small.resize((width, height)).convert('RGB').save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def browser_available():
+    """Return True if Playwright can launch Chromium here."""
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            p.chromium.launch().close()
+        return True
+    except Exception:
+        return False
+
+
+def run_mode(mode, site, stages, verbose=False):
+    """Run the pipeline once with the given executor in a fresh directory."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        output_dir = os.path.join(work_dir, 'promotion_results')
+        os.makedirs(output_dir)
+        if 'extract' not in stages:
+            with open(os.path.join(output_dir, IMAGE_URLS_FILE), 'w') as f:
+                json.dump(site.image_data(), f)
+
+        previous_dir = os.getcwd()
+        os.chdir(work_dir)  # Keeps the preprocessing cache out of data/
+        output = sys.stdout if verbose else io.StringIO()
+        started = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(output):
+                summary = process_all_flyers(
+                    output_dir=output_dir,
+                    flyer_images_dir=os.path.join(work_dir, 'flyer_images'),
+                    stages=stages,
+                    executors={'download': mode, 'analyze': mode},
+                    flyers_url=site.flyers_url,
+                    image_url_pattern=site.image_url_pattern
+                )
+        finally:
+            os.chdir(previous_dir)
+        elapsed = time.perf_counter() - started
+
+    download_stats = summary.get('download_stats') or {}
+    analysis_stats = summary.get('analysis_stats') or {}
+    return {
+        'mode': mode,
+        'seconds': elapsed,
+        'timings': summary['timings'],
+        'completed': summary['completed'],
+        'images': download_stats.get('total_downloaded', 0),
+        'bytes': download_stats.get('bytes_downloaded', 0),
+        'pages': analysis_stats.get('total_pages', 0),
+        'promotions': analysis_stats.get('total_promotions', 0)
+    }
+
+
+def per_second(count, seconds):
+    return count / seconds if seconds else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the flyer pipeline against local stand-ins")
+    parser.add_argument('--stores', type=int, default=4, help=f'Stores on the fake site (max {len(STORE_NAMES)}, default: 4)')
+    parser.add_argument('--pages', type=int, default=6, help='Pages per flyer (default: 6)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake site latency per request in seconds (default: 0.05)')
+    parser.add_argument('--bandwidth', type=float, default=5, help='Fake site bandwidth per connection in MB/s, 0 = unlimited (default: 5)')
+    parser.add_argument('--openai-delay', type=float, default=0.5, help='Fake OpenAI delay per request in seconds (default: 0.5)')
+    parser.add_argument('--modes', nargs='+', choices=list(EXECUTORS), default=list(EXECUTORS), help='Executors to compare (default: all)')
+    parser.add_argument('--skip-browser', action='store_true', help='Only run download and analyze, even if a browser is available')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline output')
+    args = parser.parse_args()
+
+    stores = {name: args.pages for name in STORE_NAMES[:args.stores]}
+    images = {}
+
+    use_browser = not args.skip_browser and browser_available()
+    stages = ['discover', 'extract', 'download', 'analyze'] if use_browser else ['download', 'analyze']
+
+    os.environ['OPENAI_API_KEY'] = 'benchmark'
+    bandwidth = args.bandwidth * 1024 * 1024 or None
+
+    print("="*60)
+    print(f"Pipeline benchmark: {len(stores)} stores x {args.pages} pages, "
+          f"site latency {args.latency * 1000:.0f} ms, "
+          f"bandwidth {f'{args.bandwidth:g} MB/s' if bandwidth else 'unlimited'}, "
+          f"OpenAI delay {args.openai_delay * 1000:.0f} ms")
+    print(f"Stages: {' → '.join(stages)}")
+    if not use_browser:
+        print("⚠ No Playwright browser: extract output seeded from the fake site")
+    print("="*60)
+
+    results = []
+    with FakeFlyerSite(stores, image_bytes=images.get, latency=args.latency, bandwidth=bandwidth) as site, \
+            FakeOpenAIServer(default_content=json.dumps(CANNED_PROMOTIONS), delay=args.openai_delay) as openai_server:
+        # A distinct image per page, so the preprocessing cache never short-circuits work
+        for name in stores:
+            for url in site.image_urls(name):
+                images[urlparse(url).path] = make_flyer_image(seed=len(images))
+
+        os.environ['OPENAI_BASE_URL'] = openai_server.base_url
+        for mode in args.modes:
+            result = run_mode(mode, site, stages, args.verbose)
+            results.append(result)
+            status = "✓" if result['completed'] else "✗"
+            print(f"\n{status} {mode}: {result['seconds']:.2f}s")
+            for stage, seconds in result['timings'].items():
+                print(f"  {stage:<10} {seconds:8.2f}s")
+            download_seconds = result['timings'].get('download', 0)
+            analyze_seconds = result['timings'].get('analyze', 0)
+            print(f"  Download:  {per_second(result['images'], download_seconds):6.1f} images/s, "
+                  f"{per_second(result['bytes'], download_seconds) / (1024 * 1024):.1f} MB/s")
+            print(f"  Analyze:   {per_second(result['pages'], analyze_seconds):6.1f} pages/s "
+                  f"({result['promotions']} promotions)")
+
+    serial = next((r for r in results if r['mode'] == 'serial'), None)
+    if serial and len(results) > 1:
+        print("\n" + "="*60)
+        print("Speedup vs serial:")
+        for result in results:
+            if result is not serial:
+                print(f"  {result['mode']:<10} {serial['seconds'] / result['seconds']:5.1f}x")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
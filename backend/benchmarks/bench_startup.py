@@ -0,0 +1,149 @@
+"""
+Benchmark how long importing the API takes, using `python -X importtime`.
+
+Every run imports the module in a fresh interpreter, so nothing is cached in
+memory (bytecode is compiled once by a warm-up run). Reports the median import
+time, the slowest top-level imports and whether heavy dependencies that should
+only load on first use were imported anyway.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --top 15
+    python -m benchmarks.bench_startup --save-baseline
+    python -m benchmarks.bench_startup --compare     # exit 1 if >25% slower
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from benchmarks.harness import compare_to_baseline, load_baseline, print_results, save_baseline
+
+BASELINE_NAME = 'bench_startup'
+
+# Modules app.py only needs for a scrape, a recipe request, the scheduler or the database
+LAZY_MODULES = ['playwright', 'openai', 'PIL', 'requests', 'apscheduler', 'tinydb']
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        List of (depth, module, self microseconds, cumulative microseconds)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def direct_imports(entries, module):
+    """Return the (module, cumulative microseconds) imported directly by the top-level module."""
+    index = next(i for i, (depth, name, _, _) in enumerate(entries) if depth == 0 and name == module)
+
+    # Output is post-order: the module's subtree is the run of deeper entries just before it
+    children = []
+    for depth, name, _, cumulative in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative))
+    return children
+
+
+def import_once(module):
+    """Import module in a fresh interpreter and return its parsed -X importtime output."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def loaded_lazy_modules(module):
+    """Return the LAZY_MODULES that importing module loads."""
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API import time with -X importtime")
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time (default: 5)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list (default: 10)')
+    parser.add_argument('--save-baseline', action='store_true', help='Save these results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='Exit with status 1 if import time regressed against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown for --compare (default: 0.25)')
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"Startup benchmark: import {args.module} ({args.runs} runs)")
+    print("="*60)
+
+    import_once(args.module)  # Warm-up: compile bytecode
+
+    totals = []
+    slowest = {}
+    for _ in range(args.runs):
+        entries = import_once(args.module)
+        total = next(cumulative for depth, name, _, cumulative in entries if depth == 0 and name == args.module)
+        totals.append(total / 1e6)
+        for name, cumulative in direct_imports(entries, args.module):
+            slowest.setdefault(name, []).append(cumulative / 1e6)
+
+    key = f"import_{args.module}"
+    results = {key: {
+        'median': statistics.median(totals),
+        'min': min(totals),
+        'max': max(totals),
+        'samples': len(totals)
+    }}
+    baseline = load_baseline(BASELINE_NAME)
+
+    print("\nImport time (cumulative, median):")
+    print_results(results, baseline)
+
+    print(f"\nSlowest imports made by {args.module} (cumulative, median):")
+    medians = sorted(((statistics.median(times), name) for name, times in slowest.items()), reverse=True)
+    for seconds, name in medians[:args.top]:
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms")
+
+    loaded = loaded_lazy_modules(args.module)
+    if loaded:
+        print(f"\n⚠ Imported at startup (expected on first use only): {', '.join(loaded)}")
+    else:
+        print(f"\n✓ None of {', '.join(LAZY_MODULES)} imported at startup")
+
+    if args.save_baseline:
+        path = save_baseline(BASELINE_NAME, results)
+        print(f"\n✓ Baseline saved to {path}")
+
+    if args.compare:
+        if not baseline:
+            print("\n⚠ No baseline to compare against (run with --save-baseline first)")
+            return 0
+
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            for case, before, after in regressions:
+                print(f"\n✗ {case}: {before * 1000:.1f} ms → {after * 1000:.1f} ms (beyond {args.tolerance:.0%})")
+            return 1
+        print(f"\n✓ No regression beyond {args.tolerance:.0%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
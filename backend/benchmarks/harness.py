@@ -0,0 +1,124 @@
+"""
+Shared timing, budget and baseline helpers for the standalone benchmarks.
+
+Baselines are JSON files mapping "<benchmark>[<size>]" to the median seconds
+measured on this machine. They are machine specific, so they live in
+benchmarks/baselines/ (git-ignored): save one on a known-good tree with
+--save-baseline, then rerun with --compare to fail on regressions.
+"""
+
+import os
+import json
+import time
+import statistics
+
+BASELINES_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+
+def measure(func, repeat=5, min_time=0.2, max_time=30.0):
+    """
+    Time func() like timeit: repeat it and keep per-call statistics.
+
+    Runs at least `repeat` times unless the first calls already exceed
+    max_time, and keeps going until min_time has elapsed so tiny operations
+    get enough samples.
+
+    Returns:
+        Dict with median, min, max and samples (seconds per call)
+    """
+    samples = []
+    started = time.perf_counter()
+
+    while True:
+        call_started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - call_started)
+
+        elapsed = time.perf_counter() - started
+        if len(samples) >= repeat and elapsed >= min_time:
+            break
+        if elapsed >= max_time:
+            break
+
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'samples': len(samples)
+    }
+
+
+def projected_seconds(previous_size, previous_seconds, size):
+    """Lower-bound projection of a run at `size` from a smaller run (assumes linear scaling)."""
+    return previous_seconds * size / previous_size
+
+
+def case_key(benchmark, size):
+    return f"{benchmark}[{size}]"
+
+
+def baseline_path(name):
+    return os.path.join(BASELINES_DIR, f"{name}.json")
+
+
+def load_baseline(name):
+    """Load a saved baseline, or {} if none exists."""
+    try:
+        with open(baseline_path(name), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_baseline(name, results):
+    """Save the median of every measured case as the new baseline."""
+    os.makedirs(BASELINES_DIR, exist_ok=True)
+    baseline = {key: result['median'] for key, result in results.items() if result.get('median') is not None}
+    with open(baseline_path(name), 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    return baseline_path(name)
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25):
+    """
+    Compare medians to a baseline.
+
+    Args:
+        results: Dict of case key -> measurement from measure()
+        baseline: Dict of case key -> baseline median seconds
+        tolerance: Allowed slowdown as a fraction (0.25 = 25% slower)
+
+    Returns:
+        List of (case key, baseline seconds, current seconds) that regressed
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline or result.get('median') is None:
+            continue
+        if result['median'] > baseline[key] * (1 + tolerance):
+            regressions.append((key, baseline[key], result['median']))
+    return regressions
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return '-'
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def print_results(results, baseline=None):
+    """Print one line per case, with the change against the baseline if known."""
+    baseline = baseline or {}
+    for key, result in results.items():
+        if result.get('skipped'):
+            print(f"  {key:<40} skipped ({result['skipped']})")
+            continue
+        line = f"  {key:<40} {format_seconds(result['median']):>10}  (min {format_seconds(result['min'])}, n={result['samples']})"
+        if key in baseline:
+            change = result['median'] / baseline[key] - 1
+            line += f"  {change:+.0%} vs baseline"
+        print(line)
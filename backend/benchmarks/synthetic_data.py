@@ -0,0 +1,85 @@
+"""
+Deterministic synthetic promotions and recipes for benchmarks.
+
+Promotions look like real flyer output (mixed units, discount wordings and
+stores) so matching, parsing and search code paths are exercised realistically.
+The same seed always yields the same data.
+"""
+
+import random
+
+STORES = ['maxi', 'metro', 'iga', 'provigo', 'super c', 'walmart', 'loblaws', 'food basics']
+
+FOODS = [
+    'chicken breast', 'chicken thighs', 'ground beef', 'pork chops', 'salmon fillets', 'shrimp',
+    'broccoli', 'carrots', 'potatoes', 'sweet potatoes', 'onions', 'garlic', 'tomatoes',
+    'bell peppers', 'spinach', 'lettuce', 'mushrooms', 'zucchini', 'apples', 'bananas',
+    'strawberries', 'blueberries', 'lemons', 'avocados', 'milk', 'cheddar cheese', 'butter',
+    'eggs', 'yogurt', 'bread', 'pasta', 'rice', 'flour', 'olive oil', 'tomato sauce',
+    'black beans', 'chickpeas', 'cereal', 'coffee', 'orange juice'
+]
+NON_FOODS = ['laundry detergent', 'paper towel', 'dish soap', 'shampoo', 'toilet paper']
+QUALIFIERS = ['', 'fresh', 'organic', 'frozen', 'boneless', 'large', 'family pack', 'extra lean', 'sliced', 'baby']
+BRANDS = ['', '', "President's Choice", 'Compliments', 'Great Value', 'Irresistibles', 'Selection', 'No Name']
+SIZES = ['', '', '454 g', '1 kg', '2 L', '500 mL', '12 x 355 mL', '6 pack', '900 g']
+UNITS = ['each', 'lb', 'kg', 'pkg', '100 g', 'L']
+DISCOUNTS = [
+    '', 'Save $1', 'Save $2.50', 'Save 30%', '30% off', '2 for $5', '3 for $10',
+    'Buy 1 get 1 free', 'Save $1.50/lb', 'Was $6.99', 'Member price', 'Rollback'
+]
+PANTRY = ['salt', 'pepper', 'water', 'vegetable oil', 'sugar', 'soy sauce', 'cumin', 'paprika']
+
+
+def make_promotion(rng, index):
+    qualifier = rng.choice(QUALIFIERS)
+    food = rng.choice(NON_FOODS) if rng.random() < 0.05 else rng.choice(FOODS)
+    brand = rng.choice(BRANDS)
+    size = rng.choice(SIZES)
+    item = ' '.join(part for part in (brand, qualifier, food, size) if part)
+
+    return {
+        'item': item[0].upper() + item[1:],
+        'price': round(rng.uniform(0.49, 24.99), 2),
+        'unit': rng.choice(UNITS),
+        'discount': rng.choice(DISCOUNTS),
+        'store': rng.choice(STORES)
+    }
+
+
+def make_promotions(count, seed=0):
+    """Return count synthetic promotions."""
+    rng = random.Random(seed)
+    return [make_promotion(rng, index) for index in range(count)]
+
+
+def make_recipes(count, ingredients_per_recipe=8, seed=0):
+    """
+    Return count synthetic recipes shaped like generate_recipes_with_openai() output.
+
+    About half the ingredients are marked on_sale; some on-sale names match no
+    promotion, which forces a full scan in naive matching.
+    """
+    rng = random.Random(seed + 1)
+    recipes = []
+
+    for index in range(count):
+        ingredients = []
+        for _ in range(ingredients_per_recipe):
+            if rng.random() < 0.5:
+                name = rng.choice(FOODS) if rng.random() < 0.85 else f"dragon fruit {rng.randint(1, 99)}"
+                ingredients.append({'item': name.capitalize(), 'amount': f"{rng.randint(1, 3)} lb", 'on_sale': True})
+            else:
+                ingredients.append({'item': rng.choice(PANTRY).capitalize(), 'amount': '1 tsp', 'on_sale': False})
+
+        recipe_id = f"recipe_{index + 1}"
+        recipes.append({
+            'id': recipe_id,
+            'name': f"Synthetic Recipe {index + 1}",
+            'description': 'Benchmark recipe',
+            'ingredients': ingredients,
+            'instructions': ['Prep', 'Cook', 'Serve'],
+            'cooking_time': '30 mins',
+            'servings': 4
+        })
+
+    return recipes
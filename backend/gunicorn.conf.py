@@ -0,0 +1,71 @@
+"""
+Gunicorn configuration for serving the LazyRecipes API in production.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py
+
+Override settings with environment variables: PORT, GUNICORN_THREADS (threads
+per worker) and GUNICORN_TIMEOUT. WEB_CONCURRENCY above 1 is not supported and
+is capped to one worker process (see MAX_WORKERS).
+"""
+
+import os
+
+wsgi_app = "app:app"
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# More than one worker process is unsupported. Generated recipes (recipes_cache),
+# their promotion links (promotion_links) and async recipe jobs live in the memory
+# of the process that created them, so with several workers /api/shopping-list and
+# /api/recipes/jobs/<id> return 404 whenever a request reaches another worker.
+# Scale with threads instead: the endpoints mostly wait on OpenAI and disk.
+MAX_WORKERS = 1
+
+requested_workers = int(os.getenv('WEB_CONCURRENCY', str(MAX_WORKERS)))
+if requested_workers > MAX_WORKERS:
+    print(f"⚠ WEB_CONCURRENCY={requested_workers} is not supported (recipes are kept in process memory), "
+          f"using {MAX_WORKERS} worker; raise GUNICORN_THREADS instead")
+
+worker_class = "gthread"
+workers = MAX_WORKERS
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+
+# Load the app in each worker, not in the master, so the OpenAI client and the
+# TinyDB file handle are never shared across fork()
+preload_app = False
+
+# Keep idle client connections open briefly (behind a reverse proxy)
+keepalive = 5
+
+# Restart a worker whose main loop is stuck for this long. With gthread workers
+# a slow request (e.g. POST /api/recipes/generate) does not count against it.
+# Scrapes never run here: they are queued for worker.py.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+# On SIGTERM, stop accepting connections and give in-flight requests this long
+graceful_timeout = 30
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    """Cap a worker count given on the command line (-w) as well, see MAX_WORKERS."""
+    if server.num_workers > MAX_WORKERS:
+        server.log.warning(f"{server.num_workers} workers are not supported (recipes are kept in "
+                           f"process memory), using {MAX_WORKERS}")
+        server.num_workers = MAX_WORKERS
+
+
+def post_worker_init(worker):
+    """Start the weekly scheduler in exactly one worker (see app.initialize_scheduler)."""
+    from app import initialize_scheduler
+    worker.scheduler = initialize_scheduler()
+
+
+def worker_exit(server, worker):
+    """Stop this worker's scheduler so the lock is free for its replacement."""
+    scheduler = getattr(worker, 'scheduler', None)
+    if scheduler is not None:
+        from app import shutdown_scheduler
+        shutdown_scheduler(scheduler)
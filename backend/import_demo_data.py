@@ -12,6 +12,7 @@ import os
 import json
 from datetime import datetime
 from tinydb import TinyDB
+from scripts.promotion_store import stored_promotions
 
 # Configuration
 RESULTS_FILE = "results/promotions.json"
@@ -64,11 +65,8 @@ def import_promotions():
     promotions_table.truncate()
     scrapes_table.truncate()
 
-    # Insert promotions with scrape_id
-    for promo in all_promotions:
-        promo_with_id = promo.copy()
-        promo_with_id['scrape_id'] = scrape_id
-        promotions_table.insert(promo_with_id)
+    # Insert the promotions, tagged with this scrape
+    promotions_table.insert_multiple(stored_promotions(all_promotions, scrape_id))
 
     # Record scrape metadata
     scrapes_table.insert({
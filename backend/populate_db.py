@@ -7,6 +7,7 @@ import json
 import glob
 from datetime import datetime
 from tinydb import TinyDB
+from scripts.promotion_store import stored_promotions
 
 PROMOTIONS_DIR = "data/promotion_results"
 DB_PATH = "data/promotions.json"
@@ -41,11 +42,8 @@ def save_to_db(promotions):
     # Clear old promotions
     promotions_table.truncate()
 
-    # Insert new promotions with scrape_id
-    for promo in promotions:
-        promo_with_id = promo.copy()
-        promo_with_id['scrape_id'] = scrape_id
-        promotions_table.insert(promo_with_id)
+    # Insert the new promotions, tagged with this scrape
+    promotions_table.insert_multiple(stored_promotions(promotions, scrape_id))
 
     # Record the scrape metadata
     scrapes_table.insert({
@@ -1,145 +1,55 @@
 """
 Analyze first N pages for all stores (except specified exclusions).
 Saves results to organized folder structure.
+
+Every page is checkpointed under <output_dir>/_checkpoints/<store>/ as soon as it
+is analyzed. Use --resume to skip pages that already have a checkpoint:
+    python -m scripts.analyze_all_stores_partial --pages 2 --resume
+
+Runs the analyze stage of scripts.pipeline (see scripts/pipeline/analysis.py).
 """
 
-import os
-import json
-from scripts.analyze_flyers import analyze_flyer_image
-from openai import OpenAI
 from dotenv import load_dotenv
+from scripts.pipeline import make_config, get_executor
+from scripts.pipeline.analysis import analyze_store, analyze_stores, make_client
 
 load_dotenv()
 
-def analyze_store_partial(client, store_key, num_pages, flyer_images_dir="flyer_images", output_dir="promotion_results"):
-    """Analyze first N pages of a store's flyers."""
-
-    store_dir = os.path.join(flyer_images_dir, store_key)
-
-    if not os.path.exists(store_dir):
-        print(f"✗ Store directory not found: {store_dir}")
-        return None
-
-    # Get all image files
-    all_image_files = sorted([
-        f for f in os.listdir(store_dir)
-        if f.endswith(('.jpg', '.jpeg', '.png'))
-    ])
-
-    if not all_image_files:
-        print(f"✗ No images found in {store_dir}")
-        return None
-
-    # Limit to first N pages
-    image_files = all_image_files[:num_pages]
-
-    print(f"\n{'='*60}")
-    print(f"Analyzing: {store_key.replace('-', ' ').title()}")
-    print(f"Pages: {len(image_files)}/{len(all_image_files)}")
-    print(f"{'='*60}\n")
-
-    all_promotions = []
-
-    for image_file in image_files:
-        image_path = os.path.join(store_dir, image_file)
-        promotions = analyze_flyer_image(
-            client,
-            image_path,
-            store_key.replace('-', ' ')
-        )
-        all_promotions.extend(promotions)
-
-    print(f"\n{'─'*60}")
-    print(f"Total promotions extracted: {len(all_promotions)}")
-    print(f"{'─'*60}\n")
-
-    result = {
-        'store': store_key.replace('-', ' '),
-        'store_key': store_key,
-        'page_count': len(image_files),
-        'total_pages': len(all_image_files),
-        'promotion_count': len(all_promotions),
-        'promotions': all_promotions
-    }
-
-    # Save result to organized folder
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, f"{store_key}_promotions.json")
+def analyze_store_partial(client, store_key, num_pages, flyer_images_dir="flyer_images", output_dir="promotion_results", pages_per_request=1, resume=False):
+    """
+    Analyze first N pages of a store's flyers, packing pages_per_request pages per API call.
 
-    with open(output_file, 'w') as f:
-        json.dump(result, f, indent=2)
+    Pages are checkpointed as they complete; with resume=True, checkpointed pages are skipped.
+    """
 
-    print(f"✓ Results saved to: {output_file}\n")
-
-    # Show sample promotions
-    if all_promotions:
-        print("Sample promotions (first 5):")
-        for promo in all_promotions[:5]:
-            print(f"  - {promo['item']}: ${promo['price']}/{promo['unit']} ({promo['discount']})")
-        print()
-
-    return result
-
-def analyze_all_stores_partial(num_pages=2, exclude_stores=None, flyer_images_dir="flyer_images", output_dir="promotion_results"):
-    """Analyze first N pages for all stores."""
-
-    if exclude_stores is None:
-        exclude_stores = []
-
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
-    # Get all store directories
-    all_stores = sorted([
-        d for d in os.listdir(flyer_images_dir)
-        if os.path.isdir(os.path.join(flyer_images_dir, d))
-    ])
-
-    # Filter out excluded stores
-    stores_to_process = [s for s in all_stores if s not in exclude_stores]
+    config = make_config(
+        num_pages=num_pages,
+        flyer_images_dir=flyer_images_dir,
+        output_dir=output_dir,
+        pages_per_request=pages_per_request,
+        resume=resume
+    )
+    return analyze_store(client, store_key, config)
+
+def analyze_all_stores_partial(num_pages=2, exclude_stores=None, flyer_images_dir="flyer_images", output_dir="promotion_results", pages_per_request=1, resume=False, executor='threaded', max_workers=4, client=None):
+    """Analyze first N pages for all stores, packing pages_per_request pages per API call."""
+
+    config = make_config(
+        num_pages=num_pages,
+        exclude_stores=exclude_stores or [],
+        flyer_images_dir=flyer_images_dir,
+        output_dir=output_dir,
+        pages_per_request=pages_per_request,
+        resume=resume,
+        executors={'analyze': executor},
+        max_workers={'analyze': max_workers}
+    )
 
     print("="*60)
-    print(f"Processing {len(stores_to_process)} Stores ({num_pages} pages each)")
+    print(f"Analyzing Stores ({num_pages} pages each, {pages_per_request} per request, {executor})")
     print("="*60)
-    print(f"Stores: {', '.join([s.replace('-', ' ').title() for s in stores_to_process])}")
-
-    if exclude_stores:
-        print(f"Excluded: {', '.join(exclude_stores)}")
-    print()
-
-    results = {}
-    stats = {
-        'stores_processed': 0,
-        'stores_succeeded': 0,
-        'total_pages': 0,
-        'total_promotions': 0,
-        'failed_stores': []
-    }
-
-    for store_key in stores_to_process:
-        try:
-            stats['stores_processed'] += 1
-
-            result = analyze_store_partial(client, store_key, num_pages, flyer_images_dir, output_dir)
-
-            if result and result['promotions']:
-                results[store_key] = result
-                stats['stores_succeeded'] += 1
-                stats['total_pages'] += result['page_count']
-                stats['total_promotions'] += result['promotion_count']
-            else:
-                stats['failed_stores'].append(store_key)
-
-        except Exception as e:
-            print(f"\n✗ Error analyzing {store_key}: {e}\n")
-            stats['failed_stores'].append(store_key)
-
-    # Save combined summary
-    summary_file = os.path.join(output_dir, "_summary.json")
-    with open(summary_file, 'w') as f:
-        json.dump({
-            'stats': stats,
-            'stores': {k: {'promotion_count': v['promotion_count'], 'page_count': v['page_count']} for k, v in results.items()}
-        }, f, indent=2)
+
+    results, stats = analyze_stores(config, get_executor(executor), client or make_client())
 
     # Print final summary
     print("\n" + "="*60)
@@ -161,9 +71,31 @@ def analyze_all_stores_partial(num_pages=2, exclude_stores=None, flyer_images_di
     return results
 
 if __name__ == "__main__":
-    # Process all stores except costco, 2 pages each
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze the first N flyer pages of every store")
+    parser.add_argument('--pages', type=int, default=2, help='Pages to analyze per store (default: 2)')
+    parser.add_argument(
+        '--exclude',
+        nargs='+',
+        default=['costco', 'super-c-direct'],  # Exclude costco and old test folder
+        help='Store keys to exclude (default: costco super-c-direct)'
+    )
+    parser.add_argument('--pages-per-request', type=int, default=1, help='Pages packed into each Vision API call (default: 1)')
+    parser.add_argument('--images', type=str, default='flyer_images', help='Flyer images directory (default: flyer_images)')
+    parser.add_argument('--output', type=str, default='promotion_results', help='Output directory (default: promotion_results)')
+    parser.add_argument('--resume', action='store_true', help='Skip pages that already have a checkpoint')
+    parser.add_argument('--executor', choices=['serial', 'threaded', 'async'], default='threaded', help='How stores are run (default: threaded)')
+    parser.add_argument('--workers', type=int, default=4, help='Stores analyzed concurrently (default: 4)')
+    args = parser.parse_args()
+
     analyze_all_stores_partial(
-        num_pages=2,
-        exclude_stores=['costco', 'super-c-direct'],  # Exclude costco and old test folder
-        output_dir="promotion_results"
+        num_pages=args.pages,
+        exclude_stores=args.exclude,
+        flyer_images_dir=args.images,
+        output_dir=args.output,
+        pages_per_request=args.pages_per_request,
+        resume=args.resume,
+        executor=args.executor,
+        max_workers=args.workers
     )
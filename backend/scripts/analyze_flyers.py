@@ -4,41 +4,108 @@ Extracts promotions and discounts from each flyer page.
 """
 
 import os
-import json
-import base64
+import threading
 from pathlib import Path
-from openai import OpenAI
 from dotenv import load_dotenv
+from scripts.image_preprocessing import preprocess_flyer_image
+from scripts.image_encoding import encode_image_data_url
+from scripts.response_parsing import ResponseParseError, parse_json_response, normalize_promotions
+from scripts.retry import call_with_retry
+from scripts.checkpoints import image_fingerprint, load_page_checkpoint, save_page_checkpoint
+from scripts.instrumentation import span, current_span, record_usage, record_bytes
+from scripts.metrics import counter
 
 # Load environment variables
 load_dotenv()
 
-def encode_image(image_path):
-    """Encode image to base64 for OpenAI API."""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
-
-def analyze_flyer_image(client, image_path, store_name):
-    """
-    Analyze a single flyer image using OpenAI Vision API.
-
-    Args:
-        client: OpenAI client instance
-        image_path: Path to flyer image
-        store_name: Name of the store
-
-    Returns:
-        List of promotions extracted from the image
-    """
-
-    print(f"  Analyzing {os.path.basename(image_path)}...")
-
-    try:
-        # Encode image
-        base64_image = encode_image(image_path)
-
-        # Create prompt for promotion extraction
-        prompt = """
+# Vision model settings shared by single-page and multi-page requests
+VISION_MODEL = "gpt-4o"
+MAX_TOKENS_PER_PAGE = 2000
+MAX_OUTPUT_TOKENS = 16000
+
+# Crop, downscale and tile pages before upload (see scripts/image_preprocessing.py)
+PREPROCESS_IMAGES = True
+
+# Retries for transient API errors (jittered exponential backoff, see scripts/retry.py)
+MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 60.0
+
+# Ask the API to enforce the promotion JSON schema (response_format json_schema).
+# Set to False for models without Structured Outputs support.
+STRUCTURED_OUTPUT = True
+
+PROMOTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "item": {"type": "string", "description": "Product name"},
+        "price": {"type": "number", "description": "Sale price as a number"},
+        "unit": {"type": "string", "description": "Unit of measurement, e.g. lb, kg, each, pkg"},
+        "discount": {"type": "string", "description": "Discount text exactly as shown, or empty"}
+    },
+    "required": ["item", "price", "unit", "discount"],
+    "additionalProperties": False
+}
+
+PROMOTIONS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "flyer_promotions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "promotions": {"type": "array", "items": PROMOTION_SCHEMA}
+            },
+            "required": ["promotions"],
+            "additionalProperties": False
+        }
+    }
+}
+
+PAGES_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "flyer_pages_promotions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "pages": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "page": {"type": "integer"},
+                            "promotions": {"type": "array", "items": PROMOTION_SCHEMA}
+                        },
+                        "required": ["page", "promotions"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["pages"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# Response outcome counters, used to track the parse-failure rate of a run
+ANALYSIS_STATS = {
+    'responses': 0,
+    'parse_failures': 0,
+    'truncated': 0,
+    'refusals': 0,
+    'api_errors': 0
+}
+_stats_lock = threading.Lock()
+
+# Same outcomes as a monotonic Prometheus counter, for tracking across runs
+ANALYSIS_RESPONSES = counter(
+    'flyer_analysis_responses_total', 'Vision analysis responses by outcome', ['outcome']
+)
+
+EXTRACTION_PROMPT = """
 Analyze this grocery store flyer image and extract ALL promotions, discounts, and sale items.
 
 For each item, extract:
@@ -64,211 +131,502 @@ Important:
 - Convert prices to numbers (remove $ and other symbols)
 - Be specific with product names
 - Include the discount/promotion text exactly as shown
+- Tall pages may be split top to bottom into several overlapping images; list each item only once
 """
 
-        # Call OpenAI Vision API
-        response = client.chat.completions.create(
-            model="gpt-4o",  # Using GPT-4o for vision capabilities
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}",
-                                "detail": "high"  # High detail for better text extraction
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=2000,
-            temperature=0.2  # Low temperature for consistent extraction
-        )
+BATCH_EXTRACTION_PROMPT = """
+Analyze these {page_count} grocery store flyer pages and extract ALL promotions, discounts, and sale items.
+Each page is introduced by a "Page N:" label followed by its image. Tall pages may be split
+top to bottom into several overlapping images under the same label; list each item only once.
+
+For each item, extract:
+- item: Product name
+- price: Regular or sale price (as a number)
+- unit: Unit of measurement (e.g., "lb", "kg", "each", "pkg")
+- discount: Discount description (e.g., "30% off", "Save $2", "2 for $5")
+
+Return ONLY a valid JSON object with this exact structure:
+{{
+  "pages": [
+    {{
+      "page": 1,
+      "promotions": [
+        {{
+          "item": "Product name",
+          "price": 4.99,
+          "unit": "lb",
+          "discount": "30% off"
+        }}
+      ]
+    }}
+  ]
+}}
+
+Include exactly one entry per page, in page order. If a page has no promotions, use an empty "promotions" array.
+
+Important:
+- Extract ALL visible items with prices
+- Convert prices to numbers (remove $ and other symbols)
+- Be specific with product names
+- Include the discount/promotion text exactly as shown
+- Never merge items from different pages into the same page entry
+"""
+
+STRUCTURED_EXTRACTION_PROMPT = """
+Analyze this grocery store flyer image and extract ALL promotions, discounts, and sale items.
+
+For each item, give the product name, the sale price as a number, the unit of measurement
+(e.g., "lb", "kg", "each", "pkg") and the discount text (e.g., "30% off", "Save $2", "2 for $5").
+Use an empty string when no discount text is shown. If no promotions are visible, return no promotions.
+
+Important:
+- Extract ALL visible items with prices
+- Be specific with product names
+- Include the discount/promotion text exactly as shown
+- Tall pages may be split top to bottom into several overlapping images; list each item only once
+"""
+
+STRUCTURED_BATCH_EXTRACTION_PROMPT = """
+Analyze these {page_count} grocery store flyer pages and extract ALL promotions, discounts, and sale items.
+Each page is introduced by a "Page N:" label followed by its image. Tall pages may be split
+top to bottom into several overlapping images under the same label; list each item only once.
+
+For each item, give the product name, the sale price as a number, the unit of measurement
+(e.g., "lb", "kg", "each", "pkg") and the discount text (e.g., "30% off", "Save $2", "2 for $5").
+Use an empty string when no discount text is shown.
+
+Return exactly one entry per page, in page order, with an empty promotions list for pages without promotions.
+
+Important:
+- Extract ALL visible items with prices
+- Be specific with product names
+- Include the discount/promotion text exactly as shown
+- Never merge items from different pages into the same page entry
+"""
+
+def record_outcome(outcome):
+    """Count one analysis response outcome (see ANALYSIS_STATS) and tag the current span with it."""
+    with _stats_lock:
+        ANALYSIS_STATS['responses'] += 1
+        if outcome != 'ok':
+            ANALYSIS_STATS[outcome] += 1
+    ANALYSIS_RESPONSES.inc(outcome=outcome)
+
+    request_span = current_span()
+    if request_span is not None:
+        request_span.set(outcome=outcome)
+
+def get_parse_failure_rate():
+    """Return the share of responses whose JSON could not be parsed."""
+    with _stats_lock:
+        if not ANALYSIS_STATS['responses']:
+            return 0.0
+        return ANALYSIS_STATS['parse_failures'] / ANALYSIS_STATS['responses']
+
+def reset_analysis_stats():
+    """Reset the response outcome counters, e.g. at the start of a run."""
+    with _stats_lock:
+        for key in ANALYSIS_STATS:
+            ANALYSIS_STATS[key] = 0
+
+def build_image_content(image_path):
+    """Build the image_url message part for an image file."""
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": encode_image_data_url(image_path),
+            "detail": "high"  # High detail for better text extraction
+        }
+    }
+
+def build_page_content(image_path, page_number=None):
+    """
+    Build the message parts for one flyer page.
+
+    When preprocessing is enabled the page is sent as its processed tiles,
+    falling back to the original file if the image cannot be processed.
+
+    Args:
+        image_path: Path to flyer image
+        page_number: Optional page number used to label the page in multi-page requests
+
+    Returns:
+        List of message content parts
+    """
+    tile_paths = [image_path]
+
+    if PREPROCESS_IMAGES:
+        try:
+            tile_paths = preprocess_flyer_image(image_path)
+        except (OSError, ValueError) as e:
+            print(f"    ⚠ Preprocessing failed for {os.path.basename(image_path)}, sending original: {e}")
+
+    parts = []
+    if page_number is not None:
+        parts.append({"type": "text", "text": f"Page {page_number}:"})
+    parts.extend(build_image_content(path) for path in tile_paths)
+
+    return parts
+
+def request_extraction(client, image_paths):
+    """
+    Send one extraction request for one or more flyer pages.
+
+    Uses the JSON schema response format when STRUCTURED_OUTPUT is enabled and
+    records the outcome of every response in ANALYSIS_STATS.
+
+    Args:
+        client: OpenAI client instance
+        image_paths: Paths to flyer images, in page order
+
+    Returns:
+        Tuple of (parsed JSON, truncated): the JSON is salvaged if the response
+        was cut off, and truncated tells the caller it is incomplete
+
+    Raises:
+        ResponseParseError: If the model refused or the JSON could not be parsed
+    """
+    with span('vision_request', model=VISION_MODEL,
+              pages=[os.path.basename(path) for path in image_paths]):
+        page_count = len(image_paths)
+
+        if page_count == 1:
+            prompt = STRUCTURED_EXTRACTION_PROMPT if STRUCTURED_OUTPUT else EXTRACTION_PROMPT
+            message_content = [{"type": "text", "text": prompt}, *build_page_content(image_paths[0])]
+            response_format = PROMOTIONS_RESPONSE_FORMAT
+        else:
+            template = STRUCTURED_BATCH_EXTRACTION_PROMPT if STRUCTURED_OUTPUT else BATCH_EXTRACTION_PROMPT
+            message_content = [{"type": "text", "text": template.format(page_count=page_count)}]
+            for page_number, path in enumerate(image_paths, 1):
+                message_content.extend(build_page_content(path, page_number))
+            response_format = PAGES_RESPONSE_FORMAT
+
+        request = {
+            "model": VISION_MODEL,  # Using GPT-4o for vision capabilities
+            "messages": [{"role": "user", "content": message_content}],
+            "max_tokens": min(MAX_TOKENS_PER_PAGE * page_count, MAX_OUTPUT_TOKENS),
+            "temperature": 0.2  # Low temperature for consistent extraction
+        }
+        if STRUCTURED_OUTPUT:
+            request["response_format"] = response_format
+
+        # Size of the base64 image payload actually uploaded
+        record_bytes(sum(
+            len(part["image_url"]["url"]) for part in message_content if part["type"] == "image_url"
+        ), direction='upload')
+
+        try:
+            response = call_with_retry(
+                lambda: client.chat.completions.create(**request),
+                max_attempts=MAX_ATTEMPTS,
+                base_delay=RETRY_BASE_DELAY,
+                max_delay=RETRY_MAX_DELAY
+            )
+        except Exception:
+            record_outcome('api_errors')
+            raise
+
+        record_usage(VISION_MODEL, getattr(response, 'usage', None))
+        choice = response.choices[0]
+
+        refusal = getattr(choice.message, 'refusal', None)
+        if refusal:
+            record_outcome('refusals')
+            raise ResponseParseError(f"Model refused to extract promotions: {refusal}")
 
-        # Parse response
-        content = response.choices[0].message.content.strip()
+        try:
+            data, truncated = parse_json_response(choice.message.content)
+        except ResponseParseError:
+            record_outcome('parse_failures')
+            raise
+
+        truncated = truncated or getattr(choice, 'finish_reason', None) == 'length'
+        if truncated:
+            print("    ⚠ Response was truncated, keeping the complete items")
+            record_outcome('truncated')
+        else:
+            record_outcome('ok')
 
-        # Extract JSON from response (handle markdown code blocks)
-        if content.startswith("```json"):
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif content.startswith("```"):
-            content = content.split("```")[1].split("```")[0].strip()
+        return data, truncated
 
-        promotions = json.loads(content)
+def extract_flyer_pages(client, image_paths, store_name):
+    """
+    Extract promotions from one or more flyer pages in a single request.
+
+    Unlike analyze_flyer_image/analyze_flyer_pages, errors are raised rather
+    than turned into empty results, so callers can tell a failed page from a
+    page without promotions.
+
+    Args:
+        client: OpenAI client instance
+        image_paths: Paths to flyer images, in page order
+        store_name: Name of the store
 
-        # Add store name to each promotion
+    Returns:
+        Tuple of (pages, complete): one promotion list per image path, and for
+        each page whether the response returned it in full. A page is incomplete
+        when the response left it out, or when the response was truncated and
+        the page's entry is the last one, where the cut happened.
+
+    Raises:
+        ResponseParseError: If the response could not be parsed
+        openai.OpenAIError: If the API call failed after all retries
+    """
+    data, truncated = request_extraction(client, image_paths)
+    pages = split_batch_response(data, len(image_paths))
+    returned = returned_page_numbers(data, len(image_paths))
+    # Entries before the last one were closed before the cut; the last may have lost promotions
+    partial = returned[-1] if truncated and returned else None
+    complete = [number in returned and number != partial for number in range(1, len(image_paths) + 1)]
+
+    # Add store name to each promotion
+    for promotions in pages:
         for promo in promotions:
             promo['store'] = store_name
 
+    return pages, complete
+
+def analyze_flyer_image(client, image_path, store_name):
+    """
+    Analyze a single flyer image using OpenAI Vision API.
+
+    Args:
+        client: OpenAI client instance
+        image_path: Path to flyer image
+        store_name: Name of the store
+
+    Returns:
+        List of promotions extracted from the image
+    """
+
+    print(f"  Analyzing {os.path.basename(image_path)}...")
+
+    try:
+        promotions = extract_flyer_pages(client, [image_path], store_name)[0][0]
+
         print(f"    ✓ Found {len(promotions)} promotions")
         return promotions
 
-    except json.JSONDecodeError as e:
+    except ResponseParseError as e:
         print(f"    ✗ JSON parsing error: {e}")
-        print(f"    Raw response: {content[:200]}")
         return []
 
     except Exception as e:
         print(f"    ✗ Error: {e}")
         return []
 
-def analyze_store_flyers(client, store_key, flyer_images_dir="flyer_images"):
+def split_batch_response(data, page_count):
     """
-    Analyze all flyer images for a single store.
+    Split a response back into one promotion list per page.
+
+    Accepts the multi-page {"pages": [...]} object, and for single-page
+    requests also the {"promotions": [...]} object or a plain array.
 
     Args:
-        client: OpenAI client instance
-        store_key: Store directory name (e.g., 'super-c')
-        flyer_images_dir: Base directory containing store folders
+        data: Parsed JSON returned for the request
+        page_count: Number of pages sent in the request
 
     Returns:
-        Dictionary with store info and all extracted promotions
+        List of validated promotion lists, one per page in request order
     """
+    pages = [[] for _ in range(page_count)]
 
-    store_dir = os.path.join(flyer_images_dir, store_key)
+    if page_count == 1:
+        # Single-page formats
+        if isinstance(data, list):
+            return [normalize_promotions(data)]
+        if isinstance(data, dict) and 'promotions' in data:
+            return [normalize_promotions(data['promotions'])]
 
-    if not os.path.exists(store_dir):
-        print(f"✗ Store directory not found: {store_dir}")
-        return None
+    if isinstance(data, dict):
+        entries = data.get('pages', [])
+    else:
+        entries = data
 
-    # Get all image files
-    image_files = sorted([
-        f for f in os.listdir(store_dir)
-        if f.endswith(('.jpg', '.jpeg', '.png'))
-    ])
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            continue
 
-    if not image_files:
-        print(f"✗ No images found in {store_dir}")
-        return None
+        page_number = entry.get('page', position + 1)
+        if not isinstance(page_number, int) or not 1 <= page_number <= page_count:
+            print(f"    ⚠ Ignoring promotions for unknown page {page_number}")
+            continue
 
-    print(f"\n{'='*60}")
-    print(f"Analyzing: {store_key.replace('-', ' ').title()}")
-    print(f"Pages: {len(image_files)}")
-    print(f"{'='*60}")
+        pages[page_number - 1].extend(normalize_promotions(entry.get('promotions', [])))
 
-    all_promotions = []
+    return pages
 
-    for image_file in image_files:
-        image_path = os.path.join(store_dir, image_file)
-        promotions = analyze_flyer_image(
-            client,
-            image_path,
-            store_key.replace('-', ' ')
-        )
-        all_promotions.extend(promotions)
+def returned_page_numbers(data, page_count):
+    """
+    Return the page numbers a response has an entry for, in response order.
 
-    print(f"{'─'*60}")
-    print(f"Total promotions extracted: {len(all_promotions)}")
-    print(f"{'─'*60}")
+    Args:
+        data: Parsed JSON returned for the request
+        page_count: Number of pages sent in the request
 
-    return {
-        'store': store_key.replace('-', ' '),
-        'store_key': store_key,
-        'page_count': len(image_files),
-        'promotion_count': len(all_promotions),
-        'promotions': all_promotions
-    }
+    Returns:
+        List of page numbers (1-based), one per page entry
+    """
+    if page_count == 1 and (isinstance(data, list) or (isinstance(data, dict) and 'promotions' in data)):
+        return [1]
 
-def analyze_all_flyers(flyer_images_dir="flyer_images", output_file="promotions.json"):
+    entries = data.get('pages', []) if isinstance(data, dict) else data
+    numbers = []
+    for position, entry in enumerate(entries or []):
+        if isinstance(entry, dict):
+            numbers.append(entry.get('page', position + 1))
+    return numbers
+
+def analyze_flyer_pages(client, image_paths, store_name):
     """
-    Analyze all downloaded flyer images and extract promotions.
+    Analyze several flyer pages of the same store in one Vision API request.
+
+    The extraction prompt is sent once for the whole group of pages and the
+    response is split back per page, which saves one round trip and one copy
+    of the prompt for every additional page.
 
     Args:
-        flyer_images_dir: Directory containing store folders with images
-        output_file: Output JSON file for extracted promotions
+        client: OpenAI client instance
+        image_paths: Paths to flyer images, in page order
+        store_name: Name of the store
 
     Returns:
-        Dictionary with all store promotions
+        List of promotion lists, one per image path
     """
+    if len(image_paths) == 1:
+        return [analyze_flyer_image(client, image_paths[0], store_name)]
 
-    # Initialize OpenAI client
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    names = ', '.join(os.path.basename(path) for path in image_paths)
+    print(f"  Analyzing {names}...")
 
-    if not os.path.exists(flyer_images_dir):
-        print(f"✗ Flyer images directory not found: {flyer_images_dir}")
-        return {}
+    try:
+        pages, _ = extract_flyer_pages(client, image_paths, store_name)
 
-    # Get all store directories
-    store_dirs = sorted([
-        d for d in os.listdir(flyer_images_dir)
-        if os.path.isdir(os.path.join(flyer_images_dir, d))
-    ])
+        total = sum(len(promotions) for promotions in pages)
+        print(f"    ✓ Found {total} promotions on {len(image_paths)} pages")
+        return pages
 
-    if not store_dirs:
-        print(f"✗ No store directories found in {flyer_images_dir}")
-        return {}
+    except ResponseParseError as e:
+        print(f"    ✗ JSON parsing error: {e}")
+        return [[] for _ in image_paths]
 
-    print("="*60)
-    print(f"Analyzing Flyers for {len(store_dirs)} Stores")
-    print("="*60)
-    print(f"Stores: {', '.join([s.replace('-', ' ').title() for s in store_dirs])}")
-    print()
+    except Exception as e:
+        print(f"    ✗ Error: {e}")
+        return [[] for _ in image_paths]
 
-    all_results = {}
-    stats = {
-        'stores_processed': 0,
-        'stores_succeeded': 0,
-        'total_pages': 0,
-        'total_promotions': 0,
-        'failed_stores': []
-    }
+def analyze_pages_in_groups(client, image_paths, store_name, pages_per_request=1):
+    """
+    Analyze flyer pages, packing up to pages_per_request pages in each request.
 
-    for store_key in store_dirs:
-        try:
-            stats['stores_processed'] += 1
+    Args:
+        client: OpenAI client instance
+        image_paths: Paths to flyer images, in page order
+        store_name: Name of the store
+        pages_per_request: Maximum number of pages sent in a single request
+
+    Returns:
+        Flat list of promotions from all pages, in page order
+    """
+    pages_per_request = max(1, pages_per_request)
+    all_promotions = []
 
-            result = analyze_store_flyers(client, store_key, flyer_images_dir)
+    for start in range(0, len(image_paths), pages_per_request):
+        group = image_paths[start:start + pages_per_request]
+        for promotions in analyze_flyer_pages(client, group, store_name):
+            all_promotions.extend(promotions)
 
-            if result and result['promotions']:
-                all_results[store_key] = result
-                stats['stores_succeeded'] += 1
-                stats['total_pages'] += result['page_count']
-                stats['total_promotions'] += result['promotion_count']
-            else:
-                stats['failed_stores'].append(store_key)
+    return all_promotions
 
-        except Exception as e:
-            print(f"\n✗ Error analyzing {store_key}: {e}")
-            stats['failed_stores'].append(store_key)
+def analyze_pages_with_checkpoints(client, image_paths, store_name, checkpoint_dir,
+                                   pages_per_request=1, resume=False):
+    """
+    Analyze flyer pages, checkpointing every page as soon as it completes.
+
+    Each page's promotions are written atomically to checkpoint_dir. With
+    resume=True, pages that already have a checkpoint for the same image bytes
+    and model are not sent to the API again. Only pages returned in full are
+    checkpointed. When a multi-page response is truncated, the pages it
+    finished before the cut are checkpointed, and only the page cut off and
+    the pages left out are retried, one per request. Pages whose request fails
+    (or is still truncated on its own) are left without a checkpoint so the
+    next resumed run retries only those.
+
+    Args:
+        client: OpenAI client instance
+        image_paths: Paths to flyer images, in page order
+        store_name: Name of the store
+        checkpoint_dir: Directory for this store's page checkpoints
+        pages_per_request: Maximum number of pages sent in a single request
+        resume: Reuse existing checkpoints instead of re-analyzing pages
+
+    Returns:
+        Tuple of (promotions from all successful pages in page order, failed image paths)
+    """
+    pages_per_request = max(1, pages_per_request)
+    fingerprints = {path: image_fingerprint(path) for path in image_paths}
+    page_results = {}
+    pending = []
+
+    for path in image_paths:
+        if resume:
+            promotions = load_page_checkpoint(checkpoint_dir, path, VISION_MODEL, fingerprints[path])
+            if promotions is not None:
+                page_results[path] = promotions
+                continue
+        pending.append(path)
+
+    if page_results:
+        print(f"  ↺ Resuming: {len(page_results)}/{len(image_paths)} pages already analyzed")
+
+    failed = []
 
-    # Save results
-    with open(output_file, 'w') as f:
-        json.dump(all_results, f, indent=2)
+    def analyze_group(group):
+        names = ', '.join(os.path.basename(path) for path in group)
+        print(f"  Analyzing {names}...")
 
-    # Print final summary
-    print(f"\n{'='*60}")
-    print("ANALYSIS COMPLETE")
-    print(f"{'='*60}")
-    print(f"Stores processed: {stats['stores_processed']}")
-    print(f"Stores succeeded: {stats['stores_succeeded']}")
-    print(f"Total pages analyzed: {stats['total_pages']}")
-    print(f"Total promotions extracted: {stats['total_promotions']}")
+        try:
+            pages, complete = extract_flyer_pages(client, group, store_name)
+        except Exception as e:
+            print(f"    ✗ Error: {e}")
+            failed.extend(group)
+            return
+
+        retry = []
+        for path, promotions, done in zip(group, pages, complete):
+            if done:
+                save_page_checkpoint(checkpoint_dir, path, promotions, VISION_MODEL, fingerprints[path])
+                page_results[path] = promotions
+            elif len(group) > 1:
+                retry.append(path)
+            else:
+                # Keep what was salvaged for this run, but analyze the page again on resume
+                page_results[path] = promotions
+                failed.append(path)
 
-    if stats['failed_stores']:
-        print(f"\nFailed stores:")
-        for store in stats['failed_stores']:
-            print(f"  - {store}")
+        print(f"    ✓ Found {sum(len(promotions) for promotions in pages)} promotions")
 
-    print(f"\n✓ Results saved to: {output_file}")
-    print(f"{'='*60}\n")
+        if retry:
+            print(f"    ⚠ {len(retry)} pages cut off or missing from the response, retrying one per request")
+            for path in retry:
+                analyze_group([path])
 
-    return all_results
+    for start in range(0, len(pending), pages_per_request):
+        analyze_group(pending[start:start + pages_per_request])
+
+    all_promotions = [promo for path in image_paths for promo in page_results.get(path, [])]
+    return all_promotions, failed
 
 if __name__ == "__main__":
+    from scripts.analyze_all_stores_partial import analyze_all_stores_partial
+
     print("="*60)
     print("FLYER PROMOTION ANALYZER")
     print("Using OpenAI Vision API")
     print("="*60)
     print()
 
-    # Analyze all flyers
-    results = analyze_all_flyers()
+    # Analyze every page of all flyers
+    results = analyze_all_stores_partial(num_pages=None, exclude_stores=[])
 
     if results:
         # Print summary by store
@@ -0,0 +1,136 @@
+"""
+Run coroutines on a background asyncio event loop and track them as jobs.
+
+Flask views are synchronous: a view waiting 10-30 s on OpenAI holds a worker
+thread for the whole round trip. Views can instead submit the call to an
+AsyncJobRunner and return a job ID at once. All submitted coroutines share one
+event loop thread, so a single process can keep hundreds of calls in flight
+while its worker threads stay free for cheap requests.
+
+Jobs are kept in memory and dropped ttl_seconds after they finish.
+"""
+
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from scripts.metrics import gauge
+
+JOBS_IN_FLIGHT = gauge('async_jobs_in_flight', 'Background async jobs submitted and not yet finished', ['runner'])
+
+
+class AsyncJobRunner:
+    """
+    Submit coroutine functions as jobs and look up their status.
+
+    The event loop thread is started on the first submit(), so creating a
+    runner at import time costs nothing.
+
+    Args:
+        name: Runner name, used as the metrics label
+        max_concurrency: Jobs allowed to run at once (the rest wait their turn)
+        ttl_seconds: How long finished jobs stay available to get()
+    """
+
+    def __init__(self, name, max_concurrency=200, ttl_seconds=3600):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name=f"{self.name}-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _run(self, job, coroutine_function, args):
+        async with self._semaphore:
+            job['status'] = 'running'
+            try:
+                job['result'] = await coroutine_function(*args)
+                job['status'] = 'done'
+            except Exception as e:
+                job['error'] = str(e)
+                job['status'] = 'error'
+            finally:
+                job['finished_at'] = time.time()
+                JOBS_IN_FLIGHT.dec(runner=self.name)
+
+    def submit(self, coroutine_function, *args):
+        """
+        Start coroutine_function(*args) on the event loop.
+
+        Returns:
+            Job ID to pass to get() or wait()
+        """
+        loop = self._ensure_loop()
+        self._prune()
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'pending',
+            'created_at': time.time(),
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+
+        JOBS_IN_FLIGHT.inc(runner=self.name)
+        future = asyncio.run_coroutine_threadsafe(self._run(job, coroutine_function, args), loop)
+        with self._lock:
+            self._futures[job['id']] = future
+        return job['id']
+
+    def get(self, job_id):
+        """Return a snapshot of a job (id, status, result, error, timestamps), or None if unknown."""
+        self._prune()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job finishes (or timeout seconds pass) and return its snapshot."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except FutureTimeoutError:
+                pass
+        return self.get(job_id)
+
+    def _prune(self):
+        """Forget jobs that finished more than ttl_seconds ago."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['finished_at'] is not None and job['finished_at'] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._futures.pop(job_id, None)
+
+    def shutdown(self):
+        """Stop the event loop thread (pending jobs are abandoned)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = self._semaphore = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
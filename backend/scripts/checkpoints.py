@@ -0,0 +1,93 @@
+"""
+Per-page checkpoints for flyer analysis runs.
+
+Each analyzed page is saved as its own small JSON file as soon as it completes,
+written atomically so a crash never leaves a half-written checkpoint. A checkpoint
+is only reused when the image bytes and extraction model still match, so stale
+results from an older flyer with the same file name are never picked up.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+
+
+def write_json_atomic(path, data):
+    """Write JSON to path via a temporary file and rename, so readers never see partial files."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def image_fingerprint(image_path):
+    """Return the sha256 of an image file."""
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def checkpoint_path(checkpoint_dir, image_path):
+    """Return the checkpoint file used for a flyer page."""
+    name = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(checkpoint_dir, f"{name}.json")
+
+
+def save_page_checkpoint(checkpoint_dir, image_path, promotions, model, fingerprint=None):
+    """
+    Save the promotions extracted from one page.
+
+    Args:
+        checkpoint_dir: Directory holding the store's checkpoints
+        image_path: Path to the analyzed flyer image
+        promotions: Promotions extracted from the page
+        model: Model used for the extraction
+        fingerprint: Precomputed image fingerprint (computed if omitted)
+    """
+    write_json_atomic(checkpoint_path(checkpoint_dir, image_path), {
+        'image': os.path.basename(image_path),
+        'fingerprint': fingerprint or image_fingerprint(image_path),
+        'model': model,
+        'completed_at': datetime.now().isoformat(),
+        'promotions': promotions
+    })
+
+
+def load_page_checkpoint(checkpoint_dir, image_path, model, fingerprint=None):
+    """
+    Load the promotions checkpointed for a page.
+
+    Returns:
+        List of promotions, or None if there is no valid checkpoint for this
+        exact image and model
+    """
+    path = checkpoint_path(checkpoint_dir, image_path)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('model') != model:
+        return None
+    if data.get('fingerprint') != (fingerprint or image_fingerprint(image_path)):
+        return None
+
+    return data.get('promotions', [])
@@ -0,0 +1,196 @@
+"""
+Parse flyer discount text into numeric savings.
+
+Flyers word discounts in many ways, in English and French: "Save $8",
+"50% d'économie", "Économisez jusqu'à 43%", "reg. 5.99", "2/14$",
+"3 for $18", "2 pour 1", "3rd free with purchase of two", "100 PTS". Each
+format is one precompiled pattern below, tried in order; parse_discount()
+returns the first match as typed fields:
+
+- original_price: price before the discount
+- savings_amount: original_price - price
+- savings_pct:    savings_amount as a percentage of original_price
+
+For multi-item deals ("2/14$", "2 pour 1", "2nd free") the flyer price is
+the single-item price: original_price is that price and savings_amount is what
+each item saves when buying the deal.
+
+Discounts without a cash value (loyalty points, "prix membre", "Chute de prix")
+give None for all three rather than a guess. Parsing runs once, when the flyer
+analysis is normalized (and at ingest for older results), so request handlers
+only read the stored numbers.
+"""
+
+import re
+
+SAVINGS_FIELDS = ['original_price', 'savings_amount', 'savings_pct']
+MAX_ORIGINAL_RATIO = 10  # Larger "savings" are misread prices (e.g. "255$/lb" for 2.55$/lb)
+
+NUMBER = r'(\d+(?:[.,]\d+)?)'
+MONEY = rf'(?:\$\s*{NUMBER}|{NUMBER}\s*(\$|¢))'  # "$8", "8$", "1,38$", "50¢"
+UP_TO = r"(?:(?:jusqu'à|jusqu’à|up to|plus de)\s*)?"
+WORD_COUNTS = {'one': 1, 'two': 2, 'three': 3, 'un': 1, 'une': 1, 'deux': 2, 'trois': 3}
+ORDINALS = {'2nd': 2, '2e': 2, 'deuxième': 2, 'second': 2, '3rd': 3, '3e': 3, 'troisième': 3}
+
+# Loyalty points: no cash savings
+POINTS_PATTERN = re.compile(r'\b\d[\d,\s]*\s*(?:pts|points)\b')
+# "2 pour/for 12$ ou/or 6,48$ chac./each": multi-buy with the single-item price
+MULTIBUY_OR_EACH_PATTERN = re.compile(
+    rf'(\d+)\s*(?:/|for|pour(?:/for)?)\s*\$?\s*{NUMBER}\s*\$?.*?\b(?:or|ou(?:/or)?)\s*\$?\s*{NUMBER}'
+)
+# "2/14$", "3 for $18", "2 pour/for 5$", "20 pour 4.49": multi-buy price
+MULTIBUY_PATTERN = re.compile(rf'(?:^|multiple\s+)(\d+)\s*(?:/|for|pour(?:/for)?)\s*\$?\s*{NUMBER}\s*\$?$')
+# "2 pour 1" (take 2, pay for 1), "buy 2 get 1 free"
+N_FOR_M_PATTERN = re.compile(r'^(\d+)\s*(?:pour|for)\s*(\d+)$')
+BUY_GET_FREE_PATTERN = re.compile(r'buy\s*(\d+)\s*get\s*(\d+)\s*free')
+# "3rd free with purchase of two", "2nd free with purchase"
+NTH_FREE_PATTERN = re.compile(r'\b(2nd|3rd|2e|3e|deuxième|troisième|second)\b.*?\b(?:free|gratuit)')
+# "Deuxième à 25% de rabais", "Obtenez 20% sur le 2e paquet"
+NTH_PERCENT_PATTERN = re.compile(r'(?:\b(2nd|2e|deuxième|second)\b.*?(\d+(?:[.,]\d+)?)\s*%|(\d+(?:[.,]\d+)?)\s*%.*?\b(2nd|2e|deuxième|second)\b)')
+# "reg. 5.99", "prix membre reg. 24.99", "reg. 4.49 à 5.99", "Was $6.99"
+REGULAR_PRICE_PATTERN = re.compile(rf'\b(?:reg|régulier|was|avant)\b\.?\s*:?\s*\$?\s*{NUMBER}')
+# "Save 30%", "50% d'économie", "Économisez jusqu'à 43%", "30% off", "rabais de 20%"
+PERCENT_PATTERN = re.compile(
+    rf'(?:\b(?:save|économisez|economisez|rabais de)\s*{UP_TO}(\d+(?:[.,]\d+)?)\s*%'
+    rf"|{UP_TO}(\d+(?:[.,]\d+)?)\s*%\s*(?:off|d'économie|d’économie|de rabais))"
+)
+# "Save $8", "1$ d'économie", "Économisez 50¢", "rabais de 8$", "5$ de rabais", "Les membres économisent 2$"
+AMOUNT_PATTERN = re.compile(
+    rf"(?:\b(?:save|économisez|economisez|économisent|rabais(?:\s+de)?)\s*{UP_TO}{MONEY}"
+    rf"|{MONEY}(?:\s*/\s*\w+)?\s*(?:d'économie|d’économie|de rabais|off)"
+    rf"|\b(?:save|économisez|economisez)\s*{NUMBER}$)"
+)
+# "à l'achat de 2", "when you buy 2": the savings are spread over that many items
+QUANTITY_CONDITION_PATTERN = re.compile(r"(?:à l'achat de|à l’achat de|when you buy|with purchase of)\s*(\d+|\w+)")
+
+
+def to_number(text):
+    return float(text.replace(',', '.'))
+
+
+def money(groups):
+    """Return the amount in dollars from the (dollar-first, amount, currency) groups of MONEY."""
+    before, after, currency = groups
+    if before is not None:
+        return to_number(before)
+    return to_number(after) / 100 if currency == '¢' else to_number(after)
+
+
+def count_word(text):
+    """Return an item count written as digits or a word ("2", "two"), or None."""
+    if text.isdigit():
+        return int(text)
+    return WORD_COUNTS.get(text)
+
+
+def from_original(price, original_price):
+    """Build the savings fields from the (per item) price paid and the price before the discount."""
+    if original_price is None or original_price <= price or original_price > price * MAX_ORIGINAL_RATIO:
+        return empty_savings()
+    savings = original_price - price
+    return {
+        'original_price': round(original_price, 2),
+        'savings_amount': round(savings, 2),
+        'savings_pct': round(savings / original_price * 100, 1)
+    }
+
+
+def from_percent(price, percent):
+    if not 0 < percent < 100:
+        return empty_savings()
+    return from_original(price, price / (1 - percent / 100))
+
+
+def empty_savings():
+    return {field: None for field in SAVINGS_FIELDS}
+
+
+def parse_discount(discount, price):
+    """
+    Parse discount text into original_price, savings_amount and savings_pct.
+
+    Args:
+        discount: Discount text from the flyer (e.g. "Save $8", "reg. 5.99")
+        price: Sale price of the promotion
+
+    Returns:
+        Dict with the three savings fields (all None when there are no cash savings)
+    """
+    if not isinstance(price, (int, float)) or isinstance(price, bool) or price <= 0:
+        return empty_savings()
+
+    text = ' '.join(str(discount or '').casefold().split())
+    if not text or POINTS_PATTERN.search(text):
+        return empty_savings()
+
+    match = MULTIBUY_OR_EACH_PATTERN.search(text)
+    if match:
+        count, total, each = match.groups()
+        return from_original(to_number(total) / int(count), to_number(each))
+
+    match = N_FOR_M_PATTERN.match(text)
+    if match and int(match.group(2)) < int(match.group(1)):
+        # "2 pour 1": take 2, pay for 1
+        taken, paid = int(match.group(1)), int(match.group(2))
+        return from_original(price * paid / taken, price)
+
+    match = BUY_GET_FREE_PATTERN.search(text)
+    if match:
+        paid, free = int(match.group(1)), int(match.group(2))
+        return from_original(price * paid / (paid + free), price)
+
+    match = MULTIBUY_PATTERN.search(text)
+    if match:
+        count, total = int(match.group(1)), to_number(match.group(2))
+        if price >= total - 0.01:
+            return empty_savings()  # The flyer price is the multi-buy total; no regular price given
+        # Otherwise the flyer price is the single-item price and the multi-buy is the deal
+        return from_original(total / count, price)
+
+    match = NTH_FREE_PATTERN.search(text)
+    if match:
+        taken = ORDINALS[match.group(1)]
+        return from_original(price * (taken - 1) / taken, price)
+
+    match = NTH_PERCENT_PATTERN.search(text)
+    if match:
+        percent = to_number(match.group(2) or match.group(3))
+        return from_original(price * (1 - percent / 200), price)  # Averaged over the two items
+
+    match = REGULAR_PRICE_PATTERN.search(text)
+    if match:
+        return from_original(price, to_number(match.group(1)))
+
+    match = PERCENT_PATTERN.search(text)
+    if match:
+        return from_percent(price, to_number(match.group(1) or match.group(2)))
+
+    match = AMOUNT_PATTERN.search(text)
+    if match:
+        groups = match.groups()
+        if groups[6] is not None:
+            amount = to_number(groups[6])
+        else:
+            amount = money(groups[0:3]) if any(g is not None for g in groups[0:3]) else money(groups[3:6])
+
+        condition = QUANTITY_CONDITION_PATTERN.search(text)
+        if condition:
+            count = count_word(condition.group(1))
+            if count:
+                amount /= count
+        return from_original(price, price + amount)
+
+    return empty_savings()
+
+
+def add_discount_savings(promotions):
+    """
+    Return promotions with the savings fields added.
+
+    Promotions that already have them (parsed during analysis) are returned as they are.
+    """
+    return [
+        promo if 'savings_amount' in promo
+        else dict(promo, **parse_discount(promo.get('discount'), promo.get('price')))
+        for promo in promotions
+    ]
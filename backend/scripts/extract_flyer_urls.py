@@ -1,16 +1,17 @@
 """
 Extract image URLs from a RedFlagDeals flyer page.
 Automatically parses the OpenSeaDragon tileSources to find original image URLs.
+
+Thin CLI over scripts.pipeline (see scripts/pipeline/scraping.py).
 """
 
-from playwright.sync_api import sync_playwright
-import re
 import json
-import time
+from scripts.pipeline.scraping import open_browser, extract_all_image_urls
+from scripts.pipeline.scraping import extract_image_urls as extract_page_image_urls
 
 def extract_image_urls(flyer_url, store_name):
     """
-    Extract all original image URLs from a flyer page.
+    Extract all original image URLs from a single flyer page.
 
     Args:
         flyer_url: Full URL to the flyer page
@@ -20,51 +21,22 @@ def extract_image_urls(flyer_url, store_name):
         List of image URLs
     """
 
-    image_urls = []
-
-    with sync_playwright() as p:
-        print(f"\nExtracting images for: {store_name}")
-        print(f"URL: {flyer_url}")
-
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
-        # Navigate to flyer page
-        page.goto(flyer_url, wait_until="domcontentloaded")
-
-        # Wait for content to load
-        time.sleep(2)
-
-        # Get page HTML
-        html_content = page.content()
-
-        # Close browser (we only needed the HTML)
-        browser.close()
-
-        # Parse HTML to extract image URLs from tileSources
-        # Look for pattern: https://[a-z].dam-img.rfdcontent.com/cms/.../*_original.jpg
+    print(f"\nExtracting images for: {store_name}")
+    print(f"URL: {flyer_url}")
 
-        # Method 1: Look for tileSources array in OpenSeaDragon script
-        pattern = r'https://[a-z]\.dam-img\.rfdcontent\.com/cms/[0-9/]+_original\.jpg'
-        matches = re.findall(pattern, html_content)
+    with open_browser() as page:
+        image_urls = extract_page_image_urls(page, flyer_url)
 
-        if matches:
-            # Remove duplicates while preserving order
-            seen = set()
-            for url in matches:
-                if url not in seen:
-                    seen.add(url)
-                    image_urls.append(url)
-
-            print(f"  ✓ Found {len(image_urls)} images")
-        else:
-            print(f"  ⚠ No images found - flyer format may have changed")
+    if image_urls:
+        print(f"  ✓ Found {len(image_urls)} images")
+    else:
+        print(f"  ⚠ No images found - flyer format may have changed")
 
-        return image_urls
+    return image_urls
 
 def extract_all_flyers(flyers_json="discovered_flyers.json"):
     """
-    Extract image URLs for all discovered flyers.
+    Extract image URLs for all discovered flyers, reusing one browser.
 
     Args:
         flyers_json: Path to JSON file with flyer information
@@ -80,32 +52,8 @@ def extract_all_flyers(flyers_json="discovered_flyers.json"):
     print(f"Extracting images from {len(flyers)} flyers...\n")
     print("="*60)
 
-    all_image_urls = {}
-
-    for flyer in flyers:
-        store = flyer['store']
-        url = flyer['url']
-
-        try:
-            # Extract image URLs
-            image_urls = extract_image_urls(url, store)
-
-            if image_urls:
-                # Clean store name for folder/key name
-                store_key = store.lower().replace(' ', '-')
-                all_image_urls[store_key] = {
-                    'store': store,
-                    'title': flyer['title'],
-                    'date_range': flyer['date_range'],
-                    'url': url,
-                    'image_urls': image_urls,
-                    'image_count': len(image_urls)
-                }
-
-        except Exception as e:
-            print(f"  ✗ Error extracting {store}: {e}")
-
-    return all_image_urls
+    with open_browser() as page:
+        return extract_all_image_urls(page, flyers)
 
 def save_image_urls(image_data, output_file="flyer_image_urls.json"):
     """Save extracted image URLs to JSON file."""
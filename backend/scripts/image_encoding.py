@@ -0,0 +1,56 @@
+"""
+Low-copy base64 encoding of flyer images for the OpenAI Vision API.
+
+The naive path (read file -> b64encode -> decode -> f-string data URL) makes four
+full-size copies of every image. This encoder memory-maps the file and encodes it
+chunk by chunk straight into a preallocated buffer that already holds the data URL
+prefix, so the only full-size allocations are that buffer and the final string.
+"""
+
+import os
+import mmap
+import binascii
+
+# Must be a multiple of 3 so chunks encode without padding in the middle
+CHUNK_SIZE = 3 * 256 * 1024
+
+
+def encoded_length(size):
+    """Return the base64 length of `size` bytes (with padding)."""
+    return 4 * ((size + 2) // 3)
+
+
+def encode_image_data_url(image_path, mime_type="image/jpeg"):
+    """
+    Encode an image file as a base64 data URL.
+
+    Args:
+        image_path: Path to the image file
+        mime_type: MIME type written in the data URL prefix
+
+    Returns:
+        Data URL string (e.g. "data:image/jpeg;base64,...")
+    """
+    prefix = f"data:{mime_type};base64,".encode('ascii')
+    size = os.path.getsize(image_path)
+
+    if size == 0:
+        return prefix.decode('ascii')
+
+    buffer = bytearray(len(prefix) + encoded_length(size))
+    buffer[:len(prefix)] = prefix
+    position = len(prefix)
+
+    with open(image_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            source = memoryview(mapped)
+            try:
+                for start in range(0, size, CHUNK_SIZE):
+                    chunk = binascii.b2a_base64(source[start:start + CHUNK_SIZE], newline=False)
+                    buffer[position:position + len(chunk)] = chunk
+                    position += len(chunk)
+            finally:
+                # Views must be released before the mapping can be closed
+                source.release()
+
+    return buffer.decode('ascii')
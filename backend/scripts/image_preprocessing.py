@@ -0,0 +1,237 @@
+"""
+Prepare flyer images for the OpenAI Vision API.
+Crops blank margins, downscales pages to the resolution the model actually uses,
+splits tall pages into overlapping tiles and re-encodes them as compact JPEGs.
+Processed tiles are cached on disk by content hash so reruns skip the work.
+Tiles and manifests are written atomically, so a crash never leaves a truncated
+file behind for the next run to upload; an unreadable manifest is rebuilt.
+When a page is processed again (its image or the settings changed), the cache
+entries previously built from the same source path are removed.
+"""
+
+import os
+import glob
+import json
+import hashlib
+import tempfile
+from PIL import Image, ImageOps
+from scripts.checkpoints import write_json_atomic
+
+# Cache location for processed tiles
+CACHE_DIR = "data/preprocessed_images"
+
+# With detail "high", gpt-4o fits an image within 2048 x 2048, then scales its
+# shortest side down to 768px, so larger uploads only cost bytes. Tiles are kept
+# at most 3 x 512px tiles tall.
+TILE_SHORT_SIDE = 768
+MAX_IMAGE_SIDE = 2048
+TILE_MAX_HEIGHT = 1536
+TILE_OVERLAP = 48  # Pixels shared by neighbouring tiles so no price is cut in half
+
+JPEG_QUALITY = 82
+MARGIN_THRESHOLD = 245  # Grayscale level above which a pixel counts as blank
+MARGIN_PADDING = 8
+
+
+def crop_margins(image, threshold=MARGIN_THRESHOLD, padding=MARGIN_PADDING):
+    """
+    Crop near-white borders around the flyer content.
+
+    Args:
+        image: PIL image
+        threshold: Grayscale value above which pixels are treated as margin
+        padding: Pixels of margin kept around the content
+
+    Returns:
+        Cropped PIL image (the original image if nothing can be cropped)
+    """
+    mask = ImageOps.grayscale(image).point(lambda value: 255 if value < threshold else 0)
+    bbox = mask.getbbox()
+
+    if not bbox:
+        return image
+
+    left, top, right, bottom = bbox
+    bbox = (
+        max(left - padding, 0),
+        max(top - padding, 0),
+        min(right + padding, image.width),
+        min(bottom + padding, image.height)
+    )
+
+    if bbox == (0, 0, image.width, image.height):
+        return image
+
+    return image.crop(bbox)
+
+
+def split_into_tiles(image, short_side=TILE_SHORT_SIDE, max_tile_height=TILE_MAX_HEIGHT, overlap=TILE_OVERLAP):
+    """
+    Downscale an image so its shortest side is short_side and split it into vertical tiles.
+
+    Images are never upscaled, and wide images are also kept within
+    MAX_IMAGE_SIDE pixels across. Tiles overlap by `overlap` pixels so text on a
+    cut line is fully visible in one tile.
+
+    Args:
+        image: PIL image
+        short_side: Target length of the shortest side in pixels
+        max_tile_height: Maximum height of a single tile
+        overlap: Pixels shared by consecutive tiles
+
+    Returns:
+        List of PIL images, top to bottom
+    """
+    scale = min(1.0, short_side / min(image.size), MAX_IMAGE_SIDE / image.width)
+    if scale < 1.0:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    if image.height <= max_tile_height:
+        return [image]
+
+    tile_count = -(-(image.height - overlap) // (max_tile_height - overlap))
+    step = -(-(image.height - overlap) // tile_count)
+
+    tiles = []
+    for idx in range(tile_count):
+        top = idx * step
+        bottom = min(top + step + overlap, image.height)
+        tiles.append(image.crop((0, top, image.width, bottom)))
+
+    return tiles
+
+
+def save_jpeg_atomic(image, path, quality):
+    """Save a JPEG via a temporary file and rename, so readers never see a partial tile."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-', suffix='.jpg')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, 'JPEG', quality=quality, optimize=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_hash(image_path, settings):
+    """Hash an image's bytes together with the preprocessing settings."""
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8'))
+
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def read_manifest(manifest_path):
+    """
+    Return the tile paths listed in a cache manifest.
+
+    Returns:
+        List of tile paths, or None if the manifest is missing, unreadable or
+        not a manifest, in which case the tiles are rebuilt
+    """
+    try:
+        with open(manifest_path, 'r') as f:
+            tile_paths = json.load(f)['tiles']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    if not isinstance(tile_paths, list) or not all(isinstance(path, str) for path in tile_paths):
+        return None
+    return tile_paths
+
+
+def prune_cache_entries(cache_dir, image_path, keep_key):
+    """
+    Remove cache entries built earlier from the same source image.
+
+    Every edit of a flyer page (or change of settings) gives it a new key, so
+    without this the tiles of each previous version would stay on disk.
+
+    Args:
+        cache_dir: Directory where processed tiles are stored
+        image_path: Source image whose older entries are removed
+        keep_key: Key of the entry just written
+
+    Returns:
+        Number of cache entries removed
+    """
+    source = os.path.abspath(image_path)
+    removed = 0
+
+    for manifest_path in glob.glob(os.path.join(cache_dir, '*.json')):
+        key = os.path.splitext(os.path.basename(manifest_path))[0]
+        if key == keep_key:
+            continue
+
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest_source = json.load(f).get('source')
+        except (OSError, ValueError, AttributeError):
+            continue
+        if not isinstance(manifest_source, str) or os.path.abspath(manifest_source) != source:
+            continue
+
+        # Manifest first, so a crash in between never leaves a manifest without its tiles
+        os.remove(manifest_path)
+        for tile_path in glob.glob(os.path.join(cache_dir, f"{key}_*.jpg")):
+            os.remove(tile_path)
+        removed += 1
+
+    return removed
+
+
+def preprocess_flyer_image(image_path, cache_dir=CACHE_DIR, short_side=TILE_SHORT_SIDE,
+                           max_tile_height=TILE_MAX_HEIGHT, quality=JPEG_QUALITY):
+    """
+    Crop, downscale, tile and re-encode a flyer page, using the on-disk cache.
+
+    Args:
+        image_path: Path to the original flyer image
+        cache_dir: Directory where processed tiles are stored
+        short_side: Target length of the shortest side in pixels
+        max_tile_height: Maximum tile height in pixels
+        quality: JPEG quality for the re-encoded tiles
+
+    Returns:
+        List of paths to the processed JPEG tiles, top to bottom
+    """
+    settings = {
+        'short_side': short_side,
+        'max_side': MAX_IMAGE_SIDE,
+        'max_tile_height': max_tile_height,
+        'overlap': TILE_OVERLAP,
+        'quality': quality,
+        'margin_threshold': MARGIN_THRESHOLD
+    }
+    key = file_hash(image_path, settings)
+    manifest_path = os.path.join(cache_dir, f"{key}.json")
+
+    # Reuse cached tiles when the manifest is readable and every tile is present
+    tile_paths = read_manifest(manifest_path)
+    if tile_paths is not None and all(os.path.exists(path) for path in tile_paths):
+        return tile_paths
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with Image.open(image_path) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        tiles = split_into_tiles(crop_margins(image), short_side, max_tile_height)
+
+    tile_paths = []
+    for idx, tile in enumerate(tiles, 1):
+        tile_path = os.path.join(cache_dir, f"{key}_{idx:02d}.jpg")
+        save_jpeg_atomic(tile, tile_path, quality)
+        tile_paths.append(tile_path)
+
+    # Write the manifest last so a partial run is never treated as cached
+    write_json_atomic(manifest_path, {'source': image_path, 'settings': settings, 'tiles': tile_paths})
+    prune_cache_entries(cache_dir, image_path, key)
+
+    return tile_paths
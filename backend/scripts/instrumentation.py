@@ -0,0 +1,247 @@
+"""
+Spans, OpenAI cost accounting and the JSONL run log for the flyer pipeline.
+
+Wrap a unit of work in span() to time it. Spans nest (run → stage → store →
+request) through a context variable, which the pipeline executors carry into
+worker threads. Every finished span is:
+
+- observed in the pipeline_span_seconds histogram (see scripts/metrics.py)
+- appended as one JSON line to the active run log, with its parent span,
+  wall time and attributes (bytes, tokens, estimated cost, ...)
+
+Usage:
+    with start_run("data/promotion_results/_run_log.jsonl") as run:
+        with span('stage', stage='download') as s:
+            s.add('bytes', len(data))
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from datetime import datetime
+from contextlib import contextmanager
+from scripts.metrics import counter, histogram
+
+# USD per 1M tokens (input, output). Update when OpenAI pricing changes.
+MODEL_PRICES = {
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-3.5-turbo': (0.50, 1.50),
+}
+
+SPAN_SECONDS = histogram(
+    'pipeline_span_seconds', 'Wall time of pipeline spans in seconds', ['span']
+)
+SPAN_ERRORS = counter(
+    'pipeline_span_errors_total', 'Pipeline spans that raised an exception', ['span']
+)
+OPENAI_TOKENS = counter(
+    'openai_tokens_total', 'Tokens sent to and received from OpenAI', ['model', 'direction']
+)
+OPENAI_COST = counter(
+    'openai_cost_dollars_total', 'Estimated OpenAI spend in US dollars', ['model']
+)
+BYTES_TRANSFERRED = counter(
+    'pipeline_bytes_total', 'Bytes downloaded or uploaded by the pipeline', ['direction']
+)
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_current_run = contextvars.ContextVar('current_run', default=None)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Return the estimated dollar cost of a request, or 0.0 for unknown models."""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class Span:
+    """One timed unit of work with free-form attributes."""
+
+    def __init__(self, name, parent=None, **attrs):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.parent_id = parent.span_id if parent else None
+        self.attrs = attrs
+        self.started_at = datetime.now().isoformat()
+        self.seconds = None
+        self._lock = threading.Lock()
+
+    def set(self, **attrs):
+        """Set attributes on the span."""
+        with self._lock:
+            self.attrs.update(attrs)
+
+    def add(self, key, amount):
+        """Add to a numeric attribute (e.g. bytes or tokens)."""
+        with self._lock:
+            self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def add_to_chain(self, key, amount):
+        """Add to an attribute of this span and all its ancestors (totals roll up)."""
+        node = self
+        while node is not None:
+            node.add(key, amount)
+            node = node.parent
+
+    def to_record(self, run_id):
+        with self._lock:
+            attrs = dict(self.attrs)
+        if 'cost' in attrs:
+            attrs['cost'] = round(attrs['cost'], 6)
+        return {
+            'run_id': run_id,
+            'span': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'started_at': self.started_at,
+            'seconds': self.seconds,
+            **attrs
+        }
+
+
+class RunLog:
+    """Append-only JSONL log of the spans of one pipeline run, with usage totals."""
+
+    def __init__(self, path, run_id=None):
+        self.path = path
+        self.run_id = run_id or datetime.now().strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        self.totals = {'prompt_tokens': 0, 'completion_tokens': 0, 'cost': 0.0, 'bytes': 0}
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._file = open(path, 'a')
+
+    def write(self, record):
+        if self._file is None:
+            return
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def add_totals(self, **amounts):
+        with self._lock:
+            for key, amount in amounts.items():
+                self.totals[key] = self.totals.get(key, 0) + amount
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def current_span():
+    """Return the innermost active span, or None."""
+    return _current_span.get()
+
+
+def current_run():
+    """Return the active run log, or None."""
+    return _current_run.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block of work as a child of the current span.
+
+    Yields:
+        The Span, so the block can attach attributes with set() and add()
+    """
+    current = Span(name, _current_span.get(), **attrs)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=f"{type(e).__name__}: {e}")
+        SPAN_ERRORS.inc(span=name)
+        raise
+    finally:
+        current.seconds = round(time.perf_counter() - started, 4)
+        _current_span.reset(token)
+        SPAN_SECONDS.observe(current.seconds, span=name)
+
+        run = _current_run.get()
+        if run is not None:
+            run.write(current.to_record(run.run_id))
+
+
+@contextmanager
+def start_run(path, **attrs):
+    """
+    Start a run log and a root 'run' span.
+
+    Args:
+        path: JSONL file to append span records to (None to only collect totals)
+        **attrs: Attributes for the root span (e.g. config settings)
+
+    Yields:
+        The RunLog; its totals hold tokens, cost and bytes when the block ends
+    """
+    run = RunLog(path)
+    token = _current_run.set(run)
+    try:
+        with span('run', **attrs):
+            yield run
+    finally:
+        _current_run.reset(token)
+        run.close()
+
+
+def record_usage(model, usage):
+    """
+    Account for the token usage of one OpenAI response.
+
+    Updates the token and cost counters, the current span and its ancestors,
+    and the run totals.
+
+    Args:
+        model: Model name used for the request
+        usage: The response's usage object (may be None)
+
+    Returns:
+        Estimated cost in dollars
+    """
+    if usage is None:
+        return 0.0
+
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    OPENAI_TOKENS.inc(prompt_tokens, model=model, direction='prompt')
+    OPENAI_TOKENS.inc(completion_tokens, model=model, direction='completion')
+    OPENAI_COST.inc(cost, model=model)
+
+    current = _current_span.get()
+    if current is not None:
+        current.add_to_chain('prompt_tokens', prompt_tokens)
+        current.add_to_chain('completion_tokens', completion_tokens)
+        current.add_to_chain('cost', cost)
+
+    run = _current_run.get()
+    if run is not None:
+        run.add_totals(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost=cost)
+
+    return cost
+
+
+def record_bytes(amount, direction='download'):
+    """Account for bytes transferred by the current span."""
+    BYTES_TRANSFERRED.inc(amount, direction=direction)
+
+    current = _current_span.get()
+    if current is not None:
+        current.add_to_chain('bytes', amount)
+
+    run = _current_run.get()
+    if run is not None:
+        run.add_totals(bytes=amount)
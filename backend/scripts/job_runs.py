@@ -0,0 +1,251 @@
+"""
+Durable queue and run records of background jobs, shared by every process on the host.
+
+The API never runs the scrape pipeline itself. The scheduler and POST
+/api/scrape enqueue a run, and the worker process (worker.py) claims it, runs
+it and records the outcome. Each run is a row in a small SQLite database:
+
+    queued -> running -> succeeded | failed | abandoned
+
+Enqueueing and claiming are IMMEDIATE transactions. A job has at most one run
+queued or running at a time, so two scrapes never overlap, even with several
+API or worker processes. Scheduled runs also record the slot they were
+scheduled for (e.g. Monday 01:00); a slot that already has a successful run is
+not queued again.
+
+A running row has a heartbeat refreshed by the worker while the job works. If
+the worker dies, the heartbeat goes stale: after stale_after seconds the run
+goes back to the queue, or is marked 'abandoned' once it has been claimed
+max_attempts times.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from contextlib import closing
+
+STALE_AFTER_SECONDS = 15 * 60
+HEARTBEAT_SECONDS = 60
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    trigger TEXT NOT NULL,
+    scheduled_for TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pid INTEGER,
+    queued_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS job_runs_job_status ON job_runs (job, status);
+"""
+
+
+class JobRuns:
+    """
+    Job queue and run records in a SQLite file.
+
+    Args:
+        path: Database file (created if missing)
+        stale_after: Seconds without a heartbeat after which a running run counts as dead
+        max_attempts: Claims of a run before a dead worker's run is abandoned instead of requeued
+    """
+
+    def __init__(self, path, stale_after=STALE_AFTER_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        # A connection per call: safe across threads, and SQLite locks the file across processes
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _transaction(self, work):
+        """Run work(connection, now) in an IMMEDIATE transaction, after recovering dead runs."""
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            self._recover_stale(connection, now)
+            result = work(connection, now)
+            connection.execute('COMMIT')
+            return result
+        except Exception:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.close()
+
+    def _recover_stale(self, connection, now):
+        """Requeue (or abandon, after max_attempts) running runs whose worker stopped beating."""
+        stale = "status = 'running' AND heartbeat_at < ?"
+        connection.execute(
+            f"UPDATE job_runs SET status = 'abandoned', finished_at = ?, error = 'No heartbeat' "
+            f"WHERE {stale} AND attempts >= ?",
+            (now, now - self.stale_after, self.max_attempts)
+        )
+        connection.execute(
+            f"UPDATE job_runs SET status = 'queued', pid = NULL, error = 'No heartbeat' WHERE {stale}",
+            (now - self.stale_after,)
+        )
+
+    def enqueue(self, job, trigger, scheduled_for=None):
+        """
+        Queue a run unless the job already has one queued or running (or the slot already ran).
+
+        Args:
+            job: Job name (e.g. 'weekly_scrape')
+            trigger: What queued it ('cron', 'catch_up', 'manual')
+            scheduled_for: Slot a scheduled run belongs to, as an ISO timestamp
+
+        Returns:
+            The new run ID, or None if the run must not be queued
+        """
+        def work(connection, now):
+            pending = connection.execute(
+                "SELECT 1 FROM job_runs WHERE job = ? AND status IN ('queued', 'running')", (job,)
+            ).fetchone()
+            done = scheduled_for is not None and connection.execute(
+                "SELECT 1 FROM job_runs WHERE job = ? AND scheduled_for = ? AND status = 'succeeded'",
+                (job, scheduled_for)
+            ).fetchone()
+            if pending or done:
+                return None
+
+            cursor = connection.execute(
+                "INSERT INTO job_runs (job, trigger, scheduled_for, status, queued_at) "
+                "VALUES (?, ?, ?, 'queued', ?)",
+                (job, trigger, scheduled_for, now)
+            )
+            return cursor.lastrowid
+
+        return self._transaction(work)
+
+    def claim(self, jobs=None):
+        """
+        Take the oldest queued run for this process and mark it running.
+
+        Args:
+            jobs: Job names this worker can run (None for any)
+
+        Returns:
+            The claimed run as a dict, or None if nothing is queued
+        """
+        def work(connection, now):
+            query = (
+                "SELECT id FROM job_runs WHERE status = 'queued' "
+                "AND job NOT IN (SELECT job FROM job_runs WHERE status = 'running')"
+            )
+            params = []
+            if jobs is not None:
+                query += f" AND job IN ({', '.join('?' * len(jobs))})"
+                params.extend(jobs)
+            row = connection.execute(query + ' ORDER BY id LIMIT 1', params).fetchone()
+            if row is None:
+                return None
+
+            connection.execute(
+                "UPDATE job_runs SET status = 'running', attempts = attempts + 1, pid = ?, "
+                "started_at = ?, heartbeat_at = ?, error = NULL WHERE id = ?",
+                (os.getpid(), now, now, row['id'])
+            )
+            return dict(connection.execute('SELECT * FROM job_runs WHERE id = ?', (row['id'],)).fetchone())
+
+        return self._transaction(work)
+
+    def heartbeat(self, run_id):
+        """Mark a run as still alive."""
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE job_runs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                (time.time(), run_id)
+            )
+
+    def keep_alive(self, run_id, interval=HEARTBEAT_SECONDS):
+        """
+        Refresh a run's heartbeat from a daemon thread until the returned function is called.
+
+        Returns:
+            Function that stops the heartbeat
+        """
+        stopped = threading.Event()
+
+        def beat():
+            while not stopped.wait(interval):
+                try:
+                    self.heartbeat(run_id)
+                except sqlite3.Error as e:
+                    print(f"⚠ Could not record heartbeat of run {run_id}: {e}")
+
+        threading.Thread(target=beat, name=f'job-run-{run_id}-heartbeat', daemon=True).start()
+        return stopped.set
+
+    def finish(self, run_id, status, error=None):
+        """
+        Record the end of a run ('succeeded' or 'failed') claimed by this process.
+
+        A run that was requeued or abandoned meanwhile (stale heartbeat), or
+        claimed again by another worker, is left as it is.
+
+        Returns:
+            True if the run was updated
+        """
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                "UPDATE job_runs SET status = ?, finished_at = ?, error = ? "
+                "WHERE id = ? AND status = 'running' AND pid = ?",
+                (status, time.time(), error, run_id, os.getpid())
+            )
+        return cursor.rowcount == 1
+
+    def get(self, run_id):
+        """Return a run as a dict, or None."""
+        with closing(self._connect()) as connection:
+            row = connection.execute('SELECT * FROM job_runs WHERE id = ?', (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def active(self, job):
+        """Return the queued or live running run of a job as a dict, or None."""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT * FROM job_runs WHERE job = ? AND (status = 'queued' "
+                "OR (status = 'running' AND heartbeat_at >= ?)) ORDER BY id DESC LIMIT 1",
+                (job, time.time() - self.stale_after)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def succeeded(self, job, scheduled_for):
+        """True if a run of this scheduled slot succeeded."""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT 1 FROM job_runs WHERE job = ? AND scheduled_for = ? AND status = 'succeeded'",
+                (job, scheduled_for)
+            ).fetchone()
+        return row is not None
+
+    def recent(self, job=None, limit=20):
+        """Return the latest runs, newest first."""
+        with closing(self._connect()) as connection:
+            if job is None:
+                rows = connection.execute('SELECT * FROM job_runs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+            else:
+                rows = connection.execute(
+                    'SELECT * FROM job_runs WHERE job = ? ORDER BY id DESC LIMIT ?', (job, limit)
+                ).fetchall()
+        return [dict(row) for row in rows]
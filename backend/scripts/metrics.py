@@ -0,0 +1,214 @@
+"""
+In-process Prometheus-style metrics.
+
+Counters, gauges and histograms live in a module-level registry and are rendered
+in the Prometheus text exposition format by render_prometheus(). Nothing is
+pushed anywhere: the API serves the text on /api/metrics and CLI runs write it
+to a .prom file that a node_exporter textfile collector can pick up.
+
+Metrics are created once at import time with counter(), gauge() or histogram();
+calling them again with the same name returns the existing metric.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+# Seconds; covers fast API reads (ms) through long Vision calls and pipeline stages
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+REGISTRY = {}
+_registry_lock = threading.Lock()
+
+
+def escape_label_value(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labelnames, labelvalues, extra=None):
+    """Render {name="value",...} for a sample, or '' when there are no labels."""
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+def format_value(value):
+    """Render a sample value (integers without a trailing .0)."""
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class holding one value per label combination."""
+
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        """Yield (suffix, labels string, value) for every sample."""
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield '', format_labels(self.labelnames, key), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing total."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down (e.g. requests in flight)."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, plus sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a with-block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state['count'] if state else 0
+
+    def total(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state['sum'] if state else 0.0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, dict(state, counts=list(state['counts']))) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state['counts']):
+                cumulative += count
+                yield '_bucket', format_labels(self.labelnames, key, ('le', format_value(bound))), cumulative
+            yield '_sum', format_labels(self.labelnames, key), state['sum']
+            yield '_count', format_labels(self.labelnames, key), state['count']
+
+
+def _register(metric_class, name, help_text, labelnames, **kwargs):
+    with _registry_lock:
+        metric = REGISTRY.get(name)
+        if metric is None:
+            metric = REGISTRY[name] = metric_class(name, help_text, labelnames, **kwargs)
+        elif not isinstance(metric, metric_class) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} is already registered with a different type or labels")
+        return metric
+
+
+def counter(name, help_text, labelnames=()):
+    """Return the counter registered under name, creating it if needed."""
+    return _register(Counter, name, help_text, labelnames)
+
+
+def gauge(name, help_text, labelnames=()):
+    """Return the gauge registered under name, creating it if needed."""
+    return _register(Gauge, name, help_text, labelnames)
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Return the histogram registered under name, creating it if needed."""
+    return _register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+
+def render_prometheus():
+    """Render every registered metric in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = sorted(REGISTRY.values(), key=lambda metric: metric.name)
+    return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+def reset_metrics():
+    """Clear all recorded values (the metrics stay registered)."""
+    with _registry_lock:
+        metrics = list(REGISTRY.values())
+    for metric in metrics:
+        metric.reset()
@@ -0,0 +1,29 @@
+"""
+Flyer processing pipeline.
+
+One implementation of each stage (discover, extract, download, analyze), shared
+by the CLI scripts and app.py. How the download and analyze stages run (serial,
+threaded or async) is chosen by config:
+
+    from scripts.pipeline import make_config, run_pipeline
+
+    config = make_config(num_pages=2, executors={'analyze': 'async'})
+    summary = run_pipeline(config)
+
+run_pipeline is imported on first access: the stage modules pull in
+Playwright, OpenAI and Pillow, which callers that only build configs (such as
+app.py at startup) should not pay for.
+"""
+
+from scripts.pipeline.config import DEFAULT_CONFIG, STAGES, make_config
+from scripts.pipeline.executors import EXECUTORS, get_executor
+
+
+def __getattr__(name):
+    if name == 'run_pipeline':
+        from scripts.pipeline.runner import run_pipeline
+        return run_pipeline
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['DEFAULT_CONFIG', 'STAGES', 'EXECUTORS', 'make_config', 'get_executor', 'run_pipeline']
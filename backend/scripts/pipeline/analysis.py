@@ -0,0 +1,169 @@
+"""
+Analyze downloaded flyer pages with the OpenAI Vision API.
+
+Stores are analyzed through the configured executor; within a store, pages are
+packed pages_per_request at a time and checkpointed as they complete (see
+scripts/analyze_flyers.py and scripts/checkpoints.py).
+"""
+
+import os
+from openai import OpenAI
+from scripts.analyze_flyers import (
+    ANALYSIS_STATS,
+    analyze_pages_with_checkpoints,
+    get_parse_failure_rate,
+    reset_analysis_stats
+)
+from scripts.checkpoints import write_json_atomic
+from scripts.instrumentation import span
+
+CHECKPOINTS_DIRNAME = "_checkpoints"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def make_client():
+    """Create the OpenAI client used for analysis (retries are handled by scripts.retry)."""
+    return OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0)
+
+
+def list_store_keys(flyer_images_dir, exclude_stores=None):
+    """Return the store folders in flyer_images_dir, minus the excluded ones."""
+    if not os.path.isdir(flyer_images_dir):
+        return []
+
+    exclude_stores = exclude_stores or []
+    return sorted(
+        d for d in os.listdir(flyer_images_dir)
+        if os.path.isdir(os.path.join(flyer_images_dir, d)) and d not in exclude_stores
+    )
+
+
+def list_store_images(store_dir):
+    """Return the flyer page images of a store folder, in page order."""
+    return sorted(f for f in os.listdir(store_dir) if f.endswith(IMAGE_EXTENSIONS))
+
+
+def analyze_store(client, store_key, config):
+    """
+    Analyze the first num_pages pages of a store's flyer and save the result.
+
+    Args:
+        client: OpenAI client instance
+        store_key: Store folder name (e.g., 'super-c')
+        config: Pipeline config
+
+    Returns:
+        Store result dict, or None if the store has no images
+    """
+    store_dir = os.path.join(config['flyer_images_dir'], store_key)
+    store_name = store_key.replace('-', ' ')
+
+    if not os.path.exists(store_dir):
+        print(f"✗ Store directory not found: {store_dir}")
+        return None
+
+    all_image_files = list_store_images(store_dir)
+    if not all_image_files:
+        print(f"✗ No images found in {store_dir}")
+        return None
+
+    image_files = all_image_files[:config['num_pages']] if config['num_pages'] else all_image_files
+    print(f"\nAnalyzing: {store_name.title()} ({len(image_files)}/{len(all_image_files)} pages)")
+
+    image_paths = [os.path.join(store_dir, image_file) for image_file in image_files]
+    promotions, failed_pages = analyze_pages_with_checkpoints(
+        client,
+        image_paths,
+        store_name,
+        os.path.join(config['output_dir'], CHECKPOINTS_DIRNAME, store_key),
+        config['pages_per_request'],
+        config['resume']
+    )
+
+    result = {
+        'store': store_name,
+        'store_key': store_key,
+        'page_count': len(image_files),
+        'total_pages': len(all_image_files),
+        'promotion_count': len(promotions),
+        'failed_pages': [os.path.basename(path) for path in failed_pages],
+        'promotions': promotions
+    }
+
+    write_json_atomic(os.path.join(config['output_dir'], f"{store_key}_promotions.json"), result)
+
+    print(f"  ✓ {store_name.title()}: {len(promotions)} promotions"
+          + (f", {len(failed_pages)} failed pages (rerun with resume to retry)" if failed_pages else ""))
+
+    return result
+
+
+def analyze_stores(config, executor, client=None):
+    """
+    Analyze every store folder and write a combined _summary.json.
+
+    Args:
+        config: Pipeline config
+        executor: Executor used to run the stores (see executors.py)
+        client: Optional OpenAI client (created if omitted)
+
+    Returns:
+        Tuple of (results by store key, analysis stats)
+    """
+    client = client or make_client()
+    store_keys = list_store_keys(config['flyer_images_dir'], config['exclude_stores'])
+
+    print(f"Stores: {', '.join(s.replace('-', ' ').title() for s in store_keys)}")
+    if config['exclude_stores']:
+        print(f"Excluded: {', '.join(config['exclude_stores'])}")
+
+    reset_analysis_stats()
+
+    def analyze_task(store_key):
+        try:
+            with span('analyze_store', store=store_key) as store_span:
+                result = analyze_store(client, store_key, config)
+                if result:
+                    store_span.set(
+                        pages=result['page_count'],
+                        promotions=result['promotion_count'],
+                        failed_pages=len(result['failed_pages'])
+                    )
+            return store_key, result
+        except Exception as e:
+            print(f"\n✗ Error analyzing {store_key}: {e}\n")
+            return store_key, None
+
+    outcomes = executor(analyze_task, store_keys, config['max_workers'].get('analyze', 4))
+
+    results = {}
+    stats = {
+        'stores_processed': len(store_keys),
+        'stores_succeeded': 0,
+        'total_pages': 0,
+        'total_promotions': 0,
+        'failed_stores': []
+    }
+
+    for store_key, result in outcomes:
+        if result and result['promotions']:
+            results[store_key] = result
+            stats['stores_succeeded'] += 1
+            stats['total_pages'] += result['page_count']
+            stats['total_promotions'] += result['promotion_count']
+        else:
+            stats['failed_stores'].append(store_key)
+
+    stats['responses'] = dict(ANALYSIS_STATS)
+    stats['parse_failure_rate'] = round(get_parse_failure_rate(), 4)
+
+    write_json_atomic(os.path.join(config['output_dir'], "_summary.json"), {
+        'stats': stats,
+        'stores': {k: {'promotion_count': v['promotion_count'], 'page_count': v['page_count']} for k, v in results.items()}
+    })
+
+    print(f"\n✓ Analyzed {stats['total_pages']} pages, extracted {stats['total_promotions']} promotions")
+    print(f"Parse failures: {stats['responses']['parse_failures']}/{stats['responses']['responses']} "
+          f"responses ({stats['parse_failure_rate']:.1%})")
+
+    return results, stats
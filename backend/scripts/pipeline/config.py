@@ -0,0 +1,100 @@
+"""
+Configuration for the flyer pipeline.
+
+A config is a plain dict. Start from DEFAULT_CONFIG and override only what a
+caller needs with make_config(); unknown keys and executor names are rejected so
+typos fail fast instead of silently falling back to defaults.
+"""
+
+from scripts.pipeline.executors import EXECUTORS
+
+STAGES = ['discover', 'extract', 'download', 'analyze']
+
+DEFAULT_CONFIG = {
+    # Stages to run, in order. Skipped stages load their output from output_dir.
+    'stages': list(STAGES),
+
+    # Execution strategy per stage: 'serial', 'threaded' or 'async'.
+    # Discovery and extraction share one Playwright browser, which is bound to
+    # the thread that opened it, so they always run serially.
+    'executors': {
+        'download': 'threaded',
+        'analyze': 'threaded'
+    },
+    'max_workers': {
+        'download': 8,
+        'analyze': 4
+    },
+
+    # Scraping
+    'flyers_url': "https://www.redflagdeals.com/flyers/",
+    'image_url_pattern': r'https://[a-z]\.dam-img\.rfdcontent\.com/cms/[0-9/]+_original\.jpg',
+    'grocery_stores': [
+        'super c', 'metro', 'walmart', 'iga', 'maxi',
+        'provigo', 'loblaws', 'no frills', 'food basics',
+        'freshco', 'costco', 'carrefour'
+    ],
+    'headless': True,
+    'download_timeout': 30,
+    'skip_unchanged_downloads': True,  # Keep pages whose source URL did not change
+
+    # Analysis
+    'num_pages': None,  # Pages per store to download and analyze (None = all)
+    'exclude_stores': [],
+    'pages_per_request': 1,
+    'resume': False,
+
+    # Paths
+    'flyer_images_dir': "flyer_images",
+    'output_dir': "promotion_results",
+
+    # Instrumentation, relative to output_dir (None to disable): one JSON line
+    # per span, and the Prometheus metrics of the last run
+    'run_log': "_run_log.jsonl",
+    'metrics_file': "_metrics.prom"
+}
+
+
+def make_config(overrides=None, **kwargs):
+    """
+    Build a pipeline config from the defaults.
+
+    Args:
+        overrides: Optional dict of settings to override
+        **kwargs: Additional settings to override
+
+    Returns:
+        New config dict
+
+    Raises:
+        ValueError: If a setting, stage or executor name is unknown
+    """
+    settings = dict(overrides or {}, **kwargs)
+
+    unknown = set(settings) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown pipeline settings: {', '.join(sorted(unknown))}")
+
+    config = {
+        key: dict(value) if isinstance(value, dict) else (list(value) if isinstance(value, list) else value)
+        for key, value in DEFAULT_CONFIG.items()
+    }
+
+    for key, value in settings.items():
+        if isinstance(config[key], dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+
+    for stage in config['stages']:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+
+    for stage, name in config['executors'].items():
+        if name not in EXECUTORS:
+            raise ValueError(f"Unknown executor for {stage}: {name} (expected one of {', '.join(EXECUTORS)})")
+
+    if config['pages_per_request'] < 1:
+        raise ValueError("pages_per_request must be at least 1")
+
+    return config
@@ -0,0 +1,178 @@
+"""
+Download flyer page images over one pooled HTTP session.
+
+Pages of all stores are downloaded as one flat list of tasks, so a store with
+40 pages does not hold up the others. Each store folder keeps a small
+_sources.json manifest mapping file names to source URLs: a page whose URL has
+not changed since the last run is already on disk and is not downloaded again.
+"""
+
+import os
+import json
+import requests
+from requests.adapters import HTTPAdapter
+from scripts.checkpoints import write_json_atomic
+from scripts.instrumentation import span, record_bytes
+
+SOURCES_MANIFEST = "_sources.json"
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://www.redflagdeals.com/',
+    'Accept': 'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+def make_session(pool_size=8):
+    """Return a requests session whose connection pool fits pool_size concurrent downloads."""
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def page_filename(store_key, page_number):
+    """Return the file name of a flyer page (e.g., 'maxi_page_001.jpg')."""
+    return f"{store_key}_page_{page_number:03d}.jpg"
+
+
+def load_sources(store_dir):
+    """Load a store folder's file name -> source URL manifest."""
+    try:
+        with open(os.path.join(store_dir, SOURCES_MANIFEST), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def download_image(session, url, filepath, timeout=30):
+    """
+    Download one image to filepath.
+
+    The image is written to a temporary file and renamed, so an interrupted
+    download never leaves a truncated page behind.
+
+    Returns:
+        Number of bytes written
+    """
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+
+    tmp_path = f"{filepath}.part"
+    with open(tmp_path, 'wb') as f:
+        f.write(response.content)
+    os.replace(tmp_path, filepath)
+
+    return len(response.content)
+
+
+def plan_downloads(image_data, config):
+    """
+    List the pages to fetch for every store.
+
+    Returns:
+        Tuple of (tasks, cached) where tasks is a list of
+        (store_key, filename, url) tuples and cached maps store keys to the
+        number of unchanged pages already on disk
+    """
+    tasks = []
+    cached = {}
+
+    for store_key, store_data in image_data.items():
+        image_urls = store_data['image_urls']
+        if config['num_pages']:
+            image_urls = image_urls[:config['num_pages']]
+
+        store_dir = os.path.join(config['flyer_images_dir'], store_key)
+        sources = load_sources(store_dir) if config['skip_unchanged_downloads'] else {}
+        cached[store_key] = 0
+
+        for page_number, url in enumerate(image_urls, 1):
+            filename = page_filename(store_key, page_number)
+            if sources.get(filename) == url and os.path.exists(os.path.join(store_dir, filename)):
+                cached[store_key] += 1
+                continue
+            tasks.append((store_key, filename, url))
+
+    return tasks, cached
+
+
+def download_all_images(image_data, config, executor):
+    """
+    Download the flyer pages of all stores.
+
+    Args:
+        image_data: Dictionary from extract_all_image_urls()
+        config: Pipeline config
+        executor: Executor used to run the downloads (see executors.py)
+
+    Returns:
+        Download statistics
+    """
+    tasks, cached = plan_downloads(image_data, config)
+    session = make_session(config['max_workers'].get('download', 8))
+
+    print(f"Downloading {len(tasks)} pages ({sum(cached.values())} unchanged pages skipped)")
+
+    def download_task(task):
+        store_key, filename, url = task
+        store_dir = os.path.join(config['flyer_images_dir'], store_key)
+        os.makedirs(store_dir, exist_ok=True)
+        try:
+            with span('download_page', store=store_key, page=filename):
+                size = download_image(session, url, os.path.join(store_dir, filename), config['download_timeout'])
+                record_bytes(size)
+            return task, size, None
+        except Exception as e:
+            return task, 0, e
+
+    try:
+        outcomes = executor(download_task, tasks, config['max_workers'].get('download', 8))
+    finally:
+        session.close()
+
+    downloaded = {store_key: cached[store_key] for store_key in image_data}
+    stats = {
+        'stores_processed': len(image_data),
+        'stores_succeeded': 0,
+        'total_images': sum(cached.values()) + len(tasks),
+        'total_downloaded': 0,
+        'cached_images': sum(cached.values()),
+        'bytes_downloaded': 0,
+        'failed_stores': []
+    }
+
+    new_sources = {}
+    for (store_key, filename, url), size, error in outcomes:
+        if error is not None:
+            print(f"  ✗ {filename} failed: {error}")
+            continue
+        downloaded[store_key] += 1
+        stats['total_downloaded'] += 1
+        stats['bytes_downloaded'] += size
+        new_sources.setdefault(store_key, {})[filename] = url
+
+    for store_key, store_data in image_data.items():
+        if downloaded[store_key] > 0:
+            stats['stores_succeeded'] += 1
+        else:
+            stats['failed_stores'].append(store_data['store'])
+
+        if store_key in new_sources:
+            store_dir = os.path.join(config['flyer_images_dir'], store_key)
+            sources = load_sources(store_dir)
+            sources.update(new_sources[store_key])
+            write_json_atomic(os.path.join(store_dir, SOURCES_MANIFEST), sources)
+
+        print(f"  {'✓' if downloaded[store_key] else '✗'} {store_data['store'].title()}: "
+              f"{downloaded[store_key]} pages ready")
+
+    print(f"\n✓ Downloaded {stats['total_downloaded']} images "
+          f"({stats['bytes_downloaded'] / (1024 * 1024):.1f} MB), "
+          f"{stats['cached_images']} unchanged")
+
+    return stats
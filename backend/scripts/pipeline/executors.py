@@ -0,0 +1,72 @@
+"""
+Interchangeable ways to run one pipeline stage over many items.
+
+Every executor has the signature executor(func, items, max_workers) and returns
+func(item) for each item, in input order. Stages are written once against this
+signature and the strategy is picked by config:
+
+- serial:   one item at a time (easiest to debug)
+- threaded: a thread pool, for blocking I/O such as HTTP downloads and API calls.
+            Each task runs in a copy of the caller's context, so instrumentation
+            spans opened in the task nest under the caller's span
+- async:    an asyncio event loop with a concurrency limit; coroutine functions
+            are awaited directly, blocking functions run in worker threads
+"""
+
+import asyncio
+import inspect
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_serial(func, items, max_workers=1):
+    """Call func on each item in turn."""
+    return [func(item) for item in items]
+
+
+def run_threaded(func, items, max_workers=4):
+    """Call func on the items from a pool of max_workers threads."""
+    items = list(items)
+    if len(items) <= 1 or max_workers <= 1:
+        return run_serial(func, items)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, func, item) for item in items]
+        return [future.result() for future in futures]
+
+
+def run_async(func, items, max_workers=4):
+    """
+    Call func on the items from an asyncio event loop, max_workers at a time.
+
+    Must be called from synchronous code (it starts its own event loop).
+    """
+    items = list(items)
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def run_one(item):
+            async with semaphore:
+                if inspect.iscoroutinefunction(func):
+                    return await func(item)
+                return await asyncio.to_thread(func, item)
+
+        return await asyncio.gather(*(run_one(item) for item in items))
+
+    return list(asyncio.run(run_all()))
+
+
+EXECUTORS = {
+    'serial': run_serial,
+    'threaded': run_threaded,
+    'async': run_async
+}
+
+
+def get_executor(name):
+    """Return the executor registered under name."""
+    try:
+        return EXECUTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown executor: {name} (expected one of {', '.join(EXECUTORS)})")
@@ -0,0 +1,172 @@
+"""
+Run the flyer pipeline: discover → extract → download → analyze.
+
+Each stage saves its output to output_dir, so a run can start part way through
+(e.g. stages=['analyze'] re-analyzes the images already on disk).
+
+Every run is instrumented (see scripts/instrumentation.py): stage, store, page
+and Vision request spans are appended to the run log, and the Prometheus
+metrics are written to metrics_file when the run ends.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from scripts.checkpoints import write_json_atomic
+from scripts.instrumentation import span, start_run
+from scripts.metrics import counter, gauge, histogram, render_prometheus
+from scripts.pipeline.config import make_config
+from scripts.pipeline.executors import get_executor
+from scripts.pipeline.scraping import open_browser, discover_flyers, extract_all_image_urls
+from scripts.pipeline.download import download_all_images
+from scripts.pipeline.analysis import analyze_stores
+
+FLYERS_FILE = "_flyers.json"
+IMAGE_URLS_FILE = "_image_urls.json"
+
+STAGE_SECONDS = histogram('pipeline_stage_seconds', 'Wall time of pipeline stages in seconds', ['stage'])
+RUNS = counter('pipeline_runs_total', 'Pipeline runs by result', ['result'])
+LAST_RUN = gauge('pipeline_last_run_timestamp_seconds', 'Unix time the last pipeline run finished')
+
+
+def print_stage(number, total, title):
+    print("\n" + "="*60)
+    print(f"[{number}/{total}] {title}")
+    print("="*60)
+
+
+def load_stage_output(output_dir, filename):
+    """Load a previous run's stage output, or None if it is missing."""
+    path = os.path.join(output_dir, filename)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def output_path(config, key):
+    """Return the path of an instrumentation file setting, or None if disabled."""
+    return os.path.join(config['output_dir'], config[key]) if config[key] else None
+
+
+def run_pipeline(config=None, client=None):
+    """
+    Run the configured pipeline stages.
+
+    Args:
+        config: Pipeline config from make_config() (defaults if omitted)
+        client: Optional OpenAI client for the analyze stage
+
+    Returns:
+        Summary dict with each stage's output and stats, per-stage timings and
+        usage totals (tokens, estimated cost, bytes). 'completed' is False if a
+        stage produced nothing for the next one to work on.
+    """
+    config = config or make_config()
+    os.makedirs(config['output_dir'], exist_ok=True)
+
+    summary = {
+        'started_at': datetime.now().isoformat(),
+        'stages': list(config['stages']),
+        'timings': {},
+        'completed': False
+    }
+
+    print("\n" + "="*60)
+    print(f"FLYER PIPELINE: {' → '.join(config['stages'])}")
+    print("="*60)
+    if config['num_pages']:
+        print(f"Pages per store: {config['num_pages']}")
+
+    result = 'error'
+    try:
+        with start_run(output_path(config, 'run_log'), stages=config['stages'],
+                       num_pages=config['num_pages'], executors=config['executors']) as run:
+            summary['run_id'] = run.run_id
+            try:
+                run_stages(config, client, summary)
+            finally:
+                summary['usage'] = dict(run.totals, cost=round(run.totals['cost'], 4))
+        result = 'completed' if summary['completed'] else 'stopped'
+    finally:
+        RUNS.inc(result=result)
+        LAST_RUN.set(time.time())
+        metrics_file = output_path(config, 'metrics_file')
+        if metrics_file:
+            with open(metrics_file, 'w') as f:
+                f.write(render_prometheus())
+
+    print("\n" + "="*60)
+    print("PIPELINE COMPLETE" if summary['completed'] else "PIPELINE STOPPED")
+    print("="*60)
+    for stage, seconds in summary['timings'].items():
+        print(f"  {stage:<10} {seconds:8.1f}s")
+    usage = summary['usage']
+    print(f"  Tokens: {usage['prompt_tokens']} in / {usage['completion_tokens']} out "
+          f"(~${usage['cost']:.2f}), {usage['bytes'] / (1024 * 1024):.1f} MB transferred")
+    print("="*60 + "\n")
+
+    return summary
+
+
+def run_stages(config, client, summary):
+    """Run each configured stage in order, filling in summary."""
+    stages = config['stages']
+    output_dir = config['output_dir']
+
+    def timed(stage, func, *args):
+        started = time.perf_counter()
+        try:
+            with span('stage', stage=stage):
+                return func(*args)
+        finally:
+            seconds = time.perf_counter() - started
+            summary['timings'][stage] = round(seconds, 3)
+            STAGE_SECONDS.observe(seconds, stage=stage)
+
+    step = 0
+    flyers = None
+    image_data = None
+
+    # Discovery and extraction share one browser
+    if 'discover' in stages or 'extract' in stages:
+        with open_browser(config['headless']) as page:
+            if 'discover' in stages:
+                step += 1
+                print_stage(step, len(stages), "DISCOVERING FLYERS")
+                flyers = timed('discover', discover_flyers, page, config)
+                write_json_atomic(os.path.join(output_dir, FLYERS_FILE), flyers)
+                summary['flyers'] = flyers
+                if not flyers:
+                    print("\n✗ No flyers discovered. Stopping.")
+                    return
+
+            if 'extract' in stages:
+                step += 1
+                print_stage(step, len(stages), "EXTRACTING IMAGE URLS")
+                if flyers is None:
+                    flyers = load_stage_output(output_dir, FLYERS_FILE) or []
+                image_data = timed('extract', extract_all_image_urls, page, flyers, config['image_url_pattern'])
+                write_json_atomic(os.path.join(output_dir, IMAGE_URLS_FILE), image_data)
+                if not image_data:
+                    print("\n✗ No image URLs extracted. Stopping.")
+                    return
+
+    if 'download' in stages:
+        step += 1
+        print_stage(step, len(stages), "DOWNLOADING IMAGES")
+        if image_data is None:
+            image_data = load_stage_output(output_dir, IMAGE_URLS_FILE) or {}
+        executor = get_executor(config['executors'].get('download', 'serial'))
+        summary['download_stats'] = timed('download', download_all_images, image_data, config, executor)
+
+    if 'analyze' in stages:
+        step += 1
+        print_stage(step, len(stages), "ANALYZING FLYERS WITH AI")
+        executor = get_executor(config['executors'].get('analyze', 'serial'))
+        results, analysis_stats = timed('analyze', analyze_stores, config, executor, client)
+        summary['results'] = results
+        summary['analysis_stats'] = analysis_stats
+
+    summary['completed'] = True
@@ -0,0 +1,191 @@
+"""
+Discover flyers on RedFlagDeals and extract their page image URLs.
+
+Both steps share one Playwright browser and one tab: launching Chromium costs
+more than loading a flyer page, so the browser is opened once per run instead
+of once per flyer.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+from scripts.instrumentation import span
+from scripts.pipeline.config import DEFAULT_CONFIG
+
+IMAGE_URL_PATTERN = re.compile(DEFAULT_CONFIG['image_url_pattern'])
+
+POPUP_SELECTORS = [
+    'button:has-text("Close")',
+    '[aria-label="Close"]',
+    '.close-button',
+    'button.btn-close'
+]
+
+
+@contextmanager
+def open_browser(headless=True):
+    """Launch Chromium and yield a single reusable page (tab)."""
+    with sync_playwright() as p:
+        print("Launching browser...")
+        with span('browser_launch', headless=headless):
+            browser = p.chromium.launch(headless=headless)
+        try:
+            yield browser.new_page()
+        finally:
+            browser.close()
+
+
+def store_key_for(store_name):
+    """Return the folder/key name used for a store (e.g., 'super c' -> 'super-c')."""
+    return store_name.lower().replace(' ', '-')
+
+
+def close_popups(page):
+    """Dismiss cookie and newsletter popups if any are shown."""
+    for selector in POPUP_SELECTORS:
+        try:
+            page.click(selector, timeout=2000)
+        except Exception:
+            pass
+
+    try:
+        page.keyboard.press("Escape")
+    except Exception:
+        pass
+
+
+def parse_flyer_card(card, grocery_stores, base_url=DEFAULT_CONFIG['flyers_url']):
+    """
+    Read one flyer listing card.
+
+    Relative flyer links are resolved against base_url (the flyers listing page).
+
+    Returns:
+        Flyer dict with store, title, date_range and url, or None if the card
+        is not a grocery store flyer
+    """
+    store_name = card.get_attribute('data-dealer-name')
+    if not store_name:
+        return None
+
+    store_name = store_name.strip().lower()
+    if not any(grocery in store_name for grocery in grocery_stores):
+        return None
+
+    link_elem = card.query_selector('a.flyer_image')
+    flyer_url = link_elem.get_attribute('href') if link_elem else None
+    if not flyer_url:
+        return None
+
+    if not flyer_url.startswith('http'):
+        flyer_url = f"{base_url.rstrip('/')}/{flyer_url.lstrip('/')}"
+
+    title_elem = card.query_selector('.flyer_title')
+    date_elem = card.query_selector('.flyer_dates')
+
+    return {
+        'store': store_name,
+        'title': title_elem.inner_text().strip() if title_elem else "Weekly Savings",
+        'date_range': date_elem.inner_text().strip() if date_elem else "Current Week",
+        'url': flyer_url
+    }
+
+
+def discover_flyers(page, config):
+    """
+    Discover the latest grocery store flyers.
+
+    Args:
+        page: Playwright page from open_browser()
+        config: Pipeline config
+
+    Returns:
+        List of flyer dicts with store, title, date_range and url
+    """
+    print("Navigating to RedFlagDeals flyers page...")
+    page.goto(config['flyers_url'], wait_until="domcontentloaded")
+    time.sleep(3)
+    close_popups(page)
+
+    print("Extracting flyer information...")
+    page.wait_for_selector('.flyer_listing', timeout=10000)
+    flyer_cards = page.query_selector_all('.flyer_listing')
+    print(f"Found {len(flyer_cards)} total flyers\n")
+
+    flyers = []
+    for card in flyer_cards:
+        try:
+            flyer = parse_flyer_card(card, config['grocery_stores'], config['flyers_url'])
+        except Exception as e:
+            print(f"✗ Error processing flyer card: {e}")
+            continue
+
+        if flyer:
+            flyers.append(flyer)
+            print(f"✓ {flyer['store'].title()} - {flyer['date_range']}")
+
+    print(f"\n✓ Discovered {len(flyers)} grocery store flyers")
+    return flyers
+
+
+def parse_image_urls(html_content, pattern=IMAGE_URL_PATTERN):
+    """Return the unique original-size page image URLs in a flyer page, in order."""
+    return list(dict.fromkeys(re.findall(pattern, html_content)))
+
+
+def extract_image_urls(page, flyer_url, pattern=IMAGE_URL_PATTERN):
+    """
+    Extract the page image URLs from one flyer.
+
+    The URLs are read from the OpenSeaDragon tileSources in the page HTML.
+    """
+    page.goto(flyer_url, wait_until="domcontentloaded")
+    time.sleep(2)
+    return parse_image_urls(page.content(), pattern)
+
+
+def extract_all_image_urls(page, flyers, pattern=IMAGE_URL_PATTERN):
+    """
+    Extract image URLs for all discovered flyers.
+
+    Args:
+        page: Playwright page from open_browser()
+        flyers: List of flyer dicts from discover_flyers()
+        pattern: Regex matching page image URLs (config 'image_url_pattern')
+
+    Returns:
+        Dictionary mapping store keys to their flyer info and image URLs
+    """
+    all_image_data = {}
+
+    for flyer in flyers:
+        store = flyer['store']
+        print(f"\nExtracting: {store.title()}...")
+
+        try:
+            with span('extract_flyer', store=store) as flyer_span:
+                image_urls = extract_image_urls(page, flyer['url'], pattern)
+                flyer_span.set(image_count=len(image_urls))
+        except Exception as e:
+            print(f"  ✗ Error: {e}")
+            continue
+
+        if not image_urls:
+            print("  ⚠ No images found - flyer format may have changed")
+            continue
+
+        all_image_data[store_key_for(store)] = {
+            'store': store,
+            'title': flyer['title'],
+            'date_range': flyer['date_range'],
+            'url': flyer['url'],
+            'image_urls': image_urls,
+            'image_count': len(image_urls)
+        }
+        print(f"  ✓ Found {len(image_urls)} pages")
+
+    total_images = sum(data['image_count'] for data in all_image_data.values())
+    print(f"\n✓ Extracted {total_images} images from {len(all_image_data)} stores")
+
+    return all_image_data
@@ -0,0 +1,57 @@
+"""
+Host-wide locks held for the lifetime of a process.
+
+Used to make sure only one process on the machine runs a singleton service,
+such as the background scheduler when the API is served by several gunicorn
+workers. The lock is an exclusive flock on a file: it is released by the
+kernel when the holding process exits, so a replacement worker can take over.
+"""
+
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, only the single-process dev server runs there
+    fcntl = None
+
+
+def acquire_process_lock(path):
+    """
+    Try to take the exclusive lock at path without waiting.
+
+    Args:
+        path: Lock file path (created if missing)
+
+    Returns:
+        Open lock file to keep referenced while the lock is needed, or None if
+        another process holds the lock
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    lock_file = open(path, 'a+')
+    if fcntl is None:
+        return lock_file
+
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+
+    # Record the holder to make `cat data/scheduler.lock` useful when debugging
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    return lock_file
+
+
+def release_process_lock(lock_file):
+    """Release a lock returned by acquire_process_lock()."""
+    if lock_file is None or lock_file.closed:
+        return
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    lock_file.close()
@@ -0,0 +1,355 @@
+"""
+In-memory indexes over the current promotions, for filtered and paginated reads.
+
+A PromotionIndex is built once per scrape (app.py rebuilds it when the database
+changes). Building it sorts the promotions once per sort key, groups them by
+store and by item word, and builds the SearchIndex used for ranked search. Queries then walk an index that is already in the
+requested order and stop as soon as the page is full, so a request costs about
+the page size instead of the catalog size.
+
+Pagination uses opaque cursors that remember the sort and the position of the
+last returned promotion. A cursor from an older scrape is rejected instead of
+silently skipping or repeating promotions.
+"""
+
+import re
+import json
+import zlib
+import base64
+import heapq
+from bisect import bisect_left, bisect_right
+from scripts.promotion_search import SearchIndex
+from scripts.store_optimizer import StoreOptimizer
+from scripts.unit_prices import BASE_UNITS
+
+# Fields a client can request with ?fields=
+PROMOTION_FIELDS = [
+    'item', 'price', 'unit', 'discount', 'store', 'quantity', 'base_unit', 'unit_price',
+    'original_price', 'savings_amount', 'savings_pct'
+]
+
+# Sort keys for ?sort= (prefix with '-' for descending). 'position' is the stored order.
+SORT_KEYS = {
+    'position': None,
+    'item': lambda promo: str(promo.get('item') or '').casefold(),
+    'price': lambda promo: promo_price(promo),
+    'unit_price': lambda promo: promo_price(promo, 'unit_price'),
+    'store': lambda promo: str(promo.get('store') or '').casefold()
+}
+
+MAX_PAGE_SIZE = 500
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class PromotionQueryError(ValueError):
+    """Raised for invalid query parameters or cursors."""
+
+
+def promo_price(promo, field='price'):
+    """Return a promotion price field as a float (infinity if missing, so it sorts last)."""
+    price = promo.get(field)
+    if isinstance(price, bool) or not isinstance(price, (int, float)):
+        return float('inf')
+    return float(price)
+
+
+def item_words(text):
+    """Split text into lowercase words."""
+    return WORD_PATTERN.findall(str(text or '').casefold())
+
+
+class PromotionIndex:
+    """
+    Sorted, per-store and per-word indexes over a list of promotions.
+
+    Args:
+        promotions: Promotions of the current scrape, in stored order
+        scrape_timestamp: Timestamp of the scrape they come from
+    """
+
+    def __init__(self, promotions, scrape_timestamp=None):
+        self.promotions = promotions
+        self.scrape_timestamp = scrape_timestamp
+        self.version = self._version(promotions, scrape_timestamp)
+        count = len(promotions)
+
+        # order[sort]: positions sorted by that key; rank[sort][position]: index in that order
+        self.order = {'position': list(range(count))}
+        self.rank = {'position': self.order['position']}
+        for sort, key in SORT_KEYS.items():
+            if key is None:
+                continue
+            values = [key(promo) for promo in promotions]
+            order = sorted(range(count), key=lambda i: (values[i], i))
+            rank = [0] * count
+            for index, position in enumerate(order):
+                rank[position] = index
+            self.order[sort] = order
+            self.rank[sort] = rank
+
+        self.prices = [promo_price(promo) for promo in promotions]
+        self.base_units = [promo.get('base_unit') for promo in promotions]
+        self.sorted_prices = [self.prices[position] for position in self.order['price']]
+
+        # Per store: positions in each sort order, plus their ranks for bisecting cursors
+        self.store_order = {}
+        self.store_ranks = {}
+        store_keys = [str(promo.get('store') or '').casefold() for promo in promotions]
+        self.store_keys = store_keys
+        for sort, order in self.order.items():
+            rank = self.rank[sort]
+            for position in order:
+                store = store_keys[position]
+                self.store_order.setdefault(store, {}).setdefault(sort, []).append(position)
+                self.store_ranks.setdefault(store, {}).setdefault(sort, []).append(rank[position])
+
+        # Inverted index of item words, with a sorted vocabulary for prefix lookups
+        self.postings = {}
+        for position, promo in enumerate(promotions):
+            for word in item_words(promo.get('item')):
+                self.postings.setdefault(word, set()).add(position)
+        self.vocabulary = sorted(self.postings)
+
+        # Ranked, typo-tolerant search (GET /api/promotions/search)
+        self.search_index = SearchIndex(promotions)
+        self.store_optimizer = StoreOptimizer(promotions)
+
+    @staticmethod
+    def _version(promotions, scrape_timestamp):
+        """Identify this catalog (same value in every process serving the same scrape)."""
+        checksum = zlib.crc32("\n".join(
+            f"{p.get('store')}|{p.get('item')}|{p.get('price')}" for p in promotions
+        ).encode('utf-8'))
+        return f"{scrape_timestamp or ''}:{len(promotions)}:{checksum:08x}"
+
+    @property
+    def stores(self):
+        """Return the store keys present in the catalog."""
+        return sorted(self.store_order)
+
+    def positions_with_prefix(self, prefix):
+        """Return the positions of promotions having an item word that starts with prefix."""
+        start = bisect_left(self.vocabulary, prefix)
+        positions = set()
+        for word in self.vocabulary[start:]:
+            if not word.startswith(prefix):
+                break
+            positions |= self.postings[word]
+        return positions
+
+    def text_matches(self, text):
+        """Return the positions matching every word of text as a word prefix, or None if text is empty."""
+        words = item_words(text)
+        if not words:
+            return None
+
+        matches = None
+        for word in sorted(set(words), key=len, reverse=True):  # Longest (most selective) first
+            positions = self.positions_with_prefix(word)
+            matches = positions if matches is None else matches & positions
+            if not matches:
+                return set()
+        return matches
+
+    def _candidates(self, sort, descending, after, stores, min_price, max_price, text_positions, limit):
+        """Yield positions in the requested order, starting after the cursor rank."""
+        rank = self.rank[sort]
+
+        # Sorting the text matches costs about m; walking an order until the page is
+        # full costs about limit * n / m. Sort when that is cheaper.
+        matches = len(text_positions) if text_positions is not None else 0
+        if text_positions is not None and (limit is None or matches * matches <= (limit + 1) * len(self.promotions)):
+            positions = sorted(text_positions, key=rank.__getitem__, reverse=descending)
+            if after is not None:
+                positions = [p for p in positions if (rank[p] < after if descending else rank[p] > after)]
+            return iter(positions)
+
+        if stores is not None:
+            lists = []
+            for store in stores:
+                order = self.store_order.get(store, {}).get(sort, [])
+                ranks = self.store_ranks.get(store, {}).get(sort, [])
+                if descending:
+                    end = bisect_left(ranks, after) if after is not None else len(order)
+                    lists.append(reversed(order[:end]))
+                else:
+                    start = bisect_right(ranks, after) if after is not None else 0
+                    lists.append(order[start:])
+            if len(lists) == 1:
+                return iter(lists[0])
+            return heapq.merge(*lists, key=rank.__getitem__, reverse=descending)
+
+        order = self.order[sort]
+        start, end = 0, len(order)
+        if sort == 'price':
+            # Price order: the price range is a contiguous slice
+            if min_price is not None:
+                start = bisect_left(self.sorted_prices, min_price)
+            if max_price is not None:
+                end = bisect_right(self.sorted_prices, max_price)
+        if after is not None:
+            # In a global order, the rank is the index
+            if descending:
+                end = min(end, after)
+            else:
+                start = max(start, after + 1)
+        if descending:
+            return (order[i] for i in range(end - 1, start - 1, -1))
+        return (order[i] for i in range(start, end))
+
+    def query(self, stores=None, min_price=None, max_price=None, text=None,
+              sort='position', descending=False, after=None, limit=None, base_unit=None):
+        """
+        Return one page of matching promotions.
+
+        Args:
+            stores: Store keys to keep (lowercase), or None for all
+            min_price: Minimum price, inclusive
+            max_price: Maximum price, inclusive
+            text: Words that must each start a word of the item name
+            sort: Key from SORT_KEYS
+            descending: Reverse the sort
+            after: Rank of the last promotion of the previous page (from a cursor)
+            limit: Page size, or None for every match
+            base_unit: Keep promotions priced per this unit ('kg', 'L' or 'each')
+
+        Returns:
+            Tuple of (promotions, rank to continue after or None if this is the last page)
+        """
+        text_positions = self.text_matches(text) if text else None
+        if text_positions is not None and not text_positions:
+            return [], None
+
+        candidates = self._candidates(sort, descending, after, stores, min_price, max_price, text_positions, limit)
+        check_store = stores is not None and text_positions is not None
+        check_price = (min_price is not None or max_price is not None) and (
+            sort != 'price' or stores is not None or text_positions is not None
+        )
+        store_set = set(stores) if check_store else None
+
+        page = []
+        for position in candidates:
+            if text_positions is not None and position not in text_positions:
+                continue
+            if check_store and self.store_keys[position] not in store_set:
+                continue
+            if base_unit is not None and self.base_units[position] != base_unit:
+                continue
+            if check_price:
+                price = self.prices[position]
+                if (min_price is not None and price < min_price) or (max_price is not None and price > max_price):
+                    continue
+            if limit is not None and len(page) == limit:
+                return [self.promotions[p] for p in page], self.rank[sort][page[-1]]
+            page.append(position)
+
+        return [self.promotions[p] for p in page], None
+
+
+def project(promotions, fields):
+    """Keep only the requested fields of each promotion (all fields if fields is None)."""
+    if fields is None:
+        return promotions
+    return [{field: promo.get(field) for field in fields} for promo in promotions]
+
+
+def encode_cursor(version, sort, descending, after):
+    """Encode a pagination position as an opaque URL-safe token."""
+    data = json.dumps({'v': version, 's': sort, 'd': descending, 'a': after}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, version, sort, descending):
+    """
+    Decode a cursor for the current catalog and sort.
+
+    Raises:
+        PromotionQueryError: If the cursor is malformed, from another scrape or another sort
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        after = int(data['a'])
+    except (ValueError, KeyError, TypeError):
+        raise PromotionQueryError("Invalid cursor")
+
+    if data.get('v') != version:
+        raise PromotionQueryError("Cursor expired: promotions were updated, start from the first page")
+    if data.get('s') != sort or bool(data.get('d')) != descending:
+        raise PromotionQueryError("Cursor does not match the requested sort")
+    return after
+
+
+def parse_float(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise PromotionQueryError(f"{name} must be a number")
+
+
+def parse_query(args, index):
+    """
+    Read the query parameters of GET /api/promotions.
+
+    Args:
+        args: Request query parameters (mapping)
+        index: PromotionIndex the query will run against (for cursor checks)
+
+    Returns:
+        Tuple of (keyword arguments for PromotionIndex.query, fields or None)
+
+    Raises:
+        PromotionQueryError: If a parameter is invalid
+    """
+    sort = args.get('sort') or 'position'
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_KEYS:
+        raise PromotionQueryError(f"sort must be one of: {', '.join(SORT_KEYS)} (prefix with - to reverse)")
+
+    stores = None
+    if args.get('store'):
+        stores = sorted({store.strip().casefold() for store in args['store'].split(',') if store.strip()})
+
+    limit = None
+    if args.get('limit') not in (None, ''):
+        try:
+            limit = int(args['limit'])
+        except ValueError:
+            raise PromotionQueryError("limit must be an integer")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise PromotionQueryError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    after = None
+    if args.get('cursor'):
+        if limit is None:
+            raise PromotionQueryError("cursor requires limit")
+        after = decode_cursor(args['cursor'], index.version, sort, descending)
+
+    base_unit = args.get('base_unit') or None
+    if base_unit is not None and base_unit not in BASE_UNITS:
+        raise PromotionQueryError(f"base_unit must be one of: {', '.join(BASE_UNITS)}")
+
+    fields = None
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in PROMOTION_FIELDS]
+        if unknown:
+            raise PromotionQueryError(f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(PROMOTION_FIELDS)})")
+
+    query = {
+        'stores': stores,
+        'min_price': parse_float(args, 'min_price'),
+        'max_price': parse_float(args, 'max_price'),
+        'text': args.get('q') or None,
+        'sort': sort,
+        'descending': descending,
+        'after': after,
+        'limit': limit,
+        'base_unit': base_unit
+    }
+    return query, fields
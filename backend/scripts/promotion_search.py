@@ -0,0 +1,272 @@
+"""
+Ranked, typo-tolerant search over promotion item names, stores and units.
+
+A SearchIndex is built once per scrape, next to the PromotionIndex. It keeps an
+inverted index from words to promotions and a trigram index over the word
+vocabulary. A query word matches a vocabulary word exactly, as a prefix
+("chick" → "chicken") or within a small edit distance ("mozarella" →
+"mozzarella"). Fuzzy lookups only scan the vocabulary (a few thousand words),
+never the promotions, so their cost does not grow with the catalog.
+
+Every query word must match somewhere in the promotion. Promotions are ranked
+by how well the words matched (exact beats prefix beats fuzzy, item name beats
+store and unit), then by shorter item names, then by stored order.
+"""
+
+import re
+import heapq
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Match quality of one query word, by field and kind of match
+MATCH_SCORES = {
+    'item': {'exact': 6, 'prefix': 4, 'fuzzy': 2},
+    'store': {'exact': 3, 'prefix': 2, 'fuzzy': 1},
+    'unit': {'exact': 3, 'prefix': 2, 'fuzzy': 1}
+}
+SEARCH_FIELDS = list(MATCH_SCORES)
+
+MIN_PREFIX_LENGTH = 2  # Shorter query words only match whole words
+QUERY_CACHE_SIZE = 256  # Recent queries kept per index (the index never changes)
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def search_words(text):
+    """Split text into lowercase words."""
+    return WORD_PATTERN.findall(str(text or '').casefold())
+
+
+def max_typos(word):
+    """Return the edit distance allowed for a query word of this length."""
+    if len(word) < 4:
+        return 0
+    if len(word) < 8:
+        return 1
+    return 2
+
+
+def trigrams(word):
+    """Return the set of trigrams of a word, padded so short words still have some."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Return the edit distance between a and b (adjacent swaps count as one edit).
+
+    Stops early and returns limit + 1 once the distance is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SearchIndex:
+    """
+    Inverted word index and vocabulary trigram index over a list of promotions.
+
+    Args:
+        promotions: Promotions of the current scrape, in stored order
+    """
+
+    def __init__(self, promotions):
+        self.promotions = promotions
+
+        # Static rank: shorter item names first, then stored order. order[rank] is the position.
+        self.order = sorted(range(len(promotions)), key=lambda i: (len(str(promotions[i].get('item') or '')), i))
+
+        # postings[(field, word)]: ascending static ranks of the promotions containing word in field
+        self.postings = {}
+        for rank, position in enumerate(self.order):
+            promo = promotions[position]
+            for field in SEARCH_FIELDS:
+                for word in set(search_words(promo.get(field))):
+                    key = (field, word)
+                    ranks = self.postings.get(key)
+                    if ranks is None:
+                        self.postings[key] = [rank]
+                    else:
+                        ranks.append(rank)
+
+        self.vocabulary = sorted({word for _, word in self.postings})
+        self.word_fields = {}
+        for field, word in self.postings:
+            self.word_fields.setdefault(word, []).append(field)
+
+        self.trigram_words = {}
+        for word in self.vocabulary:
+            for gram in trigrams(word):
+                self.trigram_words.setdefault(gram, []).append(word)
+
+        # Shared by every request thread: the lock covers reads, inserts and evictions, not searching
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def fuzzy_words(self, word):
+        """Return {vocabulary word: distance} for words within max_typos(word) edits."""
+        limit = max_typos(word)
+        if limit == 0:
+            return {}
+
+        # An edit changes at most 4 trigrams (an adjacent swap), so a match shares at least this many
+        grams = trigrams(word)
+        needed = max(1, len(grams) - 4 * limit)
+        shared = {}
+        for gram in grams:
+            for candidate in self.trigram_words.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        matches = {}
+        for candidate, count in shared.items():
+            if count < needed or candidate == word:
+                continue
+            distance = edit_distance(word, candidate, limit)
+            if distance <= limit:
+                matches[candidate] = distance
+        return matches
+
+    def term_matches(self, word):
+        """Return {(field, vocabulary word): score} for everything a query word matches."""
+        kinds = {}
+        if word in self.word_fields:
+            kinds[word] = 'exact'
+
+        if len(word) >= MIN_PREFIX_LENGTH:
+            start = bisect_left(self.vocabulary, word)
+            for candidate in self.vocabulary[start:]:
+                if not candidate.startswith(word):
+                    break
+                kinds.setdefault(candidate, 'prefix')
+
+        for candidate in self.fuzzy_words(word):
+            kinds.setdefault(candidate, 'fuzzy')
+
+        return {
+            (field, candidate): MATCH_SCORES[field][kind]
+            for candidate, kind in kinds.items()
+            for field in self.word_fields[candidate]
+        }
+
+    def search(self, query, limit=20):
+        """
+        Return the best matching promotions for a query.
+
+        Args:
+            query: Free text (e.g. "chicken", "mozarella metro")
+            limit: Maximum number of results
+
+        Returns:
+            List of (position, score) pairs, best first
+        """
+        words = list(dict.fromkeys(search_words(query)))
+        if not words or limit < 1:
+            return []
+
+        cache_key = (tuple(words), limit)
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+        terms = [self.term_matches(word) for word in words]
+        if any(not term for term in terms):
+            results = []
+        elif len(terms) == 1:
+            results = self._search_one(terms[0], limit)
+        else:
+            results = self._search_all(terms, limit)
+
+        with self._cache_lock:
+            self._cache[cache_key] = results
+            if len(self._cache) > QUERY_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return results
+
+    def _search_one(self, term, limit):
+        """Top results for one query word: walk score tiers best first, each already in static rank order."""
+        tiers = {}
+        for key, score in term.items():
+            tiers.setdefault(score, []).append(self.postings[key])
+
+        results, seen = [], set()
+        for score in sorted(tiers, reverse=True):
+            for rank in heapq.merge(*tiers[score]):
+                if rank in seen:
+                    continue
+                seen.add(rank)
+                results.append((self.order[rank], score))
+                if len(results) == limit:
+                    return results
+        return results
+
+    def next_rank(self, keys, rank):
+        """Return the smallest rank >= rank in any of the posting lists of keys (None if there is none)."""
+        found = None
+        for key in keys:
+            ranks = self.postings[key]
+            index = bisect_left(ranks, rank)
+            if index < len(ranks) and (found is None or ranks[index] < found):
+                found = ranks[index]
+        return found
+
+    def _search_all(self, terms, limit):
+        """Top results for several query words."""
+        # Fast path: promotions where every word has its best possible match. Leapfrog
+        # through the posting lists in static rank order, jumping over ranks that
+        # some word cannot match, until the page is full.
+        best = []
+        for term in terms:
+            top = max(term.values())
+            best.append([key for key, score in term.items() if score == top])
+        best.sort(key=lambda keys: sum(len(self.postings[key]) for key in keys))  # Rarest first jumps furthest
+        best_score = sum(max(term.values()) for term in terms)
+
+        results, rank = [], 0
+        while len(results) < limit:
+            candidate = rank
+            for keys in best:
+                candidate = self.next_rank(keys, candidate)
+                if candidate is None:
+                    break
+            if candidate is None:
+                break
+            if candidate == rank:
+                results.append((self.order[rank], best_score))
+                rank += 1
+            else:
+                rank = candidate
+        if len(results) == limit:
+            return results  # Nothing can score higher, and these come first in static rank
+
+        # Otherwise intersect the per-word matches and add up their scores
+        term_scores = []
+        for term in terms:
+            scores = {}
+            for key, score in sorted(term.items(), key=lambda item: item[1]):
+                scores.update(dict.fromkeys(self.postings[key], score))  # Best score per promotion wins
+            term_scores.append(scores)
+
+        term_scores.sort(key=len)
+        common = term_scores[0].keys()
+        for scores in term_scores[1:]:
+            common = common & scores.keys()
+
+        scored = [(-sum(scores[rank] for scores in term_scores), rank) for rank in common]
+        return [(self.order[rank], -negative) for negative, rank in heapq.nsmallest(limit, scored)]
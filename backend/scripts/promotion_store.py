@@ -0,0 +1,86 @@
+"""
+Atomic publishing of the promotions database (data/promotions.json).
+
+The pipeline worker publishes a scrape while the API processes read the same
+TinyDB file through their own handles. TinyDB's JSONStorage rewrites its file in
+place (seek, write, truncate), so a reader could load half-written JSON. A new
+scrape is therefore written as a complete TinyDB file next to the database and
+moved over it with os.replace: a reader's open handle keeps the previous file
+intact, and a reader opening the path gets the new one whole.
+
+Readers notice a new snapshot by its file identity (see database_file_id) and
+reopen the database, as app.get_tables() does.
+
+Every writer of the promotions table builds its rows with stored_promotions, so
+stored promotions always carry the same derived fields.
+"""
+
+import os
+import tempfile
+from scripts.unit_prices import add_unit_prices
+from scripts.discounts import add_discount_savings
+
+
+def stored_promotions(promotions, scrape_id):
+    """
+    Build the promotions table rows for one scrape.
+
+    Each row is a copy of the promotion with its scrape_id, comparable unit
+    price and numeric savings added.
+
+    Args:
+        promotions: List of promotion dicts from the analysis
+        scrape_id: ID of the scrape the promotions belong to
+
+    Returns:
+        List of promotion rows
+    """
+    return [dict(promo, scrape_id=scrape_id) for promo in add_discount_savings(add_unit_prices(promotions))]
+
+
+def database_file_id(path):
+    """
+    Return what identifies the database file currently at path.
+
+    A new snapshot is a new file, so this changes on every publish, while
+    in-place writes keep it.
+
+    Returns:
+        Tuple of (device, inode), or None if the file is missing
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def write_snapshot(path, promotions, scrapes):
+    """
+    Write a complete promotions database to a temp file and move it over path.
+
+    Args:
+        path: Database file (created with its directory if missing)
+        promotions: Rows of the promotions table
+        scrapes: Rows of the scrapes table
+    """
+    from tinydb import TinyDB
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    os.close(fd)
+    try:
+        # JSONStorage flushes and fsyncs each write, so the file is on disk before the rename
+        snapshot = TinyDB(tmp_path)
+        try:
+            snapshot.table('promotions').insert_multiple(promotions)
+            snapshot.table('scrapes').insert_multiple(scrapes)
+        finally:
+            snapshot.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,215 @@
+"""
+Parse and add up recipe ingredient amounts, and size promotion purchases.
+
+Recipes give amounts as free text: "1.5 lb", "500g", "2 tbsp", "1 1/2 cups",
+"2-3 cloves", "2 large". parse_amount() turns one into a quantity of a base unit
+(kg, L or each, the same base units as scripts/unit_prices.py) using the parse
+tables below, and caches the result since the same strings recur across recipes.
+
+For each promotion on a shopping list, aggregate_amounts() adds up what every
+recipe needs in one pass, and purchase() works out how much to buy:
+
+- Packages ("2 kg", "900 g", "6 pack"): whole packages covering the need
+- Prices per weight or volume ("lb", "/kg"): exactly the amount needed
+
+Amounts that can't be parsed ("to taste") or don't convert to the promotion's
+unit ("2 breasts" of chicken sold per kg) are shown but don't change the
+purchase; a promotion with no usable amount is bought once, as before.
+"""
+
+import re
+import math
+from functools import lru_cache
+from scripts.unit_prices import MEASURE_UNITS, EACH_UNITS, clean_unit
+
+# Cooking units on top of the flyer mass/volume units
+COOKING_UNITS = {
+    'tsp': ('L', 0.00492892),
+    'tbsp': ('L', 0.0147868),
+    'cup': ('L', 0.236588),
+    'fl oz': ('L', 0.0295735),
+    'pint': ('L', 0.473176),
+    'quart': ('L', 0.946353),
+    'gallon': ('L', 3.78541)
+}
+
+# Spellings -> canonical unit name (a key of MEASURE_UNITS or COOKING_UNITS)
+UNIT_ALIASES = {
+    'teaspoon': 'tsp', 'teaspoons': 'tsp', 'tsps': 'tsp', 'c. à thé': 'tsp', 'c. à café': 'tsp',
+    'tablespoon': 'tbsp', 'tablespoons': 'tbsp', 'tbsps': 'tbsp', 'tbs': 'tbsp', 'c. à soupe': 'tbsp',
+    'cups': 'cup', 'tasse': 'cup', 'tasses': 'cup',
+    'fluid ounce': 'fl oz', 'fluid ounces': 'fl oz', 'fl. oz': 'fl oz',
+    'pints': 'pint', 'quarts': 'quart', 'gallons': 'gallon',
+    'gram': 'g', 'grams': 'g', 'gramme': 'g', 'grammes': 'g',
+    'kilogram': 'kg', 'kilograms': 'kg', 'kgs': 'kg',
+    'pound': 'lb', 'pounds': 'lb', 'ounce': 'oz', 'ounces': 'oz',
+    'millilitre': 'ml', 'millilitres': 'ml', 'milliliter': 'ml', 'milliliters': 'ml',
+    'litre': 'l', 'litres': 'l', 'liter': 'l', 'liters': 'l'
+}
+
+# Canonical unit name -> (base unit, factor), for every unit an amount can be written in
+UNIT_TABLE = dict(MEASURE_UNITS, **COOKING_UNITS)
+UNIT_TABLE.update({alias: UNIT_TABLE[name] for alias, name in UNIT_ALIASES.items()})
+DISPLAY_NAMES = {'l': 'L', 'lt': 'L', 'ml': 'mL', 'lbs': 'lb', 'gr': 'g'}
+
+UNICODE_FRACTIONS = {'½': '1/2', '⅓': '1/3', '⅔': '2/3', '¼': '1/4', '¾': '3/4', '⅛': '1/8'}
+
+# "1 1/2", "1/2", "1.5", "2"
+QUANTITY = r'(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)'
+# Quantity, optional range ("2-3", "2 to 3"), then the unit words
+AMOUNT_PATTERN = re.compile(rf'^({QUANTITY})(?:\s*(?:-|–|to|à)\s*({QUANTITY}))?\s*(.*)$')
+UNIT_PATTERN = re.compile(
+    '^(' + '|'.join(re.escape(name) for name in sorted(UNIT_TABLE, key=len, reverse=True)) + r')(?![a-zà-ÿ])'
+)
+DOZEN_WORDS = {'dozen', 'douzaine'}
+# Words kept when adding up counts ("3 cloves"); other words ("2 garlic cloves") are dropped
+COUNT_WORDS = EACH_UNITS | {
+    'clove', 'cloves', 'head', 'heads', 'slice', 'slices', 'stalk', 'stalks', 'sprig', 'sprigs',
+    'leaf', 'leaves', 'fillet', 'fillets', 'breast', 'breasts', 'large', 'medium', 'small', 'whole'
+}
+
+
+def to_quantity(text):
+    """Convert "1 1/2", "3/4" or "2.5" to a float."""
+    total = 0.0
+    for part in text.split():
+        if '/' in part:
+            numerator, denominator = part.split('/')
+            total += int(numerator) / int(denominator) if int(denominator) else 0.0
+        else:
+            total += float(part)
+    return total
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(amount):
+    """
+    Parse a recipe amount into its quantity and unit.
+
+    Args:
+        amount: Amount as written in the recipe (e.g. "1.5 lb", "2 tbsp", "3 cloves")
+
+    Returns:
+        Tuple of (quantity in base unit, base unit, quantity as written, unit name),
+        or None if the amount has no quantity ("to taste", "a pinch")
+    """
+    text = clean_unit(amount)
+    for symbol, fraction in UNICODE_FRACTIONS.items():
+        text = re.sub(rf'(\d)\s*{symbol}', rf'\1 {fraction}', text).replace(symbol, fraction)
+
+    match = AMOUNT_PATTERN.match(text)
+    if not match:
+        return None
+    low, high, rest = match.groups()
+    quantity = to_quantity(high or low)  # Buy for the top of a range
+    if quantity <= 0:
+        return None
+
+    unit = UNIT_PATTERN.match(rest)
+    if unit:
+        name = UNIT_ALIASES.get(unit.group(1), unit.group(1))
+        base_unit, factor = UNIT_TABLE[name]
+        return quantity * factor, base_unit, quantity, DISPLAY_NAMES.get(name, name)
+
+    # Anything else counts items: "2 large", "3 cloves", "1 head", "2 (400 g) cans"
+    word = rest.split()[0].strip('.,()') if rest.split() else ''
+    if word in DOZEN_WORDS:
+        return quantity * 12, 'each', quantity, word
+    return quantity, 'each', quantity, word if word in COUNT_WORDS else ''
+
+
+def format_quantity(quantity):
+    """Format a quantity with at most 2 decimals and no trailing zeros."""
+    return f"{quantity:.2f}".rstrip('0').rstrip('.')
+
+
+def format_base(quantity, base_unit):
+    """Format a base-unit quantity, using g and mL below 1 kg or 1 L."""
+    if base_unit == 'kg' and quantity < 1:
+        return f"{format_quantity(quantity * 1000)} g"
+    if base_unit == 'L' and quantity < 1:
+        return f"{format_quantity(quantity * 1000)} mL"
+    if base_unit == 'each':
+        return format_quantity(quantity)
+    return f"{format_quantity(quantity)} {base_unit}"
+
+
+def aggregate_amounts(amounts):
+    """
+    Add up recipe amounts.
+
+    Args:
+        amounts: Amount strings, e.g. ["1.5 lb", "2 lb", "500g", "to taste"]
+
+    Returns:
+        Tuple of (totals, display): totals maps base unit -> summed quantity,
+        display is the readable total (e.g. "2.09 kg, to taste")
+    """
+    totals = {}
+    written = {}  # base unit -> {unit as written: summed quantity as written}
+    unparsed = []
+
+    for amount in amounts:
+        parsed = parse_amount(amount)
+        if parsed is None:
+            if str(amount or '').strip():
+                unparsed.append(str(amount).strip())
+            continue
+        base_quantity, base_unit, quantity, unit = parsed
+        totals[base_unit] = totals.get(base_unit, 0.0) + base_quantity
+        units = written.setdefault(base_unit, {})
+        units[unit] = units.get(unit, 0.0) + quantity
+
+    parts = []
+    for base_unit, units in written.items():
+        if len(units) == 1:
+            # All written in one unit: keep it ("3.5 lb", "3 tbsp", "4 cloves")
+            unit, quantity = next(iter(units.items()))
+            parts.append(f"{format_quantity(quantity)} {unit}".strip())
+        else:
+            parts.append(format_base(totals[base_unit], base_unit))
+
+    display = ' + '.join(parts)
+    if unparsed:
+        display = ', '.join(([display] if display else []) + unparsed)
+    return totals, display
+
+
+def sold_by_measure(promo):
+    """True if the promotion's price is per weight or volume ("lb", "/kg") rather than per package."""
+    unit = clean_unit(promo.get('unit'))
+    return promo.get('base_unit') in ('kg', 'L') and bool(unit) and not unit[0].isdigit()
+
+
+def purchase(promo, totals):
+    """
+    Work out how much of a promotion to buy for the needed totals.
+
+    Args:
+        promo: Promotion with price and the quantity/base_unit columns of scripts/unit_prices.py
+        totals: Needed quantity per base unit (from aggregate_amounts)
+
+    Returns:
+        Dict with needed_quantity and needed_unit (None when no amount converts to the
+        promotion's unit), packages (whole packages, or the number of priced units
+        for prices per weight) and cost
+    """
+    price = promo['price']
+    base_unit = promo.get('base_unit')
+    size = promo.get('quantity')
+    needed = totals.get(base_unit) if base_unit else None
+
+    if not needed or not size:
+        return {'needed_quantity': None, 'needed_unit': None, 'packages': 1, 'cost': price}
+
+    if sold_by_measure(promo):
+        packages = round(needed / size, 2)
+    else:
+        packages = max(1, math.ceil(needed / size - 1e-9))
+
+    return {
+        'needed_quantity': round(needed, 3),
+        'needed_unit': base_unit,
+        'packages': packages,
+        'cost': round(packages * price, 2)
+    }
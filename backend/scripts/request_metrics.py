@@ -0,0 +1,97 @@
+"""
+Request latency metrics for the Flask API.
+
+init_request_metrics(app) registers hooks that record, per route:
+- http_request_duration_seconds: latency histogram by method, route and status
+- http_requests_in_flight: requests currently being handled
+
+Inside a request, wrap storage reads, LLM calls and matching loops in
+timed_operation() to see where the time goes. Operations are recorded in
+app_operation_seconds and returned to the client in a Server-Timing header,
+so browser dev tools show the breakdown of each response.
+
+Everything is kept in-process (scripts/metrics.py); the app serves it on
+/api/metrics in the Prometheus text format.
+"""
+
+import time
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from scripts.metrics import gauge, histogram
+
+REQUEST_SECONDS = histogram(
+    'http_request_duration_seconds', 'API request latency in seconds', ['method', 'route', 'status']
+)
+IN_FLIGHT = gauge(
+    'http_requests_in_flight', 'API requests currently being handled', ['route']
+)
+OPERATION_SECONDS = histogram(
+    'app_operation_seconds', 'Time spent in storage, LLM and matching operations', ['route', 'operation']
+)
+
+UNMATCHED_ROUTE = '<unmatched>'
+BACKGROUND_ROUTE = '<background>'
+
+
+def current_route():
+    """Return the URL rule of the current request (not the raw path, to bound label cardinality)."""
+    if not has_request_context():
+        return BACKGROUND_ROUTE
+    rule = request.url_rule
+    return rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+@contextmanager
+def timed_operation(operation):
+    """
+    Time one operation (e.g. 'storage_read', 'llm_call', 'matching').
+
+    Works outside requests too (e.g. in the scheduler), where the route label
+    is '<background>'.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        OPERATION_SECONDS.observe(seconds, route=current_route(), operation=operation)
+        if has_request_context():
+            g.setdefault('operation_timings', []).append((operation, seconds))
+
+
+def server_timing_header(timings):
+    """Build a Server-Timing header value from (operation, seconds) pairs."""
+    totals = {}
+    for operation, seconds in timings:
+        totals[operation] = totals.get(operation, 0.0) + seconds
+    return ', '.join(f"{operation};dur={seconds * 1000:.1f}" for operation, seconds in totals.items())
+
+
+def init_request_metrics(app):
+    """Register the request timing hooks on a Flask app."""
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.request_route = current_route()
+        IN_FLIGHT.inc(route=g.request_route)
+
+    @app.after_request
+    def record_request_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            seconds = time.perf_counter() - started
+            REQUEST_SECONDS.observe(
+                seconds, method=request.method, route=g.request_route, status=response.status_code
+            )
+            timings = g.get('operation_timings', []) + [('total', seconds)]
+            response.headers['Server-Timing'] = server_timing_header(timings)
+        return response
+
+    @app.teardown_request
+    def finish_request(exc=None):
+        route = g.pop('request_route', None)
+        if route is not None:
+            IN_FLIGHT.dec(route=route)
+
+    return app
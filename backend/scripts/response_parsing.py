@@ -0,0 +1,254 @@
+"""
+Shared parsing of JSON returned by OpenAI chat completions.
+
+Handles markdown code fences, salvages every complete value from responses that
+were cut off at max_tokens, and validates/coerces promotion records. Uses orjson
+when it is installed and falls back to the standard json module otherwise.
+"""
+
+import re
+import json
+from scripts.discounts import parse_discount
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, only used for speed
+    orjson = None
+
+
+class ResponseParseError(ValueError):
+    """Raised when no JSON value can be recovered from a response."""
+
+
+def loads(text):
+    """Parse JSON text with orjson if available, else the json module."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def strip_code_fences(content):
+    """
+    Extract the JSON payload from a response that may use markdown code blocks.
+
+    Also handles a missing closing fence, which happens when the response is
+    truncated in the middle of the JSON.
+    """
+    content = content.strip()
+
+    if content.startswith("```"):
+        # Drop the opening fence line (``` or ```json)
+        newline = content.find("\n")
+        content = content[newline + 1:] if newline != -1 else ""
+        closing = content.rfind("```")
+        if closing != -1:
+            content = content[:closing]
+
+    return content.strip()
+
+
+def repair_truncated_json(text):
+    """
+    Cut a truncated JSON document back to its last complete value and close it.
+
+    The text is scanned once, tracking open containers and string state. Every
+    point right after a complete object/array, or after a complete string inside
+    an array, is a safe place to cut. The text is cut at the last safe point and
+    the containers still open there are closed.
+
+    Args:
+        text: JSON text that may be cut off part way
+
+    Returns:
+        Repaired JSON text, or None if no complete value was found
+    """
+    start = min((i for i in (text.find('['), text.find('{')) if i != -1), default=-1)
+    if start == -1:
+        return None
+
+    stack = []
+    in_string = False
+    escaped = False
+    safe_end = None
+    safe_stack = None
+
+    for position in range(start, len(text)):
+        char = text[position]
+
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if stack and stack[-1] == '[':
+                    safe_end, safe_stack = position + 1, list(stack)
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in '[{':
+            stack.append(char)
+        elif char in ']}':
+            if not stack:
+                break
+            stack.pop()
+            safe_end, safe_stack = position + 1, list(stack)
+            if not stack:
+                # The document is complete
+                return text[start:position + 1]
+
+    if safe_end is None:
+        return None
+
+    closers = ''.join(']' if opener == '[' else '}' for opener in reversed(safe_stack))
+    return text[start:safe_end] + closers
+
+
+def parse_json_response(content):
+    """
+    Parse the JSON payload of a chat completion, salvaging truncated output.
+
+    Args:
+        content: Raw message content returned by the model
+
+    Returns:
+        Tuple of (parsed value, truncated flag)
+
+    Raises:
+        ResponseParseError: If nothing can be recovered
+    """
+    text = strip_code_fences(content or "")
+
+    try:
+        return loads(text), False
+    except ValueError:
+        pass
+
+    repaired = repair_truncated_json(text)
+    if repaired is not None:
+        try:
+            return loads(repaired), True
+        except ValueError:
+            pass
+
+    raise ResponseParseError(f"No JSON found in response: {text[:200]!r}")
+
+
+# Fields of the recipe schema in the generation prompt (app.py), in the order the model writes them
+RECIPE_FIELDS = ('name', 'description', 'ingredients', 'instructions', 'cooking_time', 'servings')
+
+PRICE_PATTERN = re.compile(r'\d+(?:[.,]\d+)?')
+
+
+def coerce_price(value):
+    """
+    Convert a price to a float rounded to cents.
+
+    Accepts numbers and strings such as "$4.99", "4,99 $" or "2.50/lb".
+
+    Returns:
+        Float price, or None if no valid price can be read
+    """
+    if isinstance(value, bool):
+        return None
+
+    if isinstance(value, (int, float)):
+        price = float(value)
+    elif isinstance(value, str):
+        match = PRICE_PATTERN.search(value)
+        if not match:
+            return None
+        price = float(match.group(0).replace(',', '.'))
+    else:
+        return None
+
+    if price < 0 or price != price:  # Reject negatives and NaN
+        return None
+
+    return round(price, 2)
+
+
+def normalize_promotion(raw):
+    """
+    Validate one extracted promotion and coerce its fields.
+
+    Returns:
+        Clean promotion dict with item, price, unit, discount and the savings
+        parsed from the discount (see scripts/discounts.py), or None if invalid
+    """
+    if not isinstance(raw, dict):
+        return None
+
+    item = raw.get('item')
+    if not isinstance(item, str) or not item.strip():
+        return None
+
+    price = coerce_price(raw.get('price'))
+    if price is None:
+        return None
+
+    unit = raw.get('unit')
+    discount = raw.get('discount')
+
+    discount = discount.strip() if isinstance(discount, str) else ''
+
+    return {
+        'item': item.strip(),
+        'price': price,
+        'unit': unit.strip() if isinstance(unit, str) and unit.strip() else 'each',
+        'discount': discount,
+        **parse_discount(discount, price)
+    }
+
+
+def normalize_promotions(raw_promotions):
+    """Return only the valid promotions from a parsed list, with coerced fields."""
+    if not isinstance(raw_promotions, list):
+        return []
+
+    promotions = []
+    for raw in raw_promotions:
+        promo = normalize_promotion(raw)
+        if promo is not None:
+            promotions.append(promo)
+
+    return promotions
+
+
+def normalize_recipes(raw_recipes):
+    """
+    Keep only complete recipes from a parsed (possibly salvaged) response.
+
+    A recipe needs every field of the prompt's schema, a non-empty ingredient list
+    where every ingredient has an item, and at least one instruction. A salvaged
+    recipe cut off inside its instructions still parses, but lacks the fields
+    that come after them (cooking_time, servings), so it is dropped.
+    """
+    if not isinstance(raw_recipes, list):
+        return []
+
+    recipes = []
+    for recipe in raw_recipes:
+        if not isinstance(recipe, dict) or not recipe.get('name'):
+            continue
+        if any(recipe.get(field) in (None, '') for field in RECIPE_FIELDS):
+            continue
+
+        ingredients = recipe.get('ingredients')
+        if not isinstance(ingredients, list) or not ingredients:
+            continue
+        if not all(isinstance(i, dict) and i.get('item') for i in ingredients):
+            continue
+
+        if not recipe.get('instructions'):
+            continue
+
+        for ingredient in ingredients:
+            ingredient.setdefault('amount', '')
+            ingredient.setdefault('on_sale', False)
+
+        recipes.append(recipe)
+
+    return recipes
@@ -0,0 +1,73 @@
+"""
+Retry transient OpenAI API errors with jittered exponential backoff.
+"""
+
+import time
+import random
+import openai
+
+# Errors worth retrying: network problems, timeouts, rate limits and 5xx responses
+TRANSIENT_ERRORS = (
+    openai.APIConnectionError,  # Includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError
+)
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=30.0):
+    """
+    Return a "full jitter" delay for the given retry attempt (1-based).
+
+    The delay is drawn uniformly between 0 and base_delay * 2 ** (attempt - 1),
+    capped at max_delay, so concurrent callers do not retry in lockstep.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retry_after_seconds(error):
+    """Return the server's Retry-After hint in seconds, if the error carries one."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+
+    value = response.headers.get('retry-after')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def call_with_retry(func, max_attempts=4, base_delay=1.0, max_delay=30.0,
+                    retry_on=TRANSIENT_ERRORS, sleep=time.sleep):
+    """
+    Call func(), retrying transient errors with jittered exponential backoff.
+
+    Args:
+        func: Zero-argument callable to invoke
+        max_attempts: Total number of attempts, including the first one
+        base_delay: Base delay in seconds for the backoff
+        max_delay: Maximum delay between attempts in seconds
+        retry_on: Exception types that are retried
+        sleep: Sleep function (replaceable in tests)
+
+    Returns:
+        The return value of func()
+
+    Raises:
+        The last exception once all attempts have failed, or any non-transient error
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return func()
+        except retry_on as e:
+            if attempt == max_attempts:
+                raise
+
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            hint = retry_after_seconds(e)
+            if hint is not None:
+                delay = min(max(delay, hint), max_delay)
+
+            print(f"    ⚠ {type(e).__name__}, retrying in {delay:.1f}s "
+                  f"(attempt {attempt + 1}/{max_attempts})")
+            sleep(delay)
@@ -0,0 +1,94 @@
+"""
+Coalesce concurrent identical calls into one (single-flight).
+
+When several callers ask for the same key while a call for it is running, only
+the first one (the leader) does the work; the others wait for its result, or
+its exception, instead of repeating the call. Nothing is cached: once the call
+finishes, the next caller for that key starts a fresh one.
+
+Threads (do) and coroutines (do_async) share the same in-flight calls, so a
+synchronous request and an async job asking for the same thing also coalesce.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from scripts.metrics import counter
+
+SINGLE_FLIGHT_CALLS = counter(
+    'single_flight_calls_total', 'Calls through a single-flight group, by whether they led or shared a call',
+    ['group', 'role']
+)
+
+
+class SingleFlight:
+    """
+    A group of coalesced calls, keyed by any hashable value.
+
+    Args:
+        name: Group name, used as the metrics label
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """Return (future, is_leader) for the call in flight for key, starting one if needed."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                SINGLE_FLIGHT_CALLS.inc(group=self.name, role='shared')
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            SINGLE_FLIGHT_CALLS.inc(group=self.name, role='leader')
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, func):
+        """
+        Return func(), or the result of the identical call already in flight for key.
+
+        Raises:
+            Whatever the shared call raised
+        """
+        future, leader = self._join(key)
+        if leader:
+            try:
+                result = func()
+            except BaseException as e:  # Includes cancellation, so waiters never hang
+                self._finish(key, future, error=e)
+                raise
+            self._finish(key, future, result)
+            return result
+
+        return future.result()
+
+    async def do_async(self, key, coroutine_function):
+        """Like do(), awaiting coroutine_function() and waiting without blocking the event loop."""
+        future, leader = self._join(key)
+        if leader:
+            try:
+                result = await coroutine_function()
+            except BaseException as e:  # Includes cancellation, so waiters never hang
+                self._finish(key, future, error=e)
+                raise
+            self._finish(key, future, result)
+            return result
+
+        return await asyncio.wrap_future(future)
+
+    def in_flight(self):
+        """Return the number of calls currently running."""
+        with self._lock:
+            return len(self._calls)
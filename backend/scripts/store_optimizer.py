@@ -0,0 +1,303 @@
+"""
+Cross-store shopping list optimizer.
+
+The default shopping list binds each on-sale ingredient to the first promotion
+that matches it, whatever its store or price. StoreOptimizer instead looks at
+every matching promotion across stores and picks, for each ingredient, the
+cheapest one within a set of at most max_stores stores:
+
+1. Candidates: every promotion an ingredient matches, using the same rule as
+   the default shopping list (see candidates()). Lookups use str.find over all
+   promotion names joined into one string plus a name -> positions dict.
+2. Candidates are ranked by what buying the recipes' total amount costs
+   (purchase() in scripts/quantities.py: 4 kg of chicken is one 4 kg pack or
+   eight 500 g packs). When the amount doesn't convert to a promotion's unit,
+   its unit_price ranks it, and only then its package price.
+3. Per ingredient and store, only the best candidate matters. That
+   {store: (rank, cost, promotion)} table is cached per ingredient name and
+   amount, and a store selection is scored from the small ingredient x store table.
+4. Store selection is a budgeted set cover: selections are ranked by covered
+   ingredients, then total purchase cost. All selections are tried when there are at
+   most MAX_EXACT_SELECTIONS of them; otherwise a greedy pick is improved by
+   swapping single stores until no swap helps.
+"""
+
+import heapq
+from bisect import bisect_right
+from itertools import combinations
+from math import comb
+from scripts.quantities import aggregate_amounts, purchase
+from scripts.unit_prices import add_unit_prices
+
+MAX_EXACT_SELECTIONS = 2000  # Store selections scored exhaustively before falling back to greedy + swaps
+CANDIDATE_CACHE_SIZE = 4096
+MIN_KEYWORD_LENGTH = 5  # Ingredient words this long match inside promotion names ("chicken" in "chicken thighs")
+
+
+class ShoppingListOptimizerError(ValueError):
+    """Raised for invalid optimizer options."""
+
+
+class StoreOptimizer:
+    """
+    Per-ingredient candidate lists and store selection over a list of promotions.
+
+    Args:
+        promotions: Promotions of the current scrape, in stored order
+    """
+
+    def __init__(self, promotions):
+        # Promotions of the index already have their unit price columns; these are kept as they are
+        self.promotions = add_unit_prices(promotions)
+        promotions = self.promotions
+        self.names = [str(promo.get('item') or '').lower().replace('\n', ' ') for promo in promotions]
+        self.stores = [str(promo.get('store') or 'Unknown') for promo in promotions]
+        self.prices = [
+            float(promo['price']) if isinstance(promo.get('price'), (int, float)) and not isinstance(promo['price'], bool)
+            else None
+            for promo in promotions
+        ]
+
+        # All names in one string, for C-speed substring scans; starts[i] is where name i begins
+        self.text = '\n'.join(self.names)
+        self.starts = []
+        offset = 0
+        for name in self.names:
+            self.starts.append(offset)
+            offset += len(name) + 1
+
+        self.by_name = {}
+        for position, name in enumerate(self.names):
+            if name:
+                self.by_name.setdefault(name, []).append(position)
+        self.name_lengths = sorted({len(name) for name in self.by_name})
+
+        self.candidate_cache = {}
+
+    def positions_containing(self, needle):
+        """Return positions of promotions whose name contains needle."""
+        found = set()
+        start = self.text.find(needle)
+        while start != -1:
+            position = bisect_right(self.starts, start) - 1
+            found.add(position)
+            # Skip to the next name, since one hit per promotion is enough
+            next_start = self.starts[position + 1] if position + 1 < len(self.starts) else len(self.text)
+            start = self.text.find(needle, next_start)
+        return found
+
+    def candidates(self, item_lower):
+        """
+        Return positions of every promotion matching an ingredient, in stored order.
+
+        A promotion matches when its name is part of the ingredient name, the
+        ingredient name is part of its name, or an ingredient word of at least
+        MIN_KEYWORD_LENGTH letters is part of its name.
+        """
+        found = set()
+        if item_lower:
+            found |= self.positions_containing(item_lower)
+        for word in set(item_lower.split()):
+            if len(word) >= MIN_KEYWORD_LENGTH:
+                found |= self.positions_containing(word)
+
+        # Promotion names that are substrings of the ingredient name
+        length = len(item_lower)
+        for size in self.name_lengths:
+            if size > length:
+                break
+            for start in range(length - size + 1):
+                found.update(self.by_name.get(item_lower[start:start + size], ()))
+
+        return sorted(found)
+
+    def rank(self, position, totals):
+        """
+        Rank a priced candidate for the needed amounts.
+
+        Args:
+            position: Candidate position
+            totals: Needed quantity per base unit (from aggregate_amounts)
+
+        Returns:
+            Tuple of (rank, cost): rank sorts candidates (lower is better) by the
+            purchase cost of the amount needed, else by unit price, else by price;
+            cost is what purchase() would pay
+        """
+        promo = self.promotions[position]
+        bought = purchase(dict(promo, price=self.prices[position]), totals)
+        if bought['needed_quantity'] is not None:
+            return (0, bought['cost'], position), bought['cost']
+        unit_price = promo.get('unit_price')
+        if isinstance(unit_price, (int, float)) and not isinstance(unit_price, bool):
+            return (1, unit_price, position), bought['cost']
+        return (2, self.prices[position], position), bought['cost']
+
+    def best_by_store(self, item_lower, totals=None):
+        """
+        Return the best priced candidate in each store for the needed amounts (cached).
+
+        Args:
+            item_lower: Lowercase ingredient name
+            totals: Needed quantity per base unit (from aggregate_amounts), or None if unknown
+
+        Returns:
+            Dict of {store: (rank, cost, position)}
+        """
+        totals = totals or {}
+        cache_key = (item_lower, tuple(sorted(totals.items())))
+        cached = self.candidate_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        best = {}
+        for position in self.candidates(item_lower):
+            if self.prices[position] is None:
+                continue
+            rank, cost = self.rank(position, totals)
+            store = self.stores[position]
+            if store not in best or rank < best[store][0]:
+                best[store] = (rank, cost, position)
+
+        if len(self.candidate_cache) >= CANDIDATE_CACHE_SIZE:
+            self.candidate_cache.clear()
+        self.candidate_cache[cache_key] = best
+        return best
+
+    def choose_stores(self, tables, max_stores=None):
+        """
+        Choose up to max_stores stores covering the most ingredients at the lowest cost.
+
+        Args:
+            tables: One {store: (rank, cost, position)} table per ingredient (see best_by_store)
+            max_stores: Maximum number of stores, or None for no limit
+
+        Returns:
+            Sorted list of chosen stores
+        """
+        stores = sorted({store for table in tables for store in table})
+        if max_stores is None or max_stores >= len(stores):
+            return stores
+
+        # Candidate rows per ingredient, aligned with stores (None where the store has no candidate)
+        rows = [[table.get(store) for store in stores] for table in tables]
+        rows = [row for row in rows if any(entry is not None for entry in row)]
+
+        def score(selection):
+            covered = 0
+            total = 0.0
+            for row in rows:
+                entries = [row[index] for index in selection if row[index] is not None]
+                if entries:
+                    covered += 1
+                    total += min(entries)[1]  # Cost of the best ranked candidate
+            return -covered, round(total, 6)
+
+        indexes = range(len(stores))
+        if comb(len(stores), max_stores) <= MAX_EXACT_SELECTIONS:
+            selection = min(combinations(indexes, max_stores), key=score)
+        else:
+            selection = self._greedy_with_swaps(indexes, max_stores, score)
+
+        return [stores[index] for index in sorted(selection)]
+
+    @staticmethod
+    def _greedy_with_swaps(indexes, max_stores, score):
+        """Pick stores one at a time by best score, then swap single stores while that improves it."""
+        selection = []
+        for _ in range(max_stores):
+            remaining = [index for index in indexes if index not in selection]
+            selection.append(min(remaining, key=lambda index: score(selection + [index])))
+
+        best = score(selection)
+        improved = True
+        while improved:
+            improved = False
+            for slot in range(len(selection)):
+                for index in indexes:
+                    if index in selection:
+                        continue
+                    trial = selection[:slot] + [index] + selection[slot + 1:]
+                    trial_score = score(trial)
+                    if trial_score < best:
+                        selection, best, improved = trial, trial_score, True
+        return tuple(selection)
+
+    def optimize(self, recipes, max_stores=None, max_alternatives=3):
+        """
+        Match on-sale recipe ingredients to the cheapest promotions within the chosen stores.
+
+        Args:
+            recipes: Selected recipes
+            max_stores: Maximum number of stores to visit, or None for no limit
+            max_alternatives: Other-store options listed per promotion, best ranked first
+
+        Returns:
+            Tuple of (promotion_usage, other_ingredients, stores), with promotion_usage
+            and other_ingredients shaped like aggregate_linked_ingredients() in app.py
+        """
+        if max_stores is not None and (isinstance(max_stores, bool) or not isinstance(max_stores, int) or max_stores < 1):
+            raise ShoppingListOptimizerError('max_stores must be a positive integer')
+
+        # (recipe name, item name, amount) for every on-sale ingredient, plus the other ingredients
+        wanted = []
+        other_ingredients = {}
+        for recipe in recipes:
+            for ingredient in recipe['ingredients']:
+                item_name = ingredient['item']
+                if ingredient.get('on_sale', False):
+                    wanted.append((recipe['name'], item_name, ingredient['amount']))
+                else:
+                    add_other(other_ingredients, item_name, ingredient['amount'])
+
+        # What all recipes need of each ingredient, so candidates are ranked by what buying it costs
+        amounts = {}
+        for _, item_name, amount in wanted:
+            amounts.setdefault(item_name.lower(), []).append(amount)
+        tables = {
+            item_lower: self.best_by_store(item_lower, aggregate_amounts(item_amounts)[0])
+            for item_lower, item_amounts in amounts.items()
+        }
+
+        stores = self.choose_stores(list(tables.values()), max_stores)
+        allowed = set(stores)
+
+        promotion_usage = {}  # position -> {promo, recipe_names, suggested_amounts, alternatives}
+        for recipe_name, item_name, amount in wanted:
+            table = tables[item_name.lower()]
+            choices = [entry for store, entry in table.items() if store in allowed]
+            if not choices:
+                # No promotion in the chosen stores - treat as other ingredient
+                add_other(other_ingredients, item_name, amount)
+                continue
+
+            position = min(choices)[2]
+            if position not in promotion_usage:
+                others = [entry for entry in table.values() if entry[2] != position]
+                promotion_usage[position] = {
+                    'promo': self.promotions[position],
+                    'recipe_names': [],
+                    'suggested_amounts': [],
+                    'alternatives': [
+                        {'item': self.promotions[candidate]['item'], 'store': self.stores[candidate],
+                         'price': self.prices[candidate], 'cost': cost}
+                        for _, cost, candidate in heapq.nsmallest(max_alternatives, others)
+                    ]
+                }
+            promotion_usage[position]['recipe_names'].append(recipe_name)
+            promotion_usage[position]['suggested_amounts'].append(amount)
+
+        used = sorted({self.stores[position] for position in promotion_usage})
+        return promotion_usage, other_ingredients, used
+
+
+def add_other(other_ingredients, item_name, amount):
+    """Add an ingredient without a promotion to other_ingredients, keyed by lowercase name."""
+    item_lower = item_name.lower()
+    if item_lower not in other_ingredients:
+        other_ingredients[item_lower] = {
+            'item': item_name,
+            'amounts': [],
+            'on_sale': False
+        }
+    other_ingredients[item_lower]['amounts'].append(amount)
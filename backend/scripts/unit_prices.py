@@ -0,0 +1,209 @@
+"""
+Normalize free-form promotion units into comparable prices.
+
+Flyer analysis returns units as printed: "4 kg", "2 x 2 kg", "lb", "170g",
+"24/355 ml", "each", "pkg". normalize_unit() turns these into a quantity of a
+base unit (kg, L or each), and add_unit_prices() stores three columns next to
+each promotion at ingest:
+
+- quantity:   how much of the base unit the price buys (e.g. 4.0 for "2 x 2 kg")
+- base_unit:  'kg', 'L' or 'each'
+- unit_price: price / quantity, i.e. the price per kg, per L or per item
+
+The same arithmetic covers package sizes ("4 kg" for $30.99) and rates ("lb"
+for $3.99 means $3.99 per pound), since a rate is a package of one unit. When
+the unit says nothing about size ("each", "pkg", "selected varieties"), a size
+written in the item name ("Coffee 900 g") is used instead.
+"""
+
+import re
+
+BASE_UNITS = ['kg', 'L', 'each']
+
+# Base unit and factor for each measure unit
+MEASURE_UNITS = {
+    'mg': ('kg', 0.000001),
+    'g': ('kg', 0.001),
+    'gr': ('kg', 0.001),
+    'kg': ('kg', 1.0),
+    'lb': ('kg', 0.45359237),
+    'lbs': ('kg', 0.45359237),
+    'oz': ('kg', 0.028349523),
+    'ml': ('L', 0.001),
+    'cl': ('L', 0.01),
+    'l': ('L', 1.0),
+    'lt': ('L', 1.0),
+    'litre': ('L', 1.0),
+    'litres': ('L', 1.0),
+    'liter': ('L', 1.0),
+    'liters': ('L', 1.0)
+}
+
+# Units meaning one item, and counted units ("6 rolls", "20 unités")
+EACH_UNITS = {
+    'each', 'ea', 'ch', 'chacun', 'chaque', 'unit', 'units', 'unité', 'unités', 'item', 'items',
+    'pkg', 'pk', 'pack', 'package', 'paquet', 'bottle', 'bottles', 'can', 'cans', 'bag', 'bags',
+    'jar', 'jars', 'box', 'boxes', 'case', 'caisse', 'ctn', 'carton', 'set', 'bunch', 'roll', 'rolls',
+    'piece', 'pieces', 'pcs', 'ct', 'count', 'tray', 'loaf', 'dozen', 'douzaine'
+}
+DOZEN_UNITS = {'dozen', 'douzaine'}
+
+# Largest size a single promotion plausibly sells; anything bigger is a misread unit
+MAX_QUANTITY = {'kg': 50.0, 'L': 50.0, 'each': 500.0}
+# Denominators of sizes written as fractions ("1/2 lb", "3/4 kg")
+FRACTION_DENOMINATORS = {2, 3, 4, 8}
+# A count-and-size pack ("24/355 ml") has sizes at least this many times its count
+MIN_PACK_SIZE_RATIO = 10
+
+NUMBER = r'(\d+(?:\.\d+)?)'
+MEASURE = '|'.join(sorted(MEASURE_UNITS, key=len, reverse=True))
+
+# "2 x 2 kg", "4x100g"
+MULTIPACK_PATTERN = re.compile(rf'^(\d+)\s*(?:x|×)\s*{NUMBER}\s*({MEASURE})\b')
+# "1/2 lb", "300/400 g", "24/355 ml" (see slash_quantity)
+SLASH_PATTERN = re.compile(rf'^(\d+)\s*/\s*(\d+)\s*({MEASURE})\b')
+# "4 kg", "300-350 g" (smallest size), "lb", "100 g"
+MEASURE_PATTERN = re.compile(rf'^(?:{NUMBER}(?:\s*-\s*\d+(?:\.\d+)?)?\s*)?({MEASURE})\b')
+# "6 rolls", "2-pack", "2/pkg", "20 unités", "10"
+COUNT_PATTERN = re.compile(rf'^(\d+)\s*(?:[-/]\s*)?(\w+)?$')
+# A size anywhere in an item name ("Coffee 900 g", "Cola 12 x 355 mL")
+ITEM_SIZE_PATTERN = re.compile(
+    rf'(?:(\d+)\s*(?:x|×)\s*)?{NUMBER}\s*({MEASURE})(?![a-z])'
+)
+
+
+def clean_unit(text):
+    """Lowercase a unit string, use '.' as decimal separator and drop leading '/' or 'per'."""
+    text = str(text or '').casefold().strip()
+    text = re.sub(r'(\d),(\d)', r'\1.\2', text)
+    text = re.sub(r'^(?:/|per\s+|par\s+)', '', text).strip()
+    return text.rstrip('.')
+
+
+def slash_quantity(first, second):
+    """
+    Read "a/b" in front of a measure unit, in measure units.
+
+    - A fraction when b is a usual denominator: "1/2 lb" is half a pound
+    - A range when b is close to a: "300/400 g" and "3/5 lb" (smallest size,
+      as for "300-350 g")
+    - A pack when b is much larger than a: "24/355 ml" is 24 cans of 355 mL
+
+    Returns:
+        The quantity, or None when a/b is none of these
+    """
+    if first == 0 or second == 0:
+        return None
+    if first < second and second in FRACTION_DENOMINATORS:
+        return first / second
+    if first <= second <= 2 * first:
+        return float(first)
+    if second >= MIN_PACK_SIZE_RATIO * first:
+        return float(first * second)
+    return None
+
+
+def plausible(size):
+    """Return size if it is a believable (quantity, base_unit) for one promotion, else None."""
+    if size is None or not 0 < size[0] <= MAX_QUANTITY[size[1]]:
+        return None
+    return size
+
+
+def normalize_unit(unit):
+    """
+    Parse a unit string into (quantity, base_unit).
+
+    Args:
+        unit: Unit as printed in the flyer (e.g. "2 x 2 kg", "lb", "each")
+
+    Returns:
+        Tuple of (quantity, base_unit), or None if the unit is not understood
+        or gives an implausible size
+    """
+    return plausible(parse_unit(clean_unit(unit)))
+
+
+def parse_unit(text):
+    """Parse a cleaned unit string into (quantity, base_unit), or None."""
+    if not text:
+        return None
+
+    match = SLASH_PATTERN.match(text)
+    if match:
+        first, second, name = match.groups()
+        quantity = slash_quantity(int(first), int(second))
+        if quantity is None:
+            return None
+        base_unit, factor = MEASURE_UNITS[name]
+        return quantity * factor, base_unit
+
+    match = MULTIPACK_PATTERN.match(text)
+    if match:
+        count, amount, name = match.groups()
+        base_unit, factor = MEASURE_UNITS[name]
+        return int(count) * float(amount) * factor, base_unit
+
+    match = MEASURE_PATTERN.match(text)
+    if match:
+        amount, name = match.groups()
+        base_unit, factor = MEASURE_UNITS[name]
+        return (float(amount) if amount else 1.0) * factor, base_unit
+
+    if text in EACH_UNITS:
+        return (12.0 if text in DOZEN_UNITS else 1.0), 'each'
+
+    match = COUNT_PATTERN.match(text)
+    if match:
+        count, name = match.groups()
+        if name is None or name in EACH_UNITS or name.endswith('s'):  # "48 waffles"
+            return float(count) * (12 if name in DOZEN_UNITS else 1), 'each'
+
+    return None
+
+
+def item_size(item):
+    """Return (quantity, base_unit) for a size written in an item name, or None."""
+    match = ITEM_SIZE_PATTERN.search(clean_unit(item))
+    if not match:
+        return None
+    count, amount, name = match.groups()
+    base_unit, factor = MEASURE_UNITS[name]
+    return plausible((int(count or 1) * float(amount) * factor, base_unit))
+
+
+def unit_price_columns(promo):
+    """
+    Compute the quantity, base_unit and unit_price columns of a promotion.
+
+    Returns:
+        Dict with the three columns (all None when the size is unknown)
+    """
+    size = normalize_unit(promo.get('unit'))
+    if size is None or size[1] == 'each':
+        # "each" only tells us the price is per item; the item name may say how big it is
+        size = item_size(promo.get('item')) or size
+
+    if size is None or size[0] <= 0:
+        return {'quantity': None, 'base_unit': None, 'unit_price': None}
+
+    quantity, base_unit = size
+    price = promo.get('price')
+    unit_price = None
+    if isinstance(price, (int, float)) and not isinstance(price, bool):
+        unit_price = round(price / quantity, 4)
+
+    return {'quantity': round(quantity, 6), 'base_unit': base_unit, 'unit_price': unit_price}
+
+
+def add_unit_prices(promotions):
+    """
+    Return promotions with the unit price columns added.
+
+    Promotions that already have them are returned as they are, so this is
+    cheap to call on data normalized at ingest.
+    """
+    return [
+        promo if 'unit_price' in promo else dict(promo, **unit_price_columns(promo))
+        for promo in promotions
+    ]
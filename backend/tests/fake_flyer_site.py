@@ -0,0 +1,163 @@
+"""
+Local stand-in for the RedFlagDeals flyer pages and image CDN.
+
+Serves a flyers listing, one flyer page per store and the page images from a
+small HTTP server on 127.0.0.1, with configurable latency and bandwidth, so the
+pipeline can be run and timed without network access. Point the pipeline at it
+with flyers_url=site.flyers_url and image_url_pattern=site.image_url_pattern.
+"""
+
+import re
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LISTING_CARD = """
+<div class="flyer_listing" data-dealer-name="{name}">
+  <a class="flyer_image" href="{key}/"><img src="/thumb/{key}.jpg"></a>
+  <div class="flyer_title">{title}</div>
+  <div class="flyer_dates">{dates}</div>
+</div>"""
+
+FLYER_PAGE = """<html><head><title>{name} flyer</title></head><body>
+<div id="viewer"></div>
+<script>
+OpenSeadragon({{id: "viewer", sequenceMode: true, tileSources: [{sources}]}});
+</script>
+</body></html>"""
+
+CHUNK_SIZE = 16 * 1024
+
+
+class FakeFlyerSite:
+    """
+    Serve synthetic flyers for a set of stores.
+
+    Args:
+        stores: Dict of store name to page count (e.g., {'metro': 12})
+        image_bytes: Body served for every page image, or a function of the
+            request path returning it
+        latency: Seconds to wait before answering each request
+        bandwidth: Bytes per second per response body (None = unlimited)
+        extra_listings: Non-grocery dealer names added to the listing
+    """
+
+    def __init__(self, stores, image_bytes=b'image', latency=0.0, bandwidth=None,
+                 extra_listings=('best buy',)):
+        self.stores = dict(stores)
+        self.image_bytes = image_bytes
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.extra_listings = list(extra_listings)
+        self.hits = {}
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def flyers_url(self):
+        return f"{self.url}/flyers/"
+
+    @property
+    def image_url_pattern(self):
+        """Regex matching this site's page image URLs (config 'image_url_pattern')."""
+        return re.escape(self.url) + r'/cms/[0-9/]+_original\.jpg'
+
+    def store_key(self, name):
+        return name.lower().replace(' ', '-')
+
+    def image_urls(self, name):
+        index = list(self.stores).index(name) + 1
+        return [f"{self.url}/cms/2025/{index}/{page}_original.jpg"
+                for page in range(1, self.stores[name] + 1)]
+
+    def image_data(self):
+        """Return what the extract stage produces for this site (used when no browser is available)."""
+        return {
+            self.store_key(name): {
+                'store': name,
+                'title': 'Weekly Savings',
+                'date_range': 'Current Week',
+                'url': f"{self.flyers_url}{self.store_key(name)}/",
+                'image_urls': self.image_urls(name),
+                'image_count': pages
+            }
+            for name, pages in self.stores.items()
+        }
+
+    def listing_html(self):
+        cards = [
+            LISTING_CARD.format(name=name, key=self.store_key(name),
+                                title='Weekly Savings', dates='Current Week')
+            for name in list(self.stores) + self.extra_listings
+        ]
+        return f"<html><body>{''.join(cards)}</body></html>"
+
+    def flyer_html(self, name):
+        sources = ', '.join(f'{{type: "image", url: "{url}"}}' for url in self.image_urls(name))
+        return FLYER_PAGE.format(name=name, sources=sources)
+
+    def _route(self, path):
+        """Return (status, content type, body) for a request path."""
+        if path == '/flyers/':
+            return 200, 'text/html', self.listing_html().encode('utf-8')
+
+        for name in self.stores:
+            if path == f"/flyers/{self.store_key(name)}/":
+                return 200, 'text/html', self.flyer_html(name).encode('utf-8')
+
+        if path.startswith('/cms/') and path.endswith('_original.jpg'):
+            body = self.image_bytes(path) if callable(self.image_bytes) else self.image_bytes
+            return 200, 'image/jpeg', body
+
+        return 404, 'text/plain', b'not found'
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site._lock:
+                    site.hits[self.path] = site.hits.get(self.path, 0) + 1
+
+                if site.latency:
+                    time.sleep(site.latency)
+
+                status, content_type, body = site._route(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+                for start in range(0, len(body), CHUNK_SIZE):
+                    chunk = body[start:start + CHUNK_SIZE]
+                    self.wfile.write(chunk)
+                    if site.bandwidth:
+                        time.sleep(len(chunk) / site.bandwidth)
+
+                with site._lock:
+                    site.bytes_sent += len(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep test output quiet
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
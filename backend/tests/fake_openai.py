@@ -0,0 +1,116 @@
+"""
+Local stand-in for the OpenAI chat completions HTTP API.
+
+Runs a small HTTP server on 127.0.0.1 in a background thread so tests can point a
+real OpenAI client at it (base_url=server.base_url) and inspect the requests sent.
+"""
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer:
+    """
+    Serve canned chat completion responses.
+
+    Responses are taken from a queue filled with `add_response()`; when the queue
+    is empty, `default_content` is returned. Every request body is recorded in
+    `requests`.
+    """
+
+    def __init__(self, default_content="[]", delay=0.0):
+        self.default_content = default_content
+        self.delay = delay
+        self.requests = []
+        self._responses = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def add_response(self, content=None, finish_reason="stop", refusal=None, status=200):
+        """Queue the next response (message content, finish reason, refusal or HTTP error status)."""
+        with self._lock:
+            self._responses.append({
+                'content': content,
+                'finish_reason': finish_reason,
+                'refusal': refusal,
+                'status': status
+            })
+
+    def _next_response(self, body):
+        with self._lock:
+            self.requests.append(body)
+            if self._responses:
+                return self._responses.pop(0)
+        return {'content': self.default_content, 'finish_reason': 'stop', 'refusal': None, 'status': 200}
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                response = server._next_response(body)
+
+                if server.delay:
+                    time.sleep(server.delay)
+
+                if response['status'] != 200:
+                    payload = {"error": {"message": "fake error", "type": "server_error"}}
+                else:
+                    content = response['content']
+                    payload = {
+                        "id": f"chatcmpl-fake-{len(server.requests)}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get('model', 'gpt-4o'),
+                        "choices": [{
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": content,
+                                "refusal": response['refusal']
+                            },
+                            "finish_reason": response['finish_reason']
+                        }],
+                        "usage": {
+                            "prompt_tokens": len(json.dumps(body)) // 4,
+                            "completion_tokens": len(content or "") // 4,
+                            "total_tokens": (len(json.dumps(body)) + len(content or "")) // 4
+                        }
+                    }
+
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(response['status'])
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # Keep test output quiet
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,462 @@
+"""
+Unit tests for flyer analysis with the OpenAI Vision API.
+Uses a stand-in client or a local fake OpenAI server, so no real API calls are made.
+"""
+
+import pytest
+import json
+from types import SimpleNamespace
+from openai import OpenAI
+from scripts.analyze_flyers import (
+    ANALYSIS_STATS,
+    analyze_flyer_image,
+    analyze_flyer_pages,
+    analyze_pages_in_groups,
+    analyze_pages_with_checkpoints,
+    build_page_content,
+    get_parse_failure_rate,
+    reset_analysis_stats,
+    split_batch_response
+)
+from tests.fake_openai import FakeOpenAIServer
+from scripts.discounts import parse_discount
+
+
+class FakeCompletions:
+    """Records chat completion requests and replays canned responses."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        content = self.responses.pop(0)
+        if isinstance(content, Exception):
+            raise content
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeOpenAI:
+    """Minimal stand-in exposing client.chat.completions.create()."""
+
+    def __init__(self, responses):
+        self.chat = SimpleNamespace(completions=FakeCompletions(responses))
+
+
+@pytest.fixture(autouse=True)
+def no_preprocessing(monkeypatch):
+    """Send the raw test files; preprocessing is covered in test_image_preprocessing.py."""
+    monkeypatch.setattr('scripts.analyze_flyers.PREPROCESS_IMAGES', False)
+
+
+@pytest.fixture
+def flyer_pages(tmp_path):
+    """Write three small fake flyer pages to disk."""
+    paths = []
+    for idx in range(1, 4):
+        path = tmp_path / f"maxi_page_{idx:03d}.jpg"
+        path.write_bytes(b"fake jpeg bytes " + bytes([idx]))
+        paths.append(str(path))
+    return paths
+
+
+def promo(item, price=1.99, unit="each", discount=""):
+    """Build a complete promotion record, with the savings fields added when it is normalized."""
+    return {"item": item, "price": price, "unit": unit, "discount": discount, **parse_discount(discount, price)}
+
+
+def batch_response(*pages):
+    """Build a multi-page response body with one promotion list per page."""
+    return json.dumps({
+        "pages": [
+            {"page": number, "promotions": promotions}
+            for number, promotions in enumerate(pages, 1)
+        ]
+    })
+
+
+class TestSplitBatchResponse:
+    """Tests for splitting multi-page responses back per page."""
+
+    def test_split_by_page_number(self):
+        """Test promotions are assigned to the page they were reported on."""
+        data = {"pages": [
+            {"page": 2, "promotions": [promo("Milk")]},
+            {"page": 1, "promotions": [promo("Eggs")]}
+        ]}
+
+        pages = split_batch_response(data, 2)
+
+        assert pages == [[promo("Eggs")], [promo("Milk")]]
+
+    def test_missing_pages_are_empty(self):
+        """Test pages absent from the response come back as empty lists."""
+        data = {"pages": [{"page": 3, "promotions": [promo("Bread")]}]}
+
+        pages = split_batch_response(data, 3)
+
+        assert pages == [[], [], [promo("Bread")]]
+
+    def test_unknown_page_numbers_are_ignored(self):
+        """Test entries for pages that were never sent are dropped."""
+        data = {"pages": [{"page": 7, "promotions": [promo("Bread")]}]}
+
+        assert split_batch_response(data, 2) == [[], []]
+
+    def test_single_page_array_format(self):
+        """Test a plain array is accepted for a one-page request."""
+        assert split_batch_response([promo("Eggs")], 1) == [[promo("Eggs")]]
+
+
+class TestBuildPageContent:
+    """Tests for the message parts sent for one page."""
+
+    @pytest.mark.parametrize("error", [OSError("disk full"), ValueError("bad manifest")])
+    def test_preprocessing_failure_sends_original(self, flyer_pages, monkeypatch, capsys, error):
+        """Test the original file is sent when preprocessing raises."""
+        def fail_preprocess(image_path):
+            raise error
+
+        monkeypatch.setattr('scripts.analyze_flyers.PREPROCESS_IMAGES', True)
+        monkeypatch.setattr('scripts.analyze_flyers.preprocess_flyer_image', fail_preprocess)
+
+        parts = build_page_content(flyer_pages[0], page_number=1)
+
+        assert [part["type"] for part in parts] == ["text", "image_url"]
+        assert "Preprocessing failed" in capsys.readouterr().out
+
+
+class TestAnalyzeFlyerPages:
+    """Tests for multi-image Vision requests."""
+
+    def test_pages_share_one_request(self, flyer_pages):
+        """Test several pages are sent as images of a single request."""
+        client = FakeOpenAI([batch_response(
+            [{"item": "Eggs", "price": 2.99, "unit": "dozen", "discount": ""}],
+            [],
+            [{"item": "Milk", "price": 4.49, "unit": "2 L", "discount": "Save $1"}]
+        )])
+
+        pages = analyze_flyer_pages(client, flyer_pages, "maxi")
+
+        calls = client.chat.completions.calls
+        assert len(calls) == 1
+        content = calls[0]["messages"][0]["content"]
+        assert [part["type"] for part in content] == [
+            "text",
+            "text", "image_url",
+            "text", "image_url",
+            "text", "image_url"
+        ]
+        assert content[1]["text"] == "Page 1:"
+
+        assert [len(promotions) for promotions in pages] == [1, 0, 1]
+        assert pages[0][0]["store"] == "maxi"
+        assert pages[2][0]["item"] == "Milk"
+
+    def test_fenced_json_response(self, flyer_pages):
+        """Test responses wrapped in markdown code blocks are parsed."""
+        body = batch_response([promo("Eggs")], [promo("Milk")])
+        client = FakeOpenAI([f"```json\n{body}\n```"])
+
+        pages = analyze_flyer_pages(client, flyer_pages[:2], "iga")
+
+        assert [p[0]["item"] for p in pages] == ["Eggs", "Milk"]
+
+    def test_truncated_response_is_salvaged(self, flyer_pages):
+        """Test complete promotions survive a response cut off at max_tokens."""
+        body = batch_response([promo("Eggs")], [promo("Milk"), promo("Bread")])
+        client = FakeOpenAI([body[:body.index('"Bread"')]])
+
+        pages = analyze_flyer_pages(client, flyer_pages[:2], "iga")
+
+        assert [[p["item"] for p in page] for page in pages] == [["Eggs"], ["Milk"]]
+
+    def test_invalid_json_returns_empty_pages(self, flyer_pages):
+        """Test a malformed response yields one empty list per page."""
+        client = FakeOpenAI(["not json"])
+
+        pages = analyze_flyer_pages(client, flyer_pages, "metro")
+
+        assert pages == [[], [], []]
+
+    def test_single_page_uses_single_page_prompt(self, flyer_pages):
+        """Test a group of one page falls back to the single-page request."""
+        client = FakeOpenAI([json.dumps([promo("Eggs")])])
+
+        pages = analyze_flyer_pages(client, flyer_pages[:1], "maxi")
+
+        content = client.chat.completions.calls[0]["messages"][0]["content"]
+        assert len(content) == 2
+        assert pages == [[dict(promo("Eggs"), store="maxi")]]
+
+
+class TestAnalyzePagesInGroups:
+    """Tests for grouping store pages into requests."""
+
+    def test_groups_pages_per_request(self, flyer_pages):
+        """Test pages are chunked and results flattened in page order."""
+        client = FakeOpenAI([
+            batch_response([promo("Eggs")], [promo("Milk")]),
+            json.dumps([promo("Bread")])
+        ])
+
+        promotions = analyze_pages_in_groups(client, flyer_pages, "maxi", pages_per_request=2)
+
+        assert len(client.chat.completions.calls) == 2
+        assert [p["item"] for p in promotions] == ["Eggs", "Milk", "Bread"]
+
+    def test_one_page_per_request_by_default(self, flyer_pages):
+        """Test the default keeps one request per page."""
+        client = FakeOpenAI([json.dumps([]) for _ in flyer_pages])
+
+        analyze_pages_in_groups(client, flyer_pages, "maxi")
+
+        assert len(client.chat.completions.calls) == 3
+
+
+class TestCheckpointedAnalysis:
+    """Tests for per-page checkpoints and resumed runs."""
+
+    def test_failed_pages_are_retried_on_resume(self, flyer_pages, tmp_path):
+        """Test a resumed run only re-analyzes pages without a checkpoint."""
+        checkpoint_dir = str(tmp_path / "checkpoints")
+        client = FakeOpenAI([
+            json.dumps([promo("Eggs")]),
+            ValueError("connection dropped"),
+            json.dumps([promo("Bread")])
+        ])
+
+        promotions, failed = analyze_pages_with_checkpoints(client, flyer_pages, "maxi", checkpoint_dir)
+
+        assert [p["item"] for p in promotions] == ["Eggs", "Bread"]
+        assert failed == [flyer_pages[1]]
+        assert len(list((tmp_path / "checkpoints").glob("*.json"))) == 2
+
+        client = FakeOpenAI([json.dumps([promo("Milk")])])
+        promotions, failed = analyze_pages_with_checkpoints(
+            client, flyer_pages, "maxi", checkpoint_dir, resume=True
+        )
+
+        assert len(client.chat.completions.calls) == 1
+        assert [p["item"] for p in promotions] == ["Eggs", "Milk", "Bread"]
+        assert failed == []
+
+    def test_truncated_group_retries_from_the_cut_page(self, flyer_pages, tmp_path):
+        """Test only the cut-off page and the pages after it are sent again."""
+        checkpoint_dir = str(tmp_path / "checkpoints")
+        body = batch_response([promo("Eggs")], [promo("Milk"), promo("Bread")], [promo("Jam")])
+        client = FakeOpenAI([
+            body[:body.index('"Bread"')],  # Page 2 cut off, page 3 missing
+            json.dumps([promo("Milk"), promo("Bread")]),
+            json.dumps([promo("Jam")])
+        ])
+
+        promotions, failed = analyze_pages_with_checkpoints(
+            client, flyer_pages, "maxi", checkpoint_dir, pages_per_request=3
+        )
+
+        assert len(client.chat.completions.calls) == 3
+        assert [p["item"] for p in promotions] == ["Eggs", "Milk", "Bread", "Jam"]
+        assert failed == []
+
+        client = FakeOpenAI([])
+        promotions, _ = analyze_pages_with_checkpoints(
+            client, flyer_pages, "maxi", checkpoint_dir, pages_per_request=3, resume=True
+        )
+        assert [p["item"] for p in promotions] == ["Eggs", "Milk", "Bread", "Jam"]
+
+    def test_complete_first_page_is_kept_when_second_is_cut_off(self, flyer_pages, tmp_path):
+        """Test page 1, returned in full before the cut, is checkpointed and not paid for again."""
+        checkpoint_dir = str(tmp_path / "checkpoints")
+        body = batch_response([promo("Eggs"), promo("Butter")], [promo("Milk"), promo("Bread")])
+        client = FakeOpenAI([
+            body[:body.index('"Bread"')],
+            json.dumps([promo("Milk"), promo("Bread")])
+        ])
+
+        promotions, failed = analyze_pages_with_checkpoints(
+            client, flyer_pages[:2], "maxi", checkpoint_dir, pages_per_request=2
+        )
+
+        assert len(client.chat.completions.calls) == 2
+        retried = client.chat.completions.calls[1]["messages"][0]["content"]
+        assert sum(part["type"] == "image_url" for part in retried) == 1
+        assert [p["item"] for p in promotions] == ["Eggs", "Butter", "Milk", "Bread"]
+        assert failed == []
+        assert len(list((tmp_path / "checkpoints").glob("*.json"))) == 2
+
+    def test_page_left_out_of_complete_response_is_retried(self, flyer_pages, tmp_path):
+        """Test a page the response skipped is analyzed on its own rather than saved as empty."""
+        checkpoint_dir = str(tmp_path / "checkpoints")
+        client = FakeOpenAI([
+            json.dumps({"pages": [{"page": 1, "promotions": [promo("Eggs")]}]}),
+            json.dumps([promo("Milk")])
+        ])
+
+        promotions, failed = analyze_pages_with_checkpoints(
+            client, flyer_pages[:2], "maxi", checkpoint_dir, pages_per_request=2
+        )
+
+        assert [p["item"] for p in promotions] == ["Eggs", "Milk"]
+        assert failed == []
+
+    def test_truncated_single_page_is_not_checkpointed(self, flyer_pages, tmp_path):
+        """Test a page still cut off on its own keeps its salvaged promotions but is retried on resume."""
+        checkpoint_dir = str(tmp_path / "checkpoints")
+        body = json.dumps([promo("Milk"), promo("Bread")])
+        client = FakeOpenAI([body[:body.index('"Bread"')]])
+
+        promotions, failed = analyze_pages_with_checkpoints(client, flyer_pages[:1], "maxi", checkpoint_dir)
+
+        assert [p["item"] for p in promotions] == ["Milk"]
+        assert failed == flyer_pages[:1]
+        assert list((tmp_path / "checkpoints").glob("*.json")) == []
+
+        client = FakeOpenAI([body])
+        promotions, failed = analyze_pages_with_checkpoints(
+            client, flyer_pages[:1], "maxi", checkpoint_dir, resume=True
+        )
+        assert [p["item"] for p in promotions] == ["Milk", "Bread"]
+        assert failed == []
+
+    def test_without_resume_pages_are_reanalyzed(self, flyer_pages, tmp_path):
+        """Test existing checkpoints are ignored unless resuming."""
+        checkpoint_dir = str(tmp_path / "checkpoints")
+        analyze_pages_with_checkpoints(
+            FakeOpenAI([json.dumps([promo("Eggs")])]), flyer_pages[:1], "maxi", checkpoint_dir
+        )
+
+        client = FakeOpenAI([json.dumps([promo("Milk")])])
+        promotions, _ = analyze_pages_with_checkpoints(client, flyer_pages[:1], "maxi", checkpoint_dir)
+
+        assert [p["item"] for p in promotions] == ["Milk"]
+
+    def test_changed_image_invalidates_checkpoint(self, flyer_pages, tmp_path):
+        """Test a new flyer saved under the same file name is analyzed again."""
+        checkpoint_dir = str(tmp_path / "checkpoints")
+        analyze_pages_with_checkpoints(
+            FakeOpenAI([json.dumps([promo("Eggs")])]), flyer_pages[:1], "maxi", checkpoint_dir
+        )
+
+        with open(flyer_pages[0], 'wb') as f:
+            f.write(b"next week's flyer")
+
+        client = FakeOpenAI([json.dumps([promo("Milk")])])
+        promotions, _ = analyze_pages_with_checkpoints(
+            client, flyer_pages[:1], "maxi", checkpoint_dir, resume=True
+        )
+
+        assert len(client.chat.completions.calls) == 1
+        assert [p["item"] for p in promotions] == ["Milk"]
+
+
+@pytest.fixture
+def openai_server():
+    """Run a local fake OpenAI API server."""
+    with FakeOpenAIServer() as server:
+        yield server
+
+
+@pytest.fixture
+def openai_client(openai_server):
+    """Real OpenAI client pointed at the local fake server."""
+    return OpenAI(api_key="test", base_url=openai_server.base_url, max_retries=0)
+
+
+@pytest.fixture(autouse=True)
+def clean_stats():
+    """Start every test with empty response counters."""
+    reset_analysis_stats()
+    yield
+    reset_analysis_stats()
+
+
+class TestStructuredOutput:
+    """Tests for JSON schema extraction against a local fake OpenAI server."""
+
+    def test_single_page_requests_strict_schema(self, openai_server, openai_client, flyer_pages):
+        """Test the request carries the strict promotion schema and the object response is parsed."""
+        openai_server.add_response(json.dumps({"promotions": [promo("Eggs", 2.99, "dozen")]}))
+
+        promotions = analyze_flyer_image(openai_client, flyer_pages[0], "maxi")
+
+        response_format = openai_server.requests[0]["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["strict"] is True
+        item_schema = response_format["json_schema"]["schema"]["properties"]["promotions"]["items"]
+        assert set(item_schema["required"]) == {"item", "price", "unit", "discount"}
+        assert item_schema["additionalProperties"] is False
+
+        assert promotions == [dict(promo("Eggs", 2.99, "dozen"), store="maxi")]
+
+    def test_multi_page_requests_pages_schema(self, openai_server, openai_client, flyer_pages):
+        """Test multi-page requests use the per-page schema."""
+        openai_server.add_response(batch_response([promo("Eggs")], [promo("Milk")]))
+
+        pages = analyze_flyer_pages(openai_client, flyer_pages[:2], "iga")
+
+        schema = openai_server.requests[0]["response_format"]["json_schema"]["schema"]
+        assert "pages" in schema["properties"]
+        assert [[p["item"] for p in page] for page in pages] == [["Eggs"], ["Milk"]]
+
+    def test_free_text_mode_omits_schema(self, openai_server, openai_client, flyer_pages, monkeypatch):
+        """Test STRUCTURED_OUTPUT=False falls back to prompt-only JSON."""
+        monkeypatch.setattr('scripts.analyze_flyers.STRUCTURED_OUTPUT', False)
+        openai_server.add_response(json.dumps([promo("Eggs")]))
+
+        promotions = analyze_flyer_image(openai_client, flyer_pages[0], "maxi")
+
+        assert "response_format" not in openai_server.requests[0]
+        assert len(promotions) == 1
+
+    def test_parse_failure_rate(self, openai_server, openai_client, flyer_pages):
+        """Test unparseable responses, refusals and truncation are counted."""
+        openai_server.add_response(json.dumps({"promotions": [promo("Eggs")]}))
+        openai_server.add_response("I can't read this flyer")
+        openai_server.add_response(None, refusal="I can't help with that")
+        body = json.dumps({"promotions": [promo("Milk"), promo("Bread")]})
+        openai_server.add_response(body[:body.index('"Bread"')], finish_reason="length")
+
+        for path in [flyer_pages[0], flyer_pages[1], flyer_pages[2], flyer_pages[0]]:
+            analyze_flyer_image(openai_client, path, "maxi")
+
+        assert ANALYSIS_STATS["responses"] == 4
+        assert ANALYSIS_STATS["parse_failures"] == 1
+        assert ANALYSIS_STATS["refusals"] == 1
+        assert ANALYSIS_STATS["truncated"] == 1
+        assert get_parse_failure_rate() == 0.25
+
+    def test_transient_errors_are_retried(self, openai_server, openai_client, flyer_pages, monkeypatch):
+        """Test 5xx/429 responses are retried before the page is given up."""
+        monkeypatch.setattr('scripts.analyze_flyers.RETRY_BASE_DELAY', 0)
+        openai_server.add_response(status=500)
+        openai_server.add_response(status=429)
+        openai_server.add_response(json.dumps({"promotions": [promo("Eggs")]}))
+
+        promotions = analyze_flyer_image(openai_client, flyer_pages[0], "maxi")
+
+        assert len(openai_server.requests) == 3
+        assert [p["item"] for p in promotions] == ["Eggs"]
+        assert ANALYSIS_STATS["api_errors"] == 0
+
+    def test_api_errors_are_counted(self, openai_server, openai_client, flyer_pages, monkeypatch):
+        """Test errors that outlast all retries are counted and yield no promotions."""
+        monkeypatch.setattr('scripts.analyze_flyers.RETRY_BASE_DELAY', 0)
+        monkeypatch.setattr('scripts.analyze_flyers.MAX_ATTEMPTS', 2)
+        openai_server.add_response(status=500)
+        openai_server.add_response(status=503)
+
+        assert analyze_flyer_image(openai_client, flyer_pages[0], "maxi") == []
+        assert len(openai_server.requests) == 2
+        assert ANALYSIS_STATS["api_errors"] == 1
+
+    def test_client_errors_are_not_retried(self, openai_server, openai_client, flyer_pages, monkeypatch):
+        """Test non-transient errors such as 400 fail on the first attempt."""
+        monkeypatch.setattr('scripts.analyze_flyers.RETRY_BASE_DELAY', 0)
+        openai_server.add_response(status=400)
+
+        assert analyze_flyer_image(openai_client, flyer_pages[0], "maxi") == []
+        assert len(openai_server.requests) == 1
@@ -8,13 +8,14 @@ import json
 import os
 import tempfile
 from unittest.mock import patch, MagicMock, mock_open
-from app import app, load_all_promotions
+from app import app, load_all_promotions, reset_promotion_index
 
 
 @pytest.fixture
 def client():
     """Create a test client for the Flask app."""
     app.config['TESTING'] = True
+    reset_promotion_index()
     with app.test_client() as client:
         yield client
 
@@ -142,6 +143,52 @@ class TestPromotionsEndpoint:
         data = json.loads(response.data)
         assert "error" in data
 
+    @patch('app.load_all_promotions')
+    def test_get_promotions_filters_and_projects(self, mock_load, client, sample_promotions):
+        """Test store, price and text filters with field projection."""
+        mock_load.return_value = sample_promotions
+
+        response = client.get('/api/promotions?store=IGA,maxi&max_price=10&q=chick&fields=item,price')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["promotions"] == [{"item": "Chicken Wings", "price": 6.95}]
+        assert data["count"] == 1
+        assert "next_cursor" not in data
+
+    @patch('app.load_all_promotions')
+    def test_get_promotions_cursor_pagination(self, mock_load, client, sample_promotions):
+        """Test that following next_cursor returns every promotion once, in order."""
+        mock_load.return_value = sample_promotions
+
+        items, url = [], '/api/promotions?sort=-price&limit=2'
+        while url:
+            data = json.loads(client.get(url).data)
+            items.extend(promo["item"] for promo in data["promotions"])
+            url = f"/api/promotions?sort=-price&limit=2&cursor={data['next_cursor']}" if data["next_cursor"] else None
+
+        assert items == ["Chicken Wings", "Pasta", "Broccoli"]
+
+    @patch('app.load_all_promotions')
+    def test_get_promotions_invalid_parameters(self, mock_load, client, sample_promotions):
+        """Test that invalid query parameters return 400."""
+        mock_load.return_value = sample_promotions
+
+        for query in ['sort=cost', 'limit=0', 'min_price=abc', 'fields=secret', 'limit=5&cursor=bogus']:
+            response = client.get(f'/api/promotions?{query}')
+            assert response.status_code == 400, query
+            assert "error" in json.loads(response.data)
+
+    @patch('app.load_all_promotions')
+    def test_get_promotions_index_is_reused(self, mock_load, client, sample_promotions):
+        """Test that the promotions are loaded once until the database changes."""
+        mock_load.return_value = sample_promotions
+
+        client.get('/api/promotions')
+        client.get('/api/promotions?store=maxi')
+
+        assert mock_load.call_count == 1
+
 
 class TestLoadAllPromotions:
     """Tests for the load_all_promotions helper function."""
@@ -241,38 +288,52 @@ class TestLoadAllPromotions:
 class TestScrapeEndpoint:
     """Tests for the scrape endpoint."""
 
-    @patch('app.run_weekly_scrape_and_analysis')
-    @patch('app.load_all_promotions')
-    def test_scrape_endpoint_success(self, mock_load, mock_scrape, client, sample_promotions):
-        """Test manual scrape trigger returns success."""
-        mock_scrape.return_value = None  # Scraping completed
-        mock_load.return_value = sample_promotions
-
-        response = client.post('/api/scrape')
-
-        assert response.status_code == 200
+    @pytest.fixture
+    def job_runs(self, tmp_path):
+        """Queue scrape runs in a temp database."""
+        import app as app_module
+        from scripts.job_runs import JobRuns
+        runs = JobRuns(str(tmp_path / 'jobs.sqlite3'))
+        with patch.object(app_module, 'job_runs', runs):
+            yield runs
+
+    def test_scrape_endpoint_queues_run(self, client, job_runs):
+        """Test manual scrape trigger queues a run for the worker and returns at once."""
+        with patch('scripts.pipeline.runner.run_pipeline') as mock_pipeline:
+            response = client.post('/api/scrape')
+
+        assert response.status_code == 202
         data = json.loads(response.data)
 
-        assert data["status"] == "success"
-        assert "message" in data
-        assert "promotions" in data
-        assert data["count"] == 3
+        assert data["status"] == "queued"
+        assert data["run"]["status"] == "queued"
+        assert data["run"]["trigger"] == "manual"
+        assert data["status_url"] == f"/api/scrape/runs/{data['run']['id']}"
+        assert mock_pipeline.call_count == 0  # The API never runs the pipeline
 
-    @patch('app.run_weekly_scrape_and_analysis')
-    @patch('app.load_all_promotions')
-    def test_scrape_endpoint_calls_scraper(self, mock_load, mock_scrape, client):
-        """Test scrape endpoint actually calls the scraping function."""
-        mock_load.return_value = []
+    def test_scrape_endpoint_refuses_second_run(self, client, job_runs):
+        """Test a scrape is not queued twice."""
+        first = json.loads(client.post('/api/scrape').data)
 
         response = client.post('/api/scrape')
 
-        mock_scrape.assert_called_once()
+        assert response.status_code == 409
+        assert f"run {first['run']['id']}" in json.loads(response.data)["message"]
+
+    def test_scrape_run_status(self, client, job_runs):
+        """Test the status URL of a queued run."""
+        status_url = json.loads(client.post('/api/scrape').data)["status_url"]
+
+        response = client.get(status_url)
+
         assert response.status_code == 200
+        assert json.loads(response.data)["status"] == "queued"
+        assert client.get('/api/scrape/runs/999').status_code == 404
 
-    @patch('app.run_weekly_scrape_and_analysis')
-    def test_scrape_endpoint_error_handling(self, mock_scrape, client):
+    @patch('app.enqueue_scrape')
+    def test_scrape_endpoint_error_handling(self, mock_enqueue, client):
         """Test scrape endpoint handles errors gracefully."""
-        mock_scrape.side_effect = Exception("Scraping failed")
+        mock_enqueue.side_effect = Exception("Queue unavailable")
 
         response = client.post('/api/scrape')
 
@@ -297,13 +358,14 @@ class TestAPIIntegration:
         response = client.get('/api/promotions')
         assert response.status_code == 200
 
-    @patch('app.run_weekly_scrape_and_analysis')
-    @patch('app.load_all_promotions')
-    def test_scrape_endpoint_available(self, mock_load, mock_scrape, client):
+    @patch('app.enqueue_scrape')
+    def test_scrape_endpoint_available(self, mock_enqueue, client):
         """Test that scrape endpoint is accessible."""
-        mock_load.return_value = []
+        mock_enqueue.return_value = {
+            'id': 1, 'queued_at': 0.0, 'started_at': None, 'heartbeat_at': None, 'finished_at': None
+        }
         response = client.post('/api/scrape')
-        assert response.status_code == 200
+        assert response.status_code == 202
 
     def test_invalid_endpoint_returns_404(self, client):
         """Test that invalid endpoints return 404."""
@@ -345,5 +407,98 @@ class TestDataValidation:
             assert promo["unit"]  # Not empty
 
 
+class TestScheduler:
+    """Tests for running the weekly scheduler in a single process."""
+
+    def test_only_one_scheduler_per_lock(self, tmp_path):
+        """Test a second initialization is refused while the first scheduler runs."""
+        import app as app_module
+        from app import initialize_scheduler, shutdown_scheduler
+        from datetime import datetime
+        from scripts.job_runs import JobRuns
+        lock_path = str(tmp_path / 'scheduler.lock')
+
+        # Keep run records out of data/ and skip the catch-up scrape
+        with patch.object(app_module, 'job_runs', JobRuns(str(tmp_path / 'jobs.sqlite3'))), \
+                patch.object(app_module, 'weekly_slot', return_value=datetime(2000, 1, 3, 1, 0)):
+            scheduler = initialize_scheduler(lock_path)
+            try:
+                assert scheduler is not None
+                assert scheduler.get_job('weekly_scrape') is not None
+                assert initialize_scheduler(lock_path) is None
+            finally:
+                shutdown_scheduler(scheduler)
+
+            # The lock is released on shutdown, so a replacement can take over
+            replacement = initialize_scheduler(lock_path)
+            assert replacement is not None
+            shutdown_scheduler(replacement)
+            assert not replacement.running
+
+
+class TestStartup:
+    """Tests for keeping app imports light."""
+
+    def test_heavy_dependencies_load_on_first_use(self):
+        """Test importing the app does not load the pipeline, OpenAI, the scheduler or TinyDB."""
+        import sys
+        import subprocess
+        lazy = ['scripts.pipeline', 'playwright', 'openai', 'PIL', 'apscheduler', 'tinydb']
+        code = f"import sys, app; print([m for m in {lazy!r} if m in sys.modules])"
+
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {k: v for k, v in os.environ.items() if k != 'OPENAI_API_KEY'}
+        result = subprocess.run([sys.executable, '-c', code], cwd=backend_dir, env=env,
+                                capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip().splitlines()[-1] == '[]'
+
+    def test_tables_are_opened_once_and_kept(self, tmp_path):
+        """Test get_tables() opens the database on first use and keeps tables set by callers."""
+        import app as app_module
+        with patch.object(app_module, 'DB_PATH', str(tmp_path / 'db' / 'promotions.json')), \
+                patch.object(app_module, 'db', None), \
+                patch.object(app_module, 'promotions_table', None), \
+                patch.object(app_module, 'scrapes_table', None):
+            promotions_table, scrapes_table = app_module.get_tables()
+            assert app_module.get_tables() == (promotions_table, scrapes_table)
+            assert os.path.exists(tmp_path / 'db' / 'promotions.json')
+            app_module.db.close()
+
+
+
+class TestGunicornConfig:
+    """Tests for the single-process gunicorn configuration."""
+
+    def load_config(self, monkeypatch, web_concurrency=None):
+        import runpy
+        if web_concurrency is None:
+            monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+        else:
+            monkeypatch.setenv('WEB_CONCURRENCY', web_concurrency)
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return runpy.run_path(os.path.join(backend_dir, 'gunicorn.conf.py'))
+
+    def test_one_worker_by_default(self, monkeypatch):
+        assert self.load_config(monkeypatch)['workers'] == 1
+
+    def test_web_concurrency_is_capped(self, monkeypatch, capsys):
+        """Test WEB_CONCURRENCY above 1 is capped with a warning, not silently used."""
+        config = self.load_config(monkeypatch, '4')
+
+        assert config['workers'] == 1
+        assert 'WEB_CONCURRENCY=4 is not supported' in capsys.readouterr().out
+
+    def test_command_line_workers_are_capped(self, monkeypatch):
+        from unittest.mock import MagicMock
+        config = self.load_config(monkeypatch)
+        server = MagicMock(num_workers=3)
+
+        config['on_starting'](server)
+
+        assert server.num_workers == 1
+        assert server.log.warning.call_count == 1
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
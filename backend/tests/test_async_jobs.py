@@ -0,0 +1,185 @@
+"""
+Unit tests for the background asyncio job runner and async recipe generation.
+Recipe generation uses the fake OpenAI server, so no real API calls are made.
+"""
+
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import patch
+from openai import AsyncOpenAI
+import app as app_module
+from scripts.async_jobs import AsyncJobRunner, JOBS_IN_FLIGHT
+from tests.fake_openai import FakeOpenAIServer
+
+
+@pytest.fixture
+def runner():
+    runner = AsyncJobRunner('test', max_concurrency=50)
+    yield runner
+    runner.shutdown()
+
+
+async def slow_double(n, delay=0.2):
+    await asyncio.sleep(delay)
+    return n * 2
+
+
+async def failing():
+    raise ValueError("no recipes")
+
+
+class TestAsyncJobRunner:
+    """Tests for AsyncJobRunner."""
+
+    def test_jobs_run_concurrently_on_one_loop(self, runner):
+        """Test many waiting jobs overlap instead of running one after another."""
+        started = time.perf_counter()
+        job_ids = [runner.submit(slow_double, n) for n in range(40)]
+        jobs = [runner.wait(job_id, timeout=5) for job_id in job_ids]
+
+        assert time.perf_counter() - started < 2
+        assert [job['result'] for job in jobs] == [n * 2 for n in range(40)]
+        assert {job['status'] for job in jobs} == {'done'}
+
+    def test_submit_returns_before_the_job_finishes(self, runner):
+        """Test submit() does not block on the coroutine."""
+        job_id = runner.submit(slow_double, 1, 0.5)
+
+        assert runner.get(job_id)['status'] in ('pending', 'running')
+        assert JOBS_IN_FLIGHT.value(runner='test') >= 1
+        assert runner.wait(job_id, timeout=5)['status'] == 'done'
+        assert JOBS_IN_FLIGHT.value(runner='test') == 0
+
+    def test_errors_are_reported_on_the_job(self, runner):
+        """Test an exception marks the job as failed with its message."""
+        job = runner.wait(runner.submit(failing), timeout=5)
+
+        assert job['status'] == 'error'
+        assert job['error'] == "no recipes"
+        assert job['finished_at'] is not None
+
+    def test_concurrency_limit(self):
+        """Test jobs beyond max_concurrency wait for a free slot."""
+        runner = AsyncJobRunner('limited', max_concurrency=2)
+        try:
+            started = time.perf_counter()
+            job_ids = [runner.submit(slow_double, n, 0.2) for n in range(4)]
+            for job_id in job_ids:
+                runner.wait(job_id, timeout=5)
+            assert time.perf_counter() - started >= 0.4
+        finally:
+            runner.shutdown()
+
+    def test_finished_jobs_expire(self):
+        """Test finished jobs are forgotten after ttl_seconds and unknown IDs return None."""
+        runner = AsyncJobRunner('expiring', ttl_seconds=0)
+        try:
+            job_id = runner.submit(slow_double, 1, 0)
+            runner.wait(job_id, timeout=5)
+            time.sleep(0.01)
+
+            assert runner.get(job_id) is None
+            assert runner.get('unknown') is None
+        finally:
+            runner.shutdown()
+
+
+RECIPES_CONTENT = json.dumps([{
+    "name": "Broccoli Pasta",
+    "description": "Pasta with broccoli",
+    "ingredients": [{"item": "Broccoli", "amount": "2 heads", "on_sale": True}],
+    "instructions": ["Boil", "Toss"],
+    "cooking_time": "20 mins",
+    "servings": 4
+}])
+
+
+class TestAsyncRecipeGeneration:
+    """Tests for POST /api/recipes/generate with "async": true."""
+
+    @pytest.fixture
+    def client(self):
+        app_module.app.config['TESTING'] = True
+        with app_module.app.test_client() as client:
+            yield client
+
+    @pytest.fixture
+    def fake_openai(self):
+        promotions = [{"item": "Broccoli", "price": 0.55, "unit": "each", "discount": "", "store": "maxi"}]
+        with FakeOpenAIServer(default_content=RECIPES_CONTENT, delay=0.5) as server:
+            async_client = AsyncOpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+            with patch.object(app_module, 'async_openai_client', async_client), \
+                    patch.object(app_module, 'load_all_promotions', return_value=promotions):
+                yield server
+
+    def test_job_is_returned_and_completes(self, client, fake_openai):
+        """Test the request returns 202 at once and the job then holds cached recipes."""
+        started = time.perf_counter()
+        response = client.post('/api/recipes/generate', json={'num_recipes': 1, 'async': True})
+
+        assert response.status_code == 202
+        assert time.perf_counter() - started < 0.4
+        job_id = response.get_json()['job_id']
+        assert response.get_json()['status_url'] == f"/api/recipes/jobs/{job_id}"
+
+        app_module.recipe_jobs.wait(job_id, timeout=5)
+        data = client.get(f'/api/recipes/jobs/{job_id}').get_json()
+
+        assert data['status'] == 'done'
+        assert data['count'] == 1
+        recipe = data['recipes'][0]
+        assert app_module.recipes_cache[recipe['id']]['name'] == "Broccoli Pasta"
+        assert fake_openai.requests[0]['model'] == app_module.RECIPE_MODEL
+
+    def test_cheap_endpoints_stay_responsive(self, client, fake_openai):
+        """Test in-flight generations do not delay other requests."""
+        job_ids = [
+            client.post('/api/recipes/generate', json={
+                'async': True, 'preferences': {'servings': servings}
+            }).get_json()['job_id']
+            for servings in range(1, 11)
+        ]
+
+        started = time.perf_counter()
+        assert client.get('/api/health').status_code == 200
+        assert time.perf_counter() - started < 0.4
+
+        jobs = [app_module.recipe_jobs.wait(job_id, timeout=10) for job_id in job_ids]
+        assert {job['status'] for job in jobs} == {'done'}
+        assert len(fake_openai.requests) == 10
+
+    def test_linking_runs_off_the_event_loop(self, client, fake_openai):
+        """Test a slow promotion index build does not block other generations on the job loop."""
+        def slow_link(recipes):
+            time.sleep(0.5)
+
+        with patch.object(app_module, 'link_recipes', side_effect=slow_link) as mock_link:
+            started = time.perf_counter()
+            job_ids = [
+                client.post('/api/recipes/generate', json={
+                    'async': True, 'preferences': {'servings': servings}
+                }).get_json()['job_id']
+                for servings in range(1, 5)
+            ]
+            jobs = [app_module.recipe_jobs.wait(job_id, timeout=10) for job_id in job_ids]
+
+        assert {job['status'] for job in jobs} == {'done'}
+        assert mock_link.call_count == 4
+        # Four 0.5 s links run side by side, not one after the other on the loop
+        assert time.perf_counter() - started < 1.8
+
+    def test_failed_generation_is_reported(self, client, fake_openai):
+        """Test a response without recipes marks the job as failed."""
+        fake_openai.add_response(content="Sorry, no recipes today")
+        job_id = client.post('/api/recipes/generate', json={'async': True}).get_json()['job_id']
+        app_module.recipe_jobs.wait(job_id, timeout=5)
+
+        data = client.get(f'/api/recipes/jobs/{job_id}').get_json()
+        assert data['status'] == 'error'
+        assert 'No JSON found' in data['error']
+
+    def test_unknown_job_is_404(self, client):
+        """Test polling an unknown job ID returns 404."""
+        assert client.get('/api/recipes/jobs/nope').status_code == 404
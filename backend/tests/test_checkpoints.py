@@ -0,0 +1,75 @@
+"""
+Unit tests for atomic per-page analysis checkpoints.
+"""
+
+import pytest
+import json
+import os
+from scripts.checkpoints import (
+    write_json_atomic,
+    save_page_checkpoint,
+    load_page_checkpoint
+)
+
+
+@pytest.fixture
+def page(tmp_path):
+    """A fake flyer page on disk."""
+    path = tmp_path / "maxi_page_001.jpg"
+    path.write_bytes(b"page one")
+    return str(path)
+
+
+class TestWriteJsonAtomic:
+    """Tests for atomic JSON writes."""
+
+    def test_writes_file_without_leftovers(self, tmp_path):
+        """Test the target is written and no temporary files remain."""
+        path = tmp_path / "out" / "result.json"
+
+        write_json_atomic(str(path), {"count": 1})
+
+        assert json.loads(path.read_text()) == {"count": 1}
+        assert os.listdir(tmp_path / "out") == ["result.json"]
+
+    def test_failed_write_keeps_previous_file(self, tmp_path):
+        """Test a serialization error leaves the old file untouched."""
+        path = tmp_path / "result.json"
+        write_json_atomic(str(path), {"count": 1})
+
+        with pytest.raises(TypeError):
+            write_json_atomic(str(path), {"bad": object()})
+
+        assert json.loads(path.read_text()) == {"count": 1}
+        assert os.listdir(tmp_path) == ["result.json"]
+
+
+class TestPageCheckpoints:
+    """Tests for saving and reloading page checkpoints."""
+
+    def test_round_trip(self, page, tmp_path):
+        """Test saved promotions are loaded back for the same page and model."""
+        save_page_checkpoint(str(tmp_path / "ckpt"), page, [{"item": "Eggs"}], "gpt-4o")
+
+        assert load_page_checkpoint(str(tmp_path / "ckpt"), page, "gpt-4o") == [{"item": "Eggs"}]
+
+    def test_empty_page_is_a_valid_checkpoint(self, page, tmp_path):
+        """Test a page without promotions is distinguished from a missing checkpoint."""
+        save_page_checkpoint(str(tmp_path / "ckpt"), page, [], "gpt-4o")
+
+        assert load_page_checkpoint(str(tmp_path / "ckpt"), page, "gpt-4o") == []
+
+    def test_missing_or_corrupt_checkpoint(self, page, tmp_path):
+        """Test missing and unreadable checkpoints load as None."""
+        checkpoint_dir = tmp_path / "ckpt"
+        assert load_page_checkpoint(str(checkpoint_dir), page, "gpt-4o") is None
+
+        checkpoint_dir.mkdir()
+        (checkpoint_dir / "maxi_page_001.json").write_text("{not json")
+        assert load_page_checkpoint(str(checkpoint_dir), page, "gpt-4o") is None
+
+    def test_model_change_invalidates(self, page, tmp_path):
+        """Test checkpoints from another model are not reused."""
+        save_page_checkpoint(str(tmp_path / "ckpt"), page, [{"item": "Eggs"}], "gpt-4o")
+
+        assert load_page_checkpoint(str(tmp_path / "ckpt"), page, "gpt-4o-mini") is None
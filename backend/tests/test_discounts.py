@@ -0,0 +1,108 @@
+"""
+Unit tests for parsing discount text into numeric savings.
+"""
+
+import pytest
+from unittest.mock import patch
+import app as app_module
+from app import app, reset_promotion_index
+from scripts.discounts import add_discount_savings, parse_discount
+
+
+class TestParseDiscount:
+    """Tests for parse_discount."""
+
+    @pytest.mark.parametrize('discount, price, original_price, savings_amount, savings_pct', [
+        ('Save $8', 23.99, 31.99, 8.0, 25.0),
+        ('Économisez 50¢', 1.49, 1.99, 0.5, 25.1),
+        ("1$ d'économie", 3.99, 4.99, 1.0, 20.0),
+        ('5$ de rabais', 10.0, 15.0, 5.0, 33.3),
+        ("50% d'économie", 2.0, 4.0, 2.0, 50.0),
+        ("Économisez jusqu'à 43%", 5.7, 10.0, 4.3, 43.0),
+        ('Save 25%', 3.0, 4.0, 1.0, 25.0),
+        ('reg. 5.99', 3.99, 5.99, 2.0, 33.4),
+        ('Prix membre reg. 24,99', 19.99, 24.99, 5.0, 20.0),
+        ('2/14$', 8.99, 8.99, 1.99, 22.1),
+        ('3 for $18', 7.0, 7.0, 1.0, 14.3),
+        ('2 pour 12$ ou 6,48$ chac.', 6.0, 6.48, 0.48, 7.4),
+        ('2 pour 1', 4.0, 4.0, 2.0, 50.0),
+        ('Buy 2 get 1 free', 3.0, 3.0, 1.0, 33.3),
+        ('3rd free with purchase of two', 6.0, 6.0, 2.0, 33.3),
+        ("Économisez 1.00$ à l'achat de 2", 2.5, 3.0, 0.5, 16.7)
+    ])
+    def test_formats(self, discount, price, original_price, savings_amount, savings_pct):
+        savings = parse_discount(discount, price)
+        assert savings == {
+            'original_price': pytest.approx(original_price),
+            'savings_amount': pytest.approx(savings_amount),
+            'savings_pct': pytest.approx(savings_pct)
+        }
+
+    @pytest.mark.parametrize('discount, price', [
+        ('100 PTS', 5.0),
+        ('Obtenez 2 000 points', 5.0),
+        ('Prix membre', 5.0),
+        ('Chute de prix', 5.0),
+        ('2/14$', 14.0),  # The flyer price is the multi-buy total
+        ('', 5.0),
+        (None, 5.0),
+        ('Save $8', None),
+        ('Save $8', 0)
+    ])
+    def test_no_cash_savings(self, discount, price):
+        assert parse_discount(discount, price) == {'original_price': None, 'savings_amount': None, 'savings_pct': None}
+
+    def test_implausible_original_price_is_ignored(self):
+        """A "regular price" more than 10x the sale price is a misread, not a saving."""
+        assert parse_discount('reg. 255', 2.55)['savings_amount'] is None
+
+
+class TestAddDiscountSavings:
+    """Tests for add_discount_savings."""
+
+    def test_keeps_parsed_promotions(self):
+        parsed = {'item': 'Milk', 'price': 4.0, 'discount': 'Save $1',
+                  'original_price': 5.0, 'savings_amount': 1.0, 'savings_pct': 20.0}
+        raw = {'item': 'Milk', 'price': 4.0, 'discount': 'Save $1'}
+
+        result = add_discount_savings([parsed, raw])
+
+        assert result[0] is parsed
+        assert result[1] == parsed
+        assert 'savings_amount' not in raw
+
+
+class TestShoppingListSavings:
+    """Tests for savings in POST /api/shopping-list."""
+
+    @pytest.fixture
+    def client(self):
+        app.config['TESTING'] = True
+        reset_promotion_index()
+        with app.test_client() as client:
+            yield client
+
+    def test_savings_come_from_parsed_discounts(self, client):
+        """Savings are summed from the parsed fields; unparseable discounts add nothing."""
+        recipe = {
+            'id': 'recipe_1',
+            'name': 'Chicken Pasta',
+            'ingredients': [
+                {'item': 'Chicken breast', 'amount': '1 lb', 'on_sale': True},
+                {'item': 'Spaghetti', 'amount': '500 g', 'on_sale': True}
+            ]
+        }
+        promotions = [
+            {'item': 'Chicken Breast', 'price': 5.99, 'unit': 'lb', 'discount': 'Save $2', 'store': 'maxi'},
+            {'item': 'Spaghetti', 'price': 1.5, 'unit': '500 g', 'discount': '100 PTS', 'store': 'metro'}
+        ]
+
+        with patch.dict(app_module.recipes_cache, {'recipe_1': recipe}), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            response = client.post('/api/shopping-list', json={'recipe_ids': ['recipe_1']})
+
+        data = response.get_json()
+        assert data['estimated_savings'] == 2.0
+        chicken = next(item for item in data['shopping_list'] if item['item'] == 'Chicken Breast')
+        assert chicken['original_price'] == 7.99
+        assert chicken['savings_pct'] == 25.0
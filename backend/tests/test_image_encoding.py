@@ -0,0 +1,28 @@
+"""
+Unit tests for low-copy base64 data URL encoding of flyer images.
+"""
+
+import pytest
+import os
+import base64
+from scripts.image_encoding import CHUNK_SIZE, encode_image_data_url
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, CHUNK_SIZE - 1, CHUNK_SIZE, CHUNK_SIZE + 1, 2 * CHUNK_SIZE + 2])
+def test_matches_standard_base64(tmp_path, size):
+    """Test output is identical to base64.b64encode for sizes around chunk boundaries."""
+    path = tmp_path / "page.jpg"
+    data = os.urandom(size)
+    path.write_bytes(data)
+
+    expected = "data:image/jpeg;base64," + base64.b64encode(data).decode('ascii')
+
+    assert encode_image_data_url(str(path)) == expected
+
+
+def test_custom_mime_type(tmp_path):
+    """Test the MIME type is written in the data URL prefix."""
+    path = tmp_path / "page.png"
+    path.write_bytes(b"png")
+
+    assert encode_image_data_url(str(path), "image/png") == "data:image/png;base64,cG5n"
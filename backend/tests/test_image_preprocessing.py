@@ -0,0 +1,176 @@
+"""
+Unit tests for flyer image preprocessing (cropping, tiling and caching).
+"""
+
+import pytest
+import os
+from PIL import Image, ImageDraw
+from scripts.image_preprocessing import (
+    crop_margins,
+    split_into_tiles,
+    preprocess_flyer_image,
+    prune_cache_entries
+)
+
+
+@pytest.fixture
+def tall_flyer(tmp_path):
+    """Create a tall flyer page with white margins around the content."""
+    image = Image.new('RGB', (1600, 5000), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((100, 200, 1500, 4800), fill=(200, 30, 30))
+    path = tmp_path / "maxi_page_001.jpg"
+    image.save(path, 'JPEG', quality=95)
+    return str(path)
+
+
+class TestCropMargins:
+    """Tests for blank margin removal."""
+
+    def test_crops_to_content_with_padding(self):
+        """Test white borders are removed, keeping a small padding."""
+        image = Image.new('RGB', (400, 600), 'white')
+        ImageDraw.Draw(image).rectangle((50, 100, 349, 499), fill='black')
+
+        cropped = crop_margins(image, padding=10)
+
+        assert cropped.size == (320, 420)
+
+    def test_blank_image_is_unchanged(self):
+        """Test an all-white image is returned as is."""
+        image = Image.new('RGB', (100, 100), 'white')
+
+        assert crop_margins(image) is image
+
+
+class TestSplitIntoTiles:
+    """Tests for downscaling and tiling."""
+
+    def test_short_image_is_single_tile(self):
+        """Test an image within the height limit is only downscaled."""
+        tiles = split_into_tiles(Image.new('RGB', (1536, 2000)), short_side=768, max_tile_height=1536)
+
+        assert [tile.size for tile in tiles] == [(768, 1000)]
+
+    def test_narrow_image_is_not_upscaled(self):
+        """Test images with a shortest side under the target keep their size."""
+        tiles = split_into_tiles(Image.new('RGB', (500, 800)), short_side=768)
+
+        assert tiles[0].size == (500, 800)
+
+    def test_wide_image_is_scaled_by_its_height(self):
+        """Test the shortest side is scaled to 768, not the width."""
+        tiles = split_into_tiles(Image.new('RGB', (2000, 1000)), short_side=768)
+
+        assert [tile.size for tile in tiles] == [(1536, 768)]
+
+    def test_very_wide_image_fits_the_max_side(self):
+        """Test wide images are kept within 2048 pixels across."""
+        tiles = split_into_tiles(Image.new('RGB', (8000, 1000)), short_side=768)
+
+        assert [tile.size for tile in tiles] == [(2048, 256)]
+
+    def test_tall_image_is_split_with_overlap(self):
+        """Test tall pages are split into overlapping tiles covering the page."""
+        tiles = split_into_tiles(
+            Image.new('RGB', (768, 4000)),
+            short_side=768,
+            max_tile_height=1536,
+            overlap=48
+        )
+
+        assert len(tiles) == 3
+        assert all(tile.height <= 1536 for tile in tiles)
+        assert sum(tile.height for tile in tiles) - 48 * (len(tiles) - 1) == 4000
+
+
+class TestPreprocessFlyerImage:
+    """Tests for the cached preprocessing entry point."""
+
+    def test_writes_smaller_tiles(self, tall_flyer, tmp_path):
+        """Test processed tiles are JPEGs at the tile width and fewer bytes."""
+        cache_dir = str(tmp_path / "cache")
+
+        tiles = preprocess_flyer_image(tall_flyer, cache_dir=cache_dir)
+
+        assert len(tiles) > 1
+        for tile in tiles:
+            with Image.open(tile) as image:
+                assert image.format == 'JPEG'
+                assert image.width == 768
+                assert image.height <= 1536
+        assert sum(os.path.getsize(t) for t in tiles) < os.path.getsize(tall_flyer)
+
+    def test_cache_hit_skips_processing(self, tall_flyer, tmp_path, monkeypatch):
+        """Test a second call returns cached tiles without opening the image."""
+        cache_dir = str(tmp_path / "cache")
+        first = preprocess_flyer_image(tall_flyer, cache_dir=cache_dir)
+
+        def fail_open(*args, **kwargs):
+            raise AssertionError("image should not be reprocessed")
+
+        monkeypatch.setattr('scripts.image_preprocessing.Image.open', fail_open)
+
+        assert preprocess_flyer_image(tall_flyer, cache_dir=cache_dir) == first
+
+    def test_settings_change_invalidates_cache(self, tall_flyer, tmp_path):
+        """Test different settings produce a separate cache entry."""
+        cache_dir = str(tmp_path / "cache")
+
+        default = preprocess_flyer_image(tall_flyer, cache_dir=cache_dir)
+        lower = preprocess_flyer_image(tall_flyer, cache_dir=cache_dir, quality=50)
+
+        assert set(default).isdisjoint(lower)
+
+    def test_failed_tile_write_leaves_no_file(self, tall_flyer, tmp_path, monkeypatch):
+        """Test a crash while encoding a tile leaves neither a partial tile nor a manifest."""
+        cache_dir = tmp_path / "cache"
+
+        def fail_save(self, fp, *args, **kwargs):
+            fp.write(b'partial')
+            raise OSError("disk full")
+
+        monkeypatch.setattr(Image.Image, 'save', fail_save)
+        with pytest.raises(OSError):
+            preprocess_flyer_image(tall_flyer, cache_dir=str(cache_dir))
+
+        assert os.listdir(cache_dir) == []
+
+    @pytest.mark.parametrize("manifest", ['{"tiles": ["a.jp', '', '[]', '{"tiles": 3}'])
+    def test_unreadable_manifest_is_rebuilt(self, tall_flyer, tmp_path, manifest):
+        """Test a corrupt or partly written manifest rebuilds the tiles instead of raising."""
+        cache_dir = tmp_path / "cache"
+        first = preprocess_flyer_image(tall_flyer, cache_dir=str(cache_dir))
+        manifest_path = next(cache_dir.glob("*.json"))
+        manifest_path.write_text(manifest)
+
+        assert preprocess_flyer_image(tall_flyer, cache_dir=str(cache_dir)) == first
+        assert all(os.path.exists(tile) for tile in first)
+
+    def test_new_version_of_a_page_replaces_its_old_tiles(self, tall_flyer, tmp_path):
+        """Test reprocessing an edited page removes the tiles built from its previous version."""
+        cache_dir = tmp_path / "cache"
+        old = preprocess_flyer_image(tall_flyer, cache_dir=str(cache_dir))
+
+        with Image.open(tall_flyer) as image:
+            edited = image.copy()
+        ImageDraw.Draw(edited).rectangle((300, 300, 900, 900), fill=(30, 30, 200))
+        edited.save(tall_flyer, 'JPEG', quality=95)
+        new = preprocess_flyer_image(tall_flyer, cache_dir=str(cache_dir))
+
+        assert not any(os.path.exists(tile) for tile in old)
+        assert all(os.path.exists(tile) for tile in new)
+        assert len(list(cache_dir.glob("*.json"))) == 1
+
+    def test_other_pages_are_not_pruned(self, tall_flyer, tmp_path):
+        """Test pruning only touches entries built from the same source image."""
+        cache_dir = tmp_path / "cache"
+        other = tmp_path / "maxi_page_002.jpg"
+        Image.new('RGB', (800, 1000), (10, 120, 10)).save(other, 'JPEG')
+
+        other_tiles = preprocess_flyer_image(str(other), cache_dir=str(cache_dir))
+        preprocess_flyer_image(tall_flyer, cache_dir=str(cache_dir))
+
+        assert all(os.path.exists(tile) for tile in other_tiles)
+        assert prune_cache_entries(str(cache_dir), tall_flyer, keep_key="none") == 1
+        assert all(os.path.exists(tile) for tile in other_tiles)
@@ -0,0 +1,103 @@
+"""
+Unit tests for pipeline spans, cost accounting and the JSONL run log.
+"""
+
+import json
+from types import SimpleNamespace
+from scripts.instrumentation import (
+    OPENAI_TOKENS,
+    SPAN_SECONDS,
+    estimate_cost,
+    record_bytes,
+    record_usage,
+    span,
+    start_run
+)
+from scripts.pipeline.executors import run_threaded
+
+
+def read_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestEstimateCost:
+    """Tests for OpenAI cost estimates."""
+
+    def test_known_model(self):
+        """Test prices are applied per million input and output tokens."""
+        assert estimate_cost('gpt-4o', 1_000_000, 100_000) == 2.50 + 1.00
+
+    def test_unknown_model_costs_nothing(self):
+        """Test unknown models are not guessed."""
+        assert estimate_cost('some-new-model', 1000, 1000) == 0.0
+
+
+class TestSpans:
+    """Tests for span nesting and the run log."""
+
+    def test_spans_nest_and_are_logged(self, tmp_path):
+        """Test child spans record their parent and the run log gets one line per span."""
+        log_path = str(tmp_path / 'run.jsonl')
+
+        with start_run(log_path, stages=['analyze']) as run:
+            with span('stage', stage='analyze'):
+                with span('vision_request', pages=['p1.jpg']):
+                    record_usage('gpt-4o', SimpleNamespace(prompt_tokens=1000, completion_tokens=200))
+
+        records = {record['span']: record for record in read_log(log_path)}
+        assert set(records) == {'run', 'stage', 'vision_request'}
+        assert records['vision_request']['parent_id'] == records['stage']['span_id']
+        assert records['stage']['parent_id'] == records['run']['span_id']
+        assert all(record['run_id'] == run.run_id for record in records.values())
+
+        # Usage rolls up from the request to the stage and run spans
+        assert records['vision_request']['prompt_tokens'] == 1000
+        assert records['stage']['completion_tokens'] == 200
+        assert records['run']['cost'] == round(estimate_cost('gpt-4o', 1000, 200), 6)
+        assert run.totals['prompt_tokens'] == 1000
+
+    def test_errors_are_recorded(self, tmp_path):
+        """Test a failing span is logged with its error and re-raises."""
+        log_path = str(tmp_path / 'run.jsonl')
+
+        with start_run(log_path):
+            try:
+                with span('download_page', page='p1.jpg'):
+                    raise OSError("connection reset")
+            except OSError:
+                pass
+
+        record = next(r for r in read_log(log_path) if r['span'] == 'download_page')
+        assert record['error'] == "OSError: connection reset"
+
+    def test_threaded_tasks_nest_under_caller(self, tmp_path):
+        """Test spans opened in worker threads keep the caller's span as parent."""
+        log_path = str(tmp_path / 'run.jsonl')
+
+        def download(n):
+            with span('download_page', page=n):
+                record_bytes(100)
+
+        with start_run(log_path) as run:
+            with span('stage', stage='download'):
+                run_threaded(download, range(4), 4)
+
+        records = read_log(log_path)
+        stage = next(r for r in records if r['span'] == 'stage')
+        pages = [r for r in records if r['span'] == 'download_page']
+        assert len(pages) == 4
+        assert all(page['parent_id'] == stage['span_id'] for page in pages)
+        assert stage['bytes'] == 400
+        assert run.totals['bytes'] == 400
+
+    def test_metrics_are_recorded_without_a_run(self):
+        """Test spans and usage still feed the metrics outside a run."""
+        before_count = SPAN_SECONDS.count(span='test_span')
+        before_tokens = OPENAI_TOKENS.value(model='gpt-4o-mini', direction='prompt')
+
+        with span('test_span'):
+            record_usage('gpt-4o-mini', SimpleNamespace(prompt_tokens=10, completion_tokens=1))
+
+        assert SPAN_SECONDS.count(span='test_span') == before_count + 1
+        assert OPENAI_TOKENS.value(model='gpt-4o-mini', direction='prompt') == before_tokens + 10
@@ -0,0 +1,222 @@
+"""
+Unit tests for the job queue and the hardened weekly scrape scheduling.
+"""
+
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+import app as app_module
+from app import app, initialize_scheduler, shutdown_scheduler, weekly_slot
+from scripts.job_runs import JobRuns
+
+
+@pytest.fixture
+def runs(tmp_path):
+    """Job runs database in a temp dir, used by the app for the test."""
+    runs = JobRuns(str(tmp_path / 'jobs.sqlite3'))
+    with patch.object(app_module, 'job_runs', runs):
+        yield runs
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+class TestJobRuns:
+    """Tests for the JobRuns queue."""
+
+    def test_one_pending_run_per_job_across_processes(self, tmp_path):
+        """Two stores on the same file (as the API and a worker) share one pending run."""
+        path = str(tmp_path / 'jobs.sqlite3')
+        api, worker = JobRuns(path), JobRuns(path)
+
+        run_id = api.enqueue('weekly_scrape', 'manual')
+        assert run_id is not None
+        assert api.enqueue('weekly_scrape', 'cron') is None
+        assert api.enqueue('other_job', 'manual') is not None
+
+        claimed = worker.claim(['weekly_scrape'])
+        assert (claimed['id'], claimed['status'], claimed['attempts']) == (run_id, 'running', 1)
+        assert api.active('weekly_scrape')['status'] == 'running'
+        assert api.enqueue('weekly_scrape', 'manual') is None
+
+        worker.finish(run_id, 'failed', 'boom')
+        assert api.get(run_id)['error'] == 'boom'
+        assert api.enqueue('weekly_scrape', 'manual') is not None
+
+    def test_claims_oldest_run_once(self, tmp_path):
+        runs = JobRuns(str(tmp_path / 'jobs.sqlite3'))
+        first = runs.enqueue('job_a', 'manual')
+        second = runs.enqueue('job_b', 'manual')
+
+        assert runs.claim()['id'] == first
+        assert runs.claim()['id'] == second
+        assert runs.claim() is None
+
+    def test_claim_only_handled_jobs(self, tmp_path):
+        runs = JobRuns(str(tmp_path / 'jobs.sqlite3'))
+        runs.enqueue('other_job', 'manual')
+
+        assert runs.claim(['weekly_scrape']) is None
+        assert runs.get(1)['status'] == 'queued'
+
+    def test_dead_worker_run_is_requeued_then_abandoned(self, tmp_path):
+        """A run whose worker died goes back to the queue, up to max_attempts claims."""
+        runs = JobRuns(str(tmp_path / 'jobs.sqlite3'), stale_after=-1, max_attempts=2)
+        run_id = runs.enqueue('weekly_scrape', 'cron')
+
+        assert runs.claim()['attempts'] == 1
+        retried = runs.claim()  # The first claim's heartbeat is already stale
+        assert (retried['id'], retried['attempts']) == (run_id, 2)
+
+        assert runs.claim() is None
+        run = runs.get(run_id)
+        assert (run['status'], run['error']) == ('abandoned', 'No heartbeat')
+
+    def test_slot_runs_successfully_once(self, tmp_path):
+        runs = JobRuns(str(tmp_path / 'jobs.sqlite3'))
+        slot = '2026-10-19T01:00:00'
+
+        failed = runs.enqueue('weekly_scrape', 'cron', slot)
+        runs.claim()
+        runs.finish(failed, 'failed', 'network')
+        retried = runs.enqueue('weekly_scrape', 'catch_up', slot)
+        runs.claim()
+        runs.finish(retried, 'succeeded')
+
+        assert runs.succeeded('weekly_scrape', slot)
+        assert runs.enqueue('weekly_scrape', 'catch_up', slot) is None
+        assert [run['status'] for run in runs.recent('weekly_scrape')] == ['succeeded', 'failed']
+
+    def test_finish_only_updates_own_running_run(self, tmp_path):
+        """A worker whose run was requeued after a stale heartbeat cannot overwrite it."""
+        runs = JobRuns(str(tmp_path / 'jobs.sqlite3'), stale_after=-1)
+        run_id = runs.enqueue('weekly_scrape', 'cron')
+        assert runs.finish(run_id, 'succeeded') is False  # Never claimed
+
+        runs.claim()
+        runs.enqueue('other_job', 'manual')  # Any transaction requeues the stale run
+        assert runs.get(run_id)['status'] == 'queued'
+        assert runs.finish(run_id, 'succeeded') is False
+        assert runs.get(run_id)['status'] == 'queued'
+
+        runs.claim(['weekly_scrape'])
+        with patch('scripts.job_runs.os.getpid', return_value=-1):
+            assert runs.finish(run_id, 'failed', 'not mine') is False
+        assert runs.finish(run_id, 'succeeded') is True
+        assert runs.get(run_id)['status'] == 'succeeded'
+
+    def test_keep_alive_refreshes_heartbeat(self, tmp_path):
+        runs = JobRuns(str(tmp_path / 'jobs.sqlite3'))
+        runs.enqueue('weekly_scrape', 'manual')
+        run_id = runs.claim()['id']
+        started = runs.get(run_id)['heartbeat_at']
+
+        stop = runs.keep_alive(run_id, interval=0.01)
+        try:
+            import time
+            deadline = time.time() + 2
+            while runs.get(run_id)['heartbeat_at'] == started and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            stop()
+
+        assert runs.get(run_id)['heartbeat_at'] > started
+
+
+class TestWeeklySlot:
+    """Tests for weekly_slot."""
+
+    @pytest.mark.parametrize('now, slot', [
+        (datetime(2026, 10, 19, 1, 0), datetime(2026, 10, 19, 1, 0)),   # Monday 1 AM
+        (datetime(2026, 10, 19, 0, 59), datetime(2026, 10, 12, 1, 0)),  # Just before
+        (datetime(2026, 10, 22, 15, 30), datetime(2026, 10, 19, 1, 0))  # Thursday
+    ])
+    def test_latest_monday_1am(self, now, slot):
+        assert weekly_slot(now) == slot
+
+
+class TestScrapeRuns:
+    """Tests for queueing scrape runs and refusing overlaps."""
+
+    def test_manual_scrape_conflicts_with_running_scrape(self, runs, client):
+        runs.enqueue('weekly_scrape', 'cron')
+        runs.claim()
+
+        response = client.post('/api/scrape')
+
+        assert response.status_code == 409
+        assert 'already running' in json.loads(response.data)['message']
+        assert len(runs.recent('weekly_scrape')) == 1
+
+    def test_scheduled_scrape_queues_the_slot(self, runs):
+        app_module.scheduled_weekly_scrape()
+
+        run = runs.active('weekly_scrape')
+        assert (run['status'], run['trigger']) == ('queued', 'cron')
+        assert run['scheduled_for'] == weekly_slot().isoformat()
+
+    def test_scheduled_scrape_skips_a_slot_that_ran(self, runs):
+        run_id = runs.enqueue('weekly_scrape', 'cron', weekly_slot().isoformat())
+        runs.claim()
+        runs.finish(run_id, 'succeeded')
+
+        app_module.scheduled_weekly_scrape('catch_up')
+
+        assert runs.active('weekly_scrape') is None
+
+    def test_runs_endpoint(self, runs, client):
+        run_id = runs.enqueue('weekly_scrape', 'manual')
+        runs.claim()
+        runs.finish(run_id, 'failed', 'boom')
+
+        data = json.loads(client.get('/api/scrape/runs').data)
+        assert data['count'] == 1
+        assert data['runs'][0]['status'] == 'failed'
+        assert datetime.fromisoformat(data['runs'][0]['finished_at'])
+
+
+class TestHardenedScheduler:
+    """Tests for the scheduler's overlap and misfire settings and catch-up."""
+
+    @pytest.fixture
+    def scheduler_at(self, runs, tmp_path):
+        """Start the scheduler as if it were `now`, without running real scrapes."""
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        def start(now):
+            # Jobs stay pending (not started), so they can be inspected before they fire
+            with patch.object(app_module, 'weekly_slot', return_value=weekly_slot(now)), \
+                    patch.object(app_module, 'datetime', wraps=datetime) as mock_datetime, \
+                    patch.object(BackgroundScheduler, 'start'):
+                mock_datetime.now.return_value = now
+                scheduler = initialize_scheduler(str(tmp_path / 'scheduler.lock'))
+            shutdown_scheduler(scheduler)
+            return scheduler
+
+        return start
+
+    def test_weekly_job_settings(self, scheduler_at):
+        job = scheduler_at(datetime(2026, 10, 22, 12, 0)).get_job('weekly_scrape')
+        assert job.max_instances == 1
+        assert job.coalesce is True
+        assert job.misfire_grace_time == app_module.SCHEDULER_MISFIRE_GRACE
+
+    def test_missed_slot_is_caught_up(self, scheduler_at):
+        scheduler = scheduler_at(datetime(2026, 10, 19, 3, 0))
+        job = scheduler.get_job('weekly_scrape_catch_up')
+        assert job is not None
+        assert job.args == ('catch_up',)
+
+    def test_no_catch_up_after_grace_or_success(self, runs, scheduler_at):
+        assert scheduler_at(datetime(2026, 10, 22, 12, 0)).get_job('weekly_scrape_catch_up') is None
+
+        run_id = runs.enqueue('weekly_scrape', 'cron', '2026-10-19T01:00:00')
+        runs.claim()
+        runs.finish(run_id, 'succeeded')
+        assert scheduler_at(datetime(2026, 10, 19, 3, 0)).get_job('weekly_scrape_catch_up') is None
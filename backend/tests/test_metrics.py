@@ -0,0 +1,102 @@
+"""
+Unit tests for the in-process Prometheus-style metrics.
+"""
+
+import pytest
+from scripts.metrics import Counter, Gauge, Histogram, counter, render_prometheus, REGISTRY
+
+
+class TestCounter:
+    """Tests for counters."""
+
+    def test_counts_per_label_set(self):
+        """Test each label combination has its own total."""
+        requests = Counter('test_requests_total', 'Requests', ['route'])
+        requests.inc(route='/a')
+        requests.inc(2, route='/a')
+        requests.inc(route='/b')
+
+        assert requests.value(route='/a') == 3
+        assert requests.value(route='/b') == 1
+
+    def test_rejects_wrong_labels_and_decrements(self):
+        """Test label names must match and totals cannot decrease."""
+        requests = Counter('test_requests_total', 'Requests', ['route'])
+
+        with pytest.raises(ValueError):
+            requests.inc(method='GET')
+        with pytest.raises(ValueError):
+            requests.inc(-1, route='/a')
+
+    def test_render(self):
+        """Test the text exposition format, including label escaping."""
+        requests = Counter('test_requests_total', 'Requests served', ['route'])
+        requests.inc(route='/say "hi"')
+
+        assert requests.render() == (
+            '# HELP test_requests_total Requests served\n'
+            '# TYPE test_requests_total counter\n'
+            'test_requests_total{route="/say \\"hi\\""} 1'
+        )
+
+
+class TestGauge:
+    """Tests for gauges."""
+
+    def test_inc_dec_set(self):
+        """Test gauges move both ways."""
+        in_flight = Gauge('test_in_flight', 'In flight')
+        in_flight.inc()
+        in_flight.inc()
+        in_flight.dec()
+        assert in_flight.value() == 1
+
+        in_flight.set(7)
+        assert in_flight.value() == 7
+
+
+class TestHistogram:
+    """Tests for histograms."""
+
+    def test_buckets_are_cumulative(self):
+        """Test bucket counts, sum and count in the rendered output."""
+        latency = Histogram('test_seconds', 'Latency', ['route'], buckets=(0.1, 1))
+        latency.observe(0.05, route='/a')
+        latency.observe(0.5, route='/a')
+        latency.observe(3, route='/a')
+
+        lines = latency.render().split('\n')[2:]
+        assert lines == [
+            'test_seconds_bucket{route="/a",le="0.1"} 1',
+            'test_seconds_bucket{route="/a",le="1"} 2',
+            'test_seconds_bucket{route="/a",le="+Inf"} 3',
+            'test_seconds_sum{route="/a"} 3.55',
+            'test_seconds_count{route="/a"} 3'
+        ]
+
+    def test_time_context_manager(self):
+        """Test time() observes the block duration."""
+        latency = Histogram('test_seconds', 'Latency')
+        with latency.time():
+            pass
+
+        assert latency.count() == 1
+        assert latency.total() >= 0
+
+
+class TestRegistry:
+    """Tests for the module-level registry."""
+
+    def test_same_name_returns_same_metric(self):
+        """Test registering a metric twice returns the existing one."""
+        try:
+            first = counter('test_registry_total', 'Registry test', ['kind'])
+            assert counter('test_registry_total', 'Registry test', ['kind']) is first
+
+            with pytest.raises(ValueError):
+                counter('test_registry_total', 'Registry test', ['other'])
+
+            first.inc(kind='x')
+            assert 'test_registry_total{kind="x"} 1' in render_prometheus()
+        finally:
+            REGISTRY.pop('test_registry_total', None)
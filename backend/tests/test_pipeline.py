@@ -0,0 +1,331 @@
+"""
+Unit tests for the flyer pipeline package.
+Downloads are served from a local HTTP server and analysis uses the fake OpenAI
+server, so no network access or real API calls are made.
+"""
+
+import pytest
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from openai import OpenAI
+from scripts.pipeline import make_config, run_pipeline, DEFAULT_CONFIG
+from scripts.pipeline.executors import run_serial, run_threaded, run_async
+from scripts.pipeline.scraping import parse_flyer_card, parse_image_urls
+from scripts.pipeline.download import download_all_images, SOURCES_MANIFEST
+from tests.fake_openai import FakeOpenAIServer
+from tests.fake_flyer_site import FakeFlyerSite
+
+
+@pytest.fixture(autouse=True)
+def no_preprocessing(monkeypatch):
+    """Send the test images as-is (they are not real JPEGs)."""
+    monkeypatch.setattr('scripts.analyze_flyers.PREPROCESS_IMAGES', False)
+
+
+@pytest.fixture
+def image_server():
+    """Local HTTP server returning b'image:<path>' and counting requests per path."""
+    hits = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] = hits.get(self.path, 0) + 1
+            if self.path.startswith('/missing'):
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = f"image:{self.path}".encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    server.url = f"http://{host}:{port}"
+    server.hits = hits
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def store_data(store, urls):
+    return {
+        'store': store,
+        'title': 'Weekly Savings',
+        'date_range': 'Current Week',
+        'url': 'https://example.com/flyer',
+        'image_urls': urls,
+        'image_count': len(urls)
+    }
+
+
+class TestExecutors:
+    """Tests for the serial, threaded and async executors."""
+
+    @pytest.mark.parametrize('executor', [run_serial, run_threaded, run_async])
+    def test_results_keep_input_order(self, executor):
+        """Test every executor returns results in input order."""
+        def work(n):
+            time.sleep(0.01 * (5 - n))  # Later items finish first
+            return n * 10
+
+        assert executor(work, range(5), 4) == [0, 10, 20, 30, 40]
+
+    @pytest.mark.parametrize('executor', [run_threaded, run_async])
+    def test_items_run_concurrently(self, executor):
+        """Test the concurrent executors overlap blocking work."""
+        started = time.perf_counter()
+        executor(lambda n: time.sleep(0.2), range(4), 4)
+        assert time.perf_counter() - started < 0.6
+
+    def test_async_awaits_coroutine_functions(self):
+        """Test coroutine functions are awaited on the event loop."""
+        async def work(n):
+            return n + 1
+
+        assert run_async(work, [1, 2, 3], 2) == [2, 3, 4]
+
+
+class TestMakeConfig:
+    """Tests for building pipeline configs."""
+
+    def test_nested_settings_are_merged(self):
+        """Test overriding one stage's executor keeps the others."""
+        config = make_config(executors={'analyze': 'async'})
+
+        assert config['executors'] == {'download': 'threaded', 'analyze': 'async'}
+        assert DEFAULT_CONFIG['executors']['analyze'] == 'threaded'
+
+    def test_unknown_setting_is_rejected(self):
+        """Test typos in setting names raise instead of being ignored."""
+        with pytest.raises(ValueError, match='num_page'):
+            make_config(num_page=2)
+
+    def test_unknown_executor_is_rejected(self):
+        """Test unknown executor names raise."""
+        with pytest.raises(ValueError, match='parallel'):
+            make_config(executors={'download': 'parallel'})
+
+
+class TestParseImageUrls:
+    """Tests for reading page image URLs from flyer HTML."""
+
+    def test_unique_urls_in_page_order(self):
+        """Test duplicates are dropped and page order is kept."""
+        page_1 = "https://f.dam-img.rfdcontent.com/cms/001/2024/1_original.jpg"
+        page_2 = "https://f.dam-img.rfdcontent.com/cms/001/2024/2_original.jpg"
+        html = f'tileSources: ["{page_1}", "{page_2}", "{page_1}"] <img src="https://f.dam-img.rfdcontent.com/cms/001/thumb.jpg">'
+
+        assert parse_image_urls(html) == [page_1, page_2]
+
+    def test_configured_pattern_matches_fake_site(self):
+        """Test the fake site's flyer pages parse with its image URL pattern."""
+        with FakeFlyerSite({'metro': 3}) as site:
+            html = site.flyer_html('metro')
+
+            assert parse_image_urls(html) == []
+            assert parse_image_urls(html, site.image_url_pattern) == site.image_urls('metro')
+
+
+class FakeElement:
+    """Minimal stand-in for a Playwright element handle."""
+
+    def __init__(self, attributes=None, children=None, text=''):
+        self.attributes = attributes or {}
+        self.children = children or {}
+        self.text = text
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+    def query_selector(self, selector):
+        return self.children.get(selector)
+
+    def inner_text(self):
+        return self.text
+
+
+class TestParseFlyerCard:
+    """Tests for reading flyer listing cards."""
+
+    def make_card(self, dealer, href):
+        return FakeElement({'data-dealer-name': dealer}, {
+            'a.flyer_image': FakeElement({'href': href}),
+            '.flyer_title': FakeElement(text=' Weekly Savings '),
+            '.flyer_dates': FakeElement(text='Jan 2 - Jan 8')
+        })
+
+    def test_relative_link_uses_listing_url(self):
+        """Test relative flyer links resolve against the configured flyers URL."""
+        card = self.make_card('Super C', 'super-c/')
+        stores = DEFAULT_CONFIG['grocery_stores']
+
+        assert parse_flyer_card(card, stores)['url'] == "https://www.redflagdeals.com/flyers/super-c/"
+        flyer = parse_flyer_card(card, stores, "http://127.0.0.1:8000/flyers/")
+        assert flyer == {
+            'store': 'super c',
+            'title': 'Weekly Savings',
+            'date_range': 'Jan 2 - Jan 8',
+            'url': "http://127.0.0.1:8000/flyers/super-c/"
+        }
+
+    def test_non_grocery_card_is_skipped(self):
+        """Test dealers outside the grocery list are ignored."""
+        card = self.make_card('Best Buy', 'best-buy/')
+        assert parse_flyer_card(card, DEFAULT_CONFIG['grocery_stores']) is None
+
+
+class TestDownload:
+    """Tests for the download stage."""
+
+    def test_downloads_pages_of_all_stores(self, image_server, tmp_path):
+        """Test every page is saved under its store folder."""
+        config = make_config(flyer_images_dir=str(tmp_path))
+        image_data = {
+            'maxi': store_data('maxi', [f"{image_server.url}/maxi/1", f"{image_server.url}/maxi/2"]),
+            'metro': store_data('metro', [f"{image_server.url}/metro/1"])
+        }
+
+        stats = download_all_images(image_data, config, run_threaded)
+
+        assert stats['total_downloaded'] == 3
+        assert stats['stores_succeeded'] == 2
+        assert (tmp_path / 'maxi' / 'maxi_page_002.jpg').read_bytes() == b"image:/maxi/2"
+        assert json.loads((tmp_path / 'metro' / SOURCES_MANIFEST).read_text()) == {
+            'metro_page_001.jpg': f"{image_server.url}/metro/1"
+        }
+
+    def test_unchanged_pages_are_not_downloaded_again(self, image_server, tmp_path):
+        """Test a rerun only fetches pages whose source URL changed."""
+        config = make_config(flyer_images_dir=str(tmp_path))
+        download_all_images(
+            {'maxi': store_data('maxi', [f"{image_server.url}/a", f"{image_server.url}/b"])}, config, run_serial
+        )
+
+        stats = download_all_images(
+            {'maxi': store_data('maxi', [f"{image_server.url}/a", f"{image_server.url}/c"])}, config, run_serial
+        )
+
+        assert image_server.hits == {'/a': 1, '/b': 1, '/c': 1}
+        assert stats['cached_images'] == 1
+        assert stats['total_downloaded'] == 1
+        assert (tmp_path / 'maxi' / 'maxi_page_002.jpg').read_bytes() == b"image:/c"
+
+    def test_page_limit_and_failures(self, image_server, tmp_path):
+        """Test num_pages limits downloads and failed pages are not recorded."""
+        config = make_config(flyer_images_dir=str(tmp_path), num_pages=2)
+        urls = [f"{image_server.url}/ok", f"{image_server.url}/missing", f"{image_server.url}/extra"]
+
+        stats = download_all_images({'maxi': store_data('maxi', urls)}, config, run_threaded)
+
+        assert stats['total_images'] == 2
+        assert stats['total_downloaded'] == 1
+        assert '/extra' not in image_server.hits
+        assert not (tmp_path / 'maxi' / 'maxi_page_002.jpg').exists()
+        assert list(json.loads((tmp_path / 'maxi' / SOURCES_MANIFEST).read_text())) == ['maxi_page_001.jpg']
+
+
+class TestRunPipeline:
+    """Tests for running stages end to end without a browser."""
+
+    @pytest.mark.parametrize('executor', ['serial', 'threaded', 'async'])
+    def test_download_and_analyze_from_saved_urls(self, image_server, tmp_path, executor):
+        """Test the pipeline resumes from saved image URLs and analyzes every store."""
+        output_dir = tmp_path / 'results'
+        output_dir.mkdir()
+        (output_dir / '_image_urls.json').write_text(json.dumps({
+            'maxi': store_data('maxi', [f"{image_server.url}/maxi/1"]),
+            'iga': store_data('iga', [f"{image_server.url}/iga/1", f"{image_server.url}/iga/2"])
+        }))
+
+        content = json.dumps([{"item": "Eggs", "price": 3.49, "unit": "dozen", "discount": ""}])
+        with FakeOpenAIServer(default_content=content) as server:
+            client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+            config = make_config(
+                stages=['download', 'analyze'],
+                flyer_images_dir=str(tmp_path / 'images'),
+                output_dir=str(output_dir),
+                executors={'download': executor, 'analyze': executor}
+            )
+
+            summary = run_pipeline(config, client=client)
+
+        assert summary['completed']
+        assert set(summary['timings']) == {'download', 'analyze'}
+        assert summary['download_stats']['total_downloaded'] == 3
+        assert summary['analysis_stats']['total_promotions'] == 3
+        assert len(server.requests) == 3
+
+        iga = json.loads((output_dir / 'iga_promotions.json').read_text())
+        assert iga['promotion_count'] == 2
+        assert iga['promotions'][0]['store'] == 'iga'
+        assert os.path.exists(output_dir / '_summary.json')
+
+    def test_fake_site_with_latency(self, tmp_path):
+        """Test the pipeline runs against the fake flyer site and counts every page once."""
+        output_dir = tmp_path / 'results'
+        output_dir.mkdir()
+
+        with FakeFlyerSite({'metro': 2, 'iga': 1}, latency=0.01, bandwidth=1024 * 1024) as site, \
+                FakeOpenAIServer(default_content='{"promotions": []}') as server:
+            (output_dir / '_image_urls.json').write_text(json.dumps(site.image_data()))
+            client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+            config = make_config(
+                stages=['download', 'analyze'],
+                flyer_images_dir=str(tmp_path / 'images'),
+                output_dir=str(output_dir),
+                image_url_pattern=site.image_url_pattern
+            )
+            summary = run_pipeline(config, client=client)
+
+        assert summary['completed']
+        assert summary['download_stats']['total_downloaded'] == 3
+        assert sorted(site.hits.values()) == [1, 1, 1]
+        assert site.bytes_sent == summary['download_stats']['bytes_downloaded']
+        assert len(server.requests) == 3
+
+    def test_run_is_instrumented(self, image_server, tmp_path):
+        """Test spans, usage totals and metrics are written for a run."""
+        output_dir = tmp_path / 'results'
+        output_dir.mkdir()
+        (output_dir / '_image_urls.json').write_text(json.dumps({
+            'maxi': store_data('maxi', [f"{image_server.url}/maxi/1", f"{image_server.url}/maxi/2"])
+        }))
+
+        with FakeOpenAIServer(default_content="[]") as server:
+            client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+            config = make_config(
+                stages=['download', 'analyze'],
+                flyer_images_dir=str(tmp_path / 'images'),
+                output_dir=str(output_dir)
+            )
+            summary = run_pipeline(config, client=client)
+
+        with open(output_dir / '_run_log.jsonl') as f:
+            records = [json.loads(line) for line in f]
+        spans = [record['span'] for record in records]
+
+        assert spans.count('download_page') == 2
+        assert spans.count('vision_request') == 2
+        assert spans.count('analyze_store') == 1
+        assert spans.count('stage') == 2
+        assert spans[-1] == 'run'
+        assert {record['run_id'] for record in records} == {summary['run_id']}
+
+        store = next(record for record in records if record['span'] == 'analyze_store')
+        assert store['store'] == 'maxi'
+        assert store['prompt_tokens'] > 0
+        assert summary['usage']['prompt_tokens'] == store['prompt_tokens']
+        assert summary['usage']['bytes'] > 0
+
+        metrics = (output_dir / '_metrics.prom').read_text()
+        assert 'pipeline_stage_seconds_count{stage="analyze"}' in metrics
+        assert 'openai_tokens_total{model="gpt-4o",direction="prompt"}' in metrics
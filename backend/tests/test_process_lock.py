@@ -0,0 +1,44 @@
+"""
+Unit tests for host-wide process locks.
+"""
+
+import sys
+import subprocess
+from scripts.process_lock import acquire_process_lock, release_process_lock
+
+
+class TestProcessLock:
+    """Tests for acquire_process_lock and release_process_lock."""
+
+    def test_second_holder_is_refused(self, tmp_path):
+        """Test only one holder gets the lock until it is released."""
+        path = str(tmp_path / 'locks' / 'scheduler.lock')
+
+        first = acquire_process_lock(path)
+        assert first is not None
+        assert acquire_process_lock(path) is None
+
+        release_process_lock(first)
+        second = acquire_process_lock(path)
+        assert second is not None
+        release_process_lock(second)
+
+    def test_lock_is_released_when_process_exits(self, tmp_path):
+        """Test a lock held by a process that exited can be taken over."""
+        path = str(tmp_path / 'scheduler.lock')
+        code = ("import sys; from scripts.process_lock import acquire_process_lock; "
+                "sys.exit(0 if acquire_process_lock(sys.argv[1]) else 1)")
+
+        assert subprocess.run([sys.executable, '-c', code, path]).returncode == 0
+
+        lock = acquire_process_lock(path)
+        assert lock is not None
+        assert subprocess.run([sys.executable, '-c', code, path]).returncode == 1
+        release_process_lock(lock)
+
+    def test_release_is_idempotent(self, tmp_path):
+        """Test releasing twice or releasing None is harmless."""
+        lock = acquire_process_lock(str(tmp_path / 'scheduler.lock'))
+        release_process_lock(lock)
+        release_process_lock(lock)
+        release_process_lock(None)
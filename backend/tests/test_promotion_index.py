@@ -0,0 +1,185 @@
+"""
+Unit tests for the promotion indexes behind GET /api/promotions filtering and pagination.
+"""
+
+import re
+import random
+import pytest
+from scripts.promotion_index import (
+    PromotionIndex, PromotionQueryError, decode_cursor, encode_cursor, parse_query, project
+)
+from benchmarks.synthetic_data import make_promotions
+
+
+@pytest.fixture
+def promotions():
+    return [
+        {'item': 'Chicken Breast', 'price': 8.99, 'unit': 'lb', 'discount': 'Save $2', 'store': 'Metro'},
+        {'item': 'Broccoli', 'price': 0.55, 'unit': 'each', 'discount': 'Save 73%', 'store': 'Maxi'},
+        {'item': 'Chicken Thighs', 'price': 5.49, 'unit': 'lb', 'discount': '', 'store': 'Maxi'},
+        {'item': 'Chickpeas', 'price': 1.29, 'unit': 'each', 'discount': '', 'store': 'IGA'},
+        {'item': 'Ground Beef', 'price': 4.99, 'unit': 'lb', 'discount': 'Save $1', 'store': 'Metro'},
+        {'item': 'Mystery Box', 'price': None, 'unit': 'each', 'discount': '', 'store': 'IGA'}
+    ]
+
+
+def brute_force(promotions, stores=None, min_price=None, max_price=None, text=None,
+                sort='position', descending=False):
+    """Reference implementation: filter and sort the whole list."""
+    words = text.casefold().split() if text else []
+
+    def keep(promo):
+        price = promo['price'] if isinstance(promo['price'], (int, float)) else float('inf')
+        item_words = re.findall(r'\w+', promo['item'].casefold())
+        return (
+            (stores is None or promo['store'].casefold() in stores)
+            and (min_price is None or price >= min_price)
+            and (max_price is None or price <= max_price)
+            and all(any(w.startswith(word) for w in item_words) for word in words)
+        )
+
+    keys = {
+        'position': lambda i: i,
+        'item': lambda i: (promotions[i]['item'].casefold(), i),
+        'price': lambda i: (promotions[i]['price'] if isinstance(promotions[i]['price'], (int, float)) else float('inf'), i),
+        'store': lambda i: (promotions[i]['store'].casefold(), i)
+    }
+    positions = sorted((i for i, p in enumerate(promotions) if keep(p)), key=keys[sort], reverse=descending)
+    return [promotions[i] for i in positions]
+
+
+def all_pages(index, limit, **query):
+    """Follow the index's cursors through every page."""
+    results, after = [], None
+    while True:
+        page, after = index.query(after=after, limit=limit, **query)
+        results.extend(page)
+        if after is None:
+            return results
+
+
+class TestQuery:
+    """Tests for PromotionIndex.query filters and sorting."""
+
+    def test_no_filters_returns_stored_order(self, promotions):
+        page, after = PromotionIndex(promotions).query()
+        assert page == promotions
+        assert after is None
+
+    def test_store_filter(self, promotions):
+        page, _ = PromotionIndex(promotions).query(stores=['maxi', 'iga'])
+        assert [p['item'] for p in page] == ['Broccoli', 'Chicken Thighs', 'Chickpeas', 'Mystery Box']
+
+    def test_price_range_is_inclusive_and_skips_missing_prices(self, promotions):
+        page, _ = PromotionIndex(promotions).query(min_price=1.29, max_price=5.49, sort='price')
+        assert [p['price'] for p in page] == [1.29, 4.99, 5.49]
+
+    def test_text_matches_word_prefixes(self, promotions):
+        index = PromotionIndex(promotions)
+        assert [p['item'] for p in index.query(text='chick')[0]] == ['Chicken Breast', 'Chicken Thighs', 'Chickpeas']
+        assert [p['item'] for p in index.query(text='CHICKEN th')[0]] == ['Chicken Thighs']
+        assert index.query(text='pork')[0] == []
+
+    def test_sort_descending(self, promotions):
+        page, _ = PromotionIndex(promotions).query(sort='price', descending=True, max_price=100)
+        assert [p['price'] for p in page] == [8.99, 5.49, 4.99, 1.29, 0.55]
+
+    def test_limit_returns_continuation(self, promotions):
+        index = PromotionIndex(promotions)
+        page, after = index.query(sort='item', limit=2)
+        assert [p['item'] for p in page] == ['Broccoli', 'Chicken Breast']
+
+        page, after = index.query(sort='item', limit=2, after=after)
+        assert [p['item'] for p in page] == ['Chicken Thighs', 'Chickpeas']
+
+    def test_last_full_page_has_no_continuation(self, promotions):
+        page, after = PromotionIndex(promotions).query(stores=['metro'], limit=2)
+        assert len(page) == 2
+        assert after is None
+
+    def test_cheapest_per_kg(self):
+        promotions = [
+            {'item': 'Chicken A', 'price': 30.99, 'store': 'Costco', 'base_unit': 'kg', 'unit_price': 7.7475},
+            {'item': 'Chicken B', 'price': 3.99, 'store': 'Metro', 'base_unit': 'kg', 'unit_price': 8.7964},
+            {'item': 'Chicken C', 'price': 6.99, 'store': 'IGA', 'base_unit': 'each', 'unit_price': 6.99},
+            {'item': 'Chicken D', 'price': 9.99, 'store': 'Maxi', 'base_unit': 'kg', 'unit_price': 4.995}
+        ]
+        page, _ = PromotionIndex(promotions).query(text='chicken', base_unit='kg', sort='unit_price')
+        assert [p['item'] for p in page] == ['Chicken D', 'Chicken A', 'Chicken B']
+
+    def test_matches_brute_force_on_random_queries(self):
+        """Every combination of filters, sort and page size returns the same promotions as a full scan."""
+        promotions = make_promotions(3000, seed=7)
+        index = PromotionIndex(promotions)
+        rng = random.Random(1)
+
+        for _ in range(200):
+            query = {
+                'stores': sorted(rng.sample(['metro', 'maxi', 'iga', 'walmart', 'nowhere'], rng.randint(1, 3)))
+                if rng.random() < 0.5 else None,
+                'min_price': rng.choice([None, 2.0, 10.0]),
+                'max_price': rng.choice([None, 5.0, 15.0]),
+                'text': rng.choice([None, 'chick', 'organic', 'great value', 'br', 'x']),
+                'sort': rng.choice(['position', 'item', 'price', 'store']),
+                'descending': rng.random() < 0.5
+            }
+            expected = brute_force(promotions, **query)
+            assert all_pages(index, rng.choice([1, 7, 50, 500]), **query) == expected, query
+
+
+class TestCursors:
+    """Tests for cursor encoding and query parameter parsing."""
+
+    def test_cursor_round_trip(self):
+        token = encode_cursor('v1', 'price', True, 42)
+        assert decode_cursor(token, 'v1', 'price', True) == 42
+
+    def test_cursor_from_other_scrape_is_rejected(self):
+        token = encode_cursor('v1', 'price', False, 42)
+        with pytest.raises(PromotionQueryError, match='expired'):
+            decode_cursor(token, 'v2', 'price', False)
+
+    def test_cursor_for_other_sort_is_rejected(self):
+        token = encode_cursor('v1', 'price', False, 42)
+        with pytest.raises(PromotionQueryError, match='sort'):
+            decode_cursor(token, 'v1', 'price', True)
+
+    def test_garbage_cursor_is_rejected(self):
+        with pytest.raises(PromotionQueryError, match='Invalid cursor'):
+            decode_cursor('not-a-cursor', 'v1', 'price', False)
+
+    def test_version_changes_with_promotions(self, promotions):
+        assert PromotionIndex(promotions, 't1').version == PromotionIndex(list(promotions), 't1').version
+        assert PromotionIndex(promotions, 't1').version != PromotionIndex(promotions[1:], 't1').version
+        assert PromotionIndex(promotions, 't1').version != PromotionIndex(promotions, 't2').version
+
+    def test_parse_query(self, promotions):
+        query, fields = parse_query({
+            'store': 'Metro, maxi', 'min_price': '1', 'q': 'chicken', 'sort': '-price',
+            'limit': '10', 'fields': 'item,price'
+        }, PromotionIndex(promotions))
+
+        assert query['stores'] == ['maxi', 'metro']
+        assert query['min_price'] == 1.0
+        assert query['max_price'] is None
+        assert query['text'] == 'chicken'
+        assert (query['sort'], query['descending']) == ('price', True)
+        assert query['limit'] == 10
+        assert fields == ['item', 'price']
+
+    @pytest.mark.parametrize('args', [
+        {'sort': 'discount'},
+        {'base_unit': 'lb'},
+        {'limit': '0'},
+        {'limit': 'ten'},
+        {'min_price': 'cheap'},
+        {'fields': 'item,scrape_id'},
+        {'cursor': 'abc'}
+    ])
+    def test_parse_query_rejects_invalid_parameters(self, promotions, args):
+        with pytest.raises(PromotionQueryError):
+            parse_query(args, PromotionIndex(promotions))
+
+    def test_project(self, promotions):
+        assert project(promotions[:1], ['item', 'store']) == [{'item': 'Chicken Breast', 'store': 'Metro'}]
+        assert project(promotions, None) is promotions
@@ -0,0 +1,150 @@
+"""
+Unit tests for ranked, typo-tolerant promotion search.
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+from app import app, reset_promotion_index
+from scripts.promotion_search import SearchIndex, edit_distance, max_typos
+from benchmarks.synthetic_data import make_promotions
+
+
+@pytest.fixture
+def promotions():
+    return [
+        {'item': 'Chicken Breast Family Pack', 'price': 8.99, 'unit': 'lb', 'discount': '', 'store': 'Metro'},
+        {'item': 'Mozzarella Cheese', 'price': 5.99, 'unit': '340 g', 'discount': '', 'store': 'Maxi'},
+        {'item': 'Chicken', 'price': 12.99, 'unit': 'each', 'discount': '', 'store': 'IGA'},
+        {'item': 'Chickpeas', 'price': 1.29, 'unit': 'each', 'discount': '', 'store': 'Metro'},
+        {'item': 'Shredded Mozzarella', 'price': 6.49, 'unit': '320 g', 'discount': '', 'store': 'Metro'},
+        {'item': 'Laundry Detergent', 'price': 9.99, 'unit': 'each', 'discount': '', 'store': 'Walmart'}
+    ]
+
+
+def items(index, query, limit=20):
+    return [index.promotions[position]['item'] for position, _ in index.search(query, limit)]
+
+
+class TestEditDistance:
+    """Tests for the bounded edit distance."""
+
+    @pytest.mark.parametrize('a, b, expected', [
+        ('mozarella', 'mozzarella', 1),
+        ('chiken', 'chicken', 1),
+        ('chikcen', 'chicken', 1),  # Adjacent swap
+        ('brocoli', 'broccoli', 1),
+        ('cheese', 'cheese', 0),
+        ('milk', 'silk', 1)
+    ])
+    def test_distance(self, a, b, expected):
+        assert edit_distance(a, b, 2) == expected
+
+    def test_stops_above_limit(self):
+        assert edit_distance('chicken', 'detergent', 1) == 2
+        assert edit_distance('egg', 'eggplant', 2) == 3
+
+    def test_short_words_allow_no_typos(self):
+        assert max_typos('egg') == 0
+        assert max_typos('milk') == 1
+        assert max_typos('mozarella') == 2
+
+
+class TestSearchIndex:
+    """Tests for SearchIndex matching and ranking."""
+
+    def test_exact_match_ranks_before_prefix(self, promotions):
+        index = SearchIndex(promotions)
+        assert items(index, 'chicken') == ['Chicken', 'Chicken Breast Family Pack']
+        assert items(index, 'chick') == ['Chicken', 'Chickpeas', 'Chicken Breast Family Pack']
+
+    def test_typos_match(self, promotions):
+        index = SearchIndex(promotions)
+        assert items(index, 'mozarella') == ['Mozzarella Cheese', 'Shredded Mozzarella']
+        assert items(index, 'chikcen') == ['Chicken', 'Chicken Breast Family Pack']
+
+    def test_every_word_must_match(self, promotions):
+        index = SearchIndex(promotions)
+        assert items(index, 'mozzarella metro') == ['Shredded Mozzarella']
+        assert items(index, 'chicken walmart') == []
+        assert items(index, 'xyzzy') == []
+
+    def test_item_match_ranks_before_store_match(self, promotions):
+        promotions = promotions + [{'item': 'Metro Bread', 'price': 2.5, 'unit': 'each', 'store': 'IGA'}]
+        index = SearchIndex(promotions)
+        assert items(index, 'metro')[0] == 'Metro Bread'
+
+    def test_unit_is_searchable(self, promotions):
+        assert items(SearchIndex(promotions), 'lb') == ['Chicken Breast Family Pack']
+
+    def test_scores_are_descending_and_limit_applies(self, promotions):
+        results = SearchIndex(promotions).search('chick', limit=2)
+        assert len(results) == 2
+        assert results[0][1] >= results[1][1]
+
+    def test_empty_query(self, promotions):
+        assert SearchIndex(promotions).search('  ') == []
+
+    def test_cache_is_shared_safely_by_threads(self, promotions):
+        """Concurrent searches that keep evicting cached queries neither fail nor mix up results."""
+        from concurrent.futures import ThreadPoolExecutor
+        index = SearchIndex(promotions)
+        queries = ['chicken', 'mozzarella', 'chick', 'metro', 'pack', 'cheese', 'shredded', 'laundry']
+        expected = {query: items(SearchIndex(promotions), query) for query in queries}
+
+        with patch('scripts.promotion_search.QUERY_CACHE_SIZE', 2), ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda n: (queries[n % 8], items(index, queries[n % 8])), range(4000)))
+
+        assert all(found == expected[query] for query, found in results)
+        assert len(index._cache) <= 2
+
+    def test_matches_full_ranking_on_synthetic_catalog(self):
+        """The early-exit paths return the same top results as scoring every match."""
+        promotions = make_promotions(5000, seed=3)
+        index = SearchIndex(promotions)
+
+        for query in ['chicken', 'chiken', 'organic chicken metro', 'great value milk', 'brocoli maxi', 'pack']:
+            terms = [index.term_matches(word) for word in query.split()]
+            scored = []
+            for rank, position in enumerate(index.order):
+                total = 0
+                for term in terms:
+                    best = max((score for (field, word), score in term.items()
+                                if rank in set(index.postings[(field, word)])), default=0)
+                    if not best:
+                        break
+                    total += best
+                else:
+                    scored.append((-total, rank, position))
+            expected = [(position, -negative) for negative, _, position in sorted(scored)[:10]]
+            assert index.search(query, limit=10) == expected, query
+
+
+class TestSearchEndpoint:
+    """Tests for GET /api/promotions/search."""
+
+    @pytest.fixture
+    def client(self):
+        app.config['TESTING'] = True
+        reset_promotion_index()
+        with app.test_client() as client:
+            yield client
+
+    @patch('app.load_all_promotions')
+    def test_search(self, mock_load, client, promotions):
+        mock_load.return_value = promotions
+
+        response = client.get('/api/promotions/search?q=mozarella&fields=item,store')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['count'] == 2
+        assert data['results'][0] == {'item': 'Mozzarella Cheese', 'store': 'Maxi', 'score': 2}
+
+    @patch('app.load_all_promotions')
+    def test_search_requires_query(self, mock_load, client, promotions):
+        mock_load.return_value = promotions
+
+        for query in ['', '?q=', '?q=milk&limit=0', '?q=milk&limit=abc', '?q=milk&fields=secret']:
+            response = client.get(f'/api/promotions/search{query}')
+            assert response.status_code == 400, query
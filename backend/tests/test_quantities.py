@@ -0,0 +1,142 @@
+"""
+Unit tests for recipe amount parsing, aggregation and purchase sizing.
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+import app as app_module
+from app import app, reset_promotion_index
+from scripts.quantities import aggregate_amounts, parse_amount, purchase
+
+
+class TestParseAmount:
+    """Tests for parse_amount."""
+
+    @pytest.mark.parametrize('amount, quantity, base_unit', [
+        ('1.5 lb', 0.680389, 'kg'),
+        ('500g', 0.5, 'kg'),
+        ('1,5 kg', 1.5, 'kg'),
+        ('227 g', 0.227, 'kg'),
+        ('2 tbsp', 0.0295736, 'L'),
+        ('1 1/2 cups', 0.354882, 'L'),
+        ('1½ cups', 0.354882, 'L'),
+        ('½ cup', 0.118294, 'L'),
+        ('2 c. à soupe', 0.0295736, 'L'),
+        ('250 mL', 0.25, 'L'),
+        ('2-3 cloves', 3.0, 'each'),  # Top of the range
+        ('2 to 3 lb', 1.360777, 'kg'),
+        ('2 large', 2.0, 'each'),
+        ('1 (400 g) can', 1.0, 'each'),
+        ('1 dozen', 12.0, 'each'),
+        ('3 tomatoes', 3.0, 'each')
+    ])
+    def test_amounts(self, amount, quantity, base_unit):
+        parsed = parse_amount(amount)
+        assert parsed[0] == pytest.approx(quantity, rel=1e-4)
+        assert parsed[1] == base_unit
+
+    @pytest.mark.parametrize('amount', ['to taste', 'a pinch', '', None, '0 g'])
+    def test_no_quantity(self, amount):
+        assert parse_amount(amount) is None
+
+    def test_unit_words_do_not_match_inside_words(self):
+        """"2 garlic cloves" is a count, not 2 grams."""
+        assert parse_amount('2 garlic cloves')[1] == 'each'
+        assert parse_amount('2 large eggs')[1] == 'each'
+
+
+class TestAggregateAmounts:
+    """Tests for aggregate_amounts."""
+
+    def test_mixed_units_sum_in_base_unit(self):
+        totals, display = aggregate_amounts(['1.5 lb', '2 lb', '500g'])
+        assert totals['kg'] == pytest.approx(2.0876, abs=0.0001)
+        assert display == '2.09 kg'
+
+    def test_same_unit_keeps_it(self):
+        assert aggregate_amounts(['2 tbsp', '1 tbsp'])[1] == '3 tbsp'
+        assert aggregate_amounts(['1.5 lb', '2 lb'])[1] == '3.5 lb'
+        assert aggregate_amounts(['2 cloves', '3 cloves'])[1] == '5 cloves'
+
+    def test_small_totals_use_grams(self):
+        assert aggregate_amounts(['200 g', '0.1 kg'])[1] == '300 g'
+
+    def test_unparsed_amounts_are_kept(self):
+        totals, display = aggregate_amounts(['1 cup', 'to taste'])
+        assert set(totals) == {'L'}
+        assert display == '1 cup, to taste'
+
+    def test_different_base_units(self):
+        totals, display = aggregate_amounts(['1 lb', '2 breasts'])
+        assert set(totals) == {'kg', 'each'}
+        assert display == '1 lb + 2 breasts'
+
+
+class TestPurchase:
+    """Tests for purchase."""
+
+    def test_whole_packages(self):
+        promo = {'price': 3.99, 'unit': '900 g', 'quantity': 0.9, 'base_unit': 'kg'}
+        assert purchase(promo, {'kg': 1.0}) == {
+            'needed_quantity': 1.0, 'needed_unit': 'kg', 'packages': 2, 'cost': 7.98
+        }
+
+    def test_exact_fit_is_one_package(self):
+        promo = {'price': 3.99, 'unit': '500 g', 'quantity': 0.5, 'base_unit': 'kg'}
+        assert purchase(promo, {'kg': 0.5})['packages'] == 1
+
+    def test_price_per_weight_buys_what_is_needed(self):
+        promo = {'price': 7.99, 'unit': 'lb', 'quantity': 0.453592, 'base_unit': 'kg'}
+        bought = purchase(promo, {'kg': 0.680389})
+        assert bought['packages'] == 1.5
+        assert bought['cost'] == pytest.approx(11.98, abs=0.01)
+
+    def test_unconvertible_need_buys_one(self):
+        promo = {'price': 12.99, 'unit': 'each', 'quantity': 1.0, 'base_unit': 'each'}
+        assert purchase(promo, {'kg': 1.0}) == {'needed_quantity': None, 'needed_unit': None, 'packages': 1, 'cost': 12.99}
+
+    def test_unknown_size_buys_one(self):
+        promo = {'price': 4.0, 'unit': 'selected varieties', 'quantity': None, 'base_unit': None}
+        assert purchase(promo, {'each': 3.0})['cost'] == 4.0
+
+
+class TestShoppingListQuantities:
+    """Tests for quantities in POST /api/shopping-list."""
+
+    @pytest.fixture
+    def client(self):
+        app.config['TESTING'] = True
+        reset_promotion_index()
+        with app.test_client() as client:
+            yield client
+
+    def test_amounts_are_summed_and_packages_priced(self, client):
+        recipes = {
+            'recipe_1': {'id': 'recipe_1', 'name': 'Pasta Bake', 'ingredients': [
+                {'item': 'Spaghetti', 'amount': '500 g', 'on_sale': True},
+                {'item': 'Olive oil', 'amount': '2 tbsp', 'on_sale': False}
+            ]},
+            'recipe_2': {'id': 'recipe_2', 'name': 'Spaghetti Night', 'ingredients': [
+                {'item': 'Spaghetti', 'amount': '1 lb', 'on_sale': True},
+                {'item': 'Olive oil', 'amount': '1 tbsp', 'on_sale': False}
+            ]}
+        }
+        promotions = [
+            {'item': 'Spaghetti', 'price': 1.5, 'unit': '900 g', 'discount': 'Save $0.50', 'store': 'maxi'}
+        ]
+
+        with patch.dict(app_module.recipes_cache, recipes), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            response = client.post('/api/shopping-list', json={'recipe_ids': ['recipe_1', 'recipe_2']})
+
+        data = json.loads(response.data)
+        spaghetti, olive_oil = data['shopping_list']
+        assert spaghetti['amount'] == '953.59 g'
+        assert spaghetti['needed_unit'] == 'kg'
+        assert spaghetti['packages'] == 2
+        assert spaghetti['price'] == 3.0
+        assert spaghetti['price_per_unit'] == 1.5
+        assert data['total_cost'] == 3.0
+        assert data['estimated_savings'] == 1.0
+        assert olive_oil['amount'] == '3 tbsp'
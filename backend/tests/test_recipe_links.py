@@ -0,0 +1,130 @@
+"""
+Unit tests for linking recipe ingredients to promotions at generation time.
+"""
+
+import pytest
+from unittest.mock import patch
+import app as app_module
+from app import (
+    aggregate_linked_ingredients, cache_recipes, get_promotion_index,
+    link_recipe_ingredients, reset_promotion_index
+)
+from scripts.store_optimizer import add_other
+from scripts.promotion_index import PromotionIndex
+from benchmarks.synthetic_data import make_promotions, make_recipes
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Start every test without a cached index or links, and leave none behind."""
+    reset_promotion_index()
+    with patch.dict(app_module.recipes_cache, clear=True):
+        yield
+    reset_promotion_index()
+
+
+@pytest.fixture
+def recipe():
+    return {
+        'name': 'Chicken Broccoli',
+        'ingredients': [
+            {'item': 'Chicken breast', 'amount': '1 lb', 'on_sale': True},
+            {'item': 'Broccoli', 'amount': '1 head', 'on_sale': True},
+            {'item': 'Dragon fruit', 'amount': '1', 'on_sale': True},
+            {'item': 'Salt', 'amount': '1 tsp', 'on_sale': False}
+        ]
+    }
+
+
+WEEK_1 = [
+    {'item': 'Chicken Breast', 'price': 7.99, 'unit': 'lb', 'store': 'maxi'},
+    {'item': 'Broccoli', 'price': 1.99, 'unit': 'each', 'store': 'metro'}
+]
+WEEK_2 = [
+    {'item': 'Broccoli Crowns', 'price': 2.49, 'unit': 'each', 'store': 'iga'},
+    {'item': 'Chicken Breast Family Pack', 'price': 12.99, 'unit': 'each', 'store': 'iga'}
+]
+
+
+def first_match_usage(recipes, promotions):
+    """Reference matching: scan the promotions for each on-sale ingredient and take the first match."""
+    promotion_usage = {}
+    other_ingredients = {}
+    for recipe in recipes:
+        for ingredient in recipe['ingredients']:
+            item_lower = ingredient['item'].lower()
+            promo = None
+            if ingredient.get('on_sale', False):
+                promo = next((p for p in promotions if
+                              p['item'].lower() in item_lower or
+                              item_lower in p['item'].lower() or
+                              any(word in p['item'].lower() for word in item_lower.split() if len(word) > 4)), None)
+            if promo is None:
+                add_other(other_ingredients, ingredient['item'], ingredient['amount'])
+                continue
+
+            usage = promotion_usage.setdefault(promo['item'].lower(), {
+                'promo': promo, 'recipe_names': [], 'suggested_amounts': []
+            })
+            usage['recipe_names'].append(recipe['name'])
+            usage['suggested_amounts'].append(ingredient['amount'])
+    return promotion_usage, other_ingredients
+
+
+class TestLinking:
+    """Tests for link_recipe_ingredients and aggregate_linked_ingredients."""
+
+    def test_links_point_to_first_match(self, recipe):
+        index = PromotionIndex(WEEK_1)
+        assert link_recipe_ingredients(recipe, index) == [0, 1, None, None]
+
+    def test_aggregation_matches_name_matching(self):
+        """Aggregating links gives exactly what matching names on every request gave."""
+        index = PromotionIndex(make_promotions(3000, seed=4))
+        recipes = make_recipes(20)
+
+        assert aggregate_linked_ingredients(recipes, index) == first_match_usage(recipes, index.promotions)
+
+
+class TestLinkLifecycle:
+    """Tests for linking at generation and relinking after a new scrape."""
+
+    def test_generated_recipes_are_linked(self, recipe):
+        with patch.object(app_module, 'load_all_promotions', return_value=WEEK_1):
+            cached = cache_recipes([recipe])
+            index = get_promotion_index()
+
+        link = app_module.promotion_links[cached[0]['id']]
+        assert link['version'] == index.version
+        assert link['positions'] == [0, 1, None, None]
+        assert 'positions' not in cached[0]  # Links are not part of the recipe returned to clients
+
+    def test_links_are_reused_until_a_new_scrape(self, recipe):
+        with patch.object(app_module, 'load_all_promotions', return_value=WEEK_1):
+            cached = cache_recipes([recipe])[0]
+
+            with patch.object(app_module, 'link_recipe_ingredients', side_effect=link_recipe_ingredients) as mock_link:
+                usage, _ = aggregate_linked_ingredients([cached], get_promotion_index())
+                aggregate_linked_ingredients([cached], get_promotion_index())
+
+        assert mock_link.call_count == 0
+        assert [data['promo']['store'] for data in usage.values()] == ['maxi', 'metro']
+
+        # A new scrape lands: links are recomputed on first use
+        reset_promotion_index()
+        with patch.object(app_module, 'load_all_promotions', return_value=WEEK_2), \
+                patch.object(app_module, 'link_recipe_ingredients', side_effect=link_recipe_ingredients) as mock_link:
+            index = get_promotion_index()
+            usage, other = aggregate_linked_ingredients([cached], index)
+
+        assert mock_link.call_count == 1
+        assert app_module.promotion_links[cached['id']]['version'] == index.version
+        assert sorted(usage) == ['broccoli crowns', 'chicken breast family pack']
+        assert sorted(other) == ['dragon fruit', 'salt']
+
+    def test_generation_survives_linking_failure(self, recipe):
+        with patch.object(app_module, 'get_promotion_index', side_effect=OSError('disk')):
+            cached = cache_recipes([recipe])
+
+        assert cached[0]['id'] in app_module.recipes_cache
+        assert cached[0]['id'] not in app_module.promotion_links
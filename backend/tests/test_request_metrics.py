@@ -0,0 +1,154 @@
+"""
+Unit tests for API request latency metrics and the /api/metrics endpoint.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock
+from flask import Flask
+import app as app_module
+from app import app
+from scripts.request_metrics import (
+    IN_FLIGHT,
+    OPERATION_SECONDS,
+    REQUEST_SECONDS,
+    init_request_metrics,
+    server_timing_header,
+    timed_operation
+)
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config['TESTING'] = True
+    app_module.reset_promotion_index()
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def sample_recipe():
+    """A cached recipe with one on-sale ingredient."""
+    return {
+        'id': 'recipe_1',
+        'name': 'Roast Chicken',
+        'ingredients': [
+            {'item': 'Chicken breast', 'amount': '1 lb', 'on_sale': True},
+            {'item': 'Salt', 'amount': '1 tsp', 'on_sale': False}
+        ],
+        'instructions': ['Roast it']
+    }
+
+
+class TestRequestMetrics:
+    """Tests for the request timing hooks."""
+
+    def test_latency_is_recorded_per_route_and_status(self, client):
+        """Test each request is observed under its URL rule and status."""
+        before = REQUEST_SECONDS.count(method='GET', route='/api/health', status=200)
+
+        client.get('/api/health')
+        client.get('/api/health')
+
+        assert REQUEST_SECONDS.count(method='GET', route='/api/health', status=200) == before + 2
+        assert IN_FLIGHT.value(route='/api/health') == 0
+
+    def test_unknown_paths_share_one_label(self, client):
+        """Test 404s do not create one series per requested path."""
+        before = REQUEST_SECONDS.count(method='GET', route='<unmatched>', status=404)
+
+        client.get('/api/nope-1')
+        client.get('/api/nope-2')
+
+        assert REQUEST_SECONDS.count(method='GET', route='<unmatched>', status=404) == before + 2
+
+    def test_in_flight_during_request(self):
+        """Test the in-flight gauge counts the running request."""
+        test_app = init_request_metrics(Flask(__name__))
+        seen = []
+
+        @test_app.route('/slow')
+        def slow():
+            seen.append(IN_FLIGHT.value(route='/slow'))
+            return 'ok'
+
+        test_app.test_client().get('/slow')
+
+        assert seen == [1]
+        assert IN_FLIGHT.value(route='/slow') == 0
+
+    def test_errors_still_leave_the_gauge_balanced(self):
+        """Test unhandled exceptions are timed as 500s and decrement in-flight."""
+        test_app = init_request_metrics(Flask(__name__))
+
+        @test_app.route('/boom')
+        def boom():
+            raise RuntimeError("boom")
+
+        before = REQUEST_SECONDS.count(method='GET', route='/boom', status=500)
+        response = test_app.test_client().get('/boom')
+
+        assert response.status_code == 500
+        assert REQUEST_SECONDS.count(method='GET', route='/boom', status=500) == before + 1
+        assert IN_FLIGHT.value(route='/boom') == 0
+
+
+class TestTimedOperation:
+    """Tests for operation sub-spans."""
+
+    def test_operations_show_in_server_timing(self, client, sample_recipe):
+        """Test storage reads and matching are timed for the shopping list route."""
+        route = '/api/shopping-list'
+        before = OPERATION_SECONDS.count(route=route, operation='matching')
+        promotions_table = MagicMock()
+        promotions_table.search.return_value = [
+            {"item": "Chicken Breast", "price": 5.99, "unit": "lb", "discount": "", "store": "maxi"}
+        ]
+        scrapes_table = MagicMock()
+        scrapes_table.all.return_value = [{'scrape_id': 's1', 'timestamp': 's1'}]
+
+        with patch.dict(app_module.recipes_cache, {'recipe_1': sample_recipe}), \
+                patch.object(app_module, 'promotions_table', promotions_table), \
+                patch.object(app_module, 'scrapes_table', scrapes_table):
+            response = client.post(route, json={'recipe_ids': ['recipe_1']})
+
+        assert response.status_code == 200
+        assert OPERATION_SECONDS.count(route=route, operation='matching') == before + 1
+        assert OPERATION_SECONDS.count(route=route, operation='storage_read') >= 1
+
+        header = response.headers['Server-Timing']
+        assert 'storage_read;dur=' in header
+        assert 'matching;dur=' in header
+        assert 'total;dur=' in header
+
+    def test_outside_requests_use_background_route(self):
+        """Test operations timed by the scheduler are labelled as background."""
+        before = OPERATION_SECONDS.count(route='<background>', operation='storage_write')
+
+        with timed_operation('storage_write'):
+            pass
+
+        assert OPERATION_SECONDS.count(route='<background>', operation='storage_write') == before + 1
+
+    def test_server_timing_sums_repeated_operations(self):
+        """Test repeated operations are reported once with their total duration."""
+        header = server_timing_header([('storage_read', 0.001), ('storage_read', 0.002), ('total', 0.01)])
+
+        assert header == 'storage_read;dur=3.0, total;dur=10.0'
+
+
+class TestMetricsEndpoint:
+    """Tests for /api/metrics."""
+
+    def test_prometheus_text(self, client):
+        """Test the endpoint serves the registry in the text exposition format."""
+        client.get('/api/health')
+
+        response = client.get('/api/metrics')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+        assert '# TYPE http_request_duration_seconds histogram' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}' in body
+
@@ -0,0 +1,168 @@
+"""
+Unit tests for shared OpenAI response parsing and promotion validation.
+"""
+
+import pytest
+import json
+from scripts.response_parsing import (
+    ResponseParseError,
+    strip_code_fences,
+    repair_truncated_json,
+    parse_json_response,
+    coerce_price,
+    normalize_promotions,
+    normalize_recipes
+)
+
+
+@pytest.fixture
+def promotions_json():
+    """A complete promotions array as returned by the model."""
+    return json.dumps([
+        {"item": "Broccoli", "price": 0.55, "unit": "each", "discount": "Save 73%"},
+        {"item": "Chicken Wings", "price": 6.95, "unit": "kg", "discount": "Save 50%"},
+        {"item": "Pasta", "price": 0.99, "unit": "pkg", "discount": "Save 60%"}
+    ])
+
+
+class TestStripCodeFences:
+    """Tests for markdown code fence removal."""
+
+    def test_json_fence(self):
+        """Test ```json fences are removed."""
+        assert strip_code_fences('```json\n[1, 2]\n```') == '[1, 2]'
+
+    def test_plain_fence(self):
+        """Test bare ``` fences are removed."""
+        assert strip_code_fences('```\n{"a": 1}\n```') == '{"a": 1}'
+
+    def test_unclosed_fence(self):
+        """Test a truncated response without a closing fence keeps its body."""
+        assert strip_code_fences('```json\n[{"a": 1},') == '[{"a": 1},'
+
+    def test_no_fence(self):
+        """Test plain JSON is returned unchanged."""
+        assert strip_code_fences('  []  ') == '[]'
+
+
+class TestParseJsonResponse:
+    """Tests for parsing and truncation recovery."""
+
+    def test_complete_response(self, promotions_json):
+        """Test a complete response parses without the truncated flag."""
+        data, truncated = parse_json_response(promotions_json)
+
+        assert len(data) == 3
+        assert truncated is False
+
+    def test_truncated_array_keeps_complete_objects(self, promotions_json):
+        """Test every complete object before the cut is recovered."""
+        cut = promotions_json[:promotions_json.index('"Pasta"') + 10]
+
+        data, truncated = parse_json_response(f"```json\n{cut}")
+
+        assert truncated is True
+        assert [p["item"] for p in data] == ["Broccoli", "Chicken Wings"]
+
+    def test_truncated_nested_pages(self):
+        """Test multi-page responses are closed at the last complete promotion."""
+        text = ('{"pages": [{"page": 1, "promotions": [{"item": "Eggs", "price": 2.99}]}, '
+                '{"page": 2, "promotions": [{"item": "Milk", "price": 4.49}, {"item": "Bre')
+
+        data, truncated = parse_json_response(text)
+
+        assert truncated is True
+        assert data["pages"][1]["promotions"] == [{"item": "Milk", "price": 4.49}]
+
+    def test_strings_with_brackets_and_quotes(self):
+        """Test brackets and escaped quotes inside strings are not structural."""
+        text = '[{"item": "Chips [family \\"size\\"]", "price": 3}, {"item": "Dip'
+
+        data, _ = parse_json_response(text)
+
+        assert data == [{"item": 'Chips [family "size"]', "price": 3}]
+
+    def test_nothing_recoverable_raises(self):
+        """Test text without any complete JSON value raises ResponseParseError."""
+        with pytest.raises(ResponseParseError):
+            parse_json_response('Sorry, I cannot read this flyer.')
+
+        with pytest.raises(ResponseParseError):
+            parse_json_response('[{"item": "Eg')
+
+    def test_repair_returns_none_without_json(self):
+        """Test repair gives up when there is no JSON at all."""
+        assert repair_truncated_json("no json here") is None
+
+
+class TestPromotionValidation:
+    """Tests for price coercion and field validation."""
+
+    @pytest.mark.parametrize("value, expected", [
+        (4.99, 4.99),
+        (3, 3.0),
+        ("$4.99", 4.99),
+        ("4,99 $", 4.99),
+        ("2.50/lb", 2.5),
+        (1.005, 1.0),
+        ("free", None),
+        (-1, None),
+        (None, None),
+        (True, None)
+    ])
+    def test_coerce_price(self, value, expected):
+        """Test prices are read from numbers and price strings."""
+        assert coerce_price(value) == expected
+
+    def test_invalid_records_are_dropped(self):
+        """Test records without an item name or price are removed."""
+        promotions = normalize_promotions([
+            {"item": "Eggs", "price": "$2.99"},
+            {"item": "", "price": 1},
+            {"item": "Mystery", "price": "see store"},
+            "not a record",
+            {"price": 5}
+        ])
+
+        assert promotions == [{"item": "Eggs", "price": 2.99, "unit": "each", "discount": "",
+                               "original_price": None, "savings_amount": None, "savings_pct": None}]
+
+    def test_fields_are_trimmed(self):
+        """Test whitespace is trimmed and missing discount defaults to empty."""
+        promotions = normalize_promotions([{"item": " Milk ", "price": 4.49, "unit": " 2 L "}])
+
+        assert promotions == [{"item": "Milk", "price": 4.49, "unit": "2 L", "discount": "",
+                               "original_price": None, "savings_amount": None, "savings_pct": None}]
+
+    def test_non_list_input(self):
+        """Test anything other than a list yields no promotions."""
+        assert normalize_promotions({"item": "Eggs"}) == []
+
+
+class TestRecipeValidation:
+    """Tests for salvaged recipe filtering."""
+
+    def test_incomplete_recipes_are_dropped(self):
+        """Test recipes cut off before their instructions are removed."""
+        recipes = normalize_recipes([
+            {"name": "Stir Fry", "description": "Quick", "ingredients": [{"item": "Broccoli"}],
+             "instructions": ["Cook"], "cooking_time": "15 mins", "servings": 2},
+            {"name": "Soup", "ingredients": [{"item": "Leeks", "amount": "2"}]}
+        ])
+
+        assert [r["name"] for r in recipes] == ["Stir Fry"]
+        assert recipes[0]["ingredients"][0] == {"item": "Broccoli", "amount": "", "on_sale": False}
+
+    def test_recipe_cut_inside_instructions_is_dropped(self):
+        """Test a recipe truncated mid-instructions is not salvaged as if complete."""
+        complete = {"name": "Stir Fry", "description": "Quick", "ingredients": [{"item": "Broccoli"}],
+                    "instructions": ["Cook"], "cooking_time": "15 mins", "servings": 2}
+        text = json.dumps([complete])[:-1] + (
+            ', {"name": "Soup", "description": "Warm", "ingredients": [{"item": "Leeks"}], '
+            '"instructions": ["Step 1", "Step 2 is cut o'
+        )
+
+        data, truncated = parse_json_response(text)
+        assert truncated is True
+        assert data[1]["instructions"] == ["Step 1"]
+        assert [r["name"] for r in normalize_recipes(data)] == ["Stir Fry"]
@@ -0,0 +1,83 @@
+"""
+Unit tests for retrying transient API errors with jittered backoff.
+"""
+
+import pytest
+import openai
+from types import SimpleNamespace
+from scripts.retry import backoff_delay, call_with_retry
+
+
+def api_error(error_class, status, headers=None):
+    """Build an OpenAI status error with a fake HTTP response."""
+    response = SimpleNamespace(status_code=status, headers=headers or {}, request=None)
+    return error_class("fake error", response=response, body=None)
+
+
+class TestBackoffDelay:
+    """Tests for the full-jitter delay."""
+
+    def test_delay_is_bounded(self):
+        """Test delays stay between 0 and the exponential cap."""
+        for attempt in range(1, 8):
+            delay = backoff_delay(attempt, base_delay=1.0, max_delay=10.0)
+            assert 0 <= delay <= min(10.0, 2 ** (attempt - 1))
+
+
+class TestCallWithRetry:
+    """Tests for the retry loop."""
+
+    def test_retries_until_success(self):
+        """Test transient errors are retried and the result returned."""
+        outcomes = [api_error(openai.RateLimitError, 429), api_error(openai.InternalServerError, 500), "ok"]
+        sleeps = []
+
+        def func():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        assert call_with_retry(func, max_attempts=3, sleep=sleeps.append) == "ok"
+        assert len(sleeps) == 2
+
+    def test_gives_up_after_max_attempts(self):
+        """Test the last error is raised once attempts run out."""
+        calls = []
+
+        def func():
+            calls.append(1)
+            raise api_error(openai.InternalServerError, 503)
+
+        with pytest.raises(openai.InternalServerError):
+            call_with_retry(func, max_attempts=3, sleep=lambda delay: None)
+
+        assert len(calls) == 3
+
+    def test_non_transient_errors_are_not_retried(self):
+        """Test errors outside retry_on are raised immediately."""
+        calls = []
+
+        def func():
+            calls.append(1)
+            raise api_error(openai.BadRequestError, 400)
+
+        with pytest.raises(openai.BadRequestError):
+            call_with_retry(func, max_attempts=3, sleep=lambda delay: None)
+
+        assert len(calls) == 1
+
+    def test_retry_after_header_is_honoured(self):
+        """Test the server's Retry-After hint sets the minimum delay."""
+        outcomes = [api_error(openai.RateLimitError, 429, {"retry-after": "7"}), "ok"]
+        sleeps = []
+
+        def func():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        call_with_retry(func, base_delay=0.01, max_delay=30, sleep=sleeps.append)
+
+        assert sleeps == [7.0]
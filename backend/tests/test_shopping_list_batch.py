@@ -0,0 +1,156 @@
+"""
+Unit tests for POST /api/shopping-lists/batch.
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+import app as app_module
+from app import app, reset_promotion_index, link_recipe_ingredients
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config['TESTING'] = True
+    reset_promotion_index()
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def promotions():
+    return [
+        {'item': 'Chicken Breast', 'price': 9.99, 'unit': 'lb', 'discount': 'Save $2', 'store': 'metro'},
+        {'item': 'Chicken Breast', 'price': 7.99, 'unit': 'lb', 'discount': '', 'store': 'maxi'},
+        {'item': 'Broccoli', 'price': 1.99, 'unit': 'each', 'discount': '', 'store': 'metro'},
+        {'item': 'Spaghetti', 'price': 1.49, 'unit': '900 g', 'discount': '', 'store': 'maxi'}
+    ]
+
+
+@pytest.fixture
+def recipes():
+    return {
+        'recipe_1': {'id': 'recipe_1', 'name': 'Chicken Broccoli', 'ingredients': [
+            {'item': 'Chicken breast', 'amount': '1 lb', 'on_sale': True},
+            {'item': 'Broccoli', 'amount': '1 head', 'on_sale': True}
+        ]},
+        'recipe_2': {'id': 'recipe_2', 'name': 'Chicken Pasta', 'ingredients': [
+            {'item': 'Chicken breast', 'amount': '2 lb', 'on_sale': True},
+            {'item': 'Spaghetti', 'amount': '500 g', 'on_sale': True},
+            {'item': 'Salt', 'amount': '1 tsp', 'on_sale': False}
+        ]}
+    }
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+
+class TestShoppingListBatch:
+    """Tests for the batch shopping list endpoint."""
+
+    def test_streams_one_line_per_list_in_order(self, client, promotions, recipes):
+        """Each line matches what /api/shopping-list returns for that recipe set."""
+        lists = [
+            {'id': 'household_1', 'recipe_ids': ['recipe_1']},
+            {'id': 'household_2', 'recipe_ids': ['recipe_1', 'recipe_2']},
+            {'recipe_ids': ['recipe_2'], 'optimize': True, 'max_stores': 1}
+        ]
+
+        with patch.dict(app_module.recipes_cache, recipes), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            response = client.post('/api/shopping-lists/batch', json={'lists': lists})
+            lines = read_lines(response)
+            singles = [
+                json.loads(client.post('/api/shopping-list', json={
+                    key: value for key, value in entry.items() if key != 'id'
+                }).data)
+                for entry in lists
+            ]
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert [line['id'] for line in lines] == ['household_1', 'household_2', 2]
+        for line, single in zip(lines, singles):
+            assert {key: value for key, value in line.items() if key != 'id'} == single
+        assert lines[2]['stores'] == ['maxi']
+
+    def test_promotions_load_and_linking_happen_once(self, client, promotions, recipes):
+        """The snapshot is loaded once and each distinct recipe is linked to it once."""
+        lists = [{'recipe_ids': ['recipe_1', 'recipe_2']} for _ in range(10)]
+
+        with patch.dict(app_module.recipes_cache, recipes), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions) as mock_load, \
+                patch.object(app_module, 'link_recipe_ingredients', side_effect=link_recipe_ingredients) as mock_link:
+            response = client.post('/api/shopping-lists/batch', json={'lists': lists})
+            lines = read_lines(response)
+
+        assert len(lines) == 10
+        assert mock_load.call_count == 1
+        assert mock_link.call_count == 2
+
+    def test_failed_lists_do_not_stop_the_batch(self, client, promotions, recipes):
+        lists = [
+            {'id': 'a', 'recipe_ids': ['recipe_1', 'recipe_99']},
+            {'id': 'b', 'recipe_ids': []},
+            {'id': 'c', 'recipe_ids': ['recipe_1'], 'optimize': True, 'max_stores': 0},
+            {'id': 'd', 'recipe_ids': ['recipe_1']}
+        ]
+
+        with patch.dict(app_module.recipes_cache, recipes), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            lines = read_lines(client.post('/api/shopping-lists/batch', json={'lists': lists}))
+
+        assert [line.get('status') for line in lines] == [404, 400, 400, None]
+        assert 'recipe_99' in lines[0]['error']
+        assert lines[3]['total_cost'] == 11.98
+
+    def test_non_string_recipe_ids_are_a_line_error(self, client, promotions, recipes):
+        """Unhashable or non-string IDs get an error line instead of cutting the stream short."""
+        lists = [
+            {'id': 'a', 'recipe_ids': [['x']]},
+            {'id': 'b', 'recipe_ids': [{'id': 'recipe_1'}, 'recipe_1']},
+            {'id': 'c', 'recipe_ids': [1]},
+            {'id': 'd', 'recipe_ids': ['recipe_1']}
+        ]
+
+        with patch.dict(app_module.recipes_cache, recipes), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            lines = read_lines(client.post('/api/shopping-lists/batch', json={'lists': lists}))
+
+        assert [line['id'] for line in lines] == ['a', 'b', 'c', 'd']
+        assert [line.get('status') for line in lines] == [400, 400, 400, None]
+        assert 'list of recipe ID strings' in lines[0]['error']
+
+    def test_optimize_must_be_a_boolean(self, client, promotions, recipes):
+        """The string "false" is an error line, not a request to optimize."""
+        lists = [
+            {'id': 'a', 'recipe_ids': ['recipe_1'], 'optimize': 'false'},
+            {'id': 'b', 'recipe_ids': ['recipe_1'], 'optimize': False}
+        ]
+
+        with patch.dict(app_module.recipes_cache, recipes), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            lines = read_lines(client.post('/api/shopping-lists/batch', json={'lists': lists}))
+            response = client.post('/api/shopping-lists/batch', json={'lists': lists[1:], 'optimize': 'false'})
+
+        assert lines[0] == {'id': 'a', 'error': 'optimize must be true or false', 'status': 400}
+        assert 'stores' not in lines[1]
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('recipe_ids', [[['x']], 'recipe_1', [1]])
+    def test_single_list_rejects_non_string_ids(self, client, recipes, recipe_ids):
+        with patch.dict(app_module.recipes_cache, recipes):
+            response = client.post('/api/shopping-list', json={'recipe_ids': recipe_ids})
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('body', [{}, {'lists': []}, {'lists': 'recipe_1'}, {'lists': ['recipe_1']}])
+    def test_invalid_batch(self, client, body):
+        response = client.post('/api/shopping-lists/batch', json=body)
+        assert response.status_code == 400
+
+    def test_batch_size_limit(self, client):
+        with patch.object(app_module, 'MAX_BATCH_LISTS', 2):
+            response = client.post('/api/shopping-lists/batch', json={'lists': [{'recipe_ids': ['r']}] * 3})
+        assert response.status_code == 400
@@ -0,0 +1,179 @@
+"""
+Unit tests for single-flight call coalescing and coalesced recipe generation.
+Recipe generation uses the fake OpenAI server, so no real API calls are made.
+"""
+
+import json
+import time
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from openai import OpenAI
+import app as app_module
+from scripts.single_flight import SingleFlight, SINGLE_FLIGHT_CALLS
+from tests.fake_openai import FakeOpenAIServer
+
+
+def run_in_threads(func, count):
+    """Call func() from count threads at once and return the results in order."""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = func()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test callers with the same key wait for the leader's result."""
+        group = SingleFlight('test_shared')
+        calls = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        results = run_in_threads(lambda: group.do('key', work), 8)
+
+        assert len(calls) == 1
+        assert all(result == {'value': 42} for result in results)
+        assert SINGLE_FLIGHT_CALLS.value(group='test_shared', role='leader') == 1
+        assert SINGLE_FLIGHT_CALLS.value(group='test_shared', role='shared') == 7
+        assert group.in_flight() == 0
+
+    def test_different_keys_run_separately(self):
+        """Test only identical keys are coalesced."""
+        group = SingleFlight('test_keys')
+        calls = []
+
+        def work(key):
+            calls.append(key)
+            time.sleep(0.1)
+            return key
+
+        keys = iter(range(4))
+
+        def call():
+            key = next(keys)
+            return group.do(key, lambda: work(key))
+
+        results = run_in_threads(call, 4)
+
+        assert sorted(results) == [0, 1, 2, 3]
+        assert sorted(calls) == [0, 1, 2, 3]
+
+    def test_errors_are_shared_and_not_cached(self):
+        """Test waiters get the leader's exception and the next call starts over."""
+        group = SingleFlight('test_errors')
+
+        def fail():
+            time.sleep(0.1)
+            raise ValueError("upstream failed")
+
+        results = run_in_threads(lambda: group.do('key', fail), 3)
+        assert all(isinstance(result, ValueError) for result in results)
+
+        assert group.do('key', lambda: 'recovered') == 'recovered'
+
+    def test_async_callers_join_a_sync_call(self):
+        """Test coroutines waiting on a threaded call do not block the event loop."""
+        group = SingleFlight('test_mixed')
+        started = threading.Event()
+
+        def work():
+            started.set()
+            time.sleep(0.3)
+            return 'shared'
+
+        thread = threading.Thread(target=lambda: group.do('key', work))
+        thread.start()
+        started.wait()
+
+        async def never_called():
+            raise AssertionError("should join the running call")
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            ticking = asyncio.ensure_future(ticker())
+            results = await asyncio.gather(*(group.do_async('key', never_called) for _ in range(5)))
+            ticking.cancel()
+            return results, ticks
+
+        results, ticks = asyncio.run(main())
+        thread.join()
+
+        assert results == ['shared'] * 5
+        assert ticks > 5
+
+
+RECIPES_CONTENT = json.dumps([{
+    "name": "Broccoli Pasta",
+    "description": "Pasta with broccoli",
+    "ingredients": [{"item": "Broccoli", "amount": "2 heads", "on_sale": True}],
+    "instructions": ["Boil", "Toss"],
+    "cooking_time": "20 mins",
+    "servings": 4
+}])
+
+PROMOTIONS = [{"item": "Broccoli", "price": 0.55, "unit": "each", "discount": "", "store": "maxi"}]
+
+
+class TestRecipeCoalescing:
+    """Tests for coalescing identical recipe generations."""
+
+    @pytest.fixture
+    def fake_openai(self):
+        with FakeOpenAIServer(default_content=RECIPES_CONTENT, delay=0.3) as server:
+            client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+            with patch.object(app_module, 'openai_client', client):
+                yield server
+
+    def test_request_key_normalizes_preferences(self):
+        """Test case, whitespace, empty values and key order do not change the key."""
+        key = app_module.recipe_request_key(PROMOTIONS, 3, {'dietary': 'Vegetarian ', 'servings': 4})
+
+        assert key == app_module.recipe_request_key(PROMOTIONS, '3', {'servings': 4, 'dietary': 'vegetarian', 'cuisine': ''})
+        assert key != app_module.recipe_request_key(PROMOTIONS, 3, {'dietary': 'vegan', 'servings': 4})
+        assert key != app_module.recipe_request_key(PROMOTIONS + PROMOTIONS, 3, {'dietary': 'vegetarian', 'servings': 4})
+
+    def test_identical_requests_share_one_call(self, fake_openai):
+        """Test concurrent identical requests make one OpenAI call but get their own IDs."""
+        results = run_in_threads(
+            lambda: app_module.generate_recipes_with_openai(PROMOTIONS, 1, {'dietary': 'vegetarian'}), 6
+        )
+
+        assert len(fake_openai.requests) == 1
+        ids = [recipes[0]['id'] for recipes in results]
+        assert len(set(ids)) == 6
+        assert all(app_module.recipes_cache[recipe_id]['name'] == "Broccoli Pasta" for recipe_id in ids)
+
+    def test_different_requests_are_not_coalesced(self, fake_openai):
+        """Test requests with different preferences each call OpenAI."""
+        servings = iter(range(1, 5))
+        run_in_threads(
+            lambda: app_module.generate_recipes_with_openai(PROMOTIONS, 1, {'servings': next(servings)}), 4
+        )
+
+        assert len(fake_openai.requests) == 4
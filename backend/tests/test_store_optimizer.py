@@ -0,0 +1,274 @@
+"""
+Unit tests for the cross-store shopping list optimizer.
+"""
+
+import json
+import pytest
+from itertools import combinations
+from unittest.mock import patch
+import app as app_module
+from app import app, reset_promotion_index
+import scripts.store_optimizer as store_optimizer
+from scripts.store_optimizer import StoreOptimizer, ShoppingListOptimizerError
+from scripts.quantities import aggregate_amounts, purchase
+from benchmarks.synthetic_data import make_promotions, make_recipes
+
+
+@pytest.fixture
+def promotions():
+    return [
+        {'item': 'Chicken Breast', 'price': 9.99, 'unit': 'lb', 'store': 'metro'},
+        {'item': 'Chicken Breast', 'price': 7.99, 'unit': 'lb', 'store': 'maxi'},
+        {'item': 'Boneless Chicken Thighs', 'price': 6.49, 'unit': 'lb', 'store': 'iga'},
+        {'item': 'Broccoli', 'price': 1.99, 'unit': 'each', 'store': 'metro'},
+        {'item': 'Broccoli', 'price': 2.49, 'unit': 'each', 'store': 'maxi'},
+        {'item': 'Spaghetti', 'price': 1.29, 'unit': '900 g', 'store': 'iga'},
+        {'item': 'Spaghetti', 'price': 1.49, 'unit': '900 g', 'store': 'maxi'},
+        {'item': 'Rice', 'price': None, 'unit': 'kg', 'store': 'metro'}
+    ]
+
+
+@pytest.fixture
+def recipes():
+    return [{
+        'id': 'recipe_1',
+        'name': 'Chicken Dinner',
+        'ingredients': [
+            {'item': 'Chicken breast', 'amount': '1 lb', 'on_sale': True},
+            {'item': 'Broccoli', 'amount': '1 head', 'on_sale': True},
+            {'item': 'Spaghetti', 'amount': '500 g', 'on_sale': True},
+            {'item': 'Salt', 'amount': '1 tsp', 'on_sale': False}
+        ]
+    }]
+
+
+def matches(item_lower, promo_item_lower):
+    """The first-match rule of the default shopping list, as a plain scan."""
+    return (promo_item_lower in item_lower or
+            item_lower in promo_item_lower or
+            any(word in promo_item_lower for word in item_lower.split() if len(word) > 4))
+
+
+def chosen(usage):
+    return sorted((data['promo']['item'], data['promo']['store']) for data in usage.values())
+
+
+class TestCandidates:
+    """Tests for per-ingredient candidate lists."""
+
+    def test_same_rule_as_first_match(self):
+        """Candidates are every promotion the default matcher could bind the ingredient to."""
+        promotions = make_promotions(3000, seed=5)
+        optimizer = StoreOptimizer(promotions)
+
+        for item in ['chicken', 'chicken breast', 'olive oil', 'organic sweet potatoes', 'eggs', 'rice', 'dragon fruit']:
+            expected = [i for i, promo in enumerate(promotions) if matches(item, promo['item'].lower())]
+            assert optimizer.candidates(item) == expected, item
+
+    def test_promotion_name_inside_ingredient(self, promotions):
+        optimizer = StoreOptimizer(promotions)
+        assert optimizer.candidates('long grain rice') == [7]
+
+    def test_best_by_store_skips_unpriced(self, promotions):
+        optimizer = StoreOptimizer(promotions)
+        best = optimizer.best_by_store('chicken')
+        assert {store: position for store, (_, _, position) in best.items()} == {'metro': 0, 'maxi': 1, 'iga': 2}
+        assert optimizer.best_by_store('rice') == {}
+
+
+class TestRanking:
+    """Tests for ranking candidates by what buying the needed amount costs."""
+
+    @pytest.fixture
+    def packs(self):
+        return [
+            {'item': 'Chicken Breast', 'price': 6.00, 'unit': '500 g', 'store': 'metro'},
+            {'item': 'Chicken Breast', 'price': 30.00, 'unit': '4 kg', 'store': 'maxi'}
+        ]
+
+    def test_bulk_pack_beats_cheaper_small_packs(self, packs):
+        """4 kg is 8 packs of 500 g ($48) or one 4 kg pack ($30)."""
+        recipes = [{'name': 'Meal prep', 'ingredients': [{'item': 'Chicken breast', 'amount': '4 kg', 'on_sale': True}]}]
+        usage, _, stores = StoreOptimizer(packs).optimize(recipes)
+
+        assert stores == ['maxi']
+        chicken = next(iter(usage.values()))
+        assert chicken['alternatives'] == [{'item': 'Chicken Breast', 'store': 'metro', 'price': 6.00, 'cost': 48.0}]
+
+    def test_amounts_of_every_recipe_are_added_up(self, packs):
+        recipes = [
+            {'name': 'Stir fry', 'ingredients': [{'item': 'Chicken breast', 'amount': '400 g', 'on_sale': True}]},
+            {'name': 'Curry', 'ingredients': [{'item': 'Chicken breast', 'amount': '3.5 kg', 'on_sale': True}]}
+        ]
+        usage, _, stores = StoreOptimizer(packs).optimize(recipes)
+
+        assert stores == ['maxi']
+        assert next(iter(usage.values()))['recipe_names'] == ['Stir fry', 'Curry']
+
+    def test_small_need_buys_small_pack(self, packs):
+        recipes = [{'name': 'Stir fry', 'ingredients': [{'item': 'Chicken breast', 'amount': '400 g', 'on_sale': True}]}]
+        assert StoreOptimizer(packs).optimize(recipes)[2] == ['metro']
+
+    def test_unconvertible_amount_ranks_by_unit_price(self, packs):
+        """'2 breasts' has no weight, so the lower price per kg wins over the lower package price."""
+        recipes = [{'name': 'Dinner', 'ingredients': [{'item': 'Chicken breast', 'amount': '2 breasts', 'on_sale': True}]}]
+        assert StoreOptimizer(packs).optimize(recipes)[2] == ['maxi']
+
+    def test_no_unit_price_ranks_by_price(self):
+        promotions = [
+            {'item': 'Chicken Breast', 'price': 12.00, 'unit': 'tray', 'store': 'metro'},
+            {'item': 'Chicken Breast', 'price': 10.00, 'unit': 'tray', 'store': 'maxi'}
+        ]
+        recipes = [{'name': 'Dinner', 'ingredients': [{'item': 'Chicken breast', 'amount': '2 breasts', 'on_sale': True}]}]
+        assert StoreOptimizer(promotions).optimize(recipes)[2] == ['maxi']
+
+
+class TestChooseStores:
+    """Tests for store selection."""
+
+    def brute_force(self, optimizer, tables, max_stores):
+        stores = sorted({store for table in tables for store in table})
+
+        def score(selection):
+            covered, total = 0, 0.0
+            for table in tables:
+                entries = [table[store] for store in selection if store in table]
+                if entries:
+                    covered += 1
+                    total += min(entries)[1]
+            return -covered, round(total, 6)
+
+        return min(score(selection) for selection in combinations(stores, max_stores)), score
+
+    def test_exact_selection_is_optimal(self):
+        optimizer = StoreOptimizer(make_promotions(2000, seed=1))
+        tables = [optimizer.best_by_store(item) for item in ['chicken breast', 'milk', 'eggs', 'butter', 'rice', 'coffee']]
+
+        for max_stores in [1, 2, 3]:
+            best, score = self.brute_force(optimizer, tables, max_stores)
+            assert score(optimizer.choose_stores(tables, max_stores)) == best
+
+    def test_greedy_covers_like_exact_when_selections_are_many(self):
+        optimizer = StoreOptimizer(make_promotions(2000, seed=1))
+        tables = [optimizer.best_by_store(item) for item in ['chicken breast', 'milk', 'eggs', 'butter', 'rice', 'coffee']]
+        best, score = self.brute_force(optimizer, tables, 2)
+
+        with patch.object(store_optimizer, 'MAX_EXACT_SELECTIONS', 0):
+            selection = optimizer.choose_stores(tables, 2)
+
+        assert len(selection) == 2
+        assert score(selection)[0] == best[0]
+
+    def test_no_limit_uses_every_store(self, promotions):
+        optimizer = StoreOptimizer(promotions)
+        tables = [optimizer.best_by_store('chicken'), optimizer.best_by_store('broccoli')]
+        assert optimizer.choose_stores(tables) == ['iga', 'maxi', 'metro']
+
+
+class TestOptimize:
+    """Tests for StoreOptimizer.optimize."""
+
+    def test_cheapest_anywhere_without_limit(self, promotions, recipes):
+        usage, other, stores = StoreOptimizer(promotions).optimize(recipes)
+
+        assert chosen(usage) == [('Boneless Chicken Thighs', 'iga'), ('Broccoli', 'metro'), ('Spaghetti', 'iga')]
+        assert stores == ['iga', 'metro']
+        assert list(other) == ['salt']
+
+    def test_single_store(self, promotions, recipes):
+        usage, other, stores = StoreOptimizer(promotions).optimize(recipes, max_stores=1)
+
+        # Only maxi has all three; coverage comes before price
+        assert stores == ['maxi']
+        assert chosen(usage) == [('Broccoli', 'maxi'), ('Chicken Breast', 'maxi'), ('Spaghetti', 'maxi')]
+
+    def test_alternatives_list_other_stores(self, promotions, recipes):
+        usage, _, _ = StoreOptimizer(promotions).optimize(recipes, max_stores=1)
+
+        chicken = next(data for data in usage.values() if data['promo']['item'] == 'Chicken Breast')
+        assert chicken['alternatives'] == [
+            {'item': 'Boneless Chicken Thighs', 'store': 'iga', 'price': 6.49, 'cost': 6.49},
+            {'item': 'Chicken Breast', 'store': 'metro', 'price': 9.99, 'cost': 9.99}
+        ]
+
+    def test_unmatched_ingredients_are_other(self, promotions):
+        recipes = [{'name': 'Salad', 'ingredients': [{'item': 'Kale', 'amount': '1 bunch', 'on_sale': True}]}]
+        usage, other, stores = StoreOptimizer(promotions).optimize(recipes, max_stores=2)
+
+        assert usage == {}
+        assert other == {'kale': {'item': 'Kale', 'amounts': ['1 bunch'], 'on_sale': False}}
+        assert stores == []
+
+    @pytest.mark.parametrize('max_stores', [0, -1, 1.5, '2', True])
+    def test_invalid_max_stores(self, promotions, recipes, max_stores):
+        with pytest.raises(ShoppingListOptimizerError):
+            StoreOptimizer(promotions).optimize(recipes, max_stores=max_stores)
+
+    def test_limit_never_costs_less_than_no_limit(self):
+        optimizer = StoreOptimizer(make_promotions(5000, seed=2))
+        recipes = make_recipes(10)
+
+        def cost(usage):
+            return sum(purchase(data['promo'], aggregate_amounts(data['suggested_amounts'])[0])['cost']
+                       for data in usage.values())
+
+        unlimited = cost(optimizer.optimize(recipes)[0])
+        for max_stores in [1, 2, 3]:
+            usage, _, stores = optimizer.optimize(recipes, max_stores)
+            assert len(stores) <= max_stores
+            assert cost(usage) >= unlimited - 1e-9
+
+
+class TestOptimizedShoppingList:
+    """Tests for POST /api/shopping-list with optimize."""
+
+    @pytest.fixture
+    def client(self):
+        app.config['TESTING'] = True
+        reset_promotion_index()
+        with app.test_client() as client:
+            yield client
+
+    def test_optimized_list(self, client, promotions, recipes):
+        with patch.dict(app_module.recipes_cache, {'recipe_1': recipes[0]}), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            response = client.post('/api/shopping-list', json={
+                'recipe_ids': ['recipe_1'], 'optimize': True, 'max_stores': 1
+            })
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['stores'] == ['maxi']
+        assert data['total_cost'] == 11.97
+        promo_items = [item for item in data['shopping_list'] if item['is_promotion']]
+        assert {item['store'] for item in promo_items} == {'maxi'}
+        assert all('alternatives' in item for item in promo_items)
+
+    def test_default_list_is_unchanged(self, client, promotions, recipes):
+        with patch.dict(app_module.recipes_cache, {'recipe_1': recipes[0]}), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            response = client.post('/api/shopping-list', json={'recipe_ids': ['recipe_1']})
+
+        data = json.loads(response.data)
+        assert 'stores' not in data
+        assert data['shopping_list'][0]['store'] == 'metro'  # First match, not the cheapest
+        assert 'alternatives' not in data['shopping_list'][0]
+
+    def test_invalid_max_stores(self, client, promotions, recipes):
+        with patch.dict(app_module.recipes_cache, {'recipe_1': recipes[0]}), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            response = client.post('/api/shopping-list', json={
+                'recipe_ids': ['recipe_1'], 'optimize': True, 'max_stores': 0
+            })
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('optimize', ['false', 'true', 1, 0, None])
+    def test_optimize_must_be_a_boolean(self, client, promotions, recipes, optimize):
+        """Test the string "false" is rejected rather than read as true."""
+        with patch.dict(app_module.recipes_cache, {'recipe_1': recipes[0]}), \
+                patch.object(app_module, 'load_all_promotions', return_value=promotions):
+            response = client.post('/api/shopping-list', json={'recipe_ids': ['recipe_1'], 'optimize': optimize})
+
+        assert response.status_code == 400
+        assert json.loads(response.data)['error'] == 'optimize must be true or false'
@@ -0,0 +1,110 @@
+"""
+Unit tests for unit parsing and comparable unit prices.
+"""
+
+import pytest
+from scripts.unit_prices import add_unit_prices, item_size, normalize_unit, unit_price_columns
+
+
+class TestNormalizeUnit:
+    """Tests for normalize_unit."""
+
+    @pytest.mark.parametrize('unit, quantity, base_unit', [
+        ('4 kg', 4.0, 'kg'),
+        ('2 x 2 kg', 4.0, 'kg'),
+        ('170g', 0.17, 'kg'),
+        ('lb', 0.45359237, 'kg'),
+        ('/lb', 0.45359237, 'kg'),
+        ('100 g', 0.1, 'kg'),
+        ('4x100g', 0.4, 'kg'),
+        ('300-350 g', 0.3, 'kg'),
+        ('1,5 kg', 1.5, 'kg'),
+        ('1.54 L', 1.54, 'L'),
+        ('500 mL', 0.5, 'L'),
+        ('24/355 ml', 8.52, 'L'),
+        ('12x355 ml', 4.26, 'L'),
+        ('each', 1.0, 'each'),
+        ('ch.', 1.0, 'each'),
+        ('pkg', 1.0, 'each'),
+        ('2/pkg', 2.0, 'each'),
+        ('2-pack', 2.0, 'each'),
+        ('20 unités', 20.0, 'each'),
+        ('48 waffles', 48.0, 'each'),
+        ('dozen', 12.0, 'each'),
+        ('1 litre', 1.0, 'L'),
+        ('2 litres', 2.0, 'L'),
+        ('1/2 lb', 0.226796, 'kg'),
+        ('3/4 kg', 0.75, 'kg'),
+        ('300/400 g', 0.3, 'kg'),  # Shrimp bag, 300 to 400 g
+        ('3/5 lb', 1.360777, 'kg'),
+        ('3/350 g', 1.05, 'kg')
+    ])
+    def test_known_units(self, unit, quantity, base_unit):
+        result = normalize_unit(unit)
+        assert result[0] == pytest.approx(quantity)
+        assert result[1] == base_unit
+
+    @pytest.mark.parametrize('unit', [
+        '', None, 'selected varieties', 'taxable', '+TX', '3 for',
+        '12-15/341-355 ml', '2/4 x 125 g', 'Format Club, 1/2/3 kg', '5/30 g', '500 kg'
+    ])
+    def test_unknown_units(self, unit):
+        assert normalize_unit(unit) is None
+
+
+class TestUnitPriceColumns:
+    """Tests for the stored quantity, base_unit and unit_price columns."""
+
+    def test_package_price(self):
+        columns = unit_price_columns({'item': 'Frozen chicken breast', 'price': 31.99, 'unit': '2 x 2 kg'})
+        assert columns == {'quantity': 4.0, 'base_unit': 'kg', 'unit_price': 7.9975}
+
+    def test_rate_price(self):
+        """A price per pound becomes a price per kg."""
+        columns = unit_price_columns({'item': 'Pork chops', 'price': 2.99, 'unit': 'lb'})
+        assert columns['base_unit'] == 'kg'
+        assert columns['unit_price'] == pytest.approx(6.5918, abs=0.0001)
+
+    def test_size_in_item_name_beats_each(self):
+        columns = unit_price_columns({'item': 'Maxwell House coffee 900 g', 'price': 9.99, 'unit': 'each'})
+        assert columns == {'quantity': 0.9, 'base_unit': 'kg', 'unit_price': 11.1}
+
+    def test_slash_sizes_from_flyers(self):
+        """Sizes like "300/400 g" are not count x size (that made shrimp $0.04/kg)."""
+        shrimp = unit_price_columns({'item': 'Argentine Shrimp', 'price': 5.0, 'unit': '300/400 g'})
+        assert shrimp == {'quantity': 0.3, 'base_unit': 'kg', 'unit_price': 16.6667}
+
+        potatoes = unit_price_columns({'item': 'Pommes de terre rouges', 'price': 4.98, 'unit': '3/5 lb'})
+        assert potatoes['quantity'] == pytest.approx(1.360777)
+
+    def test_implausible_size_in_item_name(self):
+        columns = unit_price_columns({'item': 'Rice 1000 kg', 'price': 9.99, 'unit': 'each'})
+        assert columns == {'quantity': 1.0, 'base_unit': 'each', 'unit_price': 9.99}
+
+    def test_each(self):
+        columns = unit_price_columns({'item': 'Cantaloupe', 'price': 2.5, 'unit': 'each'})
+        assert columns == {'quantity': 1.0, 'base_unit': 'each', 'unit_price': 2.5}
+
+    def test_unknown_size(self):
+        columns = unit_price_columns({'item': 'Assorted snacks', 'price': 3.0, 'unit': 'selected varieties'})
+        assert columns == {'quantity': None, 'base_unit': None, 'unit_price': None}
+
+    def test_missing_price(self):
+        columns = unit_price_columns({'item': 'Salmon', 'price': None, 'unit': 'kg'})
+        assert columns['base_unit'] == 'kg'
+        assert columns['unit_price'] is None
+
+    def test_item_size_ignores_words_starting_with_a_unit(self):
+        assert item_size('12 grain bread') is None
+        assert item_size('2 large eggs') is None
+        assert item_size('Cola 12 x 355 mL')[0] == pytest.approx(4.26)
+
+    def test_add_unit_prices_keeps_normalized_promotions(self):
+        normalized = {'item': 'Milk', 'price': 5.0, 'unit': '4 L', 'quantity': 4.0, 'base_unit': 'L', 'unit_price': 1.25}
+        raw = {'item': 'Milk', 'price': 5.0, 'unit': '4 L'}
+
+        result = add_unit_prices([normalized, raw])
+
+        assert result[0] is normalized
+        assert result[1] == normalized
+        assert 'unit_price' not in raw
@@ -0,0 +1,192 @@
+"""
+Unit tests for the out-of-process pipeline worker.
+"""
+
+import os
+import json
+import threading
+import pytest
+from unittest.mock import patch
+import app as app_module
+import worker
+from app import app, reset_promotion_index
+from scripts.job_runs import JobRuns
+
+
+@pytest.fixture
+def runs(tmp_path):
+    """Job queue in a temp dir, shared by the app and the worker for the test."""
+    runs = JobRuns(str(tmp_path / 'jobs.sqlite3'))
+    with patch.object(app_module, 'job_runs', runs):
+        yield runs
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config['TESTING'] = True
+    reset_promotion_index()
+    with app.test_client() as client:
+        yield client
+    reset_promotion_index()
+
+
+COMPLETED = {'completed': True, 'results': {'maxi': {'promotion_count': 1}}}
+PROMOTIONS = [{'item': 'Broccoli', 'price': 1.99, 'unit': 'each', 'discount': '', 'store': 'maxi'}]
+
+
+class TestRunWorker:
+    """Tests for claiming and running queued jobs."""
+
+    def test_queued_scrape_is_run_and_published(self, runs):
+        run_id = runs.enqueue('weekly_scrape', 'manual')
+
+        with patch('scripts.pipeline.runner.run_pipeline', return_value=COMPLETED) as mock_pipeline, \
+                patch.object(worker, 'load_all_promotions_from_files', return_value=PROMOTIONS), \
+                patch.object(worker, 'save_promotions_to_db') as mock_save:
+            stats = worker.run_worker(runs, once=True)
+
+        assert stats == {'succeeded': 1, 'failed': 0}
+        mock_pipeline.assert_called_once_with(worker.PIPELINE_CONFIG)
+        mock_save.assert_called_once_with(PROMOTIONS)
+        run = runs.get(run_id)
+        assert (run['status'], run['error']) == ('succeeded', None)
+        assert run['finished_at'] >= run['started_at']
+
+    @pytest.mark.parametrize('pipeline, error', [
+        ({'side_effect': RuntimeError('flipp down')}, 'flipp down'),
+        ({'return_value': {'completed': False, 'results': {}}}, 'Pipeline stopped early')
+    ])
+    def test_failed_scrape_is_recorded_and_not_published(self, runs, pipeline, error):
+        run_id = runs.enqueue('weekly_scrape', 'manual')
+
+        with patch('scripts.pipeline.runner.run_pipeline', **pipeline), \
+                patch.object(worker, 'save_promotions_to_db') as mock_save:
+            stats = worker.run_worker(runs, once=True)
+
+        assert stats == {'succeeded': 0, 'failed': 1}
+        assert mock_save.call_count == 0
+        run = runs.get(run_id)
+        assert (run['status'], run['error']) == ('failed', error)
+
+    def test_empty_queue(self, runs):
+        assert worker.run_worker(runs, once=True) == {'succeeded': 0, 'failed': 0}
+
+    def test_stop_ends_polling(self, runs):
+        stop = threading.Event()
+        stop.set()
+        assert worker.run_worker(runs, poll_interval=60, stop=stop) == {'succeeded': 0, 'failed': 0}
+
+    def test_two_workers_run_a_job_once(self, runs, tmp_path):
+        """A second worker on the same queue finds nothing while the first one runs the scrape."""
+        other_worker = JobRuns(runs.path)
+        runs.enqueue('weekly_scrape', 'manual')
+        seen = []
+
+        def run_pipeline(config):
+            seen.append(worker.run_worker(other_worker, once=True))
+            return COMPLETED
+
+        with patch('scripts.pipeline.runner.run_pipeline', side_effect=run_pipeline), \
+                patch.object(worker, 'load_all_promotions_from_files', return_value=PROMOTIONS), \
+                patch.object(worker, 'save_promotions_to_db'):
+            assert worker.run_worker(runs, once=True) == {'succeeded': 1, 'failed': 0}
+
+        assert seen == [{'succeeded': 0, 'failed': 0}]
+
+
+class TestApiAndWorker:
+    """Tests for the API queueing a scrape and reading the worker's results."""
+
+    def test_api_reads_promotions_published_by_worker(self, runs, client, tmp_path):
+        with patch.object(app_module, 'DB_PATH', str(tmp_path / 'promotions.json')), \
+                patch.object(app_module, 'PROMOTIONS_DIR', str(tmp_path / 'promotion_results')), \
+                patch.object(app_module, 'promotions_table', None), \
+                patch.object(app_module, 'scrapes_table', None), \
+                patch.object(app_module, 'db', None):
+            status_url = json.loads(client.post('/api/scrape').data)['status_url']
+            assert json.loads(client.get('/api/promotions').data)['count'] == 0
+
+            with patch('scripts.pipeline.runner.run_pipeline', return_value=COMPLETED), \
+                    patch.object(worker, 'load_all_promotions_from_files', return_value=PROMOTIONS):
+                worker.run_worker(runs, once=True)
+
+            assert json.loads(client.get(status_url).data)['status'] == 'succeeded'
+            data = json.loads(client.get('/api/promotions').data)
+            app_module.db.close()
+
+        assert data['count'] == 1
+        assert data['promotions'][0]['item'] == 'Broccoli'
+
+
+class TestPublish:
+    """Tests for save_promotions_to_db publishing while the API reads."""
+
+    @pytest.fixture
+    def database(self, tmp_path):
+        """The app's promotions database in a temp dir, opened on first use."""
+        path = str(tmp_path / 'promotions.json')
+        with patch.object(app_module, 'DB_PATH', path), \
+                patch.object(app_module, 'promotions_table', None), \
+                patch.object(app_module, 'scrapes_table', None), \
+                patch.object(app_module, 'db', None):
+            yield path
+            if app_module.db is not None:
+                app_module.db.close()
+
+    def test_reads_while_publishing_see_whole_scrapes(self, database):
+        """A reader never fails or sees a mix while another handle publishes snapshots."""
+        from scripts.promotion_store import write_snapshot
+        week_1 = [dict(PROMOTIONS[0], item=f'Week 1 item {n}') for n in range(300)]
+        week_2 = [dict(PROMOTIONS[0], item=f'Week 2 item {n}') for n in range(200)]
+        app_module.save_promotions_to_db(week_1)
+        done = threading.Event()
+
+        def publish():
+            # Another process publishing: its own snapshots of the same file
+            try:
+                for n in range(40):
+                    scrape_id = f'2026-10-19T01:00:{n:02d}'
+                    rows = [dict(promo, scrape_id=scrape_id) for promo in (week_2 if n % 2 == 0 else week_1)]
+                    write_snapshot(database, rows, [{'scrape_id': scrape_id, 'timestamp': scrape_id}])
+            finally:
+                done.set()
+
+        seen = set()
+        writer = threading.Thread(target=publish)
+        writer.start()
+        while not done.is_set():
+            seen.add(len(app_module.load_all_promotions()))
+        writer.join()
+
+        assert seen <= {200, 300}
+        assert len(app_module.load_all_promotions()) == 300  # The last snapshot is picked up
+
+    def test_publish_keeps_scrape_history(self, database):
+        app_module.save_promotions_to_db(PROMOTIONS)
+        app_module.save_promotions_to_db(PROMOTIONS * 2)
+
+        _, scrapes_table = app_module.get_tables()
+        assert [scrape['promotion_count'] for scrape in scrapes_table.all()] == [1, 2]
+        assert len(app_module.load_all_promotions()) == 2
+        assert [name for name in os.listdir(os.path.dirname(database))] == ['promotions.json']
+
+    def test_populate_script_stores_the_same_rows(self, database, tmp_path):
+        """populate_db.py enriches promotions exactly like a published scrape."""
+        import populate_db
+        promotions = [dict(PROMOTIONS[0], item='Cheddar 400 g', price=5.0, discount='Save $1.50')]
+        app_module.save_promotions_to_db(promotions)
+        published = app_module.load_all_promotions()
+
+        script_path = str(tmp_path / 'populated.json')
+        with patch.object(populate_db, 'DB_PATH', script_path):
+            populate_db.save_to_db(promotions)
+        from tinydb import TinyDB
+        with TinyDB(script_path) as script_db:
+            populated = script_db.table('promotions').all()
+
+        def without_scrape_id(rows):
+            return [{k: v for k, v in row.items() if k != 'scrape_id'} for row in rows]
+
+        assert without_scrape_id(populated) == without_scrape_id(published)
+        assert 'scrape_id' in populated[0] and len(populated[0]) > len(promotions[0]) + 1
@@ -0,0 +1,170 @@
+"""
+Pipeline worker: runs queued scrape jobs outside the API process.
+
+The API (app.py) only queues jobs in data/jobs.sqlite3 (see scripts/job_runs.py)
+and reads results. This process claims the queued runs, runs the flyer
+pipeline (Chromium, flyer images, Vision calls) and publishes the promotions to
+the TinyDB store, where the API picks them up on its next request. A slow or
+crashing scrape never takes memory or the GIL from request handling.
+
+Usage (from the backend directory):
+    python worker.py            # Run jobs as they are queued, until SIGTERM or Ctrl+C
+    python worker.py --once     # Run what is queued, then exit
+
+Several workers can share the queue: each run is claimed by exactly one of
+them, and a run whose worker died is queued again (see scripts/job_runs.py).
+"""
+
+import os
+import sys
+import signal
+import argparse
+import threading
+from datetime import datetime
+from scripts.pipeline import make_config
+from app import (
+    PROMOTIONS_DIR, FLYER_IMAGES_DIR, SCRAPE_JOB,
+    get_job_runs, load_all_promotions_from_files, save_promotions_to_db
+)
+
+NUM_PAGES_PER_STORE = 2
+PAGES_PER_REQUEST = 2  # Flyer pages packed into each Vision API call
+RESUME_ANALYSIS = True  # Reuse per-page checkpoints of unchanged flyer pages
+EXCLUDE_STORES = ['super-c-direct']  # Old test folder
+POLL_SECONDS = 5  # Wait between checks of an empty queue
+
+# Flyer pipeline settings (see scripts/pipeline/config.py)
+PIPELINE_CONFIG = make_config(
+    num_pages=NUM_PAGES_PER_STORE,
+    exclude_stores=EXCLUDE_STORES,
+    flyer_images_dir=FLYER_IMAGES_DIR,
+    output_dir=PROMOTIONS_DIR,
+    pages_per_request=PAGES_PER_REQUEST,
+    resume=RESUME_ANALYSIS,
+    executors={'download': 'threaded', 'analyze': 'threaded'}
+)
+
+
+def run_scrape(run):
+    """
+    Scrape and analyze flyers, then publish the promotions to the database.
+
+    Args:
+        run: Claimed run (dict from JobRuns.claim)
+
+    Returns:
+        Error message, or None if the promotions were published
+    """
+    from scripts.pipeline import run_pipeline
+
+    # Steps 1-4: Discover, extract, download and analyze flyers
+    summary = run_pipeline(PIPELINE_CONFIG)
+    if not summary['completed']:
+        print("\n✗ Pipeline stopped early, keeping the previous promotions")
+        return "Pipeline stopped early"
+
+    results = summary['results']
+    total_promotions = sum(r['promotion_count'] for r in results.values())
+    print(f"✓ Extracted {total_promotions} promotions from {len(results)} stores")
+
+    # Step 5: Publish to the database read by the API
+    print("\n[5/5] Saving promotions to database...")
+    promotions = load_all_promotions_from_files()
+    save_promotions_to_db(promotions)
+    print(f"✓ Saved {len(promotions)} promotions to database")
+    return None
+
+
+# Job name -> function running a claimed run
+JOB_HANDLERS = {
+    SCRAPE_JOB: run_scrape
+}
+
+
+def execute(runs, run):
+    """
+    Run a claimed job while keeping its heartbeat alive, and record the outcome.
+
+    Returns:
+        True if the run succeeded
+    """
+    print("\n" + "="*60)
+    print(f"[{datetime.now()}] Running {run['job']} (run {run['id']}, {run['trigger']}, attempt {run['attempts']})...")
+    print("="*60)
+
+    error = None
+    stop_heartbeat = runs.keep_alive(run['id'])
+    try:
+        error = JOB_HANDLERS[run['job']](run)
+    except Exception as e:
+        error = str(e)
+        print(f"\n✗ Error during {run['job']}: {e}")
+    finally:
+        stop_heartbeat()
+        if not runs.finish(run['id'], 'failed' if error else 'succeeded', error):
+            print(f"⚠ Run {run['id']} was requeued or taken over while running, its outcome is not recorded")
+
+    print("\n" + "="*60)
+    if error:
+        print(f"[{datetime.now()}] Run {run['id']} failed: {error}")
+    else:
+        print(f"[{datetime.now()}] Run {run['id']} completed successfully!")
+    print("="*60 + "\n")
+    return error is None
+
+
+def run_worker(runs=None, once=False, poll_interval=POLL_SECONDS, stop=None):
+    """
+    Claim and run queued jobs, one at a time.
+
+    Args:
+        runs: JobRuns queue (defaults to the one app.py queues into)
+        once: Return when the queue is empty instead of waiting for jobs
+        poll_interval: Seconds between checks of an empty queue
+        stop: threading.Event that stops the worker after the current job
+
+    Returns:
+        Dict with the number of runs succeeded and failed
+    """
+    runs = runs or get_job_runs()
+    stop = stop or threading.Event()
+    stats = {'succeeded': 0, 'failed': 0}
+
+    while not stop.is_set():
+        run = runs.claim(list(JOB_HANDLERS))
+        if run is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+
+        if execute(runs, run):
+            stats['succeeded'] += 1
+        else:
+            stats['failed'] += 1
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued scrape jobs outside the API process")
+    parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS, help=f'Seconds between queue checks (default: {POLL_SECONDS})')
+    args = parser.parse_args()
+
+    os.makedirs(PROMOTIONS_DIR, exist_ok=True)
+    os.makedirs(FLYER_IMAGES_DIR, exist_ok=True)
+
+    # Finish the current job on SIGTERM/Ctrl+C, then exit
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    print(f"✓ Pipeline worker started in process {os.getpid()} (jobs: {', '.join(JOB_HANDLERS)})")
+    stats = run_worker(once=args.once, poll_interval=args.poll, stop=stop)
+    print(f"✓ Worker stopped ({stats['succeeded']} succeeded, {stats['failed']} failed)")
+    return 0 if stats['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -29,9 +29,17 @@ if [ $IMPORT_STATUS -ne 0 ]; then
     exit 1
 fi
 
+# Start the pipeline worker: POST /api/scrape only queues a run, the worker runs it
+echo ""
+echo "Step 2: Starting pipeline worker..."
+echo "----------------------------------------------------------------------"
+python worker.py &
+WORKER_PID=$!
+trap 'kill $WORKER_PID 2>/dev/null; wait $WORKER_PID 2>/dev/null' EXIT
+
 # Start the backend server
 echo ""
-echo "Step 2: Starting backend server..."
+echo "Step 3: Starting backend server..."
 echo "----------------------------------------------------------------------"
 echo ""
 python app.py